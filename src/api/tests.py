@@ -14,13 +14,19 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+import gzip
+import io
 import json
 import logging
 import os
+import struct
 import time
 import tempfile
+import urllib.parse
+import zipfile
 from xml.dom import minidom
 
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase
 from libsbml import SBMLReader
 
@@ -349,8 +355,8 @@ class ApiTest(TestCase):
     
       
       response = self.client.get('/api/get_network')
-      self._expect_response (response, True)
-      self.assertTrue(len (response.json()["network"]) > 0)
+      j = self._expect_response (response, True)
+      self.assertTrue(len (j["network"]) > 0)
       
     
       response = self.client.post('/api/store_filter', json.dumps({'species': ["x","y","a"], 'reaction': ["x","y","a"], 'enzymes': ["x","y","x","y"]}),content_type="application/json")
@@ -362,10 +368,799 @@ class ApiTest(TestCase):
     
       
       response = self.client.get('/api/get_network')
+      j = self._expect_response (response, True)
+      self.assertTrue(len (j["network"]) > 0)
+      
+      
+  def test_get_network_stream (self):
+    d = tempfile.TemporaryDirectory()
+    with self.settings(STORAGE=d.name):
+      with open("test/gene-filter-example.xml") as fp:
+        response = self.client.post('/gemtract/', {"custom-model": fp})
+        self.assertEqual(response.status_code, 302)
+      
+      response = self.client.get('/api/get_network')
+      self.assertTrue (response.streaming)
+      self.assertFalse (response.has_header ("Content-Encoding"))
+      j = self._expect_response (response, True)
+      self.assertEqual (len (j["network"]["species"]), 3)
+      self.assertEqual (len (j["network"]["reactions"]), 3)
+      self.assertEqual (j["fluxes"], {})
+      
+      response = self.client.get('/api/get_network', HTTP_ACCEPT_ENCODING="gzip, deflate")
+      self.assertEqual (response["Content-Encoding"], "gzip")
+      self.assertEqual (self._expect_response (response, True)["network"]["species"], j["network"]["species"])
+      
+      with self.settings(GZIP_NETWORK=False):
+        response = self.client.get('/api/get_network', HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertFalse (response.has_header ("Content-Encoding"))
+        self.assertEqual (self._expect_response (response, True)["network"]["species"], j["network"]["species"])
+      
+      response = self.client.get('/api/get_network?format=columnar')
+      c = self._expect_response (response, True)
+      self.assertEqual (c["network"]["species"]["id"], [s["id"] for s in j["network"]["species"]])
+      self.assertEqual (c["network"]["reactions"]["id"], [r["id"] for r in j["network"]["reactions"]])
+      
+      response = self.client.get('/api/get_network?format=bin')
+      self.assertEqual (response["Content-Type"], "application/octet-stream")
+      b = b"".join (response.streaming_content)
+      self.assertEqual (b[:4], b"GEMN")
+      self.assertEqual (struct.unpack_from ("<4I", b, 8), (3, 3, len (j["network"]["enzs"]), len (j["network"]["enzc"])))
+      # the extra information is the JSON document at the very end
+      extra = json.loads (b[b.rindex (b'{"filter"'):].decode ("utf-8"))
+      self.assertEqual (extra["filter"], j["filter"])
+      self.assertEqual (extra["fluxes"], {})
+      
+  def test_get_network_fluxes (self):
+    d = tempfile.TemporaryDirectory()
+    with self.settings(STORAGE=d.name):
+      with open("test/gene-filter-example.xml") as fp:
+        response = self.client.post('/gemtract/', {"custom-model": fp})
+        self.assertEqual(response.status_code, 302)
+      
+      response = self.client.post('/gemtract/filter', {"fbresults": SimpleUploadedFile ("fluxes.csv", b"not a flux")})
+      self.assertEqual(response.status_code, 200)
+      self.assertIn ("Cannot integrate your flux balance results", response.content.decode ("utf-8"))
+      
+      response = self.client.post('/gemtract/filter', {"fbresults": SimpleUploadedFile ("fluxes.csv", b"reaction,flux,max\nr1,0,2\nr2,-1.5,\nr9,1,1\n")})
+      self.assertEqual(response.status_code, 200)
+      
+      j = self._expect_response (self.client.get('/api/get_network'), True)
+      self.assertEqual (j["fluxes"], {"r1": 0, "r2": -1.5, "r9": 1})
+      self.assertEqual (j["flux_columns"], ["flux", "max"])
+      j = self._expect_response (self.client.get('/api/get_network?flux_column=max'), True)
+      self.assertEqual (j["fluxes"], {"r1": 2, "r9": 1})
+      self._expect_response (self.client.get('/api/get_network?flux_column=min'), False)
+      
+      response = self.client.get('/api/get_network?format=bin')
+      b = b"".join (response.streaming_content)
+      extra = json.loads (b[b.rindex (b'{"filter"'):].decode ("utf-8"))
+      self.assertEqual (extra["fluxes"], {"r9": 1})
+      self.assertEqual (extra["flux_columns"], ["flux", "max"])
+      
+      j = self._expect_response (self.client.get('/api/get_table?entity=reactions&sort=flux'), True)
+      self.assertTrue (j["fluxes"])
+      self.assertEqual ([row["flux"] for row in j["rows"]], [-1.5, 0, None])
+      
+  def test_get_network_etag (self):
+    d = tempfile.TemporaryDirectory()
+    with self.settings(STORAGE=d.name):
+      with open("test/gene-filter-example.xml") as fp:
+        response = self.client.post('/gemtract/', {"custom-model": fp})
+        self.assertEqual(response.status_code, 302)
+      
+      response = self.client.get('/api/get_network?format=bin')
+      self.assertEqual(response.status_code, 200)
+      self.assertEqual(response["Cache-Control"], "no-store")
+      etag = response["ETag"]
+      b"".join (response.streaming_content)
+      
+      response = self.client.get('/api/get_network?format=bin', HTTP_IF_NONE_MATCH=etag)
+      self.assertEqual(response.status_code, 304)
+      self.assertEqual(response["ETag"], etag)
+      
+      # different encodings have different tags
+      response = self.client.get('/api/get_network?format=columnar', HTTP_IF_NONE_MATCH=etag)
+      self.assertEqual(response.status_code, 200)
+      self.assertNotEqual(response["ETag"], etag)
+      b"".join (response.streaming_content)
+      response = self.client.get('/api/get_network?format=bin', HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT_ENCODING="gzip")
+      self.assertEqual(response.status_code, 200)
+      self.assertNotEqual(response["ETag"], etag)
+      b"".join (response.streaming_content)
+      
+      # changing the filter changes the tag
+      response = self.client.post('/api/store_filter', json.dumps({'species': ["a"], 'reaction': [], 'enzymes': [], 'enzyme_complexes': []}),content_type="application/json")
       self._expect_response (response, True)
-      self.assertTrue(len (response.json()["network"]) > 0)
+      response = self.client.get('/api/get_network?format=bin', HTTP_IF_NONE_MATCH=etag)
+      self.assertEqual(response.status_code, 200)
+      self.assertNotEqual(response["ETag"], etag)
+      etag = response["ETag"]
+      b"".join (response.streaming_content)
+      response = self.client.get('/api/get_network?format=bin', HTTP_IF_NONE_MATCH=etag)
+      self.assertEqual(response.status_code, 304)
+      
+      # changing the model changes the tag
+      with open("test/gene-filter-example-2.xml") as fp:
+        response = self.client.post('/gemtract/', {"custom-model": fp})
+        self.assertEqual(response.status_code, 302)
+      response = self.client.post('/api/store_filter', json.dumps({'species': ["a"], 'reaction': [], 'enzymes': [], 'enzyme_complexes': []}),content_type="application/json")
+      self._expect_response (response, True)
+      response = self.client.get('/api/get_network?format=bin', HTTP_IF_NONE_MATCH=etag)
+      self.assertEqual(response.status_code, 200)
+      b"".join (response.streaming_content)
       
+  def test_get_table (self):
+    d = tempfile.TemporaryDirectory()
+    with self.settings(STORAGE=d.name):
+      response = self.client.get('/api/get_table?entity=species')
+      self.assertEqual(response.status_code, 302)
+      
+      with open("test/gene-filter-example.xml") as fp:
+        response = self.client.post('/gemtract/', {"custom-model": fp})
+        self.assertEqual(response.status_code, 302)
+      
+      j = self._expect_response (self.client.get('/api/get_table?entity=species&limit=2'), True)
+      self.assertEqual (j["entity"], "species")
+      self.assertEqual (j["matches"], j["total"])
+      self.assertEqual (len (j["rows"]), 2)
+      self.assertEqual ([row["id"] for row in j["rows"]], ["a", "b"])
+      self.assertFalse (j["fluxes"])
+      
+      response = self.client.post('/api/store_filter', json.dumps({'species': ["a"], 'reaction': [], 'enzymes': [], 'enzyme_complexes': []}),content_type="application/json")
+      self._expect_response (response, True)
+      j = self._expect_response (self.client.get('/api/get_table?entity=species&state=excluded'), True)
+      self.assertEqual (j["matches"], 1)
+      self.assertTrue (j["rows"][0]["excluded"])
+      j = self._expect_response (self.client.get('/api/get_table?entity=species&state=included&search=A'), True)
+      self.assertEqual (j["matches"], 0)
+      
+      j = self._expect_response (self.client.get('/api/get_table?entity=reactions&sort=id&order=desc&offset=1&limit=1'), True)
+      self.assertEqual (j["offset"], 1)
+      self.assertEqual (len (j["rows"]), 1)
+      self.assertIn ("flux", j["rows"][0])
+      
+      self._expect_response (self.client.get('/api/get_table?entity=nothing'), False)
+      self._expect_response (self.client.get('/api/get_table?entity=species&sort=flux'), False)
+      self._expect_response (self.client.get('/api/get_table?entity=species&limit=lots'), False)
+      
+      with self.settings(MAX_ENTITIES_FILTER=2):
+        j = self._expect_response (self.client.get('/api/get_network'), False)
+        self.assertTrue (j["too_big"])
+        self.assertEqual (j["filter"][Constants.SESSION_FILTER_SPECIES], ["a"])
+      
+  def test_consistency (self):
+    d = tempfile.TemporaryDirectory()
+    with self.settings(STORAGE=d.name):
+      response = self.client.post('/api/consistency', json.dumps({'species': [], 'reaction': [], 'enzymes': [], 'enzyme_complexes': []}),content_type="application/json")
+      self.assertEqual(response.status_code, 302)
+      
+      with open("test/gene-filter-example.xml") as fp:
+        response = self.client.post('/gemtract/', {"custom-model": fp})
+        self.assertEqual(response.status_code, 302)
+      
+      j = self._expect_response (self.client.post('/api/consistency', json.dumps({'species': ["a"], 'reaction': [], 'enzymes': [], 'enzyme_complexes': []}),content_type="application/json"), True)
+      self.assertTrue (j["complete"])
+      self.assertEqual (j["filter"][Constants.SESSION_FILTER_SPECIES], ["a"])
+      self.assertEqual (j["inconsistent"]["reactions"], {"r1": {"consumed_removed": True}})
+      self.assertEqual (j["counts"]["reactions"], 1)
+      
+      # the filter is stored in the session
+      response = self.client.get('/api/get_session_data')
+      self.assertEqual (self._expect_response (response, True)["data"]["session"][Constants.SESSION_FILTER_SPECIES], ["a"])
       
+      # only changes are reported
+      j = self._expect_response (self.client.post('/api/consistency', json.dumps({'species': [], 'reaction': ["r2"], 'revision': j["revision"]}),content_type="application/json"), True)
+      self.assertFalse (j["complete"])
+      self.assertEqual (j["inconsistent"]["reactions"], {"r1": {}})
+      self.assertEqual (j["counts"]["reactions"], 0)
+      
+      # unknown revisions get the whole picture
+      j = self._expect_response (self.client.post('/api/consistency', json.dumps({'revision': "outdated"}),content_type="application/json"), True)
+      self.assertTrue (j["complete"])
+      self.assertEqual (j["filter"][Constants.SESSION_FILTER_REACTION], ["r2"])
+      self.assertEqual (j["inconsistent"]["reactions"], {})
+      
+      self._expect_response (self.client.post('/api/consistency', "no json",content_type="application/json"), False)
+      
+  def test_execute_fluxes (self):
+    with open("test/gene-filter-example.xml") as f:
+      model=f.read().replace('\n', '')
+    
+    response = self.client.post('/api/execute', json.dumps({
+        "export": {
+          "network_type":"rn",
+          "network_format":"csv"
+        },
+        "file": model
+        }),content_type="application/json")
+    self.assertEqual(response.status_code, 200)
+    c = b"".join (response.streaming_content).decode("utf-8")
+    self.assertIn ('"r1","r1"', c)
+    self.assertIn ('"r2","r1"', c)
+    
+    # the reversible r1 runs forwards only, so it does not link to itself anymore
+    response = self.client.post('/api/execute', json.dumps({
+        "export": {
+          "network_type":"rn",
+          "network_format":"csv"
+        },
+        "fluxes": {"r1": 1, "r2": 1, "r3": 1},
+        "file": model
+        }),content_type="application/json")
+    self.assertEqual(response.status_code, 200)
+    c = b"".join (response.streaming_content).decode("utf-8")
+    self.assertNotIn ('"r1","r1"', c)
+    self.assertIn ('"r2","r1"', c)
+    
+    # r1 does not carry any flux
+    response = self.client.post('/api/execute', json.dumps({
+        "export": {
+          "network_type":"rn",
+          "network_format":"csv",
+          "flux_trimming": True,
+          "flux_epsilon": 0.01
+        },
+        "fluxes": {"r1": 0.001, "r2": -1, "r3": "unknown"},
+        "file": model
+        }),content_type="application/json")
+    self.assertEqual(response.status_code, 200)
+    self.assertNotIn ("r1", b"".join (response.streaming_content).decode("utf-8"))
+    
+    response = self.client.post('/api/execute', json.dumps({
+        "export": {
+          "network_type":"rn",
+          "network_format":"csv",
+          "flux_trimming": True
+        },
+        "file": model
+        }),content_type="application/json")
+    self.assertEqual(response.status_code, 400)
+    
+    response = self.client.post('/api/execute', json.dumps({
+        "export": {
+          "network_type":"rn",
+          "network_format":"csv",
+          "flux_epsilon": -1
+        },
+        "fluxes": {"r1": 0},
+        "file": model
+        }),content_type="application/json")
+    self.assertEqual(response.status_code, 400)
+    
+  def test_execute_reversibility_from_bounds (self):
+    with open("test/fbc-bounds-example.xml") as f:
+      model=f.read()
+    
+    response = self.client.post('/api/execute', json.dumps({
+        "export": {
+          "network_type":"rn",
+          "network_format":"csv"
+        },
+        "file": model
+        }),content_type="application/json")
+    self.assertEqual(response.status_code, 200)
+    content = b"".join (response.streaming_content)
+    links = content.decode("utf-8").strip().count ("\n")
+    self.assertIn ('"r1","r1"', content.decode("utf-8"))
+    
+    response = self.client.post('/api/execute', json.dumps({
+        "export": {
+          "network_type":"rn",
+          "network_format":"csv",
+          "reversibility_from_bounds": True
+        },
+        "file": model
+        }),content_type="application/json")
+    self.assertEqual(response.status_code, 200)
+    c = b"".join (response.streaming_content).decode("utf-8")
+    self.assertNotIn ('"r1","r1"', c)
+    self.assertLess (c.strip().count ("\n"), links)
+    
+  def test_execute_stream (self):
+    with open("test/gene-filter-example.xml") as f:
+      model=f.read()
+    
+    for network_type in ["en", "rn", "mn"]:
+      for network_format in ["dot", "graphml", "gml", "csv"]:
+        response = self.client.post('/api/execute', json.dumps({
+            "export": {
+              "network_type": network_type,
+              "network_format": network_format
+            },
+            "file": model
+            }),content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue (response.streaming)
+        self.assertEqual(response["Content-Disposition"], "attachment; filename=gemtracted-model." + network_format)
+        c = b"".join (response.streaming_content).decode("utf-8")
+        self.assertGreater (c.count ("\n"), 1, msg="empty " + network_type + " " + network_format)
+        if network_type != "en" and network_format == "csv":
+          self.assertIn ("r1", c)
+    
+    response = self.client.post('/api/execute', json.dumps({
+        "export": {
+          "network_type": "rn",
+          "network_format": "npz"
+        },
+        "file": model
+        }),content_type="application/json")
+    self.assertEqual(response.status_code, 200)
+    self.assertTrue (response.streaming)
+    self.assertEqual(response["Content-Type"], "application/octet-stream")
+    self.assertEqual(response["Content-Disposition"], "attachment; filename=gemtracted-model.npz")
+    with zipfile.ZipFile (io.BytesIO (b"".join (response.streaming_content))) as archive:
+      self.assertEqual (sorted (archive.namelist ()), ["ids.npy", "indices.npy", "indptr.npy", "names.npy", "type_names.npy", "types.npy"])
+      self.assertIn ("r1".encode ("utf-32-le"), archive.read ("ids.npy"))
+    
+    response = self.client.post('/api/execute', json.dumps({
+        "export": {
+          "network_type": "mn",
+          "network_format": "smatrix"
+        },
+        "file": model
+        }),content_type="application/json")
+    self.assertEqual(response.status_code, 200)
+    self.assertEqual(response["Content-Disposition"], "attachment; filename=gemtracted-model.smatrix.npz")
+    with zipfile.ZipFile (io.BytesIO (b"".join (response.streaming_content))) as archive:
+      for name in ["format", "shape", "row", "col", "data", "species", "reactions", "lower_bound", "upper_bound"]:
+        self.assertIn (name + ".npy", archive.namelist ())
+    
+    response = self.client.post('/api/execute', json.dumps({
+        "export": {
+          "network_type": "en",
+          "network_format": "smatrix"
+        },
+        "file": model
+        }),content_type="application/json")
+    self.assertEqual(response.status_code, 400)
+    
+    response = self.client.post('/api/execute', json.dumps({
+        "export": {
+          "network_type": "xn",
+          "network_format": "dot"
+        },
+        "file": model
+        }),content_type="application/json")
+    self.assertEqual(response.status_code, 400)
+    
+  def test_execute_compression (self):
+    with open("test/gene-filter-example.xml") as f:
+      model=f.read()
+    
+    response = self.client.post('/api/execute', json.dumps({
+        "export": {
+          "network_type": "rn",
+          "network_format": "csv",
+          "compression": "gzip"
+        },
+        "file": model
+        }),content_type="application/json")
+    self.assertEqual(response.status_code, 200)
+    self.assertEqual(response["Content-Type"], "application/gzip")
+    self.assertEqual(response["Content-Disposition"], "attachment; filename=gemtracted-model.csv.gz")
+    self.assertIn ("r1", gzip.decompress (b"".join (response.streaming_content)).decode("utf-8"))
+    
+    for network_type in ["en", "mn"]:
+      response = self.client.post('/api/execute', json.dumps({
+          "export": {
+            "network_type": network_type,
+            "network_format": "sbml",
+            "compression": "zip"
+          },
+          "file": model
+          }),content_type="application/json")
+      self.assertEqual(response.status_code, 200)
+      self.assertEqual(response["Content-Type"], "application/zip")
+      self.assertEqual(response["Content-Disposition"], "attachment; filename=gemtracted-model.sbml.zip")
+      with zipfile.ZipFile (io.BytesIO (b"".join (response.streaming_content))) as archive:
+        self.assertEqual (archive.namelist (), ["gemtracted-model.sbml"])
+        self.assertIsNotNone (SBMLReader().readSBMLFromString(archive.read ("gemtracted-model.sbml").decode ("utf-8")).getModel ())
+    
+    response = self.client.post('/api/execute', json.dumps({
+        "export": {
+          "network_type": "rn",
+          "network_format": "csv",
+          "compression": "rar"
+        },
+        "file": model
+        }),content_type="application/json")
+    self.assertEqual(response.status_code, 400)
+    
+  def test_execute_bundle (self):
+    with open("test/gene-filter-example.xml") as f:
+      model=f.read()
+    
+    response = self.client.post('/api/execute', json.dumps({
+        "export": {
+          "targets": [
+            {"network_type":"en", "network_format":"sbml"},
+            {"network_type":"rn", "network_format":"csv"},
+            {"network_type":"mn", "network_format":"graphml"},
+            {"network_type":"mn", "network_format":"sbml"},
+          ],
+        },
+        "filter": {
+          "reactions": ["r3"],
+        },
+        "file": model
+        }),content_type="application/json")
+    self.assertEqual(response.status_code, 200)
+    self.assertEqual(response["Content-Type"], "application/zip")
+    self.assertEqual(response["Content-Disposition"], "attachment; filename=gemtracted-model.zip")
+    with zipfile.ZipFile (io.BytesIO (b"".join (response.streaming_content))) as archive:
+      self.assertEqual (sorted (archive.namelist ()), ["gemtracted-model-EnzymeNetwork.sbml", "gemtracted-model-MetabolicNetwork.graphml", "gemtracted-model-MetabolicNetwork.sbml", "gemtracted-model-ReactionNetwork.csv"])
+      valid, sbml = self._valid_sbml (archive.read ("gemtracted-model-MetabolicNetwork.sbml"))
+      self.assertTrue (valid)
+      self.assertIsNone (sbml.getModel ().getReaction ("r3"))
+      self.assertNotIn (b"r3", archive.read ("gemtracted-model-ReactionNetwork.csv"))
+    
+    for targets in [[], "en", [{"network_type":"en"}], [{"network_type":"en", "network_format":"pdf"}]]:
+      response = self.client.post('/api/execute', json.dumps({
+          "export": {
+            "targets": targets,
+          },
+          "file": model
+          }),content_type="application/json")
+      self.assertEqual(response.status_code, 400)
+
+  def test_execute_cache (self):
+    with open("test/gene-filter-example.xml") as f:
+      model=f.read()
+    
+    d = tempfile.TemporaryDirectory()
+    with self.settings(STORAGE=d.name):
+      def execute (export, species):
+        response = self.client.post('/api/execute', json.dumps({
+            "export": export,
+            "filter": {
+              "species": species,
+            },
+            "file": model
+            }),content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join (response.streaming_content)
+      
+      def stats ():
+        response = self.client.post('/api/status', json.dumps({}),content_type="application/json")
+        return response.json()["cache"]["results"]
+      
+      before = stats ()
+      export = {"network_type": "rn", "network_format": "csv", "compression": "gzip"}
+      response, first = execute (export, ["a", "b"])
+      self.assertEqual (stats ()["misses"], before["misses"] + 1)
+      self.assertEqual (stats ()["nfiles"], 1)
+      # the order and duplicates of the filters do not matter
+      response, second = execute (export, ["b", "a", "b"])
+      self.assertEqual (first, second)
+      self.assertEqual(response["Content-Type"], "application/gzip")
+      self.assertEqual(response["Content-Disposition"], "attachment; filename=gemtracted-model.csv.gz")
+      self.assertEqual (stats ()["hits"], before["hits"] + 1)
+      
+      # other jobs are not served from the cache
+      response, other = execute (export, ["a"])
+      self.assertNotEqual (first, other)
+      response, other = execute ({"network_type": "rn", "network_format": "csv"}, ["a", "b"])
+      self.assertEqual (gzip.decompress (first), other)
+      self.assertEqual (stats ()["nfiles"], 3)
+      self.assertEqual (stats ()["hits"], before["hits"] + 1)
+      
+      # bundles and trimmed models
+      for export in [{"targets": [{"network_type":"en", "network_format":"sbml"}, {"network_type":"rn", "network_format":"csv"}]}, {"network_type": "mn", "network_format": "sbml"}]:
+        response, first = execute (export, ["a"])
+        response, second = execute (export, ["a"])
+        self.assertEqual (first, second)
+      self.assertEqual (stats ()["hits"], before["hits"] + 3)
+      
+      # a disabled cache neither serves nor stores results
+      with self.settings(RESULT_CACHE_SIZE=0):
+        response, other = execute ({"network_type": "rn", "network_format": "csv"}, ["a", "b"])
+        response, other = execute ({"network_type": "rn", "network_format": "gml"}, ["a", "b"])
+        self.assertEqual (stats ()["hits"], 0)
+        self.assertEqual (stats ()["max_size"], 0)
+        self.assertEqual (stats ()["nfiles"], 5)
+
+  def test_execute_malformed (self):
+    with open("test/gene-filter-example.xml") as f:
+      model=f.read()
+    for data in [{"export": "en"}, {"export": None}, {"export": {"network_type":"en", "network_format":"csv"}, "filter": ["a"]}, {"export": {"network_type":"en", "network_format":"csv"}, "filter": 1}]:
+      response = self.client.post('/api/execute', json.dumps(dict (data, file = model)),content_type="application/json")
+      self.assertEqual(response.status_code, 400)
+      response = self.client.post('/api/batch', json.dumps({"jobs": [data], "file": model}),content_type="application/json")
+      self.assertEqual(response.status_code, 200)
+      with zipfile.ZipFile (io.BytesIO (b"".join (response.streaming_content))) as archive:
+        self.assertEqual (json.loads (archive.read ("status.json"))["jobs"][0]["status"], "failed")
+    response = self.client.post('/api/diff', json.dumps({"file": model, "other": {"export": "en"}}),content_type="application/json")
+    self.assertEqual(response.status_code, 400)
+
+  def test_execute_submission (self):
+    with open("test/gene-filter-example.xml", "rb") as f:
+      model=f.read()
+    job = {"export": {"network_type": "rn", "network_format": "csv"}, "filter": {"reactions": ["r1"]}}
+    
+    d = tempfile.TemporaryDirectory()
+    with self.settings(STORAGE=d.name):
+      def content (response):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        return b"".join (response.streaming_content)
+      
+      expected = content (self.client.post('/api/execute', json.dumps(dict (job, file = model.decode ("utf-8"))),content_type="application/json"))
+      
+      # multipart, the job may be a field or a file
+      for compress in [lambda m: m, gzip.compress]:
+        response = self.client.post('/api/execute', {"file": SimpleUploadedFile ("model.xml", compress (model)), "job": json.dumps (job)})
+        self.assertEqual (content (response), expected)
+        response = self.client.post('/api/execute', {"file": SimpleUploadedFile ("model.xml", compress (model)), "job": SimpleUploadedFile ("job.json", json.dumps (job).encode ("utf-8"))})
+        self.assertEqual (content (response), expected)
+      
+      # raw bodies
+      url = '/api/execute?job=' + urllib.parse.quote (json.dumps (job))
+      self.assertEqual (content (self.client.post(url, model, content_type="application/xml")), expected)
+      self.assertEqual (content (self.client.post(url, gzip.compress (model), content_type="application/gzip")), expected)
+      
+      # the cache is shared among all kinds of submissions
+      response = self.client.post('/api/status', json.dumps({}),content_type="application/json")
+      self.assertEqual (response.json()["cache"]["results"]["nfiles"], 1)
+      
+      # errors
+      response = self.client.post('/api/execute', model, content_type="application/xml")
+      self.assertEqual(response.status_code, 400)
+      self.assertIn ("missing the job", response.content.decode("utf-8"))
+      response = self.client.post('/api/execute?job=[', model, content_type="application/xml")
+      self.assertEqual(response.status_code, 400)
+      response = self.client.post('/api/execute?job=' + urllib.parse.quote (json.dumps ({"filter": {}})), model, content_type="application/xml")
+      self.assertEqual(response.status_code, 400)
+      self.assertIn ("export", response.content.decode("utf-8"))
+      response = self.client.post('/api/execute', {"job": json.dumps (job)})
+      self.assertEqual(response.status_code, 400)
+      response = self.client.post(url, gzip.compress (model)[:100], content_type="application/gzip")
+      self.assertEqual(response.status_code, 400)
+      response = self.client.post(url, b"<sbml", content_type="application/xml")
+      self.assertEqual(response.status_code, 400)
+      response = self.client.post('/api/execute', json.dumps(dict (job, file = 1)),content_type="application/json")
+      self.assertEqual(response.status_code, 400)
+      with self.settings(MAX_MODEL_SIZE=len (model) - 1):
+        response = self.client.post(url, gzip.compress (model), content_type="application/gzip")
+        self.assertEqual(response.status_code, 413)
+        response = self.client.post('/api/execute', json.dumps(dict (job, file = model.decode ("utf-8"))),content_type="application/json")
+        self.assertEqual(response.status_code, 413)
+
+  def test_batch (self):
+    response = self.client.get('/api/batch')
+    self.assertEqual(response.status_code, 302)
+    self.assertEqual("/learn#api-batch", response["location"])
+    
+    with open("test/gene-filter-example.xml") as f:
+      model=f.read()
+    
+    jobs = [
+      {"export": {"network_type": "rn", "network_format": "csv"}, "filter": {"reactions": ["r1"]}},
+      {"export": {"network_type": "rn", "network_format": "pdf"}},
+      {"filter": {"reactions": ["r1"]}},
+      {"export": {"targets": [{"network_type":"en", "network_format":"sbml"}, {"network_type":"mn", "network_format":"sbml"}]}},
+      {"export": {"network_type": "mn", "network_format": "sbml", "compression": "gzip"}, "filter": {"reactions": ["r2"]}},
+    ]
+    for processes in [1, 2]:
+      with self.settings(BATCH_PROCESSES=processes):
+        response = self.client.post('/api/batch', json.dumps({
+            "jobs": jobs,
+            "file": model
+            }),content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        self.assertEqual(response["Content-Disposition"], "attachment; filename=gemtracted-batch.zip")
+        with zipfile.ZipFile (io.BytesIO (b"".join (response.streaming_content))) as archive:
+          self.assertEqual (archive.namelist (), ["job-1/gemtracted-model-ReactionNetwork.csv", "job-4/gemtracted-model.zip", "job-5/gemtracted-model-MetabolicNetwork.sbml.gz", "status.json"])
+          states = json.loads (archive.read ("status.json"))["jobs"]
+          self.assertEqual ([state["job"] for state in states], [1, 2, 3, 4, 5])
+          self.assertEqual ([state["status"] for state in states], ["success", "failed", "failed", "success", "success"])
+          self.assertEqual (states[0]["mime"], "text/csv")
+          self.assertIn ("missing the export", states[2]["error"])
+          self.assertNotIn (b"r1", archive.read ("job-1/gemtracted-model-ReactionNetwork.csv"))
+          with zipfile.ZipFile (io.BytesIO (archive.read ("job-4/gemtracted-model.zip"))) as bundle:
+            self.assertEqual (sorted (bundle.namelist ()), ["gemtracted-model-EnzymeNetwork.sbml", "gemtracted-model-MetabolicNetwork.sbml"])
+          valid, sbml = self._valid_sbml (gzip.decompress (archive.read ("job-5/gemtracted-model-MetabolicNetwork.sbml.gz")))
+          self.assertTrue (valid)
+          self.assertIsNone (sbml.getModel ().getReaction ("r2"))
+          self.assertIsNotNone (sbml.getModel ().getReaction ("r1"))
+    
+    # jobs over the budget fail
+    with self.settings(EXPORT_MAX_EDGES=1, BATCH_PROCESSES=1):
+      response = self.client.post('/api/batch', json.dumps({
+          "jobs": [{"export": {"network_type": "rn", "network_format": "csv"}}],
+          "file": model
+          }),content_type="application/json")
+      with zipfile.ZipFile (io.BytesIO (b"".join (response.streaming_content))) as archive:
+        self.assertEqual (archive.namelist (), ["status.json"])
+        self.assertIn ("limited to 1 edges", json.loads (archive.read ("status.json"))["jobs"][0]["error"])
+    
+    with self.settings(BATCH_MAX_JOBS=1):
+      response = self.client.post('/api/batch', json.dumps({
+          "jobs": jobs,
+          "file": model
+          }),content_type="application/json")
+      self.assertEqual(response.status_code, 413)
+    
+    for batch in [{"jobs": jobs}, {"jobs": [], "file": model}, {"jobs": {}, "file": model}, {"jobs": jobs, "file": "no model"}, {"jobs": jobs, "file": 1}, {"jobs": jobs, "file": {"model": model}}]:
+      response = self.client.post('/api/batch', json.dumps(batch),content_type="application/json")
+      self.assertEqual(response.status_code, 400)
+
+  def test_estimate (self):
+    response = self.client.get('/api/estimate')
+    self.assertEqual(response.status_code, 302)
+    self.assertEqual("/learn#api", response["location"])
+
+    with open("test/gene-filter-example.xml") as f:
+      model=f.read()
+
+    response = self.client.post('/api/estimate', json.dumps({
+        "file": model
+        }),content_type="application/json")
+    self.assertEqual(response.status_code, 200)
+    d = json.loads (response.content)
+    self.assertEqual ("success", d["status"])
+    self.assertIsNone (d["max_edges"])
+    self.assertEqual (sorted (d["estimate"]), ["en", "mn", "rn"])
+    self.assertTrue (d["estimate"]["mn"]["exact"])
+    self.assertEqual (d["estimate"]["mn"]["bytes"]["sbml"], len (model.encode ("utf-8")))
+
+    response = self.client.post('/api/estimate', json.dumps({
+        "export": {"network_type": "rn"},
+        "file": model
+        }),content_type="application/json")
+    self.assertEqual(response.status_code, 200)
+    d = json.loads (response.content)
+    self.assertEqual (list (d["estimate"]), ["rn"])
+    rn_edges = d["estimate"]["rn"]["edges"]
+    self.assertGreater (rn_edges, 0)
+
+    response = self.client.post('/api/estimate', json.dumps({
+        "export": {"targets": [{"network_type":"en", "network_format":"csv"}, {"network_type":"mn", "network_format":"dot"}]},
+        "file": model
+        }),content_type="application/json")
+    self.assertEqual(response.status_code, 200)
+    self.assertEqual (sorted (json.loads (response.content)["estimate"]), ["en", "mn"])
+
+    for export in [{"network_type": "xx"}, {"targets": "en"}, []]:
+      response = self.client.post('/api/estimate', json.dumps({
+          "export": export,
+          "file": model
+          }),content_type="application/json")
+      self.assertEqual(response.status_code, 400)
+    response = self.client.post('/api/estimate', json.dumps({"file": 123}),content_type="application/json")
+    self.assertEqual(response.status_code, 400)
+    self.assertIn ("file needs to be", response.content.decode("utf-8"))
+
+    # exports over the budget are rejected
+    with self.settings(EXPORT_MAX_EDGES=rn_edges - 1):
+      response = self.client.post('/api/estimate', json.dumps({
+          "file": model
+          }),content_type="application/json")
+      self.assertEqual (json.loads (response.content)["max_edges"], rn_edges - 1)
+
+      response = self.client.post('/api/execute', json.dumps({
+          "export": {"network_type":"rn", "network_format":"csv"},
+          "file": model
+          }),content_type="application/json")
+      self.assertEqual(response.status_code, 413)
+
+      response = self.client.post('/api/execute', json.dumps({
+          "export": {"targets": [{"network_type":"mn", "network_format":"csv"}, {"network_type":"rn", "network_format":"dot"}]},
+          "file": model
+          }),content_type="application/json")
+      self.assertEqual(response.status_code, 413)
+
+      # the model itself is always fine
+      response = self.client.post('/api/execute', json.dumps({
+          "export": {"network_type":"mn", "network_format":"sbml"},
+          "file": model
+          }),content_type="application/json")
+      self.assertEqual(response.status_code, 200)
+
+    with self.settings(EXPORT_MAX_EDGES=rn_edges):
+      response = self.client.post('/api/execute', json.dumps({
+          "export": {"network_type":"rn", "network_format":"csv"},
+          "file": model
+          }),content_type="application/json")
+      self.assertEqual(response.status_code, 200)
+
+  def _wait_for_job (self, job_id):
+    for i in range (1000):
+      response = self.client.get('/api/jobs/' + job_id)
+      self.assertEqual(response.status_code, 200)
+      job = json.loads (response.content)["job"]
+      if job["status"] not in ["queued", "running"]:
+        return job
+      time.sleep (0.01)
+    self.fail ("job " + job_id + " did not finish")
+
+  def test_jobs (self):
+    response = self.client.get('/api/jobs')
+    self.assertEqual(response.status_code, 302)
+    self.assertEqual("/learn#api", response["location"])
+
+    with open("test/gene-filter-example.xml") as f:
+      model=f.read()
+
+    d = tempfile.TemporaryDirectory()
+    with self.settings(STORAGE=d.name, EXPORT_MAX_EDGES=1):
+      # invalid jobs are rejected right away
+      for export in [{}, {"network_type":"en"}, {"network_type":"en", "network_format":"pdf"}, {"network_type":"en", "network_format":"csv", "compression": "rar"}, "en", ["en", "csv"], 1]:
+        response = self.client.post('/api/jobs', json.dumps({
+            "export": export,
+            "file": model
+            }),content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+      # so are models that are not strings, without leaving a job behind
+      for file in [1, {"model": model}, ["model"]]:
+        response = self.client.post('/api/jobs', json.dumps({
+            "export": {"network_type":"rn", "network_format":"csv"},
+            "file": file
+            }),content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn (b"file needs to be the SBML code", response.content)
+      jobs_dir = os.path.join (d.name, Constants.STORAGE_JOBS_DIR)
+      self.assertEqual (os.listdir (jobs_dir) if os.path.isdir (jobs_dir) else [], [])
+
+      # the budget of /api/execute does not apply
+      response = self.client.post('/api/jobs', json.dumps({
+          "export": {"network_type":"rn", "network_format":"csv", "compression": "gzip"},
+          "filter": {"reactions": ["r3"]},
+          "file": model
+          }),content_type="application/json")
+      self.assertEqual(response.status_code, 202)
+      job = json.loads (response.content)["job"]
+      self.assertEqual (job["status"], "queued")
+      job = self._wait_for_job (job["id"])
+      self.assertEqual (job["status"], "done")
+      self.assertEqual (job["file_name"], "gemtracted-model-ReactionNetwork.csv.gz")
+
+      response = self.client.get('/api/jobs/' + job["id"] + '/result')
+      self.assertEqual(response.status_code, 200)
+      self.assertEqual(response["Content-Type"], "application/gzip")
+      self.assertEqual(response["Content-Disposition"], "attachment; filename=gemtracted-model-ReactionNetwork.csv.gz")
+      csv = gzip.decompress (b"".join (response.streaming_content))
+      self.assertTrue (csv.startswith (b'"source","target"\n'))
+      self.assertNotIn (b"r3", csv)
+
+      # bundles
+      response = self.client.post('/api/jobs', json.dumps({
+          "export": {"targets": [{"network_type":"mn", "network_format":"sbml"}, {"network_type":"en", "network_format":"dot"}]},
+          "file": model
+          }),content_type="application/json")
+      self.assertEqual(response.status_code, 202)
+      job = self._wait_for_job (json.loads (response.content)["job"]["id"])
+      self.assertEqual (job["status"], "done")
+      response = self.client.get('/api/jobs/' + job["id"] + '/result')
+      with zipfile.ZipFile (io.BytesIO (b"".join (response.streaming_content))) as archive:
+        self.assertEqual (sorted (archive.namelist ()), ["gemtracted-model-EnzymeNetwork.dot", "gemtracted-model-MetabolicNetwork.sbml"])
+
+      # finished jobs are deleted
+      response = self.client.delete('/api/jobs/' + job["id"])
+      self.assertEqual(response.status_code, 200)
+      self.assertIsNone (json.loads (response.content)["job"])
+      for url in ['/api/jobs/' + job["id"], '/api/jobs/' + job["id"] + '/result', '/api/jobs/nonsense', '/api/jobs/nonsense/result']:
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+      # broken models fail in the background
+      response = self.client.post('/api/jobs', json.dumps({
+          "export": {"network_type":"en", "network_format":"csv"},
+          "file": "no sbml"
+          }),content_type="application/json")
+      self.assertEqual(response.status_code, 202)
+      job = self._wait_for_job (json.loads (response.content)["job"]["id"])
+      self.assertEqual (job["status"], "failed")
+      self.assertIn ("error", job)
+      response = self.client.get('/api/jobs/' + job["id"] + '/result')
+      self.assertEqual(response.status_code, 409)
+
+      response = self.client.get('/api/status')
+      self.assertEqual(response.status_code, 200)
+      response = self.client.post('/api/status', json.dumps({}),content_type="application/json")
+      self.assertIn ("jobs", json.loads (response.content)["user"])
+
   def test_api (self):
     response = self.client.get('/api/execute')
     self.assertEqual(response.status_code, 302)
@@ -383,7 +1178,7 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      valid, sbml_mn = self._valid_sbml (response.content)
+      valid, sbml_mn = self._valid_sbml (b"".join (response.streaming_content))
       self.assertTrue (valid, msg="invalid SBML of rn")
       
       response = self.client.post('/api/execute', json.dumps({
@@ -394,7 +1189,7 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      valid, sbml_en = self._valid_sbml (response.content)
+      valid, sbml_en = self._valid_sbml (b"".join (response.streaming_content))
       self.assertTrue (valid, msg="invalid SBML of en")
       
       response = self.client.post('/api/execute', json.dumps({
@@ -405,7 +1200,7 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      valid, sbml_rn = self._valid_sbml (response.content)
+      valid, sbml_rn = self._valid_sbml (b"".join (response.streaming_content))
       self.assertTrue (valid, msg="invalid SBML of rn")
       
       
@@ -444,8 +1239,9 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      self.assertTrue (self._valid_xml (response.content), msg="invalid xml of rn")
-      c = response.content.decode("utf-8")
+      content = b"".join (response.streaming_content)
+      self.assertTrue (self._valid_xml (content), msg="invalid xml of rn")
+      c = content.decode("utf-8")
       self.assertEqual (c.count ("<node "), mnSpecies + mnReactions)
       self.assertEqual (c.count (">species</data"), mnSpecies)
       self.assertEqual (c.count (">reaction<"), mnReactions)
@@ -459,8 +1255,9 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      self.assertTrue (self._valid_xml (response.content), msg="invalid xml of en")
-      c = response.content.decode("utf-8")
+      content = b"".join (response.streaming_content)
+      self.assertTrue (self._valid_xml (content), msg="invalid xml of en")
+      c = content.decode("utf-8")
       self.assertEqual (c.count ("<node "), enSpecies)
       self.assertEqual (c.count (">enzyme</data") + c.count (">enzyme_complex</data"), enSpecies)
       self.assertEqual (c.count ("<edge"), enReactions)
@@ -473,8 +1270,9 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      self.assertTrue (self._valid_xml (response.content), msg="invalid xml of en")
-      c = response.content.decode("utf-8")
+      content = b"".join (response.streaming_content)
+      self.assertTrue (self._valid_xml (content), msg="invalid xml of en")
+      c = content.decode("utf-8")
       self.assertEqual (c.count ("<node "), rnSpecies)
       self.assertEqual (c.count (">reaction</data"), rnSpecies)
       self.assertEqual (c.count ("<edge"), rnReactions)
@@ -488,7 +1286,7 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      c = response.content.decode("utf-8")
+      c = b"".join (response.streaming_content).decode("utf-8")
       self.assertEqual (c.count ("node ["), mnSpecies + mnReactions)
       self.assertEqual (c.count ("edge ["), mnEdges)
       
@@ -500,7 +1298,7 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      c = response.content.decode("utf-8")
+      c = b"".join (response.streaming_content).decode("utf-8")
       self.assertEqual (c.count ("node ["), enSpecies)
       self.assertEqual (c.count ("edge ["), enReactions)
       
@@ -512,7 +1310,7 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      c = response.content.decode("utf-8")
+      c = b"".join (response.streaming_content).decode("utf-8")
       self.assertEqual (c.count ("node ["), rnSpecies)
       self.assertEqual (c.count ("edge ["), rnReactions)
       
@@ -524,7 +1322,7 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      c = response.content.decode("utf-8")
+      c = b"".join (response.streaming_content).decode("utf-8")
       self.assertEqual (c.count ("label="), mnSpecies + mnReactions)
       self.assertEqual (c.count (" -> "), mnEdges)
       
@@ -536,7 +1334,7 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      c = response.content.decode("utf-8")
+      c = b"".join (response.streaming_content).decode("utf-8")
       self.assertEqual (c.count ("label="), enSpecies)
       self.assertEqual (c.count (" -> "), enReactions)
       
@@ -548,7 +1346,7 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      c = response.content.decode("utf-8")
+      c = b"".join (response.streaming_content).decode("utf-8")
       self.assertEqual (c.count ("label="), rnSpecies)
       self.assertEqual (c.count (" -> "), rnReactions)
       
@@ -560,7 +1358,7 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      c = response.content.decode("utf-8")
+      c = b"".join (response.streaming_content).decode("utf-8")
       self.assertEqual (c.count ("\n"), mnEdges + 1)
       
       response = self.client.post('/api/execute', json.dumps({
@@ -571,7 +1369,7 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      c = response.content.decode("utf-8")
+      c = b"".join (response.streaming_content).decode("utf-8")
       self.assertEqual (c.count ("\n"), enReactions + 1)
       
       response = self.client.post('/api/execute', json.dumps({
@@ -582,7 +1380,7 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      c = response.content.decode("utf-8")
+      c = b"".join (response.streaming_content).decode("utf-8")
       self.assertEqual (c.count ("\n"), rnReactions + 1)
       
       
@@ -605,7 +1403,7 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      valid, sbml_xx = self._valid_sbml (response.content)
+      valid, sbml_xx = self._valid_sbml (b"".join (response.streaming_content))
       self.assertTrue (valid, msg="invalid SBML of rn")
       
       response = self.client.post('/api/execute', json.dumps({
@@ -618,7 +1416,7 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      valid, sbml_xx = self._valid_sbml (response.content)
+      valid, sbml_xx = self._valid_sbml (b"".join (response.streaming_content))
       self.assertTrue (valid, msg="invalid SBML of en")
 
     
@@ -725,7 +1523,7 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      c = response.content.decode("utf-8")
+      c = b"".join (response.streaming_content).decode("utf-8")
       self.assertEqual (c.count ("label="), 12)
       
       response = self.client.post('/api/execute', json.dumps({
@@ -740,9 +1538,8 @@ class ApiTest(TestCase):
           },
           "file": model
           }),content_type="application/json")
-      print (response.content.decode("utf-8"))
       self.assertEqual(response.status_code, 200)
-      c = response.content.decode("utf-8")
+      c = b"".join (response.streaming_content).decode("utf-8")
       self.assertEqual (c.count ("label="), 10)
       
       response = self.client.post('/api/execute', json.dumps({
@@ -756,7 +1553,7 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      c = response.content.decode("utf-8")
+      c = b"".join (response.streaming_content).decode("utf-8")
       self.assertEqual (c.strip().count ("\n"), 0)
       
       response = self.client.post('/api/execute', json.dumps({
@@ -771,7 +1568,7 @@ class ApiTest(TestCase):
           "file": model
           }),content_type="application/json")
       self.assertEqual(response.status_code, 200)
-      c = response.content.decode("utf-8")
+      c = b"".join (response.streaming_content).decode("utf-8")
       self.assertEqual (c.count ("label="), 0)
       
     
@@ -790,6 +1587,57 @@ class ApiTest(TestCase):
       self.assertEqual(c, "file does not exist")
       self.assertEqual(response.status_code, 400)
   
+  def test_diff (self):
+    response = self.client.get('/api/diff')
+    self.assertEqual(response.status_code, 302)
+    self.assertEqual("/learn#api", response["location"])
+    
+    with open("test/gene-filter-example.xml") as f:
+      model=f.read().replace('\n', '')
+      
+      response = self.client.post('/api/diff', json.dumps({
+          "file": model
+          }),content_type="application/json")
+      self.assertEqual(response.status_code, 400)
+      
+      response = self.client.post('/api/diff', json.dumps({
+          "file": model,
+          "other": {}
+          }),content_type="application/json")
+      self.assertEqual(response.status_code, 200)
+      d = json.loads (b"".join (response.streaming_content))
+      self.assertEqual ("success", d["status"])
+      for entity in ["species", "reactions", "enzs", "enzc"]:
+        self.assertEqual (len (d["diff"][entity]["removed"]), 0)
+        self.assertEqual (len (d["diff"][entity]["changed"]), 0)
+      
+      response = self.client.post('/api/diff', json.dumps({
+          "file": model,
+          "other": {
+            "filter": {"species": ["a"]},
+            "export": {"remove_reaction_missing_species": True}
+          }
+          }),content_type="application/json")
+      self.assertEqual(response.status_code, 200)
+      d = json.loads (b"".join (response.streaming_content))
+      self.assertEqual (len (d["diff"]["species"]["added"]), 0)
+      self.assertEqual (len (d["diff"]["species"]["removed"]), 0)
+      self.assertTrue ("a" in d["diff"]["species"]["changed"])
+      self.assertTrue (len (d["diff"]["reactions"]["removed"]) > 0)
+      self.assertTrue (len (d["diff"]["rn"]["removed"]) > 0)
+      self.assertEqual (len (d["diff"]["rn"]["added"]), 0)
+      
+      response = self.client.post('/api/diff', json.dumps({
+          "file": model,
+          "other": {"filter": {"species": "a"}}
+          }),content_type="application/json")
+      self.assertEqual(response.status_code, 400)
+      
+      for data in [{"file": 123, "other": {}}, {"file": model, "other": {"file": ["a"]}}]:
+        response = self.client.post('/api/diff', json.dumps(data),content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn ("file needs to be", response.content.decode("utf-8"))
+  
   def _valid_xml (self, xml):
     try:
       minidom.parseString (xml)
@@ -810,10 +1658,20 @@ class ApiTest(TestCase):
     return True, sbml
     
     
+  def _json (self, response):
+    if response.streaming:
+      content = b"".join (response.streaming_content)
+      if response.get ("Content-Encoding") == "gzip":
+        content = gzip.decompress (content)
+      return json.loads (content)
+    return response.json()
+    
   def _expect_response (self, response, succ = True):
     self.assertEqual(response.status_code, 200)
+    j = self._json (response)
     if succ:
-      self.assertEqual("success", response.json()["status"], msg = "response was: " + str(response.json()))
+      self.assertEqual("success", j["status"], msg = "response was: " + str(j))
     else:
-      self.assertEqual("failed", response.json()["status"], msg = "response was: " + str(response.json()))
-      self.assertTrue("error" in response.json(), msg = "response was: " + str(response.json()))
+      self.assertEqual("failed", j["status"], msg = "response was: " + str(j))
+      self.assertTrue("error" in j, msg = "response was: " + str(j))
+    return j
@@ -14,6 +14,14 @@ urlpatterns = [
     path('get_session_data', views.get_session_data, name='get_session_data'),
     path('clear_data', views.clear_data, name='clear_data'),
     path('execute', views.execute, name='execute'),
+    path('batch', views.batch, name='batch'),
+    path('consistency', views.consistency, name='consistency'),
+    path('get_table', views.get_table, name='get_table'),
+    path('diff', views.diff, name='diff'),
+    path('estimate', views.estimate, name='estimate'),
+    path('jobs', views.jobs, name='jobs'),
+    path('jobs/<str:job_id>', views.job_state, name='job_state'),
+    path('jobs/<str:job_id>/result', views.job_result, name='job_result'),
     path('export', views.export, name='export'),
     path('serve/<str:file_name>/<path:file_type>', views.serve_file, name='serve'),
     ]
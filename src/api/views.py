@@ -14,32 +14,50 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
 import json
 import logging
+import math
 import os
+import shutil
 import tempfile
 import urllib
-import csv
+from collections import OrderedDict
+from functools import partial
 
 from django.conf import settings
-from django.http import (HttpResponseBadRequest, HttpResponseServerError,
-                         JsonResponse)
+from django.http import (HttpResponse, HttpResponseBadRequest, HttpResponseNotFound, HttpResponseNotModified,
+                         HttpResponseServerError, JsonResponse,
+                         StreamingHttpResponse)
 from django.shortcuts import redirect, reverse
+from django.utils.http import parse_etags, quote_etag
 from django.views.decorators.csrf import csrf_exempt
 from libsbml import SBMLWriter
 
 from gemtract.forms import ExportForm
+from modules.gemtractor.batch import Batch
 from modules.gemtractor.constants import Constants
+from modules.gemtractor.exporter import Exporter
+from modules.gemtractor.fluxtable import FluxTable
 from modules.gemtractor.gemtractor import GEMtractor
+from modules.gemtractor.jobqueue import JobQueue
+from modules.gemtractor.network.consistency import Consistency
+from modules.gemtractor.network.entitytable import EntityTable
+from modules.gemtractor.network.estimator import Estimator
+from modules.gemtractor.resultcache import ResultCache
 from modules.gemtractor.utils import Utils
 from modules.gemtractor.exceptions import (InvalidBiggId, InvalidBiomodelsId,
                                       InvalidGeneComplexExpression,
-                                      InvalidGeneExpression, TooBigForBrowser,
-                                      UnableToRetrieveBiomodel)
+                                      InvalidGeneExpression, JobQueueFull, TooBigForBrowser,
+                                      TooBigForServer, UnableToRetrieveBiomodel,
+                                      UnsupportedCompression)
 
 logging.config.dictConfig(settings.LOGGING)
 __logger = logging.getLogger(__name__)
 
+# content types of models that are sent to /api/execute as the raw body, see parse_model_submission
+MODEL_CONTENT_TYPES = ["application/xml", "text/xml", "application/sbml+xml", "application/gzip", "application/x-gzip", "application/zstd", "application/octet-stream"]
+
 def get_session_data (request):
   """
   get your session data at /api/get_session_data
@@ -113,7 +131,8 @@ def clear_data (request):
   :rtype: `django:JsonResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#jsonresponse-objects>`_
   """
   if Constants.SESSION_MODEL_TYPE in request.session and request.session[Constants.SESSION_MODEL_TYPE] == Constants.SESSION_MODEL_TYPE_UPLOAD:
-    os.remove (Utils.get_model_path (request.session[Constants.SESSION_MODEL_TYPE], request.session[Constants.SESSION_MODEL_ID], request.session.session_key))
+    # other sessions may use the same model, the cleanup removes it once it is not referenced anymore
+    Utils.release_upload (request.session.session_key)
   Utils.rm_flux_file (request)
   Utils.del_session_key (request, None, Constants.SESSION_HAS_SESSION)
   Utils.del_session_key (request, None, Constants.SESSION_MODEL_ID)
@@ -204,13 +223,24 @@ def get_network (request):
   if the request was not successful, the 'status' key will have a value other than 'success'
   and there will be an 'error' key with some information about what went wrong
   
+  if the query parameter 'format' is set to 'columnar', the network will be encoded in the more compact format of :func:`modules.gemtractor.network.network.Network.serialize_columnar`
+  
+  if the query parameter 'format' is set to 'bin', the network will be encoded in the binary format of :func:`modules.gemtractor.network.network.Network.iter_serialize_binary`, with the filter, the flux columns, and the fluxes that do not belong to a reaction as extra information
+  
+  if the user uploaded flux results, 'fluxes' contains the default column (see :func:`modules.gemtractor.fluxtable.FluxTable.get_column`) and 'flux_columns' lists all available columns.
+  the query parameter 'flux_column' selects another column.
+  (failures will still be reported as JSON)
+  
+  the network is serialised while it is sent, and it will be compressed on the fly if the client accepts gzip (and settings.GZIP_NETWORK is true)
   
+  successful responses carry an ETag, which is derived from the hashes of the model, the filter, and the flux file.
+  if the client sends a matching If-None-Match header, the server responds with HTTP 304 without parsing the model.
   
   :param request: the request
   :type request: `django:HttpRequest <https://docs.djangoproject.com/en/2.2/_modules/django/http/request/#HttpRequest>`_
   
   :return: json object with information about the network
-  :rtype: `django:JsonResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#jsonresponse-objects>`_
+  :rtype: `django:StreamingHttpResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#streaminghttpresponse-objects>`_
   
   
   """
@@ -222,15 +252,8 @@ def get_network (request):
   
   if Constants.SESSION_MODEL_ID in request.session:
     try:
-      __logger.info ("getting sbml")
-      gemtractor = GEMtractor (Utils.get_model_path (request.session[Constants.SESSION_MODEL_TYPE], request.session[Constants.SESSION_MODEL_ID], request.session.session_key))
-      # gemtractor.get_sbml ()
-      network = gemtractor.extract_network_from_sbml ()
-      if len (network.species) + len (network.reactions) > settings.MAX_ENTITIES_FILTER:
-        raise TooBigForBrowser ("This model is probably too big for your browser... It contains "+str (len (network.species))+" species and "+str (len (network.reactions))+" reactions. We won't load it for filtering, as you're browser is very likely to die when trying to process that amount of data.. Max is currently set to "+str (settings.MAX_ENTITIES_FILTER)+" entities in total. Please export it w/o filtering or use the API instead.")
-      __logger.info ("got sbml")
-      # ~ network.calc_genenet ()
-      # ~ __logger.info ("got genenet")
+      model_path = Utils.get_model_path (request.session[Constants.SESSION_MODEL_TYPE], request.session[Constants.SESSION_MODEL_ID], request.session.session_key)
+      fbpath = Utils.get_upload_path (request.session.session_key) + "-fb-results"
       filter_species = []
       filter_reaction = []
       filter_enzymes = []
@@ -243,37 +266,91 @@ def get_network (request):
           filter_enzymes = request.session[Constants.SESSION_FILTER_ENZYMES]
       if Constants.SESSION_FILTER_ENZYME_COMPLEXES in request.session:
           filter_enzyme_complexes = request.session[Constants.SESSION_FILTER_ENZYME_COMPLEXES]
+      net_filter = {
+        Constants.SESSION_FILTER_SPECIES: filter_species,
+        Constants.SESSION_FILTER_REACTION: filter_reaction,
+        Constants.SESSION_FILTER_ENZYMES: filter_enzymes,
+        Constants.SESSION_FILTER_ENZYME_COMPLEXES: filter_enzyme_complexes,
+        }
+      use_gzip = settings.GZIP_NETWORK and "gzip" in request.META.get ("HTTP_ACCEPT_ENCODING", "")
+      
+      # the response only depends on the model, the filter, the fluxes, and the requested encoding
+      # so if the client already has it, we do not need to parse anything
+      etag = quote_etag (hashlib.sha256 ("\n".join ([
+        Utils.get_file_hash (request.session, model_path),
+        Utils.get_file_hash (request.session, fbpath),
+        json.dumps (net_filter, sort_keys = True),
+        request.GET.get ("format", ""),
+        request.GET.get ("flux_column", ""),
+        "gzip" if use_gzip else "",
+        ]).encode ("utf-8")).hexdigest ())
+      if etag in parse_etags (request.META.get ("HTTP_IF_NONE_MATCH", "")):
+        __logger.info ("network not modified")
+        response = HttpResponseNotModified ()
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-store"
+        return response
+      
+      __logger.info ("getting sbml")
+      gemtractor = GEMtractor (model_path)
+      # gemtractor.get_sbml ()
+      network = gemtractor.extract_network_from_sbml ()
+      if len (network.species) + len (network.reactions) > settings.MAX_ENTITIES_FILTER:
+        raise TooBigForBrowser ("This model is probably too big for your browser... It contains "+str (len (network.species))+" species and "+str (len (network.reactions))+" reactions. We won't load it for filtering, as you're browser is very likely to die when trying to process that amount of data.. Max is currently set to "+str (settings.MAX_ENTITIES_FILTER)+" entities in total. Please export it w/o filtering or use the API instead.")
+      __logger.info ("got sbml")
+      # ~ network.calc_genenet ()
+      # ~ __logger.info ("got genenet")
       __logger.info ("sending response")
       if len (network.species) + len (network.reactions) + len (network.genes) + len (network.gene_complexes) > settings.MAX_ENTITIES_FILTER:
         raise TooBigForBrowser ("This model is probably too big for your browser... It contains "+str (len (network.species))+" species, "+str (len (network.reactions))+" reactions, "+str (len (network.genes))+" genes, and "+str (len (network.gene_complexes))+" gene complexes. We won't load it for filtering, as you're browser is very likely to die when trying to process that amount of data.. Max is currently set to "+str (settings.MAX_ENTITIES_FILTER)+" entities in total. Please export it w/o filtering or use the API instead.")
-      net = network.serialize()
-      fluxfile = Utils.get_upload_path (request.session.session_key) + "-fb-results"
-      fluxes = {}
-      fbpath = Utils.get_upload_path (request.session.session_key) + "-fb-results"
-      if os.path.isfile(fbpath):
-        with open(fbpath) as csvDataFile:
-          csvReader = csv.reader(csvDataFile)
-          for row in csvReader:
-            if Utils.is_number (row[0]):
-              fluxes[row[1]] = row[0]
-            else:
-              fluxes[row[0]] = row[1]
-
-      __logger.info ("serialised the network")
-      return JsonResponse ({
-            "status":"success",
-            "network":net,
-            "fluxes": fluxes,
-            "filter": {
-            Constants.SESSION_FILTER_SPECIES: filter_species,
-            Constants.SESSION_FILTER_REACTION: filter_reaction,
-            Constants.SESSION_FILTER_ENZYMES: filter_enzymes,
-            Constants.SESSION_FILTER_ENZYME_COMPLEXES: filter_enzyme_complexes,
-            }
-            })
+      flux_table = FluxTable.load (fbpath)
+      flux_columns = flux_table.columns if flux_table else []
+      flux_column = request.GET.get ("flux_column")
+      if flux_column is not None and flux_column not in flux_columns:
+        return JsonResponse ({"status":"failed","error":"there is no flux column " + flux_column})
+      
+      # the network is serialised while it is sent
+      if request.GET.get ("format") == "bin":
+        content_type = "application/octet-stream"
+        fluxes = None
+        unmatched = {}
+        if flux_table:
+          fluxes, unmatched = flux_table.align (network.reactions, flux_column)
+          # fluxes of unknown reactions cannot be stored in the binary flux array, so they are attached to the extra information
+          unmatched = set (unmatched)
+          unmatched = {k: v for k, v in flux_table.as_dict (flux_column).items () if k in unmatched}
+        content = network.iter_serialize_binary (fluxes, {
+          "filter": net_filter,
+          "fluxes": unmatched,
+          "flux_columns": flux_columns,
+          })
+      else:
+        if request.GET.get ("format") == "columnar":
+          net = network.serialize_columnar ()
+        else:
+          net = network.iter_serialize ()
+        content_type = "application/json"
+        content = Utils.iter_json ({
+              "status":"success",
+              "network":net,
+              "fluxes": flux_table.as_dict (flux_column) if flux_table else {},
+              "flux_columns": flux_columns,
+              "filter": net_filter
+              })
+      if use_gzip:
+        response = StreamingHttpResponse (Utils.gzip_stream (content), content_type=content_type)
+        response["Content-Encoding"] = "gzip"
+      else:
+        response = StreamingHttpResponse (content, content_type=content_type)
+      response["Vary"] = "Accept-Encoding"
+      response["ETag"] = etag
+      # clients are supposed to keep the network themselves and revalidate it using If-None-Match
+      response["Cache-Control"] = "no-store"
+      return response
     except TooBigForBrowser as e:
       __logger.error ("error retrieving network: " + getattr(e, 'message', repr(e)))
-      return JsonResponse ({"status":"failed","error":getattr(e, 'message', repr(e))})
+      # the filter page can still browse the network using the paged tables of /api/get_table
+      return JsonResponse ({"status":"failed","error":getattr(e, 'message', repr(e)),"too_big":True,"filter":net_filter})
     except IOError as e:
       __logger.error ("error retrieving network: " + getattr(e, 'message', repr(e)))
       return JsonResponse ({"status":"failed","error":getattr(e, 'message', repr(e))})
@@ -285,6 +362,140 @@ def get_network (request):
   # invalid api request
   return redirect('index:index')
 
+__entity_tables = OrderedDict ()
+
+def get_entity_table (model_path, model_hash):
+  """
+  get the entity tables of a model
+  
+  the tables are expensive to prepare, so the tables of the last few models (see settings.ENTITY_TABLE_CACHE) are kept in memory
+  
+  :param model_path: the path to the model
+  :param model_hash: the hash of the model, see :func:`modules.gemtractor.utils.Utils.get_file_hash`
+  :type model_path: str
+  :type model_hash: str
+  
+  :return: the tables
+  :rtype: :class:`modules.gemtractor.network.entitytable.EntityTable`
+  """
+  if model_hash in __entity_tables:
+    __entity_tables.move_to_end (model_hash)
+    return __entity_tables[model_hash]
+  
+  __logger.info ("preparing entity tables for " + model_path)
+  table = EntityTable (GEMtractor (model_path).extract_network_from_sbml ())
+  __entity_tables[model_hash] = table
+  while len (__entity_tables) > settings.ENTITY_TABLE_CACHE:
+    __entity_tables.popitem (last = False)
+  return table
+
+def get_table (request):
+  """
+  get a window of an entity table at /api/get_table
+  
+  serves the tables of the filter page for networks that are too big to be sent to the browser at once (see settings.MAX_ENTITIES_FILTER).
+  the query parameters are:
+  
+  - entity: the table, one of 'species', 'reactions', 'enzs', or 'enzc'
+  - offset: the number of rows to skip (default 0)
+  - limit: the max number of rows to return (default 100, at most 1000)
+  - sort: the column to sort by (default 'id'), see :data:`modules.gemtractor.network.entitytable.EntityTable.COLUMNS`
+  - order: 'asc' or 'desc'
+  - search: only return rows whose id or name contain this text
+  - match: 'substring' (default) or 'prefix', should the id or name just contain the search text or start with it?
+  - state: 'all' (default), 'included', or 'excluded' by the current filter
+  
+  the returned JSON object will look like this (check for 'status' = 'success'):
+  
+  .. code-block:: json
+  
+    {
+      "status":"success",
+      "entity":"reactions",
+      "total":2712,
+      "matches":12,
+      "offset":0,
+      "fluxes":true,
+      "rows":[
+        {
+          "id":"R_PGK",
+          "name":"Phosphoglycerate kinase",
+          "rev":true,
+          "cons":[ "M_3pg_c", "M_atp_c" ],
+          "prod":[ "M_13dpg_c", "M_adp_c" ],
+          "enzs":[ "b2926" ],
+          "enzc":[],
+          "excluded":false,
+          "flux":-16.02
+        },
+        {"...": "..."}
+      ]
+    }
+  
+  in contrast to :func:`get_network`, the rows link other entities by their identifiers.
+  'fluxes' tells whether the user uploaded flux balance results, which are then attached to the reactions.
+  
+  :param request: the request
+  :type request: `django:HttpRequest <https://docs.djangoproject.com/en/2.2/_modules/django/http/request/#HttpRequest>`_
+  
+  :return: json object with the window of the table
+  :rtype: `django:JsonResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#jsonresponse-objects>`_
+  """
+  if Constants.SESSION_MODEL_ID not in request.session:
+    return redirect('index:index')
+  
+  entity = request.GET.get ("entity", "")
+  if entity not in EntityTable.ENTITIES:
+    return JsonResponse ({"status":"failed","error":"unknown table: " + entity})
+  try:
+    offset = max (0, int (request.GET.get ("offset", 0)))
+    limit = min (1000, max (0, int (request.GET.get ("limit", 100))))
+  except ValueError:
+    return JsonResponse ({"status":"failed","error":"offset and limit need to be integers"})
+  sort = request.GET.get ("sort", "id")
+  if sort not in EntityTable.COLUMNS[entity]:
+    return JsonResponse ({"status":"failed","error":"cannot sort " + entity + " by " + sort})
+  
+  filter_keys = {
+    "species": Constants.SESSION_FILTER_SPECIES,
+    "reactions": Constants.SESSION_FILTER_REACTION,
+    "enzs": Constants.SESSION_FILTER_ENZYMES,
+    "enzc": Constants.SESSION_FILTER_ENZYME_COMPLEXES,
+    }
+  excluded = set (request.session.get (filter_keys[entity], []))
+  
+  try:
+    model_path = Utils.get_model_path (request.session[Constants.SESSION_MODEL_TYPE], request.session[Constants.SESSION_MODEL_ID], request.session.session_key)
+    table = get_entity_table (model_path, Utils.get_file_hash (request.session, model_path))
+    fluxes = None
+    if entity == "reactions":
+      flux_table = FluxTable.load (Utils.get_upload_path (request.session.session_key) + "-fb-results")
+      if flux_table:
+        fluxes = flux_table.as_dict ()
+    total, matches, rows = table.window (entity, offset, limit, sort,
+      descending = request.GET.get ("order") == "desc",
+      query = request.GET.get ("search"),
+      prefix = request.GET.get ("match") == "prefix",
+      state = request.GET.get ("state"),
+      excluded = excluded,
+      fluxes = fluxes)
+  except IOError as e:
+    __logger.error ("error retrieving table: " + getattr(e, 'message', repr(e)))
+    return JsonResponse ({"status":"failed","error":getattr(e, 'message', repr(e))})
+  except InvalidGeneExpression as e:
+    __logger.error("InvalidGeneExpression in model " + request.session[Constants.SESSION_MODEL_ID] + ": " + getattr(e, 'message', repr(e)))
+    return JsonResponse ({"status":"failed","error": "The model uses an invalid gene expression: " + getattr(e, 'message', repr(e))})
+  
+  return JsonResponse ({
+    "status":"success",
+    "entity":entity,
+    "total":total,
+    "matches":matches,
+    "offset":offset,
+    "fluxes":bool (fluxes),
+    "rows":rows
+    })
+
 def prepare_filter (request):
   """
   prepare the session filter setup
@@ -377,12 +588,31 @@ def store_filter (request):
     # TODO
     return redirect('index:index')
   
-  prepare_filter (request)
-    
   succ, data = parse_json_body (request)
   if not succ:
     return JsonResponse ({"status":"failed","error":data})
   
+  succ, net_filter = update_session_filter (request, data)
+  if not succ:
+    return JsonResponse ({"status":"failed","error":net_filter})
+  
+  return JsonResponse ({"status":"success",
+            "filter": net_filter})
+
+def update_session_filter (request, data):
+  """
+  store the filters of a request in the session
+  
+  :param request: the request
+  :param data: the parsed request, may contain lists of 'species', 'reaction', 'enzymes', and 'enzyme_complexes' to filter
+  :type request: `django:HttpRequest <https://docs.djangoproject.com/en/2.2/_modules/django/http/request/#HttpRequest>`_
+  :type data: dict
+  
+  :return: [true, the stored filters] if successful, otherwise [false, error message]
+  :rtype: [bool, dict] or [bool, str]
+  """
+  prepare_filter (request)
+  
   if "species" in data and isinstance(data["species"], list):
     request.session[Constants.SESSION_FILTER_SPECIES] = data["species"]
   if "reaction" in data and isinstance(data["reaction"], list):
@@ -393,15 +623,88 @@ def store_filter (request):
     try:
       request.session[Constants.SESSION_FILTER_ENZYME_COMPLEXES] = sort_gene_complexes (data["enzyme_complexes"])
     except InvalidGeneComplexExpression as e:
-      return JsonResponse ({"status":"failed","error":str (getattr(e, 'code', repr(e))) + getattr(e, 'message', repr(e))})
+      return False, str (getattr(e, 'code', repr(e))) + getattr(e, 'message', repr(e))
+  
+  return True, {
+    Constants.SESSION_FILTER_SPECIES: request.session[Constants.SESSION_FILTER_SPECIES],
+    Constants.SESSION_FILTER_REACTION: request.session[Constants.SESSION_FILTER_REACTION],
+    Constants.SESSION_FILTER_ENZYMES: request.session[Constants.SESSION_FILTER_ENZYMES],
+    Constants.SESSION_FILTER_ENZYME_COMPLEXES: request.session[Constants.SESSION_FILTER_ENZYME_COMPLEXES],
+    }
+
+__consistencies = OrderedDict ()
+
+def consistency (request):
+  """
+  store the user's filters and check their consistency at /api/consistency
+  
+  expects the same JSON payload as :func:`store_filter`, optionally with the 'revision' of the last response.
+  the consistency of the filter is computed at the server, see :class:`modules.gemtractor.network.consistency.Consistency`.
+  the server remembers the state of the last few sessions (see settings.CONSISTENCY_CACHE),
+  so if the request contains the latest 'revision', only the entities whose consistency changed are returned ('complete' = false).
+  otherwise, all inconsistent entities are returned ('complete' = true).
+  
+  .. code-block:: json
   
+    {
+      "status":"success",
+      "filter":{ "...": "..." },
+      "revision":"60a8c1c4e2b14f0d9cc0c1b1d15fd1e2",
+      "complete":false,
+      "inconsistent":{
+        "species":{ "M_13dpg_c":{ "ghost":true } },
+        "reactions":{ "R_PGK":{ "consumed_removed":true }, "R_GAPD":{} },
+        "enzs":{},
+        "enzc":{ "b0114 + b0115 + b0116":{ "subcomplexes_removed":[ "b0114 + b0115" ] } }
+      },
+      "counts":{ "species":1, "reactions":1, "enzs":0, "enzc":1 }
+    }
+  
+  an empty dict of reasons means that the entity is consistent (again).
+  
+  :param request: the request
+  :type request: `django:HttpRequest <https://docs.djangoproject.com/en/2.2/_modules/django/http/request/#HttpRequest>`_
+  
+  :return: json object with the filters and their consistency
+  :rtype: `django:JsonResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#jsonresponse-objects>`_
+  """
+  if request.method != 'POST' or Constants.SESSION_MODEL_ID not in request.session:
+    return redirect('index:index')
+  
+  succ, data = parse_json_body (request)
+  if not succ:
+    return JsonResponse ({"status":"failed","error":data})
+  succ, net_filter = update_session_filter (request, data)
+  if not succ:
+    return JsonResponse ({"status":"failed","error":net_filter})
+  
+  try:
+    model_path = Utils.get_model_path (request.session[Constants.SESSION_MODEL_TYPE], request.session[Constants.SESSION_MODEL_ID], request.session.session_key)
+    model_hash = Utils.get_file_hash (request.session, model_path)
+    state = __consistencies.pop (request.session.session_key, None)
+    if state is None or state.model_hash != model_hash:
+      __logger.info ("preparing consistency check for " + model_path)
+      state = Consistency (GEMtractor (model_path).extract_network_from_sbml ())
+      state.model_hash = model_hash
+    __consistencies[request.session.session_key] = state
+    while len (__consistencies) > settings.CONSISTENCY_CACHE:
+      __consistencies.popitem (last = False)
+  except IOError as e:
+    __logger.error ("error checking consistency: " + getattr(e, 'message', repr(e)))
+    return JsonResponse ({"status":"failed","error":getattr(e, 'message', repr(e))})
+  except InvalidGeneExpression as e:
+    __logger.error("InvalidGeneExpression in model " + request.session[Constants.SESSION_MODEL_ID] + ": " + getattr(e, 'message', repr(e)))
+    return JsonResponse ({"status":"failed","error": "The model uses an invalid gene expression: " + getattr(e, 'message', repr(e))})
+  
+  complete = data.get ("revision") != state.revision
+  delta = state.update (net_filter[Constants.SESSION_FILTER_SPECIES], net_filter[Constants.SESSION_FILTER_REACTION], net_filter[Constants.SESSION_FILTER_ENZYMES], net_filter[Constants.SESSION_FILTER_ENZYME_COMPLEXES])
   return JsonResponse ({"status":"success",
-            "filter": {
-            Constants.SESSION_FILTER_SPECIES: request.session[Constants.SESSION_FILTER_SPECIES],
-            Constants.SESSION_FILTER_REACTION: request.session[Constants.SESSION_FILTER_REACTION],
-            Constants.SESSION_FILTER_ENZYMES: request.session[Constants.SESSION_FILTER_ENZYMES],
-            Constants.SESSION_FILTER_ENZYME_COMPLEXES: request.session[Constants.SESSION_FILTER_ENZYME_COMPLEXES],
-            }})
+    "filter": net_filter,
+    "revision": state.revision,
+    "complete": complete,
+    "inconsistent": state.get_inconsistent () if complete else delta,
+    "counts": state.get_counts (),
+    })
   
 def get_bigg_models (request):
   """
@@ -494,6 +797,7 @@ def select_bigg_model (request):
     request.session[Constants.SESSION_MODEL_NAME] = data["bigg_id"]
     request.session[Constants.SESSION_MODEL_TYPE] = Constants.SESSION_MODEL_TYPE_BIGG
     Utils.rm_flux_file (request)
+    Utils.release_upload (request.session.session_key)
     Utils.del_session_key (request, {}, Constants.SESSION_FILTER_SPECIES)
     Utils.del_session_key (request, {}, Constants.SESSION_FILTER_REACTION)
     Utils.del_session_key (request, {}, Constants.SESSION_FILTER_ENZYMES)
@@ -609,6 +913,7 @@ def select_biomodel (request):
     request.session[Constants.SESSION_MODEL_NAME] = data["biomodels_id"]
     request.session[Constants.SESSION_MODEL_TYPE] = Constants.SESSION_MODEL_TYPE_BIOMODELS
     Utils.rm_flux_file (request)
+    Utils.release_upload (request.session.session_key)
     Utils.del_session_key (request, {}, Constants.SESSION_FILTER_SPECIES)
     Utils.del_session_key (request, {}, Constants.SESSION_FILTER_REACTION)
     Utils.del_session_key (request, {}, Constants.SESSION_FILTER_ENZYMES)
@@ -658,6 +963,70 @@ def parse_json_body (request, expected_keys = []):
   except json.decoder.JSONDecodeError:
     return False, "request is not proper json"
 
+def parse_model_submission (request, expected_keys = []):
+  """
+  parse a job and the model it is to be executed on
+  
+  the job and the model may be sent in three ways:
+  
+  * as a JSON body, that contains the model as a string in the key 'file'
+  * as a multipart body, that contains the model in the part 'file' and the job as JSON in the part 'job'
+  * as a raw body, that contains just the model (the content type needs to be one of `MODEL_CONTENT_TYPES`), the job is sent as JSON in the query parameter 'job'
+  
+  a model in a multipart or raw body may be compressed using gzip or zstd, see :func:`modules.gemtractor.utils.Utils.decompress_stream`.
+  these models are streamed to disk in chunks, so they are neither limited by settings.DATA_UPLOAD_MAX_MEMORY_SIZE nor kept in memory.
+  all models are limited by settings.MAX_MODEL_SIZE.
+  
+  :param request: the request
+  :param expected_keys: keys to expect in the job, in addition to the model
+  :type request: `django:HttpRequest <https://docs.djangoproject.com/en/2.2/_modules/django/http/request/#HttpRequest>`_
+  :type expected_keys: array of str
+  
+  :return: tuple of (True, (job, temporary file of the model, hash of the model)) or (False, HTTP response with an error message)
+  :rtype: tuple
+  """
+  data = None
+  if request.content_type == "multipart/form-data":
+    if "file" not in request.FILES:
+      return False, HttpResponseBadRequest ("request is missing the part: file")
+    chunks = Utils.decompress_stream (request.FILES["file"].chunks ())
+    job = request.FILES["job"].read () if "job" in request.FILES else request.POST.get ("job")
+  elif request.content_type in MODEL_CONTENT_TYPES:
+    chunks = Utils.decompress_stream (iter (lambda: request.read (1 << 20), b""))
+    job = request.GET.get ("job")
+  else:
+    succ, data = parse_json_body (request, ["file"])
+    if not succ:
+      return False, HttpResponseBadRequest (data)
+    if not isinstance (data["file"], str):
+      return False, HttpResponseBadRequest ("file needs to be the SBML code of the model")
+    # do not keep another copy of the model in memory
+    chunks = [data.pop ("file").encode ("utf-8")]
+  
+  if data is None:
+    if job is None:
+      return False, HttpResponseBadRequest ("request is missing the job")
+    try:
+      data = json.loads (job)
+    except ValueError:
+      return False, HttpResponseBadRequest ("job is not proper json")
+  if not isinstance (data, dict):
+    return False, HttpResponseBadRequest ("job needs to be a JSON object")
+  for k in expected_keys:
+    if k not in data:
+      return False, HttpResponseBadRequest ("request is missing key: " + k)
+  
+  model_file = tempfile.NamedTemporaryFile ()
+  try:
+    model_hash = Utils.store_stream (chunks, model_file.name, settings.MAX_MODEL_SIZE)
+  except TooBigForServer as e:
+    return False, HttpResponse (str (e), status = 413)
+  except UnsupportedCompression as e:
+    return False, HttpResponse (str (e), status = 415)
+  except Exception as e:
+    return False, HttpResponseBadRequest ("the model has an issue: " + getattr(e, 'message', repr(e)))
+  return True, (data, model_file, model_hash)
+
 def serve_file (request, file_name, file_type):
   """
   server a file at /api/serve/file_name/file_type
@@ -696,6 +1065,10 @@ def export (request):
     network_format: sbml
     removing_enzyme_removes_complex: on
   
+  if the form asks for a compression ('gzip' or 'zip'), the export is compressed while it is written
+  
+  the exports are cached by the hash of the model and the export options (see :func:`get_result_key`), so an identical export is copied from the cache
+  
   returns as JSON object such as:
   
   .. code-block:: python
@@ -728,183 +1101,370 @@ def export (request):
   if (form.is_valid()):
     file_name = request.session[Constants.SESSION_MODEL_NAME] + "-gemtracted"
     
-    try:
-      gemtractor = GEMtractor (Utils.get_model_path (request.session[Constants.SESSION_MODEL_TYPE], request.session[Constants.SESSION_MODEL_ID], request.session.session_key))
-    except Exception as e:
-      return JsonResponse ({"status":"failed","error":"the model has an issue: " + getattr(e, 'message', repr(e))})
-    sbml = gemtractor.get_sbml (
-      filter_species = request.session[Constants.SESSION_FILTER_SPECIES],
-      filter_reactions = request.session[Constants.SESSION_FILTER_REACTION],
-      filter_genes = request.session[Constants.SESSION_FILTER_ENZYMES],
-      filter_gene_complexes = request.session[Constants.SESSION_FILTER_ENZYME_COMPLEXES],
-      remove_reaction_enzymes_removed = form.cleaned_data['remove_reaction_enzymes_removed'],
-      remove_ghost_species = form.cleaned_data['remove_ghost_species'],
-      discard_fake_enzymes = form.cleaned_data['discard_fake_enzymes'],
-      remove_reaction_missing_species = form.cleaned_data['remove_reaction_missing_species'],
-      removing_enzyme_removes_complex = form.cleaned_data['removing_enzyme_removes_complex'])
+    filter_reactions = request.session[Constants.SESSION_FILTER_REACTION]
+    flux_table = None
+    flux_epsilon = form.cleaned_data['flux_epsilon']
+    if form.cleaned_data['flux_trimming']:
+      flux_table = FluxTable.load (Utils.get_upload_path (request.session.session_key) + "-fb-results")
+      if flux_table is None:
+        return JsonResponse ({"status":"failed","error":"trimming by fluxes requires flux balance results, please upload them in the reactions tab of the trimming step"})
+      filter_reactions = filter_reactions + flux_table.inactive (flux_epsilon)
     
-    if form.cleaned_data['network_type'] == 'en':
-      file_name = file_name + "-EnzymeNetwork"
-      net = gemtractor.extract_network_from_sbml ()
-      net.calc_genenet ()
-      if form.cleaned_data['network_format'] == 'sbml':
-        file_name = file_name + ".sbml"
-        file_path = Utils.create_generated_file_web (request.session.session_key)
-        net.export_en_sbml (file_path, gemtractor, request.session[Constants.SESSION_MODEL_ID], request.session[Constants.SESSION_MODEL_NAME],
-            filter_species = request.session[Constants.SESSION_FILTER_SPECIES],
-            filter_reactions = request.session[Constants.SESSION_FILTER_REACTION],
-            filter_genes = request.session[Constants.SESSION_FILTER_ENZYMES],
-            filter_gene_complexes = request.session[Constants.SESSION_FILTER_ENZYME_COMPLEXES],
-            remove_reaction_enzymes_removed = form.cleaned_data['remove_reaction_enzymes_removed'],
-            remove_ghost_species = form.cleaned_data['remove_ghost_species'],
-            discard_fake_enzymes = form.cleaned_data['discard_fake_enzymes'],
-            remove_reaction_missing_species = form.cleaned_data['remove_reaction_missing_species'],
-            removing_enzyme_removes_complex = form.cleaned_data['removing_enzyme_removes_complex'])
-        if os.path.exists(file_path):
-          return JsonResponse ({"status":"success", "name": file_name, "mime": "application/xml"})
-        else:
-          return JsonResponse ({"status":"failed","error":"error generating SBML file"})
-      else:
-        if form.cleaned_data['network_format'] == 'dot':
-          file_name = file_name + ".dot"
-          file_path = Utils.create_generated_file_web (request.session.session_key)
-          net.export_en_dot (file_path)
-          if os.path.exists(file_path):
-            return JsonResponse ({"status":"success", "name": file_name, "mime": "application/dot"})
-          else:
-            return JsonResponse ({"status":"failed","error":"error generating file"})
-        elif form.cleaned_data['network_format'] == 'graphml':
-          file_name = file_name + ".graphml"
-          file_path = Utils.create_generated_file_web (request.session.session_key)
-          net.export_en_graphml (file_path)
-          if os.path.exists(file_path):
-            return JsonResponse ({"status":"success", "name": file_name, "mime": "application/xml"})
-          else:
-            return JsonResponse ({"status":"failed","error":"error generating file"})
-        elif form.cleaned_data['network_format'] == 'gml':
-          file_name = file_name + ".gml"
-          file_path = Utils.create_generated_file_web (request.session.session_key)
-          net.export_en_gml (file_path)
-          if os.path.exists(file_path):
-            return JsonResponse ({"status":"success", "name": file_name, "mime": "application/gml"})
-          else:
-            return JsonResponse ({"status":"failed","error":"error generating file"})
-        elif form.cleaned_data['network_format'] == 'csv':
-          file_name = file_name + ".csv"
-          file_path = Utils.create_generated_file_web (request.session.session_key)
-          net.export_en_csv (file_path)
-          if os.path.exists(file_path):
-            return JsonResponse ({"status":"success", "name": file_name, "mime": "text/csv"})
-          else:
-            return JsonResponse ({"status":"failed","error":"error generating file"})
-        else:
-          return JsonResponse ({"status":"failed","error":"invalid format"})
-    elif form.cleaned_data['network_type'] == 'rn':
-      file_name = file_name + "-ReactionNetwork"
-      net = gemtractor.extract_network_from_sbml ()
-      net.calc_reaction_net ()
-      if form.cleaned_data['network_format'] == 'sbml':
-        file_name = file_name + ".sbml"
-        file_path = Utils.create_generated_file_web (request.session.session_key)
-        net.export_rn_sbml (file_path, gemtractor, request.session[Constants.SESSION_MODEL_ID], request.session[Constants.SESSION_MODEL_NAME],
-            filter_species = request.session[Constants.SESSION_FILTER_SPECIES],
-            filter_reactions = request.session[Constants.SESSION_FILTER_REACTION],
-            filter_genes = request.session[Constants.SESSION_FILTER_ENZYMES],
-            filter_gene_complexes = request.session[Constants.SESSION_FILTER_ENZYME_COMPLEXES],
-            remove_reaction_enzymes_removed = form.cleaned_data['remove_reaction_enzymes_removed'],
-            remove_ghost_species = form.cleaned_data['remove_ghost_species'],
-            discard_fake_enzymes = form.cleaned_data['discard_fake_enzymes'],
-            remove_reaction_missing_species = form.cleaned_data['remove_reaction_missing_species'],
-            removing_enzyme_removes_complex = form.cleaned_data['removing_enzyme_removes_complex'])
-        if os.path.exists(file_path):
-          return JsonResponse ({"status":"success", "name": file_name, "mime": "application/xml"})
-        else:
-          return JsonResponse ({"status":"failed","error":"error generating SBML file"})
-      else:
-        if form.cleaned_data['network_format'] == 'dot':
-          file_name = file_name + ".dot"
-          file_path = Utils.create_generated_file_web (request.session.session_key)
-          net.export_rn_dot (file_path)
-          if os.path.exists(file_path):
-            return JsonResponse ({"status":"success", "name": file_name, "mime": "application/dot"})
-          else:
-            return JsonResponse ({"status":"failed","error":"error generating file"})
-        elif form.cleaned_data['network_format'] == 'graphml':
-          file_name = file_name + ".graphml"
-          file_path = Utils.create_generated_file_web (request.session.session_key)
-          net.export_rn_graphml (file_path)
-          if os.path.exists(file_path):
-            return JsonResponse ({"status":"success", "name": file_name, "mime": "application/xml"})
-          else:
-            return JsonResponse ({"status":"failed","error":"error generating file"})
-        elif form.cleaned_data['network_format'] == 'gml':
-          file_name = file_name + ".gml"
-          file_path = Utils.create_generated_file_web (request.session.session_key)
-          net.export_rn_gml (file_path)
-          if os.path.exists(file_path):
-            return JsonResponse ({"status":"success", "name": file_name, "mime": "application/gml"})
-          else:
-            return JsonResponse ({"status":"failed","error":"error generating file"})
-        elif form.cleaned_data['network_format'] == 'csv':
-          file_name = file_name + ".csv"
-          file_path = Utils.create_generated_file_web (request.session.session_key)
-          net.export_rn_csv (file_path)
-          if os.path.exists(file_path):
-            return JsonResponse ({"status":"success", "name": file_name, "mime": "text/csv"})
-          else:
-            return JsonResponse ({"status":"failed","error":"error generating file"})
-        else:
-          return JsonResponse ({"status":"failed","error":"invalid format"})
-    elif form.cleaned_data['network_type'] == 'mn':
-      file_name = file_name + "-MetabolicNetwork"
-      if form.cleaned_data['network_format'] == 'sbml':
-        file_name = file_name + ".sbml"
-        file_path = Utils.create_generated_file_web (request.session.session_key)
-        SBMLWriter().writeSBML (sbml, file_path)
-        if os.path.exists(file_path):
-          return JsonResponse ({"status":"success", "name": file_name, "mime": "application/xml"})
-        else:
-          return JsonResponse ({"status":"failed","error":"error generating file"})
-      else:
-        net = gemtractor.extract_network_from_sbml ()
-        if form.cleaned_data['network_format'] == 'dot':
-          file_name = file_name + ".dot"
-          file_path = Utils.create_generated_file_web (request.session.session_key)
-          net.export_mn_dot (file_path)
-          if os.path.exists(file_path):
-            return JsonResponse ({"status":"success", "name": file_name, "mime": "application/dot"})
-          else:
-            return JsonResponse ({"status":"failed","error":"error generating file"})
-        elif form.cleaned_data['network_format'] == 'graphml':
-          file_name = file_name + ".graphml"
-          file_path = Utils.create_generated_file_web (request.session.session_key)
-          net.export_mn_graphml (file_path)
-          if os.path.exists(file_path):
-            return JsonResponse ({"status":"success", "name": file_name, "mime": "application/xml"})
-          else:
-            return JsonResponse ({"status":"failed","error":"error generating file"})
-        elif form.cleaned_data['network_format'] == 'gml':
-          file_name = file_name + ".gml"
-          file_path = Utils.create_generated_file_web (request.session.session_key)
-          net.export_mn_gml (file_path)
-          if os.path.exists(file_path):
-            return JsonResponse ({"status":"success", "name": file_name, "mime": "application/gml"})
-          else:
-            return JsonResponse ({"status":"failed","error":"error generating file"})
-        elif form.cleaned_data['network_format'] == 'csv':
-          file_name = file_name + ".csv"
-          file_path = Utils.create_generated_file_web (request.session.session_key)
-          net.export_mn_csv (file_path)
-          if os.path.exists(file_path):
-            return JsonResponse ({"status":"success", "name": file_name, "mime": "text/csv"})
-          else:
-            return JsonResponse ({"status":"failed","error":"error generating file"})
-        else:
-          return JsonResponse ({"status":"failed","error":"invalid format"})
+    network_type = form.cleaned_data['network_type']
+    network_format = form.cleaned_data['network_format']
+    compression = form.cleaned_data['compression'] or None
+    if not Exporter.is_valid_target (network_type, network_format):
+      return JsonResponse ({"status":"failed","error":"the stoichiometric matrix can only be exported for the Metabolite-Reaction Network"})
+    trimming = {
+        "filter_species": request.session[Constants.SESSION_FILTER_SPECIES],
+        "filter_reactions": filter_reactions,
+        "filter_genes": request.session[Constants.SESSION_FILTER_ENZYMES],
+        "filter_gene_complexes": request.session[Constants.SESSION_FILTER_ENZYME_COMPLEXES],
+        "remove_reaction_enzymes_removed": form.cleaned_data['remove_reaction_enzymes_removed'],
+        "remove_ghost_species": form.cleaned_data['remove_ghost_species'],
+        "discard_fake_enzymes": form.cleaned_data['discard_fake_enzymes'],
+        "remove_reaction_missing_species": form.cleaned_data['remove_reaction_missing_species'],
+        "removing_enzyme_removes_complex": form.cleaned_data['removing_enzyme_removes_complex'],
+      }
+    
+    model_path = Utils.get_model_path (request.session[Constants.SESSION_MODEL_TYPE], request.session[Constants.SESSION_MODEL_ID], request.session.session_key)
+    model_id = request.session[Constants.SESSION_MODEL_ID]
+    if request.session[Constants.SESSION_MODEL_TYPE] == Constants.SESSION_MODEL_TYPE_UPLOAD:
+      # uploads are identified by their hash, the exports get the model's own id instead
+      model_id = None
+    cache = get_result_cache ()
+    result_key = get_result_key (Utils.get_file_hash (request.session, model_path), {
+        "targets": None,
+        "network_type": network_type,
+        "network_format": network_format,
+        "compression": compression,
+        "trimming": trimming,
+        "flux_table": flux_table,
+        "flux_epsilon": flux_epsilon,
+        "reversibility_from_bounds": form.cleaned_data['reversibility_from_bounds'],
+      }, "export", model_id = model_id, model_name = request.session[Constants.SESSION_MODEL_NAME])
+    file_path = Utils.create_generated_file_web (request.session.session_key)
+    cached = cache.get (result_key)
+    if cached is not None:
+      with cached, open (file_path, "wb") as f:
+        shutil.copyfileobj (cached, f)
     else:
-      return JsonResponse ({"status":"failed","error":"invalid network type"})
+      try:
+        gemtractor = GEMtractor (model_path)
+      except Exception as e:
+        return JsonResponse ({"status":"failed","error":"the model has an issue: " + getattr(e, 'message', repr(e))})
+      if model_id is None:
+        model_id = gemtractor.sbml.getModel ().getId ()
+      sbml = gemtractor.get_sbml (**trimming)
+      
+      net = None
+      if network_type != 'mn' or network_format not in ['sbml', 'smatrix']:
+        net = extract_network (gemtractor, flux_table, flux_epsilon, form.cleaned_data['reversibility_from_bounds'])
+        error = check_export_budget (net, [network_type])
+        if error is not None:
+          return JsonResponse ({"status":"failed","error":error})
+      exporter = Exporter (gemtractor, sbml, net, model_id, request.session[Constants.SESSION_MODEL_NAME], trimming = trimming, processes = settings.EXPORT_PROCESSES)
+      
+      exporter.export (network_type, network_format, file_path, compression, Exporter.get_file_name (file_name, network_type, network_format))
+      if not os.path.exists(file_path):
+        return JsonResponse ({"status":"failed","error":"error generating file"})
+      cache.put (result_key, file_path)
+    mime = Exporter.FORMATS[network_format][1] if compression is None else Exporter.COMPRESSIONS[compression][1]
+    return JsonResponse ({"status":"success", "name": Exporter.get_file_name (file_name, network_type, network_format, compression), "mime": mime})
   return JsonResponse ({"status":"failed","error":"submitted data is invalid"})
 
+def parse_job_filter (data):
+  """
+  parse the filter of a job that was submitted to the API
+  
+  :param data: the job, as parsed from the JSON body
+  :type data: dict
+  
+  :return: tuple of (True, (filter_species, filter_reactions, filter_enzymes, filter_enzyme_complexes)) or (False, error message)
+  :rtype: tuple
+  """
+  filter_species = []
+  filter_reactions = []
+  filter_enzymes = []
+  filter_enzyme_complexes = []
+  
+  if "filter" in data:
+    if not isinstance (data["filter"], dict):
+      return False, "filter needs to be an object"
+    if "species" in data["filter"]:
+      filter_species = data["filter"]["species"]
+    if "reactions" in data["filter"]:
+      filter_reactions = data["filter"]["reactions"]
+    if "enzymes" in data["filter"]:
+      filter_enzymes = data["filter"]["enzymes"]
+    if "enzyme_complexes" in data["filter"]:
+      try:
+        filter_enzyme_complexes = sort_gene_complexes (data["filter"]["enzyme_complexes"])
+      except InvalidGeneComplexExpression as e:
+        return False, "error: " + str (getattr(e, 'code', repr(e))) + getattr(e, 'message', repr(e))
+  
+  if not isinstance(filter_species, list):
+    return False, "filter species needs to be an array"
+  if not isinstance(filter_reactions, list):
+    return False, "filter for reactions needs to be an array"
+  if not isinstance(filter_enzymes, list):
+    return False, "filter for enzymes needs to be an array"
+  if not isinstance(filter_enzyme_complexes, list):
+    return False, "filter for enzyme complexes needs to be an array"
+  if not all (isinstance (entity, str) for entities in [filter_species, filter_reactions, filter_enzymes] for entity in entities):
+    return False, "filters need to be arrays of identifiers"
+  
+  return True, (filter_species, filter_reactions, filter_enzymes, filter_enzyme_complexes)
+
+def parse_trimming_options (export):
+  """
+  parse the trimming options of a job that was submitted to the API
+  
+  options that are not given in the job fall back to the defaults of the web interface
+  
+  :param export: the export part of the job
+  :type export: dict
+  
+  :return: tuple of remove_reaction_enzymes_removed, remove_ghost_species, discard_fake_enzymes, remove_reaction_missing_species, removing_enzyme_removes_complex
+  :rtype: tuple of bools
+  """
+  remove_reaction_enzymes_removed = True
+  remove_reaction_missing_species = False
+  remove_ghost_species = False
+  discard_fake_enzymes = False
+  removing_enzyme_removes_complex = True
+  
+  if "remove_reaction_enzymes_removed" in export:
+    remove_reaction_enzymes_removed = export["remove_reaction_enzymes_removed"]
+  if "remove_ghost_species" in export:
+    remove_ghost_species = export["remove_ghost_species"]
+  if "discard_fake_enzymes" in export:
+    discard_fake_enzymes = export["discard_fake_enzymes"]
+  if "remove_reaction_missing_species" in export:
+    remove_reaction_missing_species = export["remove_reaction_missing_species"]
+  if "removing_enzyme_removes_complex" in export:
+    removing_enzyme_removes_complex =  export["removing_enzyme_removes_complex"]
+  return remove_reaction_enzymes_removed, remove_ghost_species, discard_fake_enzymes, remove_reaction_missing_species, removing_enzyme_removes_complex
+
+def parse_export_targets (targets):
+  """
+  parse the targets of a bundle export that was submitted to the API
+  
+  every target needs to be a JSON object with a network_type and a network_format, just like a single export
+  
+  :param targets: the targets, as parsed from the JSON body
+  :type targets: list of dict
+  
+  :return: tuple of (True, list of (network type, format) tuples) or (False, error message)
+  :rtype: tuple
+  """
+  if not isinstance (targets, list) or not targets:
+    return False, "targets need to be a non-empty list of network_type and network_format objects"
+  parsed = []
+  for target in targets:
+    if not isinstance (target, dict) or not Exporter.is_valid_target (target.get ("network_type"), target.get ("network_format")):
+      return False, "invalid target " + json.dumps (target) + ", expected a network_type (en|rn|mn) and a network_format (sbml|dot|graphml|gml|csv|npz|smatrix)"
+    parsed.append ((target["network_type"], target["network_format"]))
+  return True, parsed
+
+def parse_job_fluxes (job):
+  """
+  parse the fluxes of a job that was submitted to the API
+  
+  the job may map reaction ids to fluxes in 'fluxes', which are then used to orient the reversible reactions.
+  if the export part of the job asks for 'flux_trimming', the fluxes are required
+  
+  :param job: the job, as parsed from the JSON body
+  :type job: dict
+  
+  :return: tuple of (True, (flux table or None, epsilon)) or (False, error message)
+  :rtype: tuple
+  """
+  export = job.get ("export", {})
+  epsilon = export.get ("flux_epsilon", FluxTable.DEFAULT_EPSILON)
+  if isinstance (epsilon, bool) or not isinstance (epsilon, (int, float)) or epsilon < 0:
+    return False, "flux_epsilon needs to be a non-negative number"
+  fluxes = job.get ("fluxes")
+  if fluxes is not None and not isinstance (fluxes, dict):
+    return False, "fluxes need to map reaction ids to fluxes"
+  if not fluxes:
+    if export.get ("flux_trimming", False):
+      return False, "flux_trimming requires the fluxes of the reactions"
+    return True, (None, epsilon)
+  return True, (FluxTable.from_dict (fluxes), epsilon)
+
+def extract_network (gemtractor, flux_table = None, epsilon = FluxTable.DEFAULT_EPSILON, reversibility_from_bounds = False):
+  """
+  extract the network from a (trimmed) model
+  
+  if there are fluxes, the reversible reactions will be oriented according to the fluxes, see :func:`modules.gemtractor.network.network.Network.orient_reactions`
+  
+  :param gemtractor: the GEMtractor, which already trimmed the model
+  :param flux_table: the fluxes of the reactions
+  :param epsilon: fluxes with an absolute value up to epsilon are considered zero
+  :param reversibility_from_bounds: should the direction of reversible reactions be derived from their flux bounds? see :func:`modules.gemtractor.gemtractor.GEMtractor.extract_network_from_sbml`
+  :type gemtractor: :class:`modules.gemtractor.gemtractor.GEMtractor`
+  :type flux_table: :class:`modules.gemtractor.fluxtable.FluxTable`
+  :type epsilon: float
+  :type reversibility_from_bounds: bool
+  
+  :return: the network
+  :rtype: :class:`modules.gemtractor.network.network.Network`
+  """
+  net = gemtractor.extract_network_from_sbml (reversibility_from_bounds)
+  if flux_table is not None:
+    net.orient_reactions (flux_table.align (net.reactions)[0], epsilon)
+  return net
+
+def check_export_budget (net, network_types, max_edges = None):
+  """
+  check whether some exports stay within the max number of edges of this instance (see settings.EXPORT_MAX_EDGES)
+  
+  the number of edges is estimated without calculating the projections, see :class:`modules.gemtractor.network.estimator.Estimator`
+  
+  :param net: the network to export
+  :param network_types: the network types to export
+  :param max_edges: the max number of edges, defaults to settings.EXPORT_MAX_EDGES
+  :type net: :class:`modules.gemtractor.network.network.Network`
+  :type network_types: list of str
+  :type max_edges: float
+  
+  :return: None if the exports are fine, otherwise an error message
+  :rtype: str
+  """
+  if max_edges is None:
+    max_edges = settings.EXPORT_MAX_EDGES
+  if math.isinf (max_edges):
+    return None
+  estimator = Estimator (net)
+  for network_type in network_types:
+    edges = estimator.get_edges (network_type)
+    if edges > max_edges:
+      return "the " + Exporter.NETWORK_TYPES[network_type] + " may have up to " + str (edges) + " edges, but exports are limited to " + str (int (max_edges)) + " edges. please trim the model further or submit the job to /api/jobs, see /api/estimate for the estimated sizes"
+  return None
+
+__result_cache = None
+
+def get_result_cache ():
+  """
+  get the cache of the exports of /api/execute and /api/export
+  
+  the cache is created on demand, its directory is below settings.STORAGE and its size is limited by settings.RESULT_CACHE_SIZE
+  
+  :return: the result cache
+  :rtype: :class:`modules.gemtractor.resultcache.ResultCache`
+  """
+  global __result_cache
+  directory = os.path.join (settings.STORAGE, "cache", "results")
+  if __result_cache is None or __result_cache.directory != directory or __result_cache.max_size != settings.RESULT_CACHE_SIZE:
+    __result_cache = ResultCache (directory, settings.RESULT_CACHE_SIZE)
+  return __result_cache
+
+def get_result_key (model_hash, job, endpoint, **context):
+  """
+  get the key of a job's export in the result cache, see :func:`modules.gemtractor.resultcache.ResultCache.get_key`
+  
+  the key includes settings.EXPORT_MAX_EDGES, so a cached export was checked against the current budget, see :func:`check_export_budget`
+  
+  :param model_hash: the SHA-256 hash of the model
+  :param job: the job, see :func:`parse_job`
+  :param endpoint: the endpoint that delivers the export, as the endpoints name and package their exports differently
+  :param context: further settings that end up in the export, such as the model's name
+  :type model_hash: str
+  :type job: dict
+  :type endpoint: str
+  :type context: dict
+  
+  :return: the key
+  :rtype: str
+  """
+  return ResultCache.get_key ({
+      "model": model_hash,
+      "endpoint": endpoint,
+      "context": context,
+      "targets": job["targets"],
+      "network_type": job["network_type"],
+      "network_format": job["network_format"],
+      "compression": job["compression"],
+      "trimming": job["trimming"],
+      "fluxes": None if job["flux_table"] is None else sorted (job["flux_table"].as_dict ().items ()),
+      "flux_epsilon": job["flux_epsilon"],
+      "reversibility_from_bounds": job["reversibility_from_bounds"],
+      "max_edges": None if math.isinf (settings.EXPORT_MAX_EDGES) else settings.EXPORT_MAX_EDGES,
+    })
+
+def parse_job (data):
+  """
+  parse a job that was submitted to the API, see :func:`execute`
+  
+  the job is returned as a dict with the keys:
+  
+  * 'targets': the (network type, format) tuples to export, or None for a single export
+  * 'network_type', 'network_format': the single export
+  * 'compression': the compression of a single export, or None
+  * 'trimming': the filters and trimming options, as expected by :func:`modules.gemtractor.gemtractor.GEMtractor.get_sbml`, the filters are sorted and free of duplicates, so equivalent jobs produce identical exports
+  * 'flux_table', 'flux_epsilon', 'reversibility_from_bounds': the options for :func:`extract_network`
+  
+  :param data: the job, as parsed from the JSON body
+  :type data: dict
+  
+  :return: tuple of (True, job) or (False, error message)
+  :rtype: tuple
+  """
+  if not isinstance (data.get ("export"), dict):
+    return False, "export needs to be an object"
+  succ, job_filter = parse_job_filter (data)
+  if not succ:
+    return False, job_filter
+  filter_species, filter_reactions, filter_enzymes, filter_enzyme_complexes = job_filter
+  
+  succ, job_fluxes = parse_job_fluxes (data)
+  if not succ:
+    return False, job_fluxes
+  flux_table, flux_epsilon = job_fluxes
+  if data["export"].get ("flux_trimming", False):
+    filter_reactions = filter_reactions + flux_table.inactive (flux_epsilon)
+  
+  export = data["export"]
+  
+  targets = None
+  if "targets" in export:
+    succ, targets = parse_export_targets (export["targets"])
+    if not succ:
+      return False, targets
+  else:
+    if "network_type" not in export:
+      return False, "job is missing the desired network_type (en|rn|mn)"
+    if "network_format" not in export:
+      return False, "job is missing the desired network_format (sbml|dot|graphml|gml|csv|npz|smatrix)"
+    if not Exporter.is_valid_target (export["network_type"], export["network_format"]):
+      return False, "job is not well formed, not sure what to do..."
+  compression = export.get ("compression")
+  if compression is not None and compression not in Exporter.COMPRESSIONS:
+    return False, "unsupported compression, choose one of: " + ", ".join (Exporter.COMPRESSIONS)
+  
+  remove_reaction_enzymes_removed, remove_ghost_species, discard_fake_enzymes, remove_reaction_missing_species, removing_enzyme_removes_complex = parse_trimming_options (export)
+  return True, {
+      "targets": targets,
+      "network_type": export.get ("network_type"),
+      "network_format": export.get ("network_format"),
+      "compression": compression,
+      "trimming": {
+        "filter_species": sorted (set (filter_species)),
+        "filter_reactions": sorted (set (filter_reactions)),
+        "filter_genes": sorted (set (filter_enzymes)),
+        "filter_gene_complexes": sorted (set (filter_enzyme_complexes)),
+        "remove_reaction_enzymes_removed": remove_reaction_enzymes_removed,
+        "remove_ghost_species": remove_ghost_species,
+        "discard_fake_enzymes": discard_fake_enzymes,
+        "remove_reaction_missing_species": remove_reaction_missing_species,
+        "removing_enzyme_removes_complex": removing_enzyme_removes_complex,
+      },
+      "flux_table": flux_table,
+      "flux_epsilon": flux_epsilon,
+      "reversibility_from_bounds": export.get ("reversibility_from_bounds", False),
+    }
+
 @csrf_exempt
 def execute (request):
   """
@@ -928,6 +1488,20 @@ def execute (request):
       "file": model
     }
   
+  alternatively, the model may be sent in a multipart body with the job as JSON in a separate part,
+  or as the raw body with the job as JSON in the query parameter 'job', see :func:`parse_model_submission`.
+  models sent that way may be compressed using gzip or zstd and are streamed to disk, so they may exceed settings.DATA_UPLOAD_MAX_MEMORY_SIZE.
+  
+  instead of a single network_type and network_format, the export may list several 'targets' (see :func:`parse_export_targets`),
+  in that case the model is trimmed once and all networks are returned in a ZIP archive, see :class:`modules.gemtractor.exporter.Exporter`
+  
+  a single network may be compressed while it is generated, if the export asks for a 'compression' of 'gzip' or 'zip'
+  
+  if the requested network may exceed settings.EXPORT_MAX_EDGES (see :func:`check_export_budget`), the job is rejected with HTTP 413.
+  such jobs can be submitted to /api/jobs instead, see :func:`jobs`
+  
+  the exports are cached by the hash of the model and the job (see :func:`get_result_key`), so an identical job is served from the cache
+  
   returns HTTP 200 and the generated file, or some other HTTP status and an error message
   
   :param request: the request
@@ -940,68 +1514,436 @@ def execute (request):
   if request.method != 'POST':
     return redirect(reverse('index:learn') + '#api')
 
+  succ, submission = parse_model_submission (request, ["export"])
+  if not succ:
+    return submission
+  data, inputFile, model_hash = submission
+  
+  succ, job = parse_job (data)
+  if not succ:
+    return HttpResponseBadRequest (job)
+  export = data["export"]
+  targets = job["targets"]
+  compression = job["compression"]
+  trimming = job["trimming"]
+  flux_table = job["flux_table"]
+  flux_epsilon = job["flux_epsilon"]
+  
+  cache = get_result_cache ()
+  result_key = get_result_key (model_hash, job, "execute")
+  cached = cache.get (result_key)
+  if cached is not None:
+    if targets is not None:
+      return Utils.serve_file (cached, "gemtracted-model.zip", "application/zip")
+    file_name = "gemtracted-model." + Exporter.FORMATS[export["network_format"]][0]
+    file_type = Exporter.FORMATS[export["network_format"]][1]
+    if compression is not None:
+      file_name = file_name + "." + Exporter.COMPRESSIONS[compression][0]
+      file_type = Exporter.COMPRESSIONS[compression][1]
+    return Utils.serve_file (cached, file_name, file_type)
+  
+  try:
+    gemtractor = GEMtractor (inputFile.name)
+    sbml = gemtractor.get_sbml (**trimming)
+  except Exception as e:
+    return HttpResponseBadRequest ("the model has an issue: " + getattr(e, 'message', repr(e)))
+  
+  if targets is not None:
+    outputFile = tempfile.NamedTemporaryFile(suffix = ".zip")
+    try:
+      net = extract_network (gemtractor, flux_table, flux_epsilon, job["reversibility_from_bounds"])
+      error = check_export_budget (net, [network_type for network_type, network_format in targets if network_format not in ["sbml", "smatrix"] or network_type != "mn"])
+      if error is not None:
+        return HttpResponse (error, status = 413)
+      exporter = Exporter (gemtractor, sbml, net, sbml.getModel ().getId (), sbml.getModel ().getName (), trimming = trimming)
+      exporter.bundle (targets, outputFile.name, threads = settings.EXPORT_THREADS)
+    except Exception as e:
+      return HttpResponseBadRequest ("the model has an issue: " + getattr(e, 'message', repr(e)))
+    cache.put (result_key, outputFile.name)
+    return Utils.serve_file (outputFile.name, "gemtracted-model.zip", "application/zip")
+  
+  file_name = "gemtracted-model." + Exporter.FORMATS[export["network_format"]][0]
+  file_type = Exporter.FORMATS[export["network_format"]][1]
+  
+  if export["network_type"] != "mn" or export["network_format"] not in ["sbml", "smatrix"]:
+    net = extract_network (gemtractor, flux_table, flux_epsilon, job["reversibility_from_bounds"])
+    error = check_export_budget (net, [export["network_type"]])
+    if error is not None:
+      return HttpResponse (error, status = 413)
+  
+  # the networks are streamed to the client while they are generated, and cached once they are complete
+  tee = lambda chunks: cache.tee (result_key, chunks)
+  if export["network_type"] == "en" and export["network_format"] == "sbml":
+    return Utils.stream_export (lambda stream: net.export_en_sbml (stream, gemtractor, sbml.getModel ().getId (), sbml.getModel ().getName (), **trimming), file_name, file_type, compression, tee)
+  if export["network_type"] == "rn" and export["network_format"] == "sbml":
+    return Utils.stream_export (lambda stream: net.export_rn_sbml (stream, gemtractor, sbml.getModel ().getId () + "_RN", sbml.getModel ().getName () + " converted to ReactionNetwork", **trimming), file_name, file_type, compression, tee)
+  if export["network_format"] == "smatrix":
+    return Utils.stream_export (gemtractor.export_stoichiometric_matrix, file_name, file_type, compression, tee)
+  if export["network_format"] != "sbml":
+    return Utils.stream_export (getattr (net, "export_" + export["network_type"] + "_" + export["network_format"]), file_name, file_type, compression, tee)
+  if compression is not None:
+    return Utils.stream_export (lambda stream: stream.write (SBMLWriter().writeSBMLToString (sbml)), file_name, file_type, compression, tee)
+  
+  # libsbml needs a file to write the trimmed model to
+  outputFile = tempfile.NamedTemporaryFile()
+  SBMLWriter().writeSBML (sbml, outputFile.name)
+  
+  if os.path.exists(outputFile.name):
+    cache.put (result_key, outputFile.name)
+    return Utils.serve_file (outputFile.name, file_name, file_type)
+  return HttpResponseServerError ("couldn't generate the sbml file")
+  
+  
+
+
+def export_job (gemtractor, job, file_path, progress = None, max_edges = None):
+  """
+  trim a model and export the network(s) of a job
+  
+  :param gemtractor: the GEMtractor of the model, which is trimmed in place
+  :param job: the job, see :func:`parse_job`
+  :param file_path: where to write the export, or the ZIP archive if the job has several targets
+  :param progress: function to report the progress, see :func:`modules.gemtractor.jobqueue.JobQueue.submit`
+  :param max_edges: the max number of edges of the exports, see :func:`check_export_budget`, or None to not limit the exports
+  :type gemtractor: :class:`modules.gemtractor.gemtractor.GEMtractor`
+  :type job: dict
+  :type file_path: str
+  :type progress: function
+  :type max_edges: float
+  
+  :return: the file name and the mime type of the export
+  :rtype: dict
+  
+  :raises ValueError: if the exports exceed the budget
+  """
+  checkpoint = None
+  if progress is None:
+    progress = lambda step, fraction: None
+  else:
+    # a cancelled job is also noticed while it is exporting
+    checkpoint = lambda: progress ("exporting", 0.5)
+  progress ("trimming", 0.1)
+  sbml = gemtractor.get_sbml (**job["trimming"])
+  
+  targets = job["targets"] or [(job["network_type"], job["network_format"])]
+  projections = [network_type for network_type, network_format in targets if network_type != "mn" or network_format not in ["sbml", "smatrix"]]
+  net = None
+  if projections:
+    progress ("extracting", 0.3)
+    net = extract_network (gemtractor, job["flux_table"], job["flux_epsilon"], job["reversibility_from_bounds"])
+    if max_edges is not None:
+      error = check_export_budget (net, projections, max_edges)
+      if error is not None:
+        raise ValueError (error)
+  
+  progress ("exporting", 0.5)
+  exporter = Exporter (gemtractor, sbml, net, sbml.getModel ().getId (), sbml.getModel ().getName (), trimming = job["trimming"], checkpoint = checkpoint)
+  if job["targets"] is not None:
+    exporter.bundle (targets, file_path, threads = settings.EXPORT_THREADS)
+    return {"file_name": "gemtracted-model.zip", "mime": "application/zip"}
+  compression = job["compression"]
+  exporter.export (job["network_type"], job["network_format"], file_path, compression)
+  return {
+      "file_name": Exporter.get_file_name ("gemtracted-model", job["network_type"], job["network_format"], compression),
+      "mime": Exporter.FORMATS[job["network_format"]][1] if compression is None else Exporter.COMPRESSIONS[compression][1],
+    }
+
+def run_job (job, job_dir, progress):
+  """
+  run a job that was submitted to /api/jobs, in a worker of the :class:`modules.gemtractor.jobqueue.JobQueue`
+  
+  the model is expected in the file 'model.xml' in the job's directory, the result is written to the job's result file.
+  the export is not limited by settings.EXPORT_MAX_EDGES, as the worker pool bounds the number of running jobs.
+  
+  :param job: the job, see :func:`parse_job`
+  :param job_dir: the job's directory
+  :param progress: function to report the progress
+  :type job: dict
+  :type job_dir: str
+  :type progress: function
+  
+  :return: the file name and the mime type of the result
+  :rtype: dict
+  """
+  gemtractor = GEMtractor (os.path.join (job_dir, "model.xml"))
+  return export_job (gemtractor, job, os.path.join (job_dir, JobQueue.RESULT_FILE), progress)
+
+__job_queue = None
+
+def get_job_queue ():
+  """
+  get the queue of the jobs submitted to /api/jobs
+  
+  the queue is created on demand, its directory is below settings.STORAGE
+  
+  :return: the job queue
+  :rtype: :class:`modules.gemtractor.jobqueue.JobQueue`
+  """
+  global __job_queue
+  directory = os.path.join (settings.STORAGE, Constants.STORAGE_JOBS_DIR)
+  if __job_queue is None or __job_queue.directory != directory:
+    __job_queue = JobQueue (directory, settings.JOB_WORKERS, settings.JOB_QUEUE_SIZE)
+  return __job_queue
+
+@csrf_exempt
+def jobs (request):
+  """
+  submit a job at /api/jobs
+  
+  the job is sent as JSON HTTP POST data, just like for /api/execute (see :func:`execute`), but it is executed in the background (see :func:`run_job`).
+  the job is validated immediately, an invalid job is rejected with HTTP 400.
+  if too many jobs are waiting (see settings.JOB_QUEUE_SIZE), the job is rejected with HTTP 503.
+  
+  returns HTTP 202 and the state of the job (see :class:`modules.gemtractor.jobqueue.JobQueue`), such as:
+  
+  .. code-block:: python
+  
+    {
+      "status": "success",
+      "job": {
+        "id": "2f0b7f1c8a3e4c8b9a1f0c6d5e4b3a21",
+        "status": "queued",
+        ...
+      }
+    }
+  
+  poll /api/jobs/ID for the state of the job (see :func:`job_state`) and download the result from /api/jobs/ID/result (see :func:`job_result`).
+  
+  :param request: the request
+  :type request: `django:HttpRequest <https://docs.djangoproject.com/en/2.2/_modules/django/http/request/#HttpRequest>`_
+  
+  :return: HTTP 202 and the state of the job or some other HTTP status and an error message
+  :rtype: `django:JsonResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#jsonresponse-objects>`_
+  """
+  if request.method != 'POST':
+    return redirect(reverse('index:learn') + '#api')
+  
   succ, data = parse_json_body (request, ["file", "export"])
   if not succ:
     return HttpResponseBadRequest(data)
+  if not isinstance (data["file"], str):
+    return HttpResponseBadRequest ("file needs to be the SBML code of the model")
+  succ, job = parse_job (data)
+  if not succ:
+    return HttpResponseBadRequest (job)
   
-  inputFile = tempfile.NamedTemporaryFile()
-  with open(inputFile.name, 'w') as f:
-    f.write (data['file'])
+  try:
+    state = get_job_queue ().submit (lambda job_dir, progress: run_job (job, job_dir, progress), {"model.xml": data["file"]})
+  except JobQueueFull as e:
+    return HttpResponse (str (e), status = 503)
+  return JsonResponse ({"status": "success", "job": state}, status = 202)
+
+@csrf_exempt
+def job_state (request, job_id):
+  """
+  get the state of a job at /api/jobs/ID, or cancel it using HTTP DELETE
   
-  filter_species = []
-  filter_reactions = []
-  filter_enzymes = []
-  filter_enzyme_complexes = []
+  GET returns HTTP 200 and the state of the job, see :func:`jobs`.
+  once the job's status is 'done', the state contains the 'file_name' and the 'mime' type of the result.
+  if the job 'failed', the state contains the 'error'.
   
-  if "filter" in data:
-    if "species" in data["filter"]:
-      filter_species = data["filter"]["species"]
-    if "reactions" in data["filter"]:
-      filter_reactions = data["filter"]["reactions"]
-    if "enzymes" in data["filter"]:
-      filter_enzymes = data["filter"]["enzymes"]
-    if "enzyme_complexes" in data["filter"]:
-      try:
-        filter_enzyme_complexes = sort_gene_complexes (data["filter"]["enzyme_complexes"])
-      except InvalidGeneComplexExpression as e:
-        return HttpResponseBadRequest ("error: " + str (getattr(e, 'code', repr(e))) + getattr(e, 'message', repr(e)))
+  DELETE cancels a job that is 'queued' or 'running' and returns its state, a job that finished is deleted together with its result.
   
-  if not isinstance(filter_species, list):
-    return HttpResponseBadRequest("filter species needs to be an array")
-  if not isinstance(filter_reactions, list):
-    return HttpResponseBadRequest("filter for reactions needs to be an array")
-  if not isinstance(filter_enzymes, list):
-    return HttpResponseBadRequest("filter for enzymes needs to be an array")
-  if not isinstance(filter_enzyme_complexes, list):
-    return HttpResponseBadRequest("filter for enzyme complexes needs to be an array")
+  :param request: the request
+  :param job_id: the id of the job
+  :type request: `django:HttpRequest <https://docs.djangoproject.com/en/2.2/_modules/django/http/request/#HttpRequest>`_
+  :type job_id: str
   
-  export = data["export"]
+  :return: HTTP 200 and the state of the job, or HTTP 404 if there is no such job
+  :rtype: `django:JsonResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#jsonresponse-objects>`_
+  """
+  queue = get_job_queue ()
+  state = queue.get_state (job_id)
+  if state is None:
+    return HttpResponseNotFound ("no such job")
+  if request.method == 'DELETE':
+    state = queue.cancel (job_id)
+    if state is None:
+      return JsonResponse ({"status": "success", "job": None})
+  return JsonResponse ({"status": "success", "job": state})
+
+def job_result (request, job_id):
+  """
+  download the result of a job at /api/jobs/ID/result
   
-  if "network_type" not in export:
-    return HttpResponseBadRequest ("job is missing the desired network_type (en|rn|mn)")
-  if "network_format" not in export:
-    return HttpResponseBadRequest ("job is missing the desired network_format (sbml|dot|graphml|gml|csv)")
-    
+  :param request: the request
+  :param job_id: the id of the job
+  :type request: `django:HttpRequest <https://docs.djangoproject.com/en/2.2/_modules/django/http/request/#HttpRequest>`_
+  :type job_id: str
   
-  remove_reaction_enzymes_removed = True
-  remove_reaction_missing_species = False
-  remove_ghost_species = False
-  discard_fake_enzymes = False
-  removing_enzyme_removes_complex = True
+  :return: HTTP 200 and the result, HTTP 404 if there is no such job, or HTTP 409 if the job is not done
+  :rtype: `django:HttpResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#httpresponse-objects>`_
+  """
+  queue = get_job_queue ()
+  state = queue.get_state (job_id)
+  if state is None:
+    return HttpResponseNotFound ("no such job")
+  if state["status"] != JobQueue.DONE:
+    return HttpResponse ("job is " + state["status"], status = 409)
+  return Utils.serve_file (queue.get_result_path (job_id), state["file_name"], state["mime"])
+
+
+def run_batch_job (gemtractor, job, file_path, max_edges):
+  """
+  run a job of a batch that was submitted to /api/batch, see :class:`modules.gemtractor.batch.Batch`
   
-  if "remove_reaction_enzymes_removed" in export:
-    remove_reaction_enzymes_removed = export["remove_reaction_enzymes_removed"]
-  if "remove_ghost_species" in export:
-    remove_ghost_species = export["remove_ghost_species"]
-  if "discard_fake_enzymes" in export:
-    discard_fake_enzymes = export["discard_fake_enzymes"]
-  if "remove_reaction_missing_species" in export:
-    remove_reaction_missing_species = export["remove_reaction_missing_species"]
-  if "removing_enzyme_removes_complex" in export:
-    removing_enzyme_removes_complex =  export["removing_enzyme_removes_complex"]
+  the job may run in a worker process, which does not see settings that changed at runtime, so the budget is passed explicitly.
+  
+  :param gemtractor: the GEMtractor of a clone of the model
+  :param job: the parsed job, see :func:`parse_job`
+  :param file_path: where to write the export
+  :param max_edges: the max number of edges of the exports, see :func:`check_export_budget`
+  :type gemtractor: :class:`modules.gemtractor.gemtractor.GEMtractor`
+  :type job: tuple of (bool, dict or error message)
+  :type file_path: str
+  :type max_edges: float
+  
+  :return: the file name and the mime type of the export
+  :rtype: dict
+  
+  :raises ValueError: if the job is invalid or exceeds the budget
+  """
+  succ, job = job
+  if not succ:
+    raise ValueError (job)
+  # the jobs already run in parallel, so every export is written by a single process
+  return export_job (gemtractor, job, file_path, max_edges = max_edges)
+
+@csrf_exempt
+def batch (request):
+  """
+  execute a batch of jobs against a single model at /api/batch
+  
+  the batch is sent as JSON HTTP POST data, such as:
+  
+  .. code-block:: python
+  
+    {
+      "jobs": [
+        {
+          "export": {"network_type": "en", "network_format": "csv"},
+          "filter": {"enzymes": ["gene_abc"]}
+        },
+        {
+          "export": {"network_type": "en", "network_format": "csv"},
+          "filter": {"enzymes": ["gene_xyz"]}
+        }
+      ],
+      "file": model
+    }
+  
+  every job is just like a job for /api/execute (see :func:`execute`), but without the model.
+  every job trims its own clone of the model,
+  the jobs are executed in parallel by up to settings.BATCH_PROCESSES processes (see :class:`modules.gemtractor.batch.Batch`).
+  
+  returns HTTP 200 and a ZIP archive, which is streamed while the jobs finish.
+  the archive contains the export of the n-th job in the directory 'job-n' and a 'status.json' that lists the state of every job, such as:
+  
+  .. code-block:: python
+  
+    {
+      "jobs": [
+        {"job": 1, "status": "success", "file": "job-1/gemtracted-model-EnzymeNetwork.csv", "mime": "text/csv"},
+        {"job": 2, "status": "failed", "error": "..."}
+      ]
+    }
+  
+  invalid jobs and jobs that exceed settings.EXPORT_MAX_EDGES (see :func:`check_export_budget`) fail, without affecting the other jobs.
+  if the batch is not well formed or if it has more than settings.BATCH_MAX_JOBS jobs, it is rejected with HTTP 400 or 413, respectively.
+  
+  :param request: the request
+  :type request: `django:HttpRequest <https://docs.djangoproject.com/en/2.2/_modules/django/http/request/#HttpRequest>`_
+  
+  :return: HTTP 200 and the archive or some other HTTP status and an error message
+  :rtype: `django:StreamingHttpResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#streaminghttpresponse-objects>`_
+  """
+  if request.method != 'POST':
+    return redirect(reverse('index:learn') + '#api-batch')
+  
+  succ, data = parse_json_body (request, ["file", "jobs"])
+  if not succ:
+    return HttpResponseBadRequest(data)
+  if not isinstance (data["file"], str):
+    return HttpResponseBadRequest ("file needs to be the SBML code of the model")
+  if not isinstance (data["jobs"], list) or not data["jobs"]:
+    return HttpResponseBadRequest ("jobs need to be a non-empty list")
+  if len (data["jobs"]) > settings.BATCH_MAX_JOBS:
+    return HttpResponse ("batches are limited to " + str (int (settings.BATCH_MAX_JOBS)) + " jobs", status = 413)
+  jobs = []
+  for job in data["jobs"]:
+    if not isinstance (job, dict) or "export" not in job:
+      jobs.append ((False, "job is missing the export"))
+    else:
+      jobs.append (parse_job (job))
+  
+  inputFile = tempfile.NamedTemporaryFile()
+  with open(inputFile.name, 'w') as f:
+    f.write (data['file'])
+  try:
+    gemtractor = GEMtractor (inputFile.name)
+  except Exception as e:
+    return HttpResponseBadRequest ("the model has an issue: " + getattr(e, 'message', repr(e)))
+  
+  def files (directory):
+    states = []
+    run_job = partial (run_batch_job, max_edges = settings.EXPORT_MAX_EDGES)
+    for n, result in enumerate (Batch (gemtractor, run_job, settings.BATCH_PROCESSES).run (jobs, directory)):
+      state = {"job": n + 1, "status": result["status"]}
+      if result["status"] == Batch.SUCCESS:
+        state["file"] = "job-" + str (n + 1) + "/" + result["file_name"]
+        state["mime"] = result["mime"]
+        yield state["file"], result["path"]
+      else:
+        state["error"] = result["error"]
+      states.append (state)
+    status_path = os.path.join (directory, "status.json")
+    with open (status_path, "w") as f:
+      json.dump ({"jobs": states}, f)
+    yield "status.json", status_path
+  
+  def stream ():
+    # the workers of the batch read the model from the input file
+    with inputFile, tempfile.TemporaryDirectory () as directory:
+      yield from Utils.zip_files_stream (files (directory))
+  
+  response = StreamingHttpResponse (stream (), content_type = "application/zip")
+  response['Content-Disposition'] = 'attachment; filename=gemtracted-batch.zip'
+  return response
+
+def build_job_network (model, job):
+  """
+  extract the network of a model as requested in a job
+  
+  :param model: the SBML model as a string
+  :param job: the job, which may contain a filter and trimming options in its export part
+  :type model: str
+  :type job: dict
+  
+  :return: tuple of (True, network) or (False, error message)
+  :rtype: tuple
+  """
+  if not isinstance (job.get ("export", {}), dict):
+    return False, "export needs to be an object"
+  succ, job_filter = parse_job_filter (job)
+  if not succ:
+    return False, job_filter
+  filter_species, filter_reactions, filter_enzymes, filter_enzyme_complexes = job_filter
+  succ, job_fluxes = parse_job_fluxes (job)
+  if not succ:
+    return False, job_fluxes
+  flux_table, flux_epsilon = job_fluxes
+  if job.get ("export", {}).get ("flux_trimming", False):
+    filter_reactions = filter_reactions + flux_table.inactive (flux_epsilon)
+  remove_reaction_enzymes_removed, remove_ghost_species, discard_fake_enzymes, remove_reaction_missing_species, removing_enzyme_removes_complex = parse_trimming_options (job.get ("export", {}))
+  if not isinstance (model, str):
+    return False, "file needs to be the SBML code of the model"
+  
+  inputFile = tempfile.NamedTemporaryFile()
   try:
+    with open(inputFile.name, 'w') as f:
+      f.write (model)
     gemtractor = GEMtractor (inputFile.name)
-    sbml = gemtractor.get_sbml (
+    gemtractor.get_sbml (
         filter_species = filter_species,
         filter_reactions = filter_reactions,
         filter_genes = filter_enzymes,
@@ -1011,137 +1953,132 @@ def execute (request):
         discard_fake_enzymes = discard_fake_enzymes,
         remove_reaction_missing_species = remove_reaction_missing_species,
         removing_enzyme_removes_complex = removing_enzyme_removes_complex)
+    return True, extract_network (gemtractor, flux_table, flux_epsilon, job.get ("export", {}).get ("reversibility_from_bounds", False))
   except Exception as e:
-    return HttpResponseBadRequest ("the model has an issue: " + getattr(e, 'message', repr(e)))
+    return False, "the model has an issue: " + getattr(e, 'message', repr(e))
+
+@csrf_exempt
+def diff (request):
+  """
+  compare two networks at /api/diff
   
-  outputFile = tempfile.NamedTemporaryFile()
+  the job is send as JSON HTTP POST data, such as:
   
+  .. code-block:: python
   
+    {
+      "file": model,
+      "filter": {...},
+      "export": {...},
+      "other": {
+          "file": other_model,
+          "filter": {...},
+          "export": {...}
+      },
+      "projections": True
+    }
   
+  filter and export (the trimming options) are optional and work as for /api/execute.
+  if other does not contain a file, the first model is compared to a trimmed version of itself.
   
-  if export["network_type"] == "en":
-    net = gemtractor.extract_network_from_sbml ()
-    # net.calc_genenet ()
-    if export["network_format"] == "sbml":
-      net.export_en_sbml (outputFile.name, gemtractor, sbml.getModel ().getId (), sbml.getModel ().getName (), 
-          filter_species = filter_species, 
-          filter_reactions = filter_reactions,
-          filter_genes = filter_enzymes,
-          filter_gene_complexes = filter_enzyme_complexes,
-          remove_reaction_enzymes_removed = remove_reaction_enzymes_removed,
-          remove_ghost_species = remove_ghost_species,
-          discard_fake_enzymes = discard_fake_enzymes,
-          remove_reaction_missing_species = remove_reaction_missing_species,
-          removing_enzyme_removes_complex = removing_enzyme_removes_complex)
-      if os.path.exists(outputFile.name):
-        return Utils.serve_file (outputFile.name, "gemtracted-model.sbml", "application/xml")
-      else:
-        return HttpResponseServerError ("couldn't generate the sbml file")
-    elif export["network_format"] == "dot":
-      net.export_en_dot (outputFile.name)
-      if os.path.exists(outputFile.name):
-        return Utils.serve_file (outputFile.name, "gemtracted-model.dot", "application/dot")
-      else:
-        return HttpResponseServerError ("couldn't generate the dot file")
-    elif export["network_format"] == "graphml":
-      net.export_en_graphml (outputFile.name)
-      if os.path.exists(outputFile.name):
-        return Utils.serve_file (outputFile.name, "gemtracted-model.graphml", "application/xml")
-      else:
-        return HttpResponseServerError ("couldn't generate the graphml file")
-    elif export["network_format"] == "gml":
-      net.export_en_gml (outputFile.name)
-      if os.path.exists(outputFile.name):
-        return Utils.serve_file (outputFile.name, "gemtracted-model.gml", "application/gml")
-      else:
-        return HttpResponseServerError ("couldn't generate the gml file")
-    elif export["network_format"] == "csv":
-      net.export_en_csv (outputFile.name)
-      if os.path.exists(outputFile.name):
-        return Utils.serve_file (outputFile.name, "gemtracted-model.csv", "text/csv")
-      else:
-        return HttpResponseServerError ("couldn't generate the csv file")
-  elif export["network_type"] == "rn":
-    net = gemtractor.extract_network_from_sbml ()
-    # net.calc_reaction_net ()
-    if export["network_format"] == "sbml":
-      net.export_rn_sbml (outputFile.name, gemtractor, sbml.getModel ().getId () + "_RN", sbml.getModel ().getName () + " converted to ReactionNetwork",
-          filter_species = filter_species, 
-          filter_reactions = filter_reactions,
-          filter_genes = filter_enzymes,
-          filter_gene_complexes = filter_enzyme_complexes,
-          remove_reaction_enzymes_removed = remove_reaction_enzymes_removed,
-          remove_ghost_species = remove_ghost_species,
-          discard_fake_enzymes = discard_fake_enzymes,
-          remove_reaction_missing_species = remove_reaction_missing_species,
-          removing_enzyme_removes_complex = removing_enzyme_removes_complex)
-      if os.path.exists(outputFile.name):
-        return Utils.serve_file (outputFile.name, "gemtracted-model.sbml", "application/xml")
-      else:
-        return HttpResponseServerError ("couldn't generate the sbml file")
-    elif export["network_format"] == "dot":
-      net.export_rn_dot (outputFile.name)
-      if os.path.exists(outputFile.name):
-        return Utils.serve_file (outputFile.name, "gemtracted-model.dot", "application/dot")
-      else:
-        return HttpResponseServerError ("couldn't generate the dot file")
-    elif export["network_format"] == "graphml":
-      net.export_rn_graphml (outputFile.name)
-      if os.path.exists(outputFile.name):
-        return Utils.serve_file (outputFile.name, "gemtracted-model.graphml", "application/xml")
-      else:
-        return HttpResponseServerError ("couldn't generate the graphml file")
-    elif export["network_format"] == "gml":
-      net.export_rn_gml (outputFile.name)
-      if os.path.exists(outputFile.name):
-        return Utils.serve_file (outputFile.name, "gemtracted-model.gml", "application/gml")
-      else:
-        return HttpResponseServerError ("couldn't generate the gml file")
-    elif export["network_format"] == "csv":
-      net.export_rn_csv (outputFile.name)
-      if os.path.exists(outputFile.name):
-        return Utils.serve_file (outputFile.name, "gemtracted-model.csv", "text/csv")
-      else:
-        return HttpResponseServerError ("couldn't generate the csv file")
-  elif export["network_type"] == "mn":
-    if export["network_format"] == "sbml":
-      SBMLWriter().writeSBML (sbml, outputFile.name)
-      if os.path.exists(outputFile.name):
-        return Utils.serve_file (outputFile.name, "gemtracted-model.sbml", "application/xml")
-      else:
-        return HttpResponseServerError ("couldn't generate the sbml file")
-    else:
-      net = gemtractor.extract_network_from_sbml ()
-      if export["network_format"] == "dot":
-        net.export_mn_dot (outputFile.name)
-        if os.path.exists(outputFile.name):
-          return Utils.serve_file (outputFile.name, "gemtracted-model.dot", "application/dot")
-        else:
-          return HttpResponseServerError ("couldn't generate the dot file")
-      elif export["network_format"] == "graphml":
-        net.export_mn_graphml (outputFile.name)
-        if os.path.exists(outputFile.name):
-          return Utils.serve_file (outputFile.name, "gemtracted-model.graphml", "application/xml")
-        else:
-          return HttpResponseServerError ("couldn't generate the graphml file")
-      elif export["network_format"] == "gml":
-        net.export_mn_gml (outputFile.name)
-        if os.path.exists(outputFile.name):
-          return Utils.serve_file (outputFile.name, "gemtracted-model.gml", "application/gml")
-        else:
-          return HttpResponseServerError ("couldn't generate the gml file")
-      elif export["network_format"] == "csv":
-        net.export_mn_csv (outputFile.name)
-        if os.path.exists(outputFile.name):
-          return Utils.serve_file (outputFile.name, "gemtracted-model.csv", "text/csv")
-        else:
-          return HttpResponseServerError ("couldn't generate the csv file")
+  returns HTTP 200 and a JSON document with the added, removed, and changed entities, as computed by :func:`modules.gemtractor.network.network.Network.diff`
   
+  :param request: the request
+  :type request: `django:HttpRequest <https://docs.djangoproject.com/en/2.2/_modules/django/http/request/#HttpRequest>`_
+  
+  :return: HTTP 200 and the differences or some other HTTP status and an error message
+  :rtype: `django:StreamingHttpResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#streaminghttpresponse-objects>`_
+  """
+  if request.method != 'POST':
+    return redirect(reverse('index:learn') + '#api')
   
-  return HttpResponseBadRequest ("job is not well formed, not sure what to do...")
+  succ, data = parse_json_body (request, ["file", "other"])
+  if not succ:
+    return HttpResponseBadRequest(data)
   
+  other = data["other"]
+  if not isinstance (other, dict):
+    return HttpResponseBadRequest ("other needs to be an object")
   
+  succ, net = build_job_network (data["file"], data)
+  if not succ:
+    return HttpResponseBadRequest (net)
+  succ, other_net = build_job_network (other.get ("file", data["file"]), other)
+  if not succ:
+    return HttpResponseBadRequest (other_net)
+  
+  # the networks are compared while the differences are streamed
+  differences = dict (net.diff (other_net, projections = data.get ("projections", True)))
+  return StreamingHttpResponse (Utils.iter_json ({"status": "success", "diff": differences}), content_type="application/json")
 
+@csrf_exempt
+def estimate (request):
+  """
+  estimate the size of exports at /api/estimate
+  
+  the job is send as JSON HTTP POST data, just like for /api/execute (see :func:`execute`).
+  the export part is optional, if it specifies a network_type or targets only those network types are estimated, otherwise all of them.
+  the projections are not calculated, see :class:`modules.gemtractor.network.estimator.Estimator`
+  
+  returns HTTP 200 and a JSON document such as:
+  
+  .. code-block:: python
+  
+    {
+      "status": "success",
+      "estimate": {
+        "en": {
+          "nodes": 1362,
+          "edges": 1243522,
+          "exact": False,
+          "seconds": 6.2,
+          "bytes": {"sbml": 431985340, "dot": 29844528, ...}
+        }
+      },
+      "max_edges": None
+    }
+  
+  the number of edges is an upper bound, unless it's 'exact'.
+  'max_edges' is the max number of edges per export of this instance (see settings.EXPORT_MAX_EDGES), or None if unlimited.
+  
+  :param request: the request
+  :type request: `django:HttpRequest <https://docs.djangoproject.com/en/2.2/_modules/django/http/request/#HttpRequest>`_
+  
+  :return: HTTP 200 and the estimates or some other HTTP status and an error message
+  :rtype: `django:JsonResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#jsonresponse-objects>`_
+  """
+  if request.method != 'POST':
+    return redirect(reverse('index:learn') + '#api')
+  
+  succ, data = parse_json_body (request, ["file"])
+  if not succ:
+    return HttpResponseBadRequest(data)
+  if not isinstance (data["file"], str):
+    return HttpResponseBadRequest ("file needs to be the SBML code of the model")
+  
+  export = data.get ("export", {})
+  if not isinstance (export, dict):
+    return HttpResponseBadRequest ("export needs to be an object")
+  network_types = Estimator.NETWORK_TYPES
+  if "targets" in export:
+    succ, targets = parse_export_targets (export["targets"])
+    if not succ:
+      return HttpResponseBadRequest (targets)
+    network_types = [network_type for network_type in Estimator.NETWORK_TYPES if any (target[0] == network_type for target in targets)]
+  elif "network_type" in export:
+    if export["network_type"] not in Exporter.NETWORK_TYPES:
+      return HttpResponseBadRequest ("unknown network_type, choose one of (en|rn|mn)")
+    network_types = [export["network_type"]]
+  
+  succ, net = build_job_network (data["file"], data)
+  if not succ:
+    return HttpResponseBadRequest (net)
+  
+  try:
+    estimates = Estimator (net).estimate (network_types, sbml_size = len (data["file"].encode ("utf-8")))
+  except Exception as e:
+    return HttpResponseBadRequest ("the model has an issue: " + getattr(e, 'message', repr(e)))
+  return JsonResponse ({"status": "success", "estimate": estimates, "max_edges": None if math.isinf (settings.EXPORT_MAX_EDGES) else int (settings.EXPORT_MAX_EDGES)})
 
 
 
@@ -1172,6 +2109,13 @@ def status (request):
         "bigg": {
           "nfiles": 5,
           "size": 59429817
+        },
+        "results": {
+          "hits": 12,
+          "misses": 3,
+          "nfiles": 3,
+          "size": 10485760,
+          "max_size": 536870912
         }
       },
       "user": {
@@ -1182,6 +2126,10 @@ def status (request):
         "generated": {
           "nfiles": 0,
           "size": 0
+        },
+        "jobs": {
+          "nfiles": 0,
+          "size": 0
         }
       }
     }
@@ -1205,6 +2153,7 @@ def status (request):
     
     if settings.HEALTH_SECRET == "" or ("secret" in data and data["secret"] == settings.HEALTH_SECRET):
       Utils.collect_stats (response)
+      response["cache"]["results"] = get_result_cache ().get_stats ()
   
   # TODO bit more information
   return JsonResponse (response)
@@ -1,5 +1,7 @@
 from django import forms
 
+from modules.gemtractor.fluxtable import FluxTable
+
 TYPE = (
     ('en', 'Enzyme-centric Network'),
     ('rn', 'Reaction-centric Network'),
@@ -11,6 +13,13 @@ FORMAT = (
     ('dot', 'DOT'),
     ('gml', 'GML'),
     ('csv', 'CSV'),
+    ('npz', 'NumPy (npz)'),
+    ('smatrix', 'Stoichiometric Matrix (npz)'),
+)
+COMPRESSION = (
+    ('', 'uncompressed'),
+    ('gzip', 'gzip'),
+    ('zip', 'ZIP'),
 )
 
 class ExportForm (forms.Form):
@@ -23,8 +32,14 @@ class ExportForm (forms.Form):
   discard_fake_enzymes = forms.BooleanField(required=False)
   remove_reaction_missing_species = forms.BooleanField(required=False)
   removing_enzyme_removes_complex = forms.BooleanField(required=False)
+  flux_trimming = forms.BooleanField(required=False)
+  flux_epsilon = forms.FloatField(required=False, min_value=0)
+  reversibility_from_bounds = forms.BooleanField(required=False)
   network_format = forms.ChoiceField(choices=FORMAT)
+  compression = forms.ChoiceField(choices=COMPRESSION, required=False)
   def clean(self):
       cleaned_data = super().clean()
+      if cleaned_data.get("flux_epsilon") is None:
+        cleaned_data["flux_epsilon"] = FluxTable.DEFAULT_EPSILON
       if cleaned_data.get("network_type") == "en":
         cleaned_data["remove_reaction_enzymes_removed"] = True;
@@ -97,6 +97,15 @@ class GemtractTest(TestCase):
         uploaded_file = Utils.get_upload_path (response.json ()["data"]["session"]["model_id"])
         self.assertTrue(os.path.isfile (uploaded_file))
         
+        # visits mark the session's reference as used, but leave the model untouched, so its fingerprint stays valid
+        os.utime (uploaded_file, (1000, 1000))
+        reference = Utils.get_upload_reference_path (self.client.session.session_key)
+        os.utime (reference, (1000, 1000))
+        response = self.client.get('/gemtract/filter')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual (os.path.getmtime (uploaded_file), 1000)
+        self.assertGreater (os.path.getmtime (reference), 1000)
+        
         os.remove (uploaded_file)
         
         
@@ -132,6 +141,25 @@ class GemtractTest(TestCase):
         self.assertEqual("/gemtract/", response["location"])
     
     
+  def test_export_upload_id (self):
+    d = tempfile.TemporaryDirectory()
+    with self.settings(STORAGE=d.name):
+      with open("test/gene-filter-example.xml") as fp:
+        response = self.client.post('/gemtract/', {"custom-model": fp})
+        self.assertEqual(response.status_code, 302)
+      
+      # the exports of uploaded models are named after the model, not after the stored upload
+      form = self._create_export ('en', 'sbml', False, True)
+      self.assertTrue (form.is_valid())
+      response = self.client.post('/api/export', form.cleaned_data)
+      self.assertEqual(response.status_code, 200)
+      data = response.json()
+      response = self.client.post('/api/serve/' + data["name"] + "/" + data["mime"])
+      valid, sbml = self._valid_sbml (b"".join (response.streaming_content))
+      self.assertTrue (valid)
+      self.assertEqual (sbml.getModel ().getId (), "modelid_GEMtracted_EnzymeNetwork")
+    
+    
   def test_workflow_upload (self):
     d = tempfile.TemporaryDirectory()
     with self.settings(STORAGE=d.name):
@@ -190,7 +218,7 @@ class GemtractTest(TestCase):
         self.assertTrue(len(data["name"]) > 0)
         self.assertTrue(len(data["mime"]) > 0)
         response = self.client.post('/api/serve/' + data["name"] + "/" + data["mime"])
-        valid, sbml_mn = self._valid_sbml (response.content)
+        valid, sbml_mn = self._valid_sbml (b"".join (response.streaming_content))
         self.assertTrue (valid, msg="invalid SBML of rn")
         
         mnSpecies = sbml_mn.getModel ().getNumSpecies ()
@@ -209,7 +237,7 @@ class GemtractTest(TestCase):
         self.assertTrue(len(data["name"]) > 0)
         self.assertTrue(len(data["mime"]) > 0)
         response = self.client.post('/api/serve/' + data["name"] + "/" + data["mime"])
-        valid, sbml_en = self._valid_sbml (response.content)
+        valid, sbml_en = self._valid_sbml (b"".join (response.streaming_content))
         self.assertTrue (valid, msg="invalid SBML of en")
         
         enSpecies = sbml_en.getModel ().getNumSpecies ()
@@ -228,7 +256,7 @@ class GemtractTest(TestCase):
         self.assertTrue(len(data["name"]) > 0)
         self.assertTrue(len(data["mime"]) > 0)
         response = self.client.post('/api/serve/' + data["name"] + "/" + data["mime"])
-        valid, sbml_rn = self._valid_sbml (response.content)
+        valid, sbml_rn = self._valid_sbml (b"".join (response.streaming_content))
         self.assertTrue (valid, msg="invalid SBML of en")
         
         rnSpecies = sbml_rn.getModel ().getNumSpecies ()
@@ -249,8 +277,9 @@ class GemtractTest(TestCase):
         self.assertTrue(len(data["name"]) > 0)
         self.assertTrue(len(data["mime"]) > 0)
         response = self.client.post('/api/serve/' + data["name"] + "/" + data["mime"])
-        self.assertTrue (self._valid_xml (response.content))
-        c = response.content.decode("utf-8")
+        content = b"".join (response.streaming_content)
+        self.assertTrue (self._valid_xml (content))
+        c = content.decode("utf-8")
         self.assertEqual (c.count ("<node "), mnSpecies + mnReactions)
         self.assertEqual (c.count (">species</data"), mnSpecies)
         self.assertEqual (c.count (">reaction<"), mnReactions)
@@ -266,8 +295,9 @@ class GemtractTest(TestCase):
         self.assertTrue(len(data["name"]) > 0)
         self.assertTrue(len(data["mime"]) > 0)
         response = self.client.post('/api/serve/' + data["name"] + "/" + data["mime"])
-        self.assertTrue (self._valid_xml (response.content))
-        c = response.content.decode("utf-8")
+        content = b"".join (response.streaming_content)
+        self.assertTrue (self._valid_xml (content))
+        c = content.decode("utf-8")
         self.assertEqual (c.count ("<node "), enSpecies)
         self.assertEqual (c.count (">enzyme</data") + c.count (">enzyme_complex</data"), enSpecies)
         self.assertEqual (c.count ("<edge"), enReactions)
@@ -282,8 +312,9 @@ class GemtractTest(TestCase):
         self.assertTrue(len(data["name"]) > 0)
         self.assertTrue(len(data["mime"]) > 0)
         response = self.client.post('/api/serve/' + data["name"] + "/" + data["mime"])
-        self.assertTrue (self._valid_xml (response.content))
-        c = response.content.decode("utf-8")
+        content = b"".join (response.streaming_content)
+        self.assertTrue (self._valid_xml (content))
+        c = content.decode("utf-8")
         self.assertEqual (c.count ("<node "), rnSpecies)
         self.assertEqual (c.count (">reaction</data"), rnSpecies)
         self.assertEqual (c.count ("<edge"), rnReactions)
@@ -298,7 +329,7 @@ class GemtractTest(TestCase):
         self.assertTrue(len(data["name"]) > 0)
         self.assertTrue(len(data["mime"]) > 0)
         response = self.client.post('/api/serve/' + data["name"] + "/" + data["mime"])
-        c = response.content.decode("utf-8")
+        c = b"".join (response.streaming_content).decode("utf-8")
         self.assertEqual (c.count ("node ["), mnSpecies + mnReactions)
         self.assertEqual (c.count ("edge ["), mnEdges)
         
@@ -312,7 +343,7 @@ class GemtractTest(TestCase):
         self.assertTrue(len(data["name"]) > 0)
         self.assertTrue(len(data["mime"]) > 0)
         response = self.client.post('/api/serve/' + data["name"] + "/" + data["mime"])
-        c = response.content.decode("utf-8")
+        c = b"".join (response.streaming_content).decode("utf-8")
         self.assertEqual (c.count ("node ["), enSpecies)
         self.assertEqual (c.count ("edge ["), enReactions)
         
@@ -326,7 +357,7 @@ class GemtractTest(TestCase):
         self.assertTrue(len(data["name"]) > 0)
         self.assertTrue(len(data["mime"]) > 0)
         response = self.client.post('/api/serve/' + data["name"] + "/" + data["mime"])
-        c = response.content.decode("utf-8")
+        c = b"".join (response.streaming_content).decode("utf-8")
         self.assertEqual (c.count ("node ["), rnSpecies)
         self.assertEqual (c.count ("edge ["), rnReactions)
         
@@ -340,7 +371,7 @@ class GemtractTest(TestCase):
         self.assertTrue(len(data["name"]) > 0)
         self.assertTrue(len(data["mime"]) > 0)
         response = self.client.post('/api/serve/' + data["name"] + "/" + data["mime"])
-        c = response.content.decode("utf-8")
+        c = b"".join (response.streaming_content).decode("utf-8")
         self.assertEqual (c.count ("label="), mnSpecies + mnReactions)
         self.assertEqual (c.count (" -> "), mnEdges)
         
@@ -354,7 +385,7 @@ class GemtractTest(TestCase):
         self.assertTrue(len(data["name"]) > 0)
         self.assertTrue(len(data["mime"]) > 0)
         response = self.client.post('/api/serve/' + data["name"] + "/" + data["mime"])
-        c = response.content.decode("utf-8")
+        c = b"".join (response.streaming_content).decode("utf-8")
         self.assertEqual (c.count ("label="), enSpecies)
         self.assertEqual (c.count (" -> "), enReactions)
         
@@ -368,7 +399,7 @@ class GemtractTest(TestCase):
         self.assertTrue(len(data["name"]) > 0)
         self.assertTrue(len(data["mime"]) > 0)
         response = self.client.post('/api/serve/' + data["name"] + "/" + data["mime"])
-        c = response.content.decode("utf-8")
+        c = b"".join (response.streaming_content).decode("utf-8")
         self.assertEqual (c.count ("label="), rnSpecies)
         self.assertEqual (c.count (" -> "), rnReactions)
         
@@ -382,7 +413,7 @@ class GemtractTest(TestCase):
         self.assertTrue(len(data["name"]) > 0)
         self.assertTrue(len(data["mime"]) > 0)
         response = self.client.post('/api/serve/' + data["name"] + "/" + data["mime"])
-        c = response.content.decode("utf-8")
+        c = b"".join (response.streaming_content).decode("utf-8")
         self.assertEqual (c.count ("\n"), mnEdges + 1)
         
         
@@ -395,7 +426,7 @@ class GemtractTest(TestCase):
         self.assertTrue(len(data["name"]) > 0)
         self.assertTrue(len(data["mime"]) > 0)
         response = self.client.post('/api/serve/' + data["name"] + "/" + data["mime"])
-        c = response.content.decode("utf-8")
+        c = b"".join (response.streaming_content).decode("utf-8")
         self.assertEqual (c.count ("\n"), enReactions + 1)
         
         
@@ -408,7 +439,7 @@ class GemtractTest(TestCase):
         self.assertTrue(len(data["name"]) > 0)
         self.assertTrue(len(data["mime"]) > 0)
         response = self.client.post('/api/serve/' + data["name"] + "/" + data["mime"])
-        c = response.content.decode("utf-8")
+        c = b"".join (response.streaming_content).decode("utf-8")
         self.assertEqual (c.count ("\n"), rnReactions + 1)
         
         
@@ -439,7 +470,7 @@ class GemtractTest(TestCase):
         self.assertTrue(len(data["name"]) > 0)
         self.assertTrue(len(data["mime"]) > 0)
         response = self.client.post('/api/serve/' + data["name"] + "/" + data["mime"])
-        c = response.content.decode("utf-8")
+        c = b"".join (response.streaming_content).decode("utf-8")
         self.assertEqual (c.count ("label="), 12)
         self.assertEqual (c.count (" -> "), enReactions)
         
@@ -451,7 +482,7 @@ class GemtractTest(TestCase):
         self.assertTrue(len(data["name"]) > 0)
         self.assertTrue(len(data["mime"]) > 0)
         response = self.client.post('/api/serve/' + data["name"] + "/" + data["mime"])
-        c = response.content.decode("utf-8")
+        c = b"".join (response.streaming_content).decode("utf-8")
         # b, c, and b+c should now be removed:
         self.assertEqual (c.count ("label="), 9)
         
@@ -15,10 +15,13 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import time
 
 from django.shortcuts import redirect, render, reverse
 
 from modules.gemtractor.constants import Constants
+from modules.gemtractor.exceptions import InvalidFluxTable
+from modules.gemtractor.fluxtable import FluxTable
 from modules.gemtractor.utils import Utils
 
 from .forms import ExportForm
@@ -64,11 +67,17 @@ def model_exists (request):
   :return: true if the user's model exists
   :rtype: bool
   """
-  if not Constants.SESSION_MODEL_ID in request.session:
+  if not Constants.SESSION_MODEL_ID in request.session or not Constants.SESSION_MODEL_TYPE in request.session:
     return False
   
-  if Constants.SESSION_MODEL_TYPE in request.session and os.path.isfile (Utils.get_model_path (request.session[Constants.SESSION_MODEL_TYPE], request.session[Constants.SESSION_MODEL_ID], request.session.session_key)):
-    os.utime (Utils.get_model_path (request.session[Constants.SESSION_MODEL_TYPE], request.session[Constants.SESSION_MODEL_ID], request.session.session_key))
+  model_path = Utils.get_model_path (request.session[Constants.SESSION_MODEL_TYPE], request.session[Constants.SESSION_MODEL_ID], request.session.session_key)
+  if os.path.isfile (model_path):
+    # touching the model would invalidate its fingerprint, see Utils.get_file_hash
+    if request.session[Constants.SESSION_MODEL_TYPE] == Constants.SESSION_MODEL_TYPE_UPLOAD:
+      # the session's reference keeps the upload alive
+      Utils.touch_upload (request.session.session_key)
+    elif time.time () - os.path.getmtime (model_path) > Utils.MODEL_TOUCH_INTERVAL:
+      os.utime (model_path)
     return True
   
   return False
@@ -100,12 +109,8 @@ def index(request):
     Utils.rm_flux_file (request)
     model = request.FILES['custom-model']
     
-    filename = Utils.get_upload_path (request.session.session_key)
-    with open(filename, 'wb+') as destination:
-      for chunk in model.chunks():
-        destination.write(chunk)
-    
-    request.session[Constants.SESSION_MODEL_ID] = os.path.basename(filename)
+    # the model is stored by its content, so every model is stored only once
+    request.session[Constants.SESSION_MODEL_ID] = Utils.store_upload (request.session.session_key, model.chunks())
     request.session[Constants.SESSION_MODEL_NAME] = model.name
     request.session[Constants.SESSION_MODEL_TYPE] = Constants.SESSION_MODEL_TYPE_UPLOAD
     Utils.del_session_key (request, None, Constants.SESSION_FILTER_SPECIES)
@@ -156,16 +161,19 @@ def filter(request):
   if Constants.SESSION_MODEL_ID not in request.session:
     return redirect('gemtract:index')
   
+  error = False
   if request.method == 'POST' and 'fbresults' in request.FILES and request.FILES['fbresults']:
-    model = request.FILES['fbresults']
+    fluxes = request.FILES['fbresults']
     
-    filename = Utils.get_upload_path (request.session.session_key)
-    with open(filename + "-fb-results", 'wb+') as destination:
-      for chunk in model.chunks():
-        destination.write(chunk)
+    # parse the fluxes once, so we do not need to parse the CSV whenever the fluxes are needed
+    try:
+      flux_table = FluxTable.parse_csv (line.decode ("utf-8", errors = "replace") for line in fluxes)
+      flux_table.save (Utils.get_upload_path (request.session.session_key) + "-fb-results")
+    except InvalidFluxTable as e:
+      error = "Cannot integrate your flux balance results: " + str (e)
   
   context = __prepare_context (request)
-  context['error'] = False
+  context['error'] = error
   if not model_exists (request):
     return redirect('gemtract:index')
   
@@ -199,7 +207,8 @@ def export(request):
   context = __prepare_context (request)
   context['error'] = False
   
-  context['form'] = ExportForm(initial={'network_type':'en','remove_reaction_genes_removed': True, 'remove_reaction_missing_species': False,'remove_ghost_species': False, 'discard_fake_enzymes': False, 'removing_enzyme_removes_complex': True, 'network_format': 'sbml'})
+  context['form'] = ExportForm(initial={'network_type':'en','remove_reaction_genes_removed': True, 'remove_reaction_missing_species': False,'remove_ghost_species': False, 'discard_fake_enzymes': False, 'removing_enzyme_removes_complex': True, 'flux_trimming': False, 'flux_epsilon': FluxTable.DEFAULT_EPSILON, 'reversibility_from_bounds': False, 'network_format': 'sbml', 'compression': ''})
+  context['has_fluxes'] = os.path.isfile (Utils.get_upload_path (request.session.session_key) + "-fb-results")
   context["NEXT_l"] = False
   context["PREV_s"] = "Step 2"
   context["PREV_t"] = "Trim the Model"
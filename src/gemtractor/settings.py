@@ -148,6 +148,7 @@ STATICFILES_DIRS = (
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 # allow for models up to 30mb
+# models sent to /api/execute as multipart or raw bodies are streamed to disk and not limited by this (see MAX_MODEL_SIZE)
 DATA_UPLOAD_MAX_MEMORY_SIZE=30*1024*1024
 
 DJANGO_LOG_LEVEL = os.getenv('DJANGO_LOG_LEVEL', 'INFO')
@@ -223,6 +224,8 @@ def parse_env_var (key, default):
 KEEP_UPLOADED = parse_env_var ('KEEP_UPLOADED', 1.5*60*60)
 # how long to keep generated files (there are basically just for immediate download)
 KEEP_GENERATED = parse_env_var ('KEEP_GENERATED', 10*60)
+# how long to keep the results of jobs that were submitted to /api/jobs after they finished
+KEEP_JOBS = parse_env_var ('KEEP_JOBS', 60*60)
 
 # how long to keep the bigg model list (that is the list of available models from bigg)
 CACHE_BIGG = parse_env_var ('CACHE_BIGG', 60*60*24)
@@ -243,7 +246,50 @@ URLS_BIOMODEL_INFO = lambda model_id: "https://www.ebi.ac.uk/biomodels/"+model_i
 URLS_BIOMODEL_SBML = lambda model_id, filename: "https://www.ebi.ac.uk/biomodels/model/download/"+model_id+"?filename="+filename
 
 # what's the max number of entities to allow in the browser
-MAX_ENTITIES_FILTER = parse_env_var ('MAX_ENTITIES_FILTER', 100000)
+MAX_ENTITIES_FILTER = parse_env_var ('MAX_ENTITIES_FILTER', 250000)
+
+# for how many models should the tables of bigger networks be kept in memory
+ENTITY_TABLE_CACHE = parse_env_var ('ENTITY_TABLE_CACHE', 4)
+
+# for how many sessions should the consistency of the filters be kept in memory
+CONSISTENCY_CACHE = parse_env_var ('CONSISTENCY_CACHE', 16)
+
+# the max number of bytes of a (decompressed) model sent to /api/execute
+# larger models are rejected, unlimited if <= 0
+MAX_MODEL_SIZE = parse_env_var ('MAX_MODEL_SIZE', 1024*1024*1024)
+
+# the max number of edges of a single export, as estimated by the degrees of the species (see modules.gemtractor.network.estimator)
+# larger exports are rejected, unlimited if <= 0
+EXPORT_MAX_EDGES = parse_env_var ('EXPORT_MAX_EDGES', 0)
+
+# how many exports of a bundle should be written in parallel
+EXPORT_THREADS = max (1, int (os.getenv ('EXPORT_THREADS', 4)))
+
+# how many processes may write a single large export of the reaction- or enzyme-centric network (see modules.gemtractor.network.segmentwriter)
+# only the exports of the web interface (/api/export) are written by several processes, exports of the other endpoints run in threads
+# 1 writes every export in a single process
+EXPORT_PROCESSES = max (1, int (os.getenv ('EXPORT_PROCESSES', 1)))
+
+# how many jobs submitted to /api/jobs should be executed in parallel (per server process)
+JOB_WORKERS = max (1, int (os.getenv ('JOB_WORKERS', 2)))
+# how many jobs may wait to be executed (per server process), further jobs are rejected
+JOB_QUEUE_SIZE = parse_env_var ('JOB_QUEUE_SIZE', 100)
+
+# how many jobs may be submitted to /api/batch at once, unlimited if <= 0
+BATCH_MAX_JOBS = parse_env_var ('BATCH_MAX_JOBS', 1000)
+# how many processes may execute the jobs of a batch in parallel (see modules.gemtractor.batch)
+BATCH_PROCESSES = max (1, int (os.getenv ('BATCH_PROCESSES', os.cpu_count () or 1)))
+
+# how many bytes of exports may be cached, identical jobs to /api/execute and /api/export are then served from the cache (see modules.gemtractor.resultcache)
+# the least recently used exports are evicted first, 0 disables the cache
+RESULT_CACHE_SIZE = max (0, int (os.getenv ('RESULT_CACHE_SIZE', 512*1024*1024)))
+
+# internal nginx location that maps to the STORAGE directory
+# if it is set, files in the STORAGE are delivered by nginx using an X-Accel-Redirect, otherwise they are streamed by Django
+ACCEL_REDIRECT = os.getenv ('ACCEL_REDIRECT', '')
+
+# compress the network on the fly if the browser accepts gzip
+GZIP_NETWORK = os.getenv('GZIP_NETWORK', 'True').lower () in ["true", "yes", "t", "y", "1"]
 
 # health secret to protect the healtmonitoring
 # if it is set, it must be sent as POST '{"secret": XXX}', otherwise /api/status won't export the health information
@@ -39,9 +39,23 @@ def learn(request):
     context["STORAGE_DIR"] = settings.STORAGE
     context["KEEP_UPLOADED"] = settings.KEEP_UPLOADED
     context["KEEP_GENERATED"] = settings.KEEP_GENERATED
+    context["KEEP_JOBS"] = settings.KEEP_JOBS
     context["CACHE_BIGG"] = settings.CACHE_BIGG
     context["CACHE_BIGG_MODEL"] = settings.CACHE_BIGG_MODEL
     context["CACHE_BIOMODELS"] = settings.CACHE_BIOMODELS
     context["CACHE_BIOMODELS_MODEL"] = settings.CACHE_BIOMODELS_MODEL
     context["MAX_ENTITIES_FILTER"] = settings.MAX_ENTITIES_FILTER
+    context["GZIP_NETWORK"] = settings.GZIP_NETWORK
+    context["ENTITY_TABLE_CACHE"] = settings.ENTITY_TABLE_CACHE
+    context["CONSISTENCY_CACHE"] = settings.CONSISTENCY_CACHE
+    context["EXPORT_THREADS"] = settings.EXPORT_THREADS
+    context["EXPORT_PROCESSES"] = settings.EXPORT_PROCESSES
+    context["MAX_MODEL_SIZE"] = settings.MAX_MODEL_SIZE
+    context["EXPORT_MAX_EDGES"] = settings.EXPORT_MAX_EDGES
+    context["JOB_WORKERS"] = settings.JOB_WORKERS
+    context["JOB_QUEUE_SIZE"] = settings.JOB_QUEUE_SIZE
+    context["BATCH_MAX_JOBS"] = settings.BATCH_MAX_JOBS
+    context["BATCH_PROCESSES"] = settings.BATCH_PROCESSES
+    context["RESULT_CACHE_SIZE"] = settings.RESULT_CACHE_SIZE
+    context["ACCEL_REDIRECT"] = settings.ACCEL_REDIRECT
     return render(request, 'index/learn.html', context)
@@ -0,0 +1,170 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+#
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .gemtractor import GEMtractor
+
+# the GEMtractor of the model in a worker process, see _init_worker
+_GEMTRACTOR = None
+
+
+class Batch:
+  """
+  run many jobs against a single model
+
+  every job trims its own clone of the model, see :func:`.gemtractor.GEMtractor.clone`.
+  the jobs are independent, so they run in parallel in up to `processes` worker processes.
+  the workers are started by a fork server, as forking the threaded web server directly may deadlock the workers.
+  thus, they do not inherit the parsed model, but every worker parses the model file once and runs all its jobs on clones of it.
+  if the platform does not support a fork server or if `processes` is 1, the jobs run one after the other in this process.
+
+  a job is run by calling `run_job (gemtractor, job, file_path)`, which needs to write the job's result to `file_path` and may return a dict of information about the result, such as a file name.
+  if it raises an exception, the job failed.
+  to run in a worker process, `run_job` and the jobs need to be picklable, e.g. `run_job` should be a module-level function.
+
+  .. code-block:: python
+
+    for result in Batch (gemtractor, run_job, 4).run (jobs, directory):
+      print (result["status"])
+
+  :param gemtractor: the GEMtractor of the model
+  :param run_job: the function that runs a job
+  :param processes: the max number of worker processes
+  :type gemtractor: :class:`.gemtractor.GEMtractor`
+  :type run_job: function
+  :type processes: int
+  """
+
+  SUCCESS = "success"
+  FAILED = "failed"
+
+  def __init__ (self, gemtractor, run_job, processes = None):
+    self.__logger = logging.getLogger(__name__)
+    self.gemtractor = gemtractor
+    self.run_job = run_job
+    self.processes = processes
+
+  @staticmethod
+  def is_parallel (processes):
+    """
+    can the jobs of a batch run in parallel?
+
+    that requires more than one process and a platform that supports a fork server.
+
+    :param processes: the max number of worker processes, or None
+    :type processes: int
+
+    :return: true if the jobs run in worker processes
+    :rtype: bool
+    """
+    return processes is not None and processes > 1 and "forkserver" in multiprocessing.get_all_start_methods ()
+
+  def run (self, jobs, directory):
+    """
+    run the jobs
+
+    the result of the n-th job is written to the file `n` in the directory.
+    the results are generated in the order of the jobs, as soon as the job and all jobs before it are finished.
+    if the iteration stops early, e.g. as the client disconnected, the jobs that did not start yet are cancelled and the running jobs are killed.
+
+    :param jobs: the jobs
+    :param directory: where to store the results
+    :type jobs: list
+    :type directory: str
+
+    :return: the results, dicts of the 'status' (:data:`SUCCESS` or :data:`FAILED`), the 'path' to the result, and the 'error' or what the job returned
+    :rtype: generator of dict
+    """
+    paths = [os.path.join (directory, str (n)) for n in range (len (jobs))]
+    if not Batch.is_parallel (self.processes):
+      for job, path in zip (jobs, paths):
+        yield self.run_one (job, path)
+      return
+
+    pool = ProcessPoolExecutor (max_workers = self.processes, mp_context = multiprocessing.get_context ("forkserver"),
+      initializer = _init_worker, initargs = (self.gemtractor.get_sbml_file (),))
+    finished = False
+    try:
+      futures = [pool.submit (_run_job, self.run_job, job, path) for job, path in zip (jobs, paths)]
+      for future, path in zip (futures, paths):
+        try:
+          yield future.result ()
+        except Exception as e:
+          # e.g. the worker died
+          yield {"status": Batch.FAILED, "path": path, "error": getattr(e, 'message', repr(e))}
+      finished = True
+    finally:
+      # do not block until the running jobs are done, nobody is waiting for them anymore
+      processes = list ((pool._processes or {}).values ())
+      pool.shutdown (wait = False, cancel_futures = True)
+      if not finished:
+        for process in processes:
+          process.terminate ()
+
+  def run_one (self, job, path):
+    """
+    run a single job on a clone of the model
+
+    :param job: the job
+    :param path: where to store the result
+    :type job: anything that `run_job` understands
+    :type path: str
+
+    :return: the result, see :func:`run`
+    :rtype: dict
+    """
+    try:
+      result = dict (self.run_job (self.gemtractor.clone (), job, path) or {})
+      result["status"] = Batch.SUCCESS
+    except Exception as e:
+      self.__logger.info ("job of batch failed: " + getattr(e, 'message', repr(e)))
+      if os.path.exists (path):
+        os.remove (path)
+      result = {"status": Batch.FAILED, "error": getattr(e, 'message', repr(e))}
+    result["path"] = path
+    return result
+
+
+def _init_worker (sbml_file):
+  """
+  parse the model in a new worker process of :func:`Batch.run`
+
+  :param sbml_file: the path to the model
+  :type sbml_file: str
+  """
+  global _GEMTRACTOR
+  _GEMTRACTOR = GEMtractor (sbml_file)
+
+
+def _run_job (run_job, job, path):
+  """
+  run a job of a batch, runs in a worker process of :func:`Batch.run`
+
+  :param run_job: the function that runs the job
+  :param job: the job
+  :param path: where to store the result
+  :type run_job: function
+  :type job: anything that `run_job` understands
+  :type path: str
+
+  :return: the result, see :func:`Batch.run`
+  :rtype: dict
+  """
+  return Batch (_GEMTRACTOR, run_job).run_one (job, path)
@@ -26,6 +26,7 @@ class Constants:
   SESSION_FILTER_ENZYMES          = "filter_enzymes"
   SESSION_FILTER_ENZYME_COMPLEXES = "filter_enzyme_complexes"
   SESSION_HAS_SESSION             = "has_session"
+  SESSION_FINGERPRINTS            = "fingerprints"
   
   SESSION_MODEL_TYPE_UPLOAD       = "upload"
   SESSION_MODEL_TYPE_BIGG         = "bigg"
@@ -33,6 +34,8 @@ class Constants:
   SESSION_HAS_SESSION_VALUE       = "yes"
   
   STORAGE_UPLOAD_DIR              = "UPLOADED"
+  STORAGE_UPLOAD_SESSIONS_DIR     = "SESSIONS"
   STORAGE_BIGG_DIR                = "BIGG"
   STORAGE_BIOMODELS_DIR           = "BIOMODELS"
   STORAGE_GENERATED_DIR           = "GENERATED"
+  STORAGE_JOBS_DIR                = "JOBS"
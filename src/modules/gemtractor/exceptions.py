@@ -54,3 +54,28 @@ class TooBigForBrowser (Exception):
   signals that the model is too big for the browser
   """
   pass
+class InvalidFluxTable (Exception):
+  """
+  signals that the user supplied flux results that the GEMtractor doesn't understand
+  """
+  pass
+class JobQueueFull (Exception):
+  """
+  signals that too many jobs are waiting to be executed
+  """
+  pass
+class JobCancelled (Exception):
+  """
+  signals that a job was cancelled while it was running
+  """
+  pass
+class TooBigForServer (Exception):
+  """
+  signals that a model is too big to be processed by the server
+  """
+  pass
+class UnsupportedCompression (Exception):
+  """
+  signals that a model is compressed in a way that the GEMtractor cannot decompress
+  """
+  pass
@@ -0,0 +1,319 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+#
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import contextlib
+import gzip
+import io
+import logging
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from libsbml import SBMLWriter
+
+
+class Exporter:
+  """
+  export the networks of a trimmed model in several formats
+
+  the model is parsed and trimmed once, see :func:`.gemtractor.GEMtractor.get_sbml`, and the network is extracted once, see :func:`.gemtractor.GEMtractor.extract_network_from_sbml`.
+  every projection (reaction- or enzyme-centric network) is calculated at most once, no matter how many formats are requested.
+
+  :param gemtractor: the GEMtractor, which already trimmed the model
+  :param sbml: the trimmed SBML document, as returned by :func:`.gemtractor.GEMtractor.get_sbml`
+  :param network: the network extracted from the trimmed model
+  :param model_id: the model's identifier
+  :param model_name: the model's name
+  :param trimming: the filters and trimming options that were applied, will be attached to SBML exports (see :func:`.network.network.Network.export_rn_sbml`)
+  :param processes: the max number of processes to write a single large export of a projection, see :class:`.network.segmentwriter.SegmentWriter`, or None to write every export in a single process. several processes are only used for exports that are written to a path, without compression or checkpoint, in the main thread (see :func:`.network.segmentwriter.SegmentWriter.is_applicable`), so the exports of :func:`bundle`, which run in threads, are always written by a single process
+  :param checkpoint: function that is called every :data:`CHECKPOINT_INTERVAL` seconds while an export is written, it may raise an exception to abort the export (e.g. if a job was cancelled), or None
+  :type gemtractor: :class:`.gemtractor.GEMtractor`
+  :type sbml: `libsbml:SBMLDocument <http://sbml.org/Special/Software/libSBML/docs/python-api/classlibsbml_1_1_s_b_m_l_document.html>`_
+  :type network: :class:`.network.network.Network`
+  :type model_id: str
+  :type model_name: str
+  :type trimming: dict
+  :type processes: int
+  :type checkpoint: function
+  """
+
+  NETWORK_TYPES = {
+    "en": "EnzymeNetwork",
+    "rn": "ReactionNetwork",
+    "mn": "MetabolicNetwork",
+    }
+  FORMATS = {
+    "sbml": ("sbml", "application/xml"),
+    "dot": ("dot", "application/dot"),
+    "graphml": ("graphml", "application/xml"),
+    "gml": ("gml", "application/gml"),
+    "csv": ("csv", "text/csv"),
+    "npz": ("npz", "application/octet-stream"),
+    "smatrix": ("smatrix.npz", "application/octet-stream"),
+    }
+  # formats that are written to binary instead of text streams
+  BINARY_FORMATS = {"npz", "smatrix"}
+  # formats of the projections that can be written by several processes
+  PARALLEL_FORMATS = {"dot", "gml", "graphml", "csv"}
+  # formats that are only available for the metabolite-reaction network
+  MN_FORMATS = {"smatrix"}
+  COMPRESSIONS = {
+    "gzip": ("gz", "application/gzip"),
+    "zip": ("zip", "application/zip"),
+    }
+  # how often (in seconds) the checkpoint is called while an export is written
+  CHECKPOINT_INTERVAL = 1
+
+  def __init__ (self, gemtractor, sbml, network, model_id, model_name = None, trimming = None, processes = None, checkpoint = None):
+    self.__logger = logging.getLogger(__name__)
+    self.gemtractor = gemtractor
+    self.sbml = sbml
+    self.network = network
+    self.model_id = model_id
+    self.model_name = model_name
+    self.trimming = trimming or {}
+    self.processes = processes
+    self.checkpoint = checkpoint
+
+  @staticmethod
+  def is_valid_target (network_type, network_format):
+    """
+    is this a supported combination of network type and format?
+
+    :param network_type: the network type, see :data:`NETWORK_TYPES`
+    :param network_format: the format, see :data:`FORMATS`
+    :type network_type: str
+    :type network_format: str
+
+    :return: true if the target can be exported
+    :rtype: bool
+    """
+    if network_format in Exporter.MN_FORMATS and network_type != "mn":
+      return False
+    return network_type in Exporter.NETWORK_TYPES and network_format in Exporter.FORMATS
+
+  @staticmethod
+  def get_file_name (prefix, network_type, network_format, compression = None):
+    """
+    get the file name of an export
+
+    :param prefix: the prefix of the file name, e.g. the model's name
+    :param network_type: the network type, see :data:`NETWORK_TYPES`
+    :param network_format: the format, see :data:`FORMATS`
+    :param compression: the compression, see :data:`COMPRESSIONS`, or None
+    :type prefix: str
+    :type network_type: str
+    :type network_format: str
+    :type compression: str
+
+    :return: the file name, such as 'prefix-EnzymeNetwork.sbml' or 'prefix-EnzymeNetwork.sbml.gz'
+    :rtype: str
+    """
+    file_name = prefix + "-" + Exporter.NETWORK_TYPES[network_type] + "." + Exporter.FORMATS[network_format][0]
+    if compression is not None:
+      file_name = file_name + "." + Exporter.COMPRESSIONS[compression][0]
+    return file_name
+
+  @staticmethod
+  @contextlib.contextmanager
+  def open_compressed (file_path, compression, name, binary = False):
+    """
+    open a stream that compresses everything that is written to a file
+
+    use it as a context manager, the file is complete when the context is left:
+
+    .. code-block:: python
+
+      with Exporter.open_compressed (file_path, "gzip", "network.dot") as stream:
+        network.export_en_dot (stream)
+
+    :param file_path: where to store the compressed file
+    :param compression: the compression, see :data:`COMPRESSIONS`
+    :param name: the name of the file in a ZIP archive
+    :param binary: open a binary instead of a text stream?
+    :type file_path: str
+    :type compression: str
+    :type name: str
+    :type binary: bool
+
+    :return: the writable stream
+    :rtype: file-like object
+
+    :raises ValueError: if the compression is not supported
+    """
+    if compression == "gzip":
+      if binary:
+        with gzip.open (file_path, "wb") as stream:
+          yield stream
+      else:
+        with gzip.open (file_path, "wt", encoding = "utf-8") as stream:
+          yield stream
+    elif compression == "zip":
+      with zipfile.ZipFile (file_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        with archive.open (name, "w", force_zip64 = True) as entry:
+          if binary:
+            yield entry
+          else:
+            with io.TextIOWrapper (entry, encoding = "utf-8") as stream:
+              yield stream
+    else:
+      raise ValueError ("unsupported compression " + str (compression))
+
+  def prepare (self, network_types):
+    """
+    calculate the projections that are required for some network types
+
+    the exports would calculate them on demand, but they must not be calculated concurrently.
+
+    :param network_types: the network types that will be exported
+    :type network_types: iterable of str
+    """
+    network_types = set (network_types)
+    if "rn" in network_types and not self.network.have_reaction_net:
+      self.network.calc_reaction_net ()
+    if "en" in network_types and not self.network.have_gene_net:
+      self.network.calc_genenet ()
+
+  def export (self, network_type, network_format, file_path, compression = None, name = None):
+    """
+    export a network
+
+    :param network_type: the network type, see :data:`NETWORK_TYPES`
+    :param network_format: the format, see :data:`FORMATS`
+    :param file_path: where to store the export, a path or a writable stream (only without compression), binary for the :data:`BINARY_FORMATS` and text otherwise
+    :param compression: compress the export while it is written, see :data:`COMPRESSIONS`, or None
+    :param name: the name of the export in a ZIP archive, defaults to the file name of :func:`get_file_name` with the prefix 'gemtracted-model'
+    :type network_type: str
+    :type network_format: str
+    :type file_path: str or file-like object
+    :type compression: str
+    :type name: str
+
+    :raises ValueError: if the target or the compression is not supported
+    """
+    if not Exporter.is_valid_target (network_type, network_format):
+      raise ValueError ("cannot export " + str (network_type) + " as " + str (network_format))
+    if compression is not None:
+      if name is None:
+        name = Exporter.get_file_name ("gemtracted-model", network_type, network_format)
+      with Exporter.open_compressed (file_path, compression, name, network_format in Exporter.BINARY_FORMATS) as stream:
+        self.export (network_type, network_format, self.__watch (stream))
+    elif self.checkpoint is not None and isinstance (file_path, str):
+      # the export is written to a stream, so the checkpoint is called while it is written
+      with open (file_path, "wb" if network_format in Exporter.BINARY_FORMATS else "w") as stream:
+        self.export (network_type, network_format, self.__watch (stream))
+    elif network_format == "smatrix":
+      self.gemtractor.export_stoichiometric_matrix (file_path)
+    elif network_format == "sbml":
+      if network_type != "mn":
+        getattr (self.network, "export_" + network_type + "_sbml") (file_path, self.gemtractor, self.model_id, self.model_name, **self.trimming)
+      elif isinstance (file_path, str):
+        SBMLWriter ().writeSBML (self.sbml, file_path)
+      else:
+        # libsbml cannot write to a stream
+        file_path.write (SBMLWriter ().writeSBMLToString (self.sbml))
+    elif network_type != "mn" and network_format in Exporter.PARALLEL_FORMATS:
+      getattr (self.network, "export_" + network_type + "_" + network_format) (file_path, self.processes)
+    else:
+      getattr (self.network, "export_" + network_type + "_" + network_format) (file_path)
+
+  def __watch (self, stream):
+    """
+    call the checkpoint while a stream is written
+
+    :param stream: the stream
+    :type stream: file-like object
+
+    :return: the stream, wrapped if there is a checkpoint
+    :rtype: file-like object
+    """
+    if self.checkpoint is None or isinstance (stream, _CheckpointStream):
+      return stream
+    return _CheckpointStream (stream, self.checkpoint, Exporter.CHECKPOINT_INTERVAL)
+
+  def bundle (self, targets, file_path, prefix = "gemtracted-model", threads = None):
+    """
+    export several networks into a single ZIP archive
+
+    the projections are calculated first, see :func:`prepare`.
+    then, the exports are written in parallel to a temporary directory and finally stored in the archive.
+
+    :param targets: the (network type, format) tuples to export, duplicates are exported once
+    :param file_path: where to store the ZIP archive
+    :param prefix: the prefix of the file names in the archive, see :func:`get_file_name`
+    :param threads: the max number of exports to write in parallel, or None for the default of :class:`concurrent.futures.ThreadPoolExecutor`
+    :type targets: list of tuples of str
+    :type file_path: str
+    :type prefix: str
+    :type threads: int
+
+    :return: the names of the files in the archive
+    :rtype: list of str
+
+    :raises ValueError: if a target is not supported
+    """
+    unique = []
+    for target in targets:
+      if not Exporter.is_valid_target (*target):
+        raise ValueError ("cannot export " + str (target[0]) + " as " + str (target[1]))
+      if target not in unique:
+        unique.append (target)
+    self.prepare (network_type for network_type, network_format in unique)
+
+    with tempfile.TemporaryDirectory () as directory:
+      names = [Exporter.get_file_name (prefix, network_type, network_format) for network_type, network_format in unique]
+      paths = [os.path.join (directory, name) for name in names]
+      with ThreadPoolExecutor (max_workers = threads) as pool:
+        # list() to raise the first exception of the exports
+        list (pool.map (lambda job: self.export (job[0][0], job[0][1], job[1]), zip (unique, paths)))
+      with zipfile.ZipFile (file_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, path in zip (names, paths):
+          archive.write (path, name)
+    self.__logger.info ("bundled " + str (len (names)) + " exports of " + self.model_id)
+    return names
+
+
+class _CheckpointStream:
+  """
+  a stream that calls a checkpoint every now and then while it is written, see :class:`Exporter`
+
+  everything but writing is delegated to the wrapped stream
+
+  :param stream: the wrapped stream
+  :param checkpoint: the function to call
+  :param interval: the min number of seconds between two calls
+  :type stream: file-like object
+  :type checkpoint: function
+  :type interval: float
+  """
+
+  def __init__ (self, stream, checkpoint, interval):
+    self.stream = stream
+    self.checkpoint = checkpoint
+    self.interval = interval
+    self.last = None
+
+  def write (self, data):
+    now = time.monotonic ()
+    if self.last is None or now - self.last >= self.interval:
+      self.last = now
+      self.checkpoint ()
+    return self.stream.write (data)
+
+  def __getattr__ (self, name):
+    return getattr (self.stream, name)
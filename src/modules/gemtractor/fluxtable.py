@@ -0,0 +1,246 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+#
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import csv
+import json
+import logging
+import math
+import os
+import sys
+from array import array
+
+from .exceptions import InvalidFluxTable
+from .utils import Utils
+
+
+class FluxTable:
+  """
+  the results of a flux balance (or flux variability) analysis
+
+  a table of reactions and one or more columns of fluxes, such as different scenarios or the minimum and maximum fluxes of an FVA.
+  every column is stored as an array of doubles, unknown fluxes are NaN.
+
+  flux tables are parsed from CSV once (see :func:`parse_csv`) and then stored in a binary format (see :func:`save`), which can be loaded without parsing any numbers.
+
+  :param reactions: the reaction ids
+  :param columns: the names of the flux columns
+  :param values: one array per column, aligned to the reactions
+  :type reactions: list of str
+  :type columns: list of str
+  :type values: list of array of float
+  """
+
+  MAGIC = b"GEMtractor fluxes 1\n"
+  DEFAULT_COLUMN = "flux"
+  DEFAULT_EPSILON = 1e-9
+
+  def __init__ (self, reactions, columns, values):
+    self.reactions = reactions
+    self.columns = columns
+    self.values = values
+    self.index = {reaction: n for n, reaction in enumerate (reactions)}
+
+  @staticmethod
+  def parse_csv (lines):
+    """
+    parse flux results from CSV
+
+    every row needs to contain a reaction id and one or more fluxes, the id may be in any column (e.g. 'flux,reaction_id' or 'reaction_id,flux').
+    if the first row does not contain any number, it is considered a header that names the flux columns.
+    otherwise, a single column is called 'flux' and multiple columns are called 'flux_1', 'flux_2', etc.
+    empty or non-numeric fluxes are stored as NaN.
+
+    :param lines: the lines of the CSV file
+    :type lines: iterable of str
+
+    :return: the flux table
+    :rtype: :class:`FluxTable`
+
+    :raises InvalidFluxTable: if there is no row with a reaction id
+    """
+    header = None
+    columns = None
+    reactions = []
+    values = []
+    for row in csv.reader (lines):
+      row = [cell.strip () for cell in row]
+      if not any (row):
+        continue
+      numeric = [Utils.is_number (cell) for cell in row]
+      if header is None and not reactions and not any (numeric):
+        header = row
+        continue
+      # the reaction id is the first non-numeric cell
+      id_column = numeric.index (False) if False in numeric else None
+      if id_column is None or not row[id_column]:
+        continue
+      if header is not None and columns is None:
+        # the header cell above the reaction ids does not name a flux column
+        columns = [cell for n, cell in enumerate (header) if n != id_column]
+      reactions.append (row[id_column])
+      values.append ([float (cell) if numeric[n] else math.nan for n, cell in enumerate (row) if n != id_column])
+
+    if not reactions:
+      raise InvalidFluxTable ("did not find any reaction in the flux results")
+    ncolumns = max (len (row) for row in values)
+    if columns is None or len (columns) < ncolumns:
+      if ncolumns == 1:
+        columns = [FluxTable.DEFAULT_COLUMN]
+      else:
+        columns = [FluxTable.DEFAULT_COLUMN + "_" + str (n + 1) for n in range (ncolumns)]
+    columns = columns[:ncolumns]
+    return FluxTable (reactions, columns, [array ("d", (row[n] if n < len (row) else math.nan for row in values)) for n in range (ncolumns)])
+
+  @staticmethod
+  def from_dict (fluxes):
+    """
+    create a flux table from a dict of fluxes
+
+    :param fluxes: dict that maps reaction ids to their fluxes, fluxes that cannot be converted to float are stored as NaN
+    :type fluxes: dict
+
+    :return: the flux table, with a single column 'flux'
+    :rtype: :class:`FluxTable`
+    """
+    values = array ("d")
+    for flux in fluxes.values ():
+      try:
+        values.append (float (flux))
+      except (TypeError, ValueError):
+        values.append (math.nan)
+    return FluxTable (list (fluxes), [FluxTable.DEFAULT_COLUMN], [values])
+
+  def save (self, file_path):
+    """
+    store the flux table in a binary format
+
+    the file consists of the magic line, a JSON header with the reactions and the columns, and the little-endian doubles of every column
+
+    :param file_path: where to store the table
+    :type file_path: str
+    """
+    with open (file_path, "wb") as f:
+      f.write (FluxTable.MAGIC)
+      f.write (json.dumps ({"reactions": self.reactions, "columns": self.columns}).encode ("utf-8"))
+      f.write (b"\n")
+      for column in self.values:
+        if sys.byteorder != "little":
+          column = array ("d", column)
+          column.byteswap ()
+        column.tofile (f)
+
+  @staticmethod
+  def load (file_path):
+    """
+    load a flux table
+
+    understands the binary format of :func:`save`, and falls back to :func:`parse_csv` for files in CSV format
+
+    :param file_path: the file to load
+    :type file_path: str
+
+    :return: the flux table, or None if there is no such file or if it is not a valid flux table
+    :rtype: :class:`FluxTable`
+    """
+    if not os.path.isfile (file_path):
+      return None
+    logger = logging.getLogger(__name__)
+    try:
+      with open (file_path, "rb") as f:
+        if f.read (len (FluxTable.MAGIC)) != FluxTable.MAGIC:
+          f.seek (0)
+          return FluxTable.parse_csv (line.decode ("utf-8", errors = "replace") for line in f)
+        header = json.loads (f.readline ().decode ("utf-8"))
+        values = []
+        for column in header["columns"]:
+          values.append (array ("d"))
+          values[-1].fromfile (f, len (header["reactions"]))
+          if sys.byteorder != "little":
+            values[-1].byteswap ()
+        return FluxTable (header["reactions"], header["columns"], values)
+    except (InvalidFluxTable, EOFError, ValueError, KeyError) as e:
+      logger.error ("cannot load flux table " + file_path + ": " + getattr(e, 'message', repr(e)))
+      return None
+
+  def get_column (self, column = None):
+    """
+    get the index of a column
+
+    :param column: the name of the column, or None for the default column ('flux' if there is such a column, otherwise the first column)
+    :type column: str
+
+    :return: the index of the column
+    :rtype: int
+
+    :raises KeyError: if there is no such column
+    """
+    if column is None:
+      return self.columns.index (FluxTable.DEFAULT_COLUMN) if FluxTable.DEFAULT_COLUMN in self.columns else 0
+    if column not in self.columns:
+      raise KeyError ("there is no flux column " + str (column))
+    return self.columns.index (column)
+
+  def as_dict (self, column = None):
+    """
+    get the known fluxes of a column
+
+    :param column: the name of the column, see :func:`get_column`
+    :type column: str
+
+    :return: dict that maps reaction ids to their fluxes, unknown fluxes are skipped
+    :rtype: dict
+    """
+    values = self.values[self.get_column (column)]
+    return {reaction: values[n] for n, reaction in enumerate (self.reactions) if not math.isnan (values[n])}
+
+  def align (self, reactions, column = None):
+    """
+    align a column of fluxes to a list of reactions
+
+    :param reactions: the reaction ids, e.g. the keys of :attr:`.network.network.Network.reactions`
+    :param column: the name of the column, see :func:`get_column`
+    :type reactions: iterable of str
+    :type column: str
+
+    :return: the fluxes in the order of the reactions (NaN if unknown) and the ids of the reactions in this table that are not in the list
+    :rtype: tuple of array of float and list of str
+    """
+    values = self.values[self.get_column (column)]
+    aligned = array ("d")
+    matched = set ()
+    for reaction in reactions:
+      n = self.index.get (reaction)
+      if n is None:
+        aligned.append (math.nan)
+      else:
+        aligned.append (values[n])
+        matched.add (reaction)
+    return aligned, [reaction for reaction in self.reactions if reaction not in matched]
+
+  def inactive (self, epsilon = DEFAULT_EPSILON, column = None):
+    """
+    get the reactions that do not carry any flux
+
+    :param epsilon: fluxes with an absolute value up to epsilon are considered zero
+    :param column: the name of the column, see :func:`get_column`
+    :type epsilon: float
+    :type column: str
+
+    :return: the ids of the reactions with a known flux of (about) zero
+    :rtype: list of str
+    """
+    values = self.values[self.get_column (column)]
+    return [self.reactions[n] for n, flux in enumerate (values) if abs (flux) <= epsilon]
@@ -14,9 +14,11 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+import copy
 import logging
 import math
 import re
+from array import array
 
 import pyparsing as pp
 from libsbml import FbcAssociation_parseFbcInfixAssociation, SBMLReader
@@ -24,6 +26,7 @@ from libsbml import FbcAssociation_parseFbcInfixAssociation, SBMLReader
 from .network.gene import Gene
 from .network.genecomplex import GeneComplex
 from .network.network import Network
+from .network.npzwriter import NpzWriter
 from .utils import Utils
 from .exceptions import BreakLoops, InvalidGeneExpression
 
@@ -53,6 +56,30 @@ class GEMtractor:
         e.append (self.sbml.getError(i).getMessage())
       raise IOError ("model seems to be invalid: " + str (e))
   
+  def clone (self):
+    """
+    get an independent copy of this GEMtractor
+    
+    the copy gets a clone of the SBML document instead of reading the file again, so it can be trimmed without affecting this GEMtractor.
+    
+    :return: the copy
+    :rtype: :class:`GEMtractor`
+    """
+    duplicate = copy.copy (self)
+    duplicate.sbml = self.sbml.clone ()
+    duplicate.__reaction_gene_map = {}
+    duplicate.__fbc_plugin = None
+    return duplicate
+  
+  def get_sbml_file (self):
+    """
+    get the path to the model of this GEMtractor
+    
+    :return: the path to the SBML file
+    :rtype: str
+    """
+    return self.__sbml_file
+  
   def __get_expression_parser (self):
     """
     get a parser to parse gene-association strings of reactions
@@ -459,12 +486,79 @@ class GEMtractor:
       
       
   
-  def extract_network_from_sbml (self):
+  def _get_parameter_values (self, model):
+    """
+    Get the values of a model's parameters
+    
+    :param model: the SBML model
+    :type model: `libsbml:Model <http://sbml.org/Software/libSBML/docs/python-api/classlibsbml_1_1_model.html>`_
+    
+    :return: dict that maps the parameter ids to their values, parameters without value are skipped
+    :rtype: dict
+    """
+    parameters = {}
+    for n in range (0, model.getNumParameters()):
+      p = model.getParameter (n)
+      if p.isSetValue ():
+        parameters[p.getId ()] = p.getValue ()
+    return parameters
+  
+  def _get_bounds (self, reaction, parameters):
+    """
+    Get the flux bounds of a reaction
+    
+    uses the lower and upper flux bounds of the `FBC package <http://sbml.org/Documents/Specifications/SBML_Level_3/Packages/fbc>`_.
+    
+    :param reaction: the SBML reaction
+    :param parameters: the values of the model's parameters, see :func:`_get_parameter_values`
+    :type reaction: `libsbml:Reaction <http://sbml.org/Software/libSBML/docs/python-api/classlibsbml_1_1_reaction.html>`_
+    :type parameters: dict
+    
+    :return: the lower and the upper bound, None if a bound is not known
+    :rtype: tuple of float
+    """
+    rfbc = reaction.getPlugin ("fbc")
+    if rfbc is None:
+      return None, None
+    lower = parameters.get (rfbc.getLowerFluxBound ()) if rfbc.isSetLowerFluxBound () else None
+    upper = parameters.get (rfbc.getUpperFluxBound ()) if rfbc.isSetUpperFluxBound () else None
+    return lower, upper
+  
+  def _get_bounds_direction (self, reaction, parameters):
+    """
+    Get the direction of a reaction from its flux bounds
+    
+    uses the lower and upper flux bounds of the `FBC package <http://sbml.org/Documents/Specifications/SBML_Level_3/Packages/fbc>`_:
+    a reaction that cannot carry a negative flux (lower bound >= 0) runs forwards,
+    a reaction that cannot carry a positive flux (upper bound <= 0) runs backwards.
+    
+    :param reaction: the SBML reaction
+    :param parameters: the values of the model's parameters
+    :type reaction: `libsbml:Reaction <http://sbml.org/Software/libSBML/docs/python-api/classlibsbml_1_1_reaction.html>`_
+    :type parameters: dict
+    
+    :return: 1 if the reaction runs forwards, -1 if it runs backwards, or 0 if the bounds allow for both directions or are not known
+    :rtype: int
+    """
+    lower, upper = self._get_bounds (reaction, parameters)
+    if lower is not None and lower >= 0:
+      return 1
+    if upper is not None and upper <= 0:
+      return -1
+    return 0
+  
+  def extract_network_from_sbml (self, reversibility_from_bounds = False):
     """
     Extract the Network from the SBML model
     
     Will go through the SBML file and convert the (remaining) entities into our own network structure.
     
+    Many models mark reactions as reversible, even though their flux bounds only allow for one direction.
+    If `reversibility_from_bounds` is set, such reactions will be irreversible in the network (and reactions that only run backwards will have their reactants and products swapped), see :func:`_get_bounds_direction`.
+    
+    :param reversibility_from_bounds: should the direction of reversible reactions be derived from their FBC flux bounds?
+    :type reversibility_from_bounds: bool
+    
     :return: the network (after optional trimming)
     :rtype: :class:`.network.network.Network`
     
@@ -477,6 +571,9 @@ class GEMtractor:
     network = Network ()
     species = {}
     
+    # the flux bounds refer to parameters, so resolve them once
+    parameters = self._get_parameter_values (model) if reversibility_from_bounds else {}
+    
     for n in range (0, model.getNumSpecies()):
       s = model.getSpecies (n)
       species[s.getId ()] = network.add_species (s.getId (), s.getName ())
@@ -490,6 +587,11 @@ class GEMtractor:
       r = network.add_reaction (reaction.getId (), reaction.getName ())
       if reaction.isSetReversible ():
         r.reversible = reaction.getReversible ()
+      direction = 0
+      if reversibility_from_bounds and r.reversible:
+        direction = self._get_bounds_direction (reaction, parameters)
+        if direction != 0:
+          r.reversible = False
       
       current_genes = self._get_genes (reaction)
       self.__logger.debug("current genes: " + self._implode_genes (current_genes) + " - reaction: " + reaction.getId ())
@@ -500,14 +602,79 @@ class GEMtractor:
       
       network.add_genes (r, current_genes)
       
+      add_reactant, add_product = (r.add_output, r.add_input) if direction < 0 else (r.add_input, r.add_output)
       for sn in range (0, reaction.getNumReactants()):
         s = reaction.getReactant(sn).getSpecies()
-        r.add_input (species[s])
+        add_reactant (species[s])
           
       for sn in range (0, reaction.getNumProducts()):
         s = reaction.getProduct(sn).getSpecies()
-        r.add_output (species[s])
+        add_product (species[s])
     
       
     self.__logger.info ("extracted network")
     return network
+  
+  def export_stoichiometric_matrix (self, file_path):
+    """
+    Export the stoichiometric matrix of the (trimmed) model
+    
+    The species x reaction matrix is collected from the reactions' species references in a single pass and stored in a NumPy .npz archive (see :class:`.network.npzwriter.NpzWriter`) with the following arrays:
+    
+    - format, shape, row, col, and data: the matrix in coordinate format, which can be loaded using `scipy.sparse.load_npz`; row and col point into species and reactions
+    - species and reactions: the identifiers of the species and reactions, in the order of the model
+    - lower_bound and upper_bound: the flux bounds of the reactions (see :func:`_get_bounds`); unknown bounds are -infinity (or 0 for irreversible reactions) and infinity
+    
+    Reactants have negative and products positive coefficients.
+    If a species occurs several times in a reaction, its coefficients are summed up and dropped if they cancel out.
+    
+    :param file_path: where to store the matrix, a path or a writable binary stream
+    :type file_path: str or file-like object
+    """
+    model = self.sbml.getModel()
+    self.__logger.info ("collecting the stoichiometric matrix of " + model.getId ())
+    
+    species = [model.getSpecies (n).getId () for n in range (0, model.getNumSpecies())]
+    species_mapper = {identifier: n for n, identifier in enumerate (species)}
+    parameters = self._get_parameter_values (model)
+    
+    reactions = []
+    rows = array ("i")
+    cols = array ("i")
+    coefficients = array ("d")
+    lower_bounds = array ("d")
+    upper_bounds = array ("d")
+    for n in range (0, model.getNumReactions()):
+      reaction = model.getReaction(n)
+      reactions.append (reaction.getId ())
+      column = {}
+      for references, sign in ((reaction.getListOfReactants (), -1), (reaction.getListOfProducts (), 1)):
+        for reference in references:
+          stoichiometry = reference.getStoichiometry () if reference.isSetStoichiometry () else 1
+          if math.isnan (stoichiometry):
+            stoichiometry = 1
+          row = species_mapper[reference.getSpecies ()]
+          column[row] = column.get (row, 0) + sign * stoichiometry
+      for row in sorted (column):
+        if column[row] != 0:
+          rows.append (row)
+          cols.append (n)
+          coefficients.append (column[row])
+      
+      lower, upper = self._get_bounds (reaction, parameters)
+      if lower is None:
+        lower = -math.inf if reaction.getReversible () else 0
+      lower_bounds.append (lower)
+      upper_bounds.append (math.inf if upper is None else upper)
+    
+    with NpzWriter (file_path) as writer:
+      writer.write ("format", b"coo")
+      writer.write ("shape", array ("q", [len (species), len (reactions)]))
+      writer.write ("row", rows)
+      writer.write ("col", cols)
+      writer.write ("data", coefficients)
+      writer.write ("species", species)
+      writer.write ("reactions", reactions)
+      writer.write ("lower_bound", lower_bounds)
+      writer.write ("upper_bound", upper_bounds)
+    self.__logger.info ("exported a " + str (len (species)) + "x" + str (len (reactions)) + " stoichiometric matrix with " + str (len (coefficients)) + " entries")
@@ -0,0 +1,363 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+#
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import contextlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .exceptions import JobCancelled, JobQueueFull
+
+try:
+  import fcntl
+except ImportError:
+  # e.g. on Windows, the states are then only guarded within a process
+  fcntl = None
+
+
+class JobQueue:
+  """
+  run jobs in the background
+
+  every job gets a directory below the queue's directory, which contains the job's state (:data:`STATE_FILE`), its inputs, and its result (:data:`RESULT_FILE`).
+  thus, the directories form the table of jobs, and every process of an instance can report the state of a job, cancel it, or deliver its result.
+  the jobs are executed by a pool of `workers` threads, at most `queue_size` jobs may wait for a worker.
+
+  a job is a function that is called with the job's directory and a function to report its progress, see :func:`submit`.
+  while a job is 'queued' or 'running' it can be cancelled, see :func:`cancel`.
+  a running job notices the cancellation the next time it reports its progress.
+  the state of a job is only changed while its :data:`LOCK_FILE` is locked, so the processes of an instance do not overwrite each others' changes.
+
+  the state of a job is a JSON-dumpable dict, such as:
+
+  .. code-block:: python
+
+    {
+      "id": "2f0b7f1c8a3e4c8b9a1f0c6d5e4b3a21",
+      "status": "running",
+      "step": "exporting",
+      "progress": 0.6,
+      "submitted": 1571234567.8,
+      "updated": 1571234569.1
+    }
+
+  :param directory: the directory for the job table
+  :param workers: the max number of jobs to run in parallel
+  :param queue_size: the max number of jobs waiting for a worker
+  :type directory: str
+  :type workers: int
+  :type queue_size: int
+  """
+
+  STATE_FILE = "job.json"
+  LOCK_FILE = "job.lock"
+  RESULT_FILE = "result"
+  QUEUED = "queued"
+  RUNNING = "running"
+  DONE = "done"
+  FAILED = "failed"
+  CANCELLED = "cancelled"
+  FINAL_STATES = [DONE, FAILED, CANCELLED]
+  # unfinished jobs that did not progress for this long are lost, e.g. because the server restarted
+  STALE = 24*60*60
+
+  def __init__ (self, directory, workers, queue_size):
+    self.__logger = logging.getLogger(__name__)
+    self.directory = directory
+    self.workers = workers
+    self.queue_size = queue_size
+    self.__pool = ThreadPoolExecutor (max_workers = workers)
+    self.__futures = {}
+    self.__lock = threading.Lock ()
+
+  @staticmethod
+  def is_valid_id (job_id):
+    """
+    is this a proper job id?
+
+    :param job_id: the id of the job
+    :type job_id: str
+
+    :return: true if the id may identify a job
+    :rtype: bool
+    """
+    return isinstance (job_id, str) and re.fullmatch ("[0-9a-f]{32}", job_id) is not None
+
+  def get_job_dir (self, job_id):
+    """
+    get the directory of a job
+
+    :param job_id: the id of the job
+    :type job_id: str
+
+    :return: the path to the job's directory
+    :rtype: str
+
+    :raises ValueError: if the id is not valid
+    """
+    if not JobQueue.is_valid_id (job_id):
+      raise ValueError ("invalid job id: " + str (job_id))
+    return os.path.join (self.directory, job_id)
+
+  def get_result_path (self, job_id):
+    """
+    get the path to the result of a job
+
+    :param job_id: the id of the job
+    :type job_id: str
+
+    :return: the path to the job's result
+    :rtype: str
+    """
+    return os.path.join (self.get_job_dir (job_id), JobQueue.RESULT_FILE)
+
+  def get_state (self, job_id):
+    """
+    get the state of a job
+
+    :param job_id: the id of the job
+    :type job_id: str
+
+    :return: the job's state, or None if there is no such job
+    :rtype: dict
+    """
+    if not JobQueue.is_valid_id (job_id):
+      return None
+    return JobQueue.__read_state (os.path.join (self.get_job_dir (job_id), JobQueue.STATE_FILE))
+
+  @staticmethod
+  def __read_state (state_file):
+    """
+    read the state of a job
+
+    :param state_file: the path to the job's state file
+    :type state_file: str
+
+    :return: the job's state, or None if there is no such file
+    :rtype: dict
+    """
+    try:
+      with open (state_file) as f:
+        return json.load (f)
+    except (OSError, ValueError):
+      return None
+
+  def __write_state (self, state):
+    """
+    write the state of a job
+
+    the state is written to a temporary file first, so readers never see an incomplete state
+
+    :param state: the job's state
+    :type state: dict
+    """
+    state_file = os.path.join (self.get_job_dir (state["id"]), JobQueue.STATE_FILE)
+    with open (state_file + ".tmp", "w") as f:
+      json.dump (state, f)
+    os.replace (state_file + ".tmp", state_file)
+
+  def __transition (self, job_id, from_states, **changes):
+    """
+    change the state of a job, if it is currently in one of some states
+
+    :param job_id: the id of the job
+    :param from_states: the states the job may be in
+    :param changes: the changes to the job's state
+    :type job_id: str
+    :type from_states: list of str
+    :type changes: dict
+
+    :return: the new state, or None if the job is not in one of the states
+    :rtype: dict
+    """
+    with self.__lock, self.__lock_job (job_id):
+      state = self.get_state (job_id)
+      if state is None or state["status"] not in from_states:
+        return None
+      state.update (changes)
+      state["updated"] = time.time ()
+      self.__write_state (state)
+      return state
+
+  @contextlib.contextmanager
+  def __lock_job (self, job_id):
+    """
+    lock the state of a job against other processes
+
+    the lock file is separate from the state file, as the state file is replaced whenever it is written
+
+    :param job_id: the id of the job
+    :type job_id: str
+    """
+    try:
+      lock = open (os.path.join (self.get_job_dir (job_id), JobQueue.LOCK_FILE), "a") if fcntl is not None else None
+    except OSError:
+      # the job was deleted, there is no state to guard
+      lock = None
+    if lock is None:
+      yield
+      return
+    with lock:
+      fcntl.flock (lock.fileno (), fcntl.LOCK_EX)
+      yield
+
+  def get_pending (self):
+    """
+    get the number of jobs of this process that are queued or running
+
+    :return: the number of unfinished jobs
+    :rtype: int
+    """
+    with self.__lock:
+      for job_id in [job_id for job_id, future in self.__futures.items () if future.done ()]:
+        del self.__futures[job_id]
+      return len (self.__futures)
+
+  def submit (self, job, inputs = None):
+    """
+    submit a job
+
+    the job is called with the path to the job's directory and a function `progress (step, fraction)` to report its progress.
+    `progress` raises a :class:`.exceptions.JobCancelled` if the job was cancelled.
+    the job needs to write its result to :data:`RESULT_FILE` in the job's directory and may return a dict of information to add to its state, such as a file name.
+
+    :param job: the job
+    :param inputs: files to store in the job's directory before the job is queued, maps file names to their contents
+    :type job: function
+    :type inputs: dict of str to str
+
+    :return: the state of the new job
+    :rtype: dict
+
+    :raises JobQueueFull: if too many jobs are waiting
+    """
+    if self.get_pending () >= self.workers + self.queue_size:
+      raise JobQueueFull ("too many jobs are waiting, please try again later")
+    job_id = uuid.uuid4 ().hex
+    job_dir = self.get_job_dir (job_id)
+    os.makedirs (job_dir)
+    try:
+      for name, content in (inputs or {}).items ():
+        with open (os.path.join (job_dir, name), "w") as f:
+          f.write (content)
+    except Exception:
+      shutil.rmtree (job_dir, ignore_errors = True)
+      raise
+    now = time.time ()
+    state = {"id": job_id, "status": JobQueue.QUEUED, "step": None, "progress": 0, "submitted": now, "updated": now}
+    with self.__lock:
+      self.__write_state (state)
+      self.__futures[job_id] = self.__pool.submit (self.__run, job_id, job)
+    self.__logger.info ("queued job " + job_id)
+    return state
+
+  def __run (self, job_id, job):
+    """
+    run a job in a worker
+
+    :param job_id: the id of the job
+    :param job: the job, see :func:`submit`
+    :type job_id: str
+    :type job: function
+    """
+    if self.__transition (job_id, [JobQueue.QUEUED], status = JobQueue.RUNNING, started = time.time ()) is None:
+      return
+
+    def progress (step, fraction):
+      if self.__transition (job_id, [JobQueue.RUNNING], step = step, progress = fraction) is None:
+        raise JobCancelled ("job " + job_id + " was cancelled")
+
+    try:
+      info = job (self.get_job_dir (job_id), progress) or {}
+      if self.__transition (job_id, [JobQueue.RUNNING], status = JobQueue.DONE, step = None, progress = 1, finished = time.time (), **info) is None:
+        raise JobCancelled ("job " + job_id + " was cancelled")
+      self.__logger.info ("finished job " + job_id)
+    except JobCancelled:
+      self.__logger.info ("cancelled job " + job_id)
+      self.__remove_result (job_id)
+    except Exception as e:
+      self.__logger.error ("job " + job_id + " failed: " + getattr(e, 'message', repr(e)))
+      self.__remove_result (job_id)
+      self.__transition (job_id, [JobQueue.RUNNING], status = JobQueue.FAILED, finished = time.time (), error = getattr(e, 'message', repr(e)))
+
+  def __remove_result (self, job_id):
+    """
+    remove the (partial) result of a job
+
+    :param job_id: the id of the job
+    :type job_id: str
+    """
+    try:
+      os.remove (self.get_result_path (job_id))
+    except OSError:
+      pass
+
+  def cancel (self, job_id):
+    """
+    cancel or delete a job
+
+    a job that is queued or running is cancelled, a job that is finished is deleted together with its result
+
+    :param job_id: the id of the job
+    :type job_id: str
+
+    :return: the state of the cancelled job, or None if the job was deleted or if there is no such job
+    :rtype: dict
+    """
+    state = self.__transition (job_id, [JobQueue.QUEUED, JobQueue.RUNNING], status = JobQueue.CANCELLED, finished = time.time ())
+    if state is not None:
+      with self.__lock:
+        future = self.__futures.get (job_id)
+      if future is not None:
+        future.cancel ()
+      return state
+    if self.get_state (job_id) is not None:
+      shutil.rmtree (self.get_job_dir (job_id), ignore_errors = True)
+      self.__logger.info ("deleted job " + job_id)
+    return None
+
+  @staticmethod
+  def cleanup (directory, max_age):
+    """
+    remove jobs that finished more than `max_age` seconds ago, and jobs that went stale (see :data:`STALE`)
+
+    :param directory: the directory of the job table
+    :param max_age: the max age of finished jobs
+    :type directory: str
+    :type max_age: int
+    """
+    if not os.path.isdir (directory):
+      return
+    now = time.time ()
+    for job_id in os.listdir (directory):
+      job_dir = os.path.join (directory, job_id)
+      state = JobQueue.__read_state (os.path.join (job_dir, JobQueue.STATE_FILE))
+      if state is None:
+        # not yet written or broken, judge by the directory
+        age = now - os.path.getmtime (job_dir)
+        keep = max (max_age, JobQueue.STALE)
+      else:
+        age = now - state["updated"]
+        keep = max_age if state["status"] in JobQueue.FINAL_STATES else max (max_age, JobQueue.STALE)
+      if age > keep:
+        logging.getLogger(__name__).info ("deleting old job: " + job_dir)
+        shutil.rmtree (job_dir, ignore_errors = True)
@@ -0,0 +1,265 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+#
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import uuid
+
+
+class Consistency:
+  """
+  the consistency of a filter applied to a network
+
+  entities become inconsistent if the filter removes things they depend on:
+
+  - species: 'ghost' if all reactions it participates in are removed
+  - reactions: 'uncatalyzed' if all enzymes and enzyme complexes are removed, 'consumed_removed' or 'produced_removed' if some of its species are removed
+  - enzymes: 'unused' if all reactions and complexes it participates in are removed
+  - enzyme complexes: 'unused' if all its reactions are removed, 'enzymes_removed' if some of its enzymes are removed, 'subcomplexes_removed' if some complexes are removed whose enzymes are a subset of this complex's enzymes
+
+  entities that are removed themselves are never inconsistent.
+
+  instead of scanning the whole network for every change of the filter, we keep counters of the removed neighbours of every entity.
+  changing the filter only updates the counters of the neighbours of the changed entities, see :func:`update`.
+
+  :param network: the network
+  :type network: :class:`.network.Network`
+  """
+
+  ENTITIES = ["species", "reactions", "enzs", "enzc"]
+
+  def __init__ (self, network):
+    self.__logger = logging.getLogger(__name__)
+    self.ids = {
+      "species": list (network.species),
+      "reactions": list (network.reactions),
+      "enzs": list (network.genes),
+      "enzc": list (network.gene_complexes),
+      }
+    self.index = {entity: {identifier: n for n, identifier in enumerate (ids)} for entity, ids in self.ids.items ()}
+    species = self.index["species"]
+    reactions = self.index["reactions"]
+    genes = self.index["enzs"]
+    gene_complexes = self.index["enzc"]
+
+    # the inverted indexes
+    self.consumed_in = [[] for s in network.species]
+    self.produced_in = [[] for s in network.species]
+    self.species_of = []
+    self.genes_of = []
+    self.complexes_of = []
+    for n, reaction in enumerate (network.reactions.values ()):
+      for s in reaction.consumed:
+        self.consumed_in[species[s]].append (n)
+      for s in reaction.produced:
+        self.produced_in[species[s]].append (n)
+      self.species_of.append ([species[s] for s in reaction.consumed + reaction.produced])
+      self.genes_of.append ([genes[g] for g in reaction.genes])
+      self.complexes_of.append ([gene_complexes[c] for c in reaction.genec])
+    self.reactions_of_species = [self.consumed_in[n] + self.produced_in[n] for n in range (len (network.species))]
+    self.reactions_of_gene = [[reactions[r] for r in gene.reactions] for gene in network.genes.values ()]
+    self.complexes_of_gene = [[] for g in network.genes]
+    self.genes_of_complex = []
+    self.reactions_of_complex = []
+    for n, gene_complex in enumerate (network.gene_complexes.values ()):
+      self.genes_of_complex.append ([genes[g.identifier] for g in gene_complex.genes])
+      self.reactions_of_complex.append ([reactions[r] for r in gene_complex.reactions])
+      for g in self.genes_of_complex[n]:
+        self.complexes_of_gene[g].append (n)
+    # a complex is a supercomplex of another if it contains all the other's enzymes
+    self.supercomplexes = []
+    for n, gs in enumerate (self.genes_of_complex):
+      candidates = None
+      for g in gs:
+        if candidates is None:
+          candidates = set (self.complexes_of_gene[g])
+        else:
+          candidates.intersection_update (self.complexes_of_gene[g])
+      candidates = candidates or set ()
+      candidates.discard (n)
+      self.supercomplexes.append (sorted (candidates))
+
+    # the counters
+    self.catalysts_left = [len (self.genes_of[n]) + len (self.complexes_of[n]) for n in range (len (self.ids["reactions"]))]
+    self.consumed_removed = [0] * len (self.ids["reactions"])
+    self.produced_removed = [0] * len (self.ids["reactions"])
+    self.reactions_left = [len (occ) for occ in self.reactions_of_species]
+    self.usages_left = [len (self.reactions_of_gene[n]) + len (self.complexes_of_gene[n]) for n in range (len (self.ids["enzs"]))]
+    self.complex_reactions_left = [len (rs) for rs in self.reactions_of_complex]
+    self.complex_genes_removed = [0] * len (self.ids["enzc"])
+    self.subcomplexes_removed = [set () for c in self.ids["enzc"]]
+
+    self.filter = {entity: set () for entity in Consistency.ENTITIES}
+    self.inconsistent = {entity: {} for entity in Consistency.ENTITIES}
+    for entity in Consistency.ENTITIES:
+      for n in range (len (self.ids[entity])):
+        reasons = self.__reasons (entity, n)
+        if reasons:
+          self.inconsistent[entity][n] = reasons
+    self.revision = uuid.uuid4 ().hex
+
+  def __reasons (self, entity, n):
+    """
+    find out why an entity is inconsistent
+
+    :param entity: the type of the entity, see :data:`ENTITIES`
+    :param n: the index of the entity
+    :type entity: str
+    :type n: int
+
+    :return: the reasons, mapped to True or to the ids of the removed subcomplexes, or an empty dict if the entity is consistent
+    :rtype: dict
+    """
+    reasons = {}
+    if n in self.filter[entity]:
+      return reasons
+    if entity == "species":
+      if self.reactions_left[n] == 0:
+        reasons["ghost"] = True
+    elif entity == "reactions":
+      if self.catalysts_left[n] == 0:
+        reasons["uncatalyzed"] = True
+      if self.consumed_removed[n] > 0:
+        reasons["consumed_removed"] = True
+      if self.produced_removed[n] > 0:
+        reasons["produced_removed"] = True
+    elif entity == "enzs":
+      if self.usages_left[n] == 0:
+        reasons["unused"] = True
+    else:
+      if self.complex_reactions_left[n] == 0:
+        reasons["unused"] = True
+      if self.complex_genes_removed[n] > 0:
+        reasons["enzymes_removed"] = True
+      if self.subcomplexes_removed[n]:
+        reasons["subcomplexes_removed"] = sorted (self.ids["enzc"][c] for c in self.subcomplexes_removed[n])
+    return reasons
+
+  def __apply (self, entity, n, removed, touched):
+    """
+    update the counters of the neighbours of an entity that is removed or restored
+
+    :param entity: the type of the entity, see :data:`ENTITIES`
+    :param n: the index of the entity
+    :param removed: is the entity removed (True) or restored (False)?
+    :param touched: the entities that may have changed their consistency, will be extended
+    :type entity: str
+    :type n: int
+    :type removed: bool
+    :type touched: dict of sets
+    """
+    d = 1 if removed else -1
+    touched[entity].add (n)
+    if entity == "species":
+      for r in self.consumed_in[n]:
+        self.consumed_removed[r] += d
+        touched["reactions"].add (r)
+      for r in self.produced_in[n]:
+        self.produced_removed[r] += d
+        touched["reactions"].add (r)
+    elif entity == "reactions":
+      for s in self.species_of[n]:
+        self.reactions_left[s] -= d
+        touched["species"].add (s)
+      for g in self.genes_of[n]:
+        self.usages_left[g] -= d
+        touched["enzs"].add (g)
+      for c in self.complexes_of[n]:
+        self.complex_reactions_left[c] -= d
+        touched["enzc"].add (c)
+    elif entity == "enzs":
+      for r in self.reactions_of_gene[n]:
+        self.catalysts_left[r] -= d
+        touched["reactions"].add (r)
+      for c in self.complexes_of_gene[n]:
+        self.complex_genes_removed[c] += d
+        touched["enzc"].add (c)
+    else:
+      for r in self.reactions_of_complex[n]:
+        self.catalysts_left[r] -= d
+        touched["reactions"].add (r)
+      for g in self.genes_of_complex[n]:
+        self.usages_left[g] -= d
+        touched["enzs"].add (g)
+      for c in self.supercomplexes[n]:
+        if removed:
+          self.subcomplexes_removed[c].add (n)
+        else:
+          self.subcomplexes_removed[c].discard (n)
+        touched["enzc"].add (c)
+
+  def update (self, species = None, reactions = None, enzymes = None, enzyme_complexes = None):
+    """
+    apply a new filter
+
+    only the entities that were added to or removed from the filter since the last update are processed.
+    unknown identifiers are ignored.
+
+    :param species: the ids of the species to remove, or None to keep the current selection
+    :param reactions: the ids of the reactions to remove, or None to keep the current selection
+    :param enzymes: the ids of the enzymes to remove, or None to keep the current selection
+    :param enzyme_complexes: the ids of the enzyme complexes to remove, or None to keep the current selection
+    :type species: list of str
+    :type reactions: list of str
+    :type enzymes: list of str
+    :type enzyme_complexes: list of str
+
+    :return: the entities whose consistency changed, as a dict that maps the entity type to a dict of ids and their reasons (empty if the entity is consistent now), see :func:`get_inconsistent`
+    :rtype: dict
+    """
+    touched = {entity: set () for entity in Consistency.ENTITIES}
+    for entity, ids in zip (Consistency.ENTITIES, [species, reactions, enzymes, enzyme_complexes]):
+      if ids is None:
+        continue
+      index = self.index[entity]
+      new_filter = set (index[identifier] for identifier in ids if identifier in index)
+      for n in new_filter - self.filter[entity]:
+        self.filter[entity].add (n)
+        self.__apply (entity, n, True, touched)
+      for n in self.filter[entity] - new_filter:
+        self.filter[entity].discard (n)
+        self.__apply (entity, n, False, touched)
+
+    delta = {entity: {} for entity in Consistency.ENTITIES}
+    for entity, indexes in touched.items ():
+      for n in indexes:
+        reasons = self.__reasons (entity, n)
+        if reasons != self.inconsistent[entity].get (n, {}):
+          delta[entity][self.ids[entity][n]] = reasons
+          if reasons:
+            self.inconsistent[entity][n] = reasons
+          else:
+            del self.inconsistent[entity][n]
+    self.revision = uuid.uuid4 ().hex
+    self.__logger.debug ("updated consistency, touched " + str (sum (len (t) for t in touched.values ())) + " entities")
+    return delta
+
+  def get_inconsistent (self):
+    """
+    get all inconsistent entities
+
+    :return: dict that maps the entity type to a dict of ids and the reasons for their inconsistency
+    :rtype: dict
+    """
+    return {entity: {self.ids[entity][n]: reasons for n, reasons in self.inconsistent[entity].items ()} for entity in Consistency.ENTITIES}
+
+  def get_counts (self):
+    """
+    get the number of inconsistent entities
+
+    :return: dict that maps the entity type to the number of inconsistent entities of that type
+    :rtype: dict
+    """
+    return {entity: len (self.inconsistent[entity]) for entity in Consistency.ENTITIES}
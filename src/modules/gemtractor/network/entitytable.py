@@ -0,0 +1,251 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+#
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import math
+from array import array
+from bisect import bisect_left
+
+
+class EntityTable:
+  """
+  sortable and searchable tables of the entities in a network
+
+  prepares everything that is needed to serve windows of the species, reaction, enzyme, and enzyme complex tables:
+  the rows, the row order for every sortable column, sorted keys for prefix searches, and a trigram index for substring searches.
+  thus, only the currently requested window of a table needs to be sent to the browser.
+
+  columns that depend on the user's state (include and flux) are sorted on demand.
+
+  :param network: the network
+  :type network: :class:`.network.Network`
+  """
+
+  ENTITIES = ["species", "reactions", "enzs", "enzc"]
+  COLUMNS = {
+    "species": ["include", "id", "name", "occ"],
+    "reactions": ["include", "id", "name", "reaction", "enzymes", "flux"],
+    "enzs": ["include", "id", "reactions", "cplx"],
+    "enzc": ["include", "id", "reactions"],
+    }
+
+  def __init__ (self, network):
+    self.__logger = logging.getLogger(__name__)
+    self.rows = {
+      "species": [{"id": s.identifier, "name": s.name, "occ": s.occurence} for s in network.species.values ()],
+      "reactions": [{"id": r.identifier, "name": r.name, "rev": r.reversible, "cons": r.consumed, "prod": r.produced, "enzs": r.genes, "enzc": r.genec} for r in network.reactions.values ()],
+      "enzs": [{"id": g.identifier, "reactions": g.reactions, "cplx": []} for g in network.genes.values ()],
+      "enzc": [{"id": identifier, "reactions": gc.reactions} for identifier, gc in network.gene_complexes.items ()],
+      }
+    gene_mapper = {identifier: n for n, identifier in enumerate (network.genes)}
+    for identifier, gene_complex in network.gene_complexes.items ():
+      for g in gene_complex.genes:
+        self.rows["enzs"][gene_mapper[g.identifier]]["cplx"].append (identifier)
+
+    sort_keys = {
+      "species": {
+        "id": lambda row: row["id"].lower (),
+        "name": lambda row: row["name"].lower (),
+        "occ": lambda row: len (row["occ"]),
+        },
+      "reactions": {
+        "id": lambda row: row["id"].lower (),
+        "name": lambda row: row["name"].lower (),
+        "reaction": lambda row: (" + ".join (row["cons"]) + " -> " + " + ".join (row["prod"])).lower (),
+        "enzymes": lambda row: " ".join (row["enzs"] + row["enzc"]).lower (),
+        },
+      "enzs": {
+        "id": lambda row: row["id"].lower (),
+        "reactions": lambda row: len (row["reactions"]),
+        "cplx": lambda row: len (row["cplx"]),
+        },
+      "enzc": {
+        "id": lambda row: row["id"].lower (),
+        "reactions": lambda row: len (row["reactions"]),
+        },
+      }
+
+    self.orders = {}
+    self.prefix_keys = {}
+    self.trigrams = {}
+    for entity in EntityTable.ENTITIES:
+      rows = self.rows[entity]
+      self.orders[entity] = {}
+      for column, key in sort_keys[entity].items ():
+        keys = [key (row) for row in rows]
+        self.orders[entity][column] = array ("L", sorted (range (len (rows)), key = keys.__getitem__))
+
+      # sorted (key, row) pairs of ids and names for prefix searches
+      prefix_keys = [(row["id"].lower (), n) for n, row in enumerate (rows)]
+      prefix_keys.extend ((row["name"].lower (), n) for n, row in enumerate (rows) if row.get ("name"))
+      prefix_keys.sort ()
+      self.prefix_keys[entity] = prefix_keys
+
+      # trigrams of ids and names for substring searches
+      trigrams = {}
+      for n, row in enumerate (rows):
+        text = EntityTable.__search_text (row)
+        for trigram in set (text[i:i + 3] for i in range (len (text) - 2)):
+          if trigram in trigrams:
+            trigrams[trigram].append (n)
+          else:
+            trigrams[trigram] = array ("L", [n])
+      self.trigrams[entity] = trigrams
+    self.__logger.info ("prepared entity tables")
+
+  @staticmethod
+  def __search_text (row):
+    """
+    get the text of a row that is searched
+
+    :param row: the row
+    :type row: dict
+
+    :return: the lower-cased id and name, separated by a newline
+    :rtype: str
+    """
+    return (row["id"] + "\n" + row.get ("name", "")).lower ()
+
+  def search (self, entity, query, prefix = False):
+    """
+    search the ids and names of a table
+
+    the search is case-insensitive.
+    prefix searches are answered using the sorted keys, substring searches of at least three characters using the trigram index.
+
+    :param entity: the table to search, see :data:`ENTITIES`
+    :param query: the text to search for
+    :param prefix: should the ids or names start with the query? otherwise they just need to contain the query
+    :type entity: str
+    :type query: str
+    :type prefix: bool
+
+    :return: the indexes of all matching rows
+    :rtype: set of int
+    """
+    query = query.lower ()
+    rows = self.rows[entity]
+    if prefix:
+      prefix_keys = self.prefix_keys[entity]
+      matches = set ()
+      n = bisect_left (prefix_keys, (query, -1))
+      while n < len (prefix_keys) and prefix_keys[n][0].startswith (query):
+        matches.add (prefix_keys[n][1])
+        n += 1
+      return matches
+
+    if len (query) < 3:
+      return set (n for n, row in enumerate (rows) if query in EntityTable.__search_text (row))
+
+    # intersect the postings of all trigrams, starting with the rarest one
+    postings = []
+    for trigram in set (query[i:i + 3] for i in range (len (query) - 2)):
+      if trigram not in self.trigrams[entity]:
+        return set ()
+      postings.append (self.trigrams[entity][trigram])
+    postings.sort (key = len)
+    candidates = set (postings[0])
+    for posting in postings[1:]:
+      candidates.intersection_update (posting)
+      if not candidates:
+        break
+    # trigrams may match in different places, so verify the candidates
+    return set (n for n in candidates if query in EntityTable.__search_text (rows[n]))
+
+  def window (self, entity, offset = 0, limit = 100, sort = "id", descending = False, query = None, prefix = False, state = None, excluded = None, fluxes = None):
+    """
+    get a window of a table
+
+    :param entity: the table, see :data:`ENTITIES`
+    :param offset: the number of (sorted and searched) rows to skip
+    :param limit: the max number of rows to return
+    :param sort: the column to sort by, see :data:`COLUMNS`
+    :param descending: sort in descending order?
+    :param query: only return rows whose id or name contain this text, see :func:`search`
+    :param prefix: should the id or name start with the query?
+    :param state: only return rows that are 'included' or 'excluded', or all rows if None
+    :param excluded: the ids of the entities, that are excluded by the user's filter
+    :param fluxes: the fluxes of the reactions
+    :type entity: str
+    :type offset: int
+    :type limit: int
+    :type sort: str
+    :type descending: bool
+    :type query: str
+    :type prefix: bool
+    :type state: str
+    :type excluded: set of str
+    :type fluxes: dict
+
+    :return: the total number of rows, the number of rows matching the query and state, and the rows in the window (with an additional 'excluded' flag, and the 'flux' for reactions)
+    :rtype: tuple of int, int, list of dict
+    """
+    if entity not in self.rows:
+      raise ValueError ("unknown table " + str (entity))
+    if sort not in EntityTable.COLUMNS[entity]:
+      raise ValueError ("cannot sort " + entity + " by " + str (sort))
+    if excluded is None:
+      excluded = set ()
+    if fluxes is None:
+      fluxes = {}
+    rows = self.rows[entity]
+
+    if sort == "include":
+      # excluded rows first
+      order = sorted (self.orders[entity]["id"], key = lambda n: rows[n]["id"] not in excluded)
+    elif sort == "flux":
+      # unknown fluxes last
+      order = sorted (self.orders[entity]["id"], key = lambda n: EntityTable.__flux_key (fluxes.get (rows[n]["id"])))
+    else:
+      order = self.orders[entity][sort]
+    if descending:
+      order = reversed (order)
+
+    if query:
+      matches = self.search (entity, query, prefix)
+      order = (n for n in order if n in matches)
+    if state == "included":
+      order = (n for n in order if rows[n]["id"] not in excluded)
+    elif state == "excluded":
+      order = (n for n in order if rows[n]["id"] in excluded)
+
+    order = list (order)
+    window = []
+    for n in order[offset:offset + limit]:
+      row = dict (rows[n], excluded = rows[n]["id"] in excluded)
+      if entity == "reactions":
+        row["flux"] = fluxes.get (row["id"])
+      window.append (row)
+    return len (rows), len (order), window
+
+  @staticmethod
+  def __flux_key (flux):
+    """
+    get a sort key for a flux
+
+    :param flux: the flux
+    :type flux: str
+
+    :return: the numeric flux, unknown fluxes are sorted last
+    :rtype: tuple
+    """
+    try:
+      value = float (flux)
+      if not math.isnan (value):
+        return (0, value)
+    except (TypeError, ValueError):
+      pass
+    return (1, 0)
@@ -0,0 +1,242 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+#
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+
+from .exportwriter import ExportWriter
+
+
+class Estimator:
+  """
+  estimate the size of the exported networks, without calculating the reaction- or enzyme-centric network
+
+  the estimate is based on the degree index of the species:
+  every species links the reactions (or enzymes) that produce it to the reactions (or enzymes) that consume it, where reversible reactions do both.
+  thus, the number of links through a species is the number of its consumers times the number of its producers.
+  the sum over all species is an upper bound of the number of edges, as two nodes may be linked through several species.
+  if the projection was already calculated, the edges are counted instead.
+
+  the number of bytes is estimated from the templates of the :class:`.exportwriter.ExportWriter` and the average length of the identifiers.
+  annotations are not taken into account.
+
+  :param network: the (trimmed) network
+  :type network: :class:`.network.Network`
+  """
+
+  NETWORK_TYPES = ["en", "rn", "mn"]
+  # a rough guide of how many nodes and edges an export writes per second
+  ITEMS_PER_SECOND = 200000
+
+  def __init__ (self, network):
+    self.__logger = logging.getLogger(__name__)
+    self.network = network
+    self.__edges = {}
+
+  def get_nodes (self, network_type):
+    """
+    get the number of nodes of a network
+
+    :param network_type: the network type, 'en', 'rn', or 'mn'
+    :type network_type: str
+
+    :return: the number of nodes
+    :rtype: int
+    """
+    if network_type == "en":
+      return len (self.network.genes) + len (self.network.gene_complexes)
+    if network_type == "rn":
+      return len (self.network.reactions)
+    return len (self.network.species) + len (self.network.reactions)
+
+  def get_edges (self, network_type):
+    """
+    estimate the number of edges of a network
+
+    the number is exact for the metabolite-reaction network and for projections that were already calculated, otherwise it is an upper bound
+
+    :param network_type: the network type, 'en', 'rn', or 'mn'
+    :type network_type: str
+
+    :return: the number of edges
+    :rtype: int
+    """
+    if network_type not in self.__edges:
+      if network_type == "en":
+        self.__edges[network_type] = self.__estimate_en_edges ()
+      elif network_type == "rn":
+        self.__edges[network_type] = self.__estimate_rn_edges ()
+      else:
+        self.__edges[network_type] = sum (len (r.consumed) + len (r.produced) for r in self.network.reactions.values ())
+    return self.__edges[network_type]
+
+  def __estimate_rn_edges (self):
+    """
+    estimate the number of edges of the reaction-centric network
+
+    :return: the (upper bound of the) number of edges
+    :rtype: int
+    """
+    if self.network.have_reaction_net:
+      return sum (len (r.links) for r in self.network.reactions.values ())
+    consumers = dict.fromkeys (self.network.species, 0)
+    producers = dict.fromkeys (self.network.species, 0)
+    for reaction in self.network.reactions.values ():
+      for species in reaction.consumed:
+        consumers[species] += 1
+        if reaction.reversible:
+          producers[species] += 1
+      for species in reaction.produced:
+        producers[species] += 1
+        if reaction.reversible:
+          consumers[species] += 1
+    return sum (consumers[species] * producers[species] for species in self.network.species)
+
+  def __estimate_en_edges (self):
+    """
+    estimate the number of edges of the enzyme-centric network
+
+    :return: the (upper bound of the) number of edges
+    :rtype: int
+    """
+    if self.network.have_gene_net:
+      return sum (len (g.links["g"]) + len (g.links["gc"]) for entities in (self.network.genes, self.network.gene_complexes) for g in entities.values ())
+    consumers = {species: set () for species in self.network.species}
+    producers = {species: set () for species in self.network.species}
+    for reaction in self.network.reactions.values ():
+      enzymes = reaction.genes + reaction.genec
+      if not enzymes:
+        continue
+      for species in reaction.consumed:
+        consumers[species].update (enzymes)
+        if reaction.reversible:
+          producers[species].update (enzymes)
+      for species in reaction.produced:
+        producers[species].update (enzymes)
+        if reaction.reversible:
+          consumers[species].update (enzymes)
+    return sum (len (consumers[species]) * len (producers[species]) for species in self.network.species)
+
+  def get_bytes (self, network_type, network_format, nodes, edges, sbml_size = None):
+    """
+    estimate the size of an export
+
+    :param network_type: the network type, 'en', 'rn', or 'mn'
+    :param network_format: the format, see :data:`modules.gemtractor.exporter.Exporter.FORMATS`
+    :param nodes: the number of nodes, see :func:`get_nodes`
+    :param edges: the number of edges, see :func:`get_edges`
+    :param sbml_size: the size of the trimmed SBML model, which is the estimate for the SBML export of the metabolite-reaction network
+    :type network_type: str
+    :type network_format: str
+    :type nodes: int
+    :type edges: int
+    :type sbml_size: int
+
+    :return: the estimated number of bytes, or None if it cannot be estimated
+    :rtype: int
+    """
+    ids = self.__get_identifiers (network_type)
+    length = sum (len (i) for i in ids) / len (ids) if ids else 0
+    # the numbers of nodes and edges in the exports
+    number = len (str (nodes + edges))
+
+    if network_format == "dot":
+      size = len (ExportWriter.DOT_PREFIX + ExportWriter.DOT_SUFFIX) + nodes * (len (ExportWriter.DOT_BOX_NODE ("", "")) + 2 * length) + edges * (len ("".join (ExportWriter.DOT_EDGE)) + 2 * length)
+    elif network_format == "gml":
+      size = len (ExportWriter.GML_PREFIX + ExportWriter.GML_SUFFIX) + nodes * (len (ExportWriter.GML_NODE ("", "")) + number + length) + edges * (len ("".join (ExportWriter.GML_EDGE)) + 2 * number)
+    elif network_format == "graphml":
+      size = len (ExportWriter.GRAPHML_PREFIX + ExportWriter.GRAPHML_SUFFIX) + nodes * (len (ExportWriter.GRAPHML_NODE ("", "reaction", "rectangle", "")) + 2 * length) + edges * (len ("".join (ExportWriter.GRAPHML_EDGE)) + number + 2 * length)
+    elif network_format == "csv":
+      size = len (ExportWriter.CSV_PREFIX) + edges * (len ("".join (ExportWriter.CSV_EDGE)) + 2 * length)
+    elif network_format == "npz":
+      # ids and names as UTF-32, types, indptr, and indices
+      width = max ((len (i) for i in ids), default = 1)
+      size = 1600 + nodes * (8 * width + 5) + edges * 4
+    elif network_format == "smatrix":
+      width = max ((len (i) for i in ids), default = 1)
+      size = 2400 + nodes * 4 * width + len (self.network.reactions) * 16 + edges * 16
+    elif network_format == "sbml":
+      if network_type == "mn":
+        return sbml_size
+      # every edge becomes a reaction
+      size = len (ExportWriter.SBML_PREFIX ("", "", "") + ExportWriter.SBML_SUFFIX) + nodes * (len (ExportWriter.SBML_SPECIES ("", "")) + 3 * length) + edges * (len ("".join (ExportWriter.SBML_REACTION)) + number + 2 * length)
+    else:
+      return None
+    return int (size)
+
+  def __get_identifiers (self, network_type):
+    """
+    get the identifiers of the nodes of a network
+
+    :param network_type: the network type, 'en', 'rn', or 'mn'
+    :type network_type: str
+
+    :return: the identifiers
+    :rtype: list of str
+    """
+    if network_type == "en":
+      return list (self.network.genes) + list (self.network.gene_complexes)
+    if network_type == "rn":
+      return list (self.network.reactions)
+    return list (self.network.species) + list (self.network.reactions)
+
+  def estimate (self, network_types = NETWORK_TYPES, network_formats = None, sbml_size = None):
+    """
+    estimate the sizes of some networks and their exports
+
+    returns a JSON-dumpable object such as:
+
+    .. code-block:: python
+
+      {
+        "rn": {
+          "nodes": 2583,
+          "edges": 1348921,
+          "exact": False,
+          "seconds": 6.8,
+          "bytes": {"sbml": 498713942, "dot": 37793019, ...}
+        }
+      }
+
+    :param network_types: the network types to estimate
+    :param network_formats: the formats to estimate the sizes for, defaults to all formats
+    :param sbml_size: the size of the trimmed SBML model, see :func:`get_bytes`
+    :type network_types: list of str
+    :type network_formats: list of str
+    :type sbml_size: int
+
+    :return: the estimates of every network type
+    :rtype: dict
+    """
+    if network_formats is None:
+      network_formats = ["sbml", "dot", "graphml", "gml", "csv", "npz", "smatrix"]
+    estimates = {}
+    for network_type in network_types:
+      nodes = self.get_nodes (network_type)
+      edges = self.get_edges (network_type)
+      sizes = {}
+      for network_format in network_formats:
+        if network_format == "smatrix" and network_type != "mn":
+          continue
+        sizes[network_format] = self.get_bytes (network_type, network_format, nodes, edges, sbml_size)
+      estimates[network_type] = {
+        "nodes": nodes,
+        "edges": edges,
+        "exact": network_type == "mn" or (network_type == "rn" and self.network.have_reaction_net) or (network_type == "en" and self.network.have_gene_net),
+        "seconds": round ((nodes + edges) / Estimator.ITEMS_PER_SECOND, 1),
+        "bytes": sizes,
+        }
+    self.__logger.debug ("estimated the exports of " + ", ".join (network_types))
+    return estimates
@@ -0,0 +1,441 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+#
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import queue
+import re
+import threading
+
+
+class ExportWriter:
+  """
+  a buffered writer for exported networks
+
+  exporters produce many tiny fragments per node and edge.
+  instead of writing every fragment to the file, the writer collects them in chunks, which are joined and written at once through a large file buffer.
+
+  use it as a context manager:
+
+  .. code-block:: python
+
+    with ExportWriter (file_path) as writer:
+      writer.write (ExportWriter.DOT_PREFIX)
+      writer.write_edges_from (ExportWriter.DOT_EDGE, "r1", ["r2", "r3"])
+      writer.write (ExportWriter.DOT_SUFFIX)
+
+  the node templates of the supported formats are precompiled as bound :func:`str.format` methods.
+  the edge templates are split into the parts before the source, between source and target, and after the target (plus the edge number for GraphML).
+  all edges of a node share the node's part of the template, so they are written with a single :func:`str.join`, see :func:`write_edges_from` and :func:`write_edges_to`.
+  the templates for SBML produce a level 3 version 2 document, in which every edge is a reaction with a single reactant and a single product.
+  the first part of :data:`SBML_REACTION` needs to be extended by a prefix for the reaction ids.
+
+  the escape functions should be applied once per entity, e.g. when creating the map of node ids, and not for every edge.
+
+  instead of a path, the writer also accepts a writable text stream, which will not be closed.
+  see :func:`iterate` to stream an export, e.g. to an HTTP response.
+
+  :param file_path: where to write the export, a path or a writable text stream
+  :param chunk_size: the number of characters to collect before they are written
+  :param buffer_size: the size of the file buffer in bytes
+  :type file_path: str or file-like object
+  :type chunk_size: int
+  :type buffer_size: int
+  """
+
+  CHUNK_SIZE = 1 << 18
+  BUFFER_SIZE = 1 << 20
+  QUEUE_SIZE = 8
+
+  DOT_PREFIX = "digraph GEMtractor {\n"
+  DOT_SUFFIX = "}\n"
+  DOT_NODE = "\t{} [label=\"{}\"];\n".format
+  DOT_BOX_NODE = "\t{} [label=\"{}\" shape=box];\n".format
+  DOT_EDGE = ("\t", " -> ", ";\n")
+
+  GML_PREFIX = "graph [\n\tcomment \"generated using the GEMtractor\"\n\tdirected 1\n"
+  GML_SUFFIX = "]\n"
+  GML_NODE = "\tnode [\n\t\tid {}\n\t\tlabel \"{}\"\n\t]\n".format
+  GML_EDGE = ("\tedge [\n\t\tsource ", "\n\t\ttarget ", "\n\t]\n")
+
+  GRAPHML_PREFIX = (
+    "<graphml xmlns=\"http://graphml.graphdrawing.org/xmlns\"\n"
+    "\txmlns:xsi=\"http://www.w3.org/2001/XMLSchema-instance\"\n"
+    "\txsi:schemaLocation=\"http://graphml.graphdrawing.org/xmlns/1.0/graphml.xsd\"\n"
+    "\txmlns:y=\"http://www.yworks.com/xml/graphml\">\n\n"
+    "\t<key for=\"node\" id=\"layout\" yfiles.type=\"nodegraphics\"/>\n"
+    "\t<key for=\"node\" id=\"type\" attr.type=\"string\"><default>species</default></key>\n"
+    "\t<graph id=\"GEMtractor\" edgedefault=\"directed\">\n")
+  GRAPHML_SUFFIX = "\t</graph>\n</graphml>\n"
+  GRAPHML_NODE = (
+    "\t\t<node id=\"{}\">\n"
+    "\t\t\t<data key=\"type\">{}</data>\n"
+    "\t\t\t<data key=\"layout\">\n"
+    "\t\t\t\t<y:ShapeNode>\n"
+    "\t\t\t\t\t<y:Shape type=\"{}\"/>\n"
+    "\t\t\t\t\t<y:NodeLabel>{}</y:NodeLabel>\n"
+    "\t\t\t\t</y:ShapeNode>\n"
+    "\t\t\t</data>\n"
+    "\t\t</node>\n").format
+  GRAPHML_EDGE = ("\t\t<edge id=\"e", "\" source=\"", "\" target=\"", "\"/>\n")
+
+  CSV_PREFIX = "\"source\",\"target\"\n"
+  CSV_EDGE = ("\"", "\",\"", "\"\n")
+
+  SBML_PREFIX = (
+    "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
+    "<sbml xmlns=\"http://www.sbml.org/sbml/level3/version2/core\" level=\"3\" version=\"2\">\n"
+    "  <model id=\"{}\" name=\"{}\">\n"
+    "    <notes>\n"
+    "      <body xmlns=\"http://www.w3.org/1999/xhtml\">{}</body>\n"
+    "    </notes>\n"
+    "    <listOfCompartments>\n"
+    "      <compartment id=\"compartment\" constant=\"true\"/>\n"
+    "    </listOfCompartments>\n").format
+  SBML_SUFFIX = "  </model>\n</sbml>\n"
+  # characters that are not allowed in SBML identifiers, see to_sid
+  __SID_INVALID = re.compile (r"[^A-Za-z0-9_]")
+  SBML_SPECIES_PREFIX = "    <listOfSpecies>\n"
+  SBML_SPECIES_SUFFIX = "    </listOfSpecies>\n"
+  SBML_SPECIES = "      <species metaid=\"{0}\" id=\"{0}\" name=\"{1}\" compartment=\"compartment\" hasOnlySubstanceUnits=\"false\" boundaryCondition=\"false\" constant=\"false\"/>\n".format
+  SBML_ANNOTATED_SPECIES = "      <species metaid=\"{0}\" id=\"{0}\" name=\"{1}\" compartment=\"compartment\" hasOnlySubstanceUnits=\"false\" boundaryCondition=\"false\" constant=\"false\">\n{2}\n      </species>\n".format
+  SBML_REACTIONS_PREFIX = "    <listOfReactions>\n"
+  SBML_REACTIONS_SUFFIX = "    </listOfReactions>\n"
+  SBML_REACTION = (
+    "      <reaction id=\"",
+    "\" reversible=\"false\">\n"
+    "        <listOfReactants>\n"
+    "          <speciesReference species=\"",
+    "\" stoichiometry=\"1\" constant=\"true\"/>\n"
+    "        </listOfReactants>\n"
+    "        <listOfProducts>\n"
+    "          <speciesReference species=\"",
+    "\" stoichiometry=\"1\" constant=\"true\"/>\n"
+    "        </listOfProducts>\n"
+    "      </reaction>\n")
+
+  def __init__ (self, file_path, chunk_size = CHUNK_SIZE, buffer_size = BUFFER_SIZE):
+    self.__logger = logging.getLogger(__name__)
+    self.file_path = file_path
+    self.chunk_size = chunk_size
+    self.buffer_size = buffer_size
+    self.__file = None
+    self.__chunk = []
+    self.__chunk_length = 0
+    self.written = 0
+
+  def __enter__ (self):
+    if isinstance (self.file_path, str):
+      self.__file = open (self.file_path, 'w', buffering = self.buffer_size)
+    else:
+      self.__file = self.file_path
+    return self
+
+  def __exit__ (self, exc_type, exc_value, traceback):
+    try:
+      if exc_type is None:
+        self.flush ()
+    finally:
+      if self.__file is not self.file_path:
+        self.__file.close ()
+      self.__file = None
+    self.__logger.debug ("wrote " + str (self.written) + " characters to " + str (self.file_path))
+    return False
+
+  def write (self, fragment):
+    """
+    write a fragment
+
+    :param fragment: the fragment
+    :type fragment: str
+    """
+    self.__chunk.append (fragment)
+    self.__chunk_length += len (fragment)
+    if self.__chunk_length >= self.chunk_size:
+      self.flush ()
+
+  def write_all (self, fragments):
+    """
+    write many fragments, e.g. a generator of nodes
+
+    :param fragments: the fragments
+    :type fragments: iterable of str
+    """
+    self.write ("".join (fragments))
+
+  def write_joined (self, prefix, items, suffix):
+    """
+    write every item, surrounded by the same prefix and suffix
+
+    :param prefix: the text before every item
+    :param items: the items
+    :param suffix: the text after every item
+    :type prefix: str
+    :type items: list of str
+    :type suffix: str
+    """
+    if items:
+      self.write (prefix + (suffix + prefix).join (items) + suffix)
+
+  def write_edges_from (self, template, source, targets):
+    """
+    write the edges from one node to many others
+
+    :param template: the edge template, such as :data:`DOT_EDGE`
+    :param source: the (escaped) id of the source node
+    :param targets: the (escaped) ids of the target nodes
+    :type template: tuple of str
+    :type source: str
+    :type targets: list of str
+    """
+    self.write_joined (template[0] + source + template[1], targets, template[2])
+
+  def write_edges_to (self, template, sources, target):
+    """
+    write the edges from many nodes to one other
+
+    :param template: the edge template, such as :data:`DOT_EDGE`
+    :param sources: the (escaped) ids of the source nodes
+    :param target: the (escaped) id of the target node
+    :type template: tuple of str
+    :type sources: list of str
+    :type target: str
+    """
+    self.write_joined (template[0], sources, template[1] + target + template[2])
+
+  def write_numbered_edges_from (self, template, num, source, targets):
+    """
+    write the numbered edges from one node to many others
+
+    :param template: the edge template, such as :data:`GRAPHML_EDGE`
+    :param num: the number of the first edge
+    :param source: the (escaped) id of the source node
+    :param targets: the (escaped) ids of the target nodes
+    :type template: tuple of str
+    :type num: int
+    :type source: str
+    :type targets: list of str
+
+    :return: the number of the next edge
+    :rtype: int
+    """
+    middle = template[1] + source + template[2]
+    self.write_joined (template[0], [f"{n}{middle}{target}" for n, target in enumerate (targets, num)], template[3])
+    return num + len (targets)
+
+  def write_numbered_edges_to (self, template, num, sources, target):
+    """
+    write the numbered edges from many nodes to one other
+
+    :param template: the edge template, such as :data:`GRAPHML_EDGE`
+    :param num: the number of the first edge
+    :param sources: the (escaped) ids of the source nodes
+    :param target: the (escaped) id of the target node
+    :type template: tuple of str
+    :type num: int
+    :type sources: list of str
+    :type target: str
+
+    :return: the number of the next edge
+    :rtype: int
+    """
+    middle, suffix = template[1], template[2] + target + template[3]
+    self.write_joined (template[0], [f"{n}{middle}{source}" for n, source in enumerate (sources, num)], suffix)
+    return num + len (sources)
+
+  def flush (self):
+    """
+    join the collected fragments and write them to the file
+    """
+    if self.__chunk:
+      data = "".join (self.__chunk)
+      self.__file.write (data)
+      self.written += len (data)
+      self.__chunk.clear ()
+      self.__chunk_length = 0
+
+  @staticmethod
+  def iterate (export, queue_size = QUEUE_SIZE):
+    """
+    run an export in the background and iterate over the chunks it writes
+
+    the export is called in a separate thread with a stream that passes every chunk through a bounded queue.
+    thus, at most `queue_size` chunks are kept in memory and the export pauses if the consumer is slower.
+    if the iteration stops early (e.g. the client disconnected), the export is cancelled.
+
+    .. code-block:: python
+
+      for chunk in ExportWriter.iterate (network.export_en_dot):
+        print (chunk)
+
+    :param export: the export, called with a writable stream, e.g. :func:`.network.Network.export_en_dot`
+    :param queue_size: the max number of chunks waiting to be consumed
+    :type export: function
+    :type queue_size: int
+
+    :return: the chunks of the export
+    :rtype: generator of str or bytes-like objects
+
+    :raises Exception: what the export raised
+    """
+    stream = _QueueStream (queue_size)
+    errors = []
+
+    def run ():
+      try:
+        export (stream)
+      except Exception as e:
+        errors.append (e)
+      finally:
+        stream.close ()
+
+    thread = threading.Thread (target = run, daemon = True)
+    thread.start ()
+    try:
+      for chunk in stream:
+        yield chunk
+      thread.join ()
+      if errors:
+        raise errors[0]
+    finally:
+      stream.cancel ()
+      while thread.is_alive ():
+        stream.drain ()
+        thread.join (0.1)
+
+  @staticmethod
+  def escape_dot (text):
+    """
+    escape a string for a quoted DOT attribute
+
+    :param text: the text to escape
+    :type text: str
+
+    :return: the escaped text
+    :rtype: str
+    """
+    if "\"" in text or "\\" in text or "\n" in text:
+      return text.replace ("\\", "\\\\").replace ("\"", "\\\"").replace ("\n", "\\n")
+    return text
+
+  @staticmethod
+  def escape_gml (text):
+    """
+    escape a string for a quoted GML value
+
+    GML encodes special characters as HTML entities
+
+    :param text: the text to escape
+    :type text: str
+
+    :return: the escaped text
+    :rtype: str
+    """
+    if "&" in text or "\"" in text:
+      return text.replace ("&", "&amp;").replace ("\"", "&quot;")
+    return text
+
+  @staticmethod
+  def escape_xml (text):
+    """
+    escape a string for XML content and attributes
+
+    :param text: the text to escape
+    :type text: str
+
+    :return: the escaped text
+    :rtype: str
+    """
+    if "&" in text or "<" in text or ">" in text or "\"" in text:
+      return text.replace ("&", "&amp;").replace ("<", "&lt;").replace (">", "&gt;").replace ("\"", "&quot;")
+    return text
+
+  @staticmethod
+  def to_sid (text):
+    """
+    turn a string into a valid SBML identifier (SId)
+
+    characters other than letters, digits, and underscores are replaced by underscores, and an identifier that starts with a digit is prefixed with an underscore
+
+    :param text: the text to turn into an identifier
+    :type text: str
+
+    :return: the identifier
+    :rtype: str
+    """
+    sid = ExportWriter.__SID_INVALID.sub ("_", text)
+    if sid[:1].isdigit ():
+      return "_" + sid
+    return sid
+
+  @staticmethod
+  def escape_csv (text):
+    """
+    escape a string for a quoted CSV cell
+
+    :param text: the text to escape
+    :type text: str
+
+    :return: the escaped text
+    :rtype: str
+    """
+    if "\"" in text:
+      return text.replace ("\"", "\"\"")
+    return text
+
+
+class _QueueStream:
+  """
+  a writable (text or binary) stream that passes the written chunks through a bounded queue, see :func:`ExportWriter.iterate`
+
+  :param queue_size: the max number of chunks in the queue
+  :type queue_size: int
+  """
+
+  END = None
+
+  def __init__ (self, queue_size):
+    self.queue = queue.Queue (queue_size)
+    self.cancelled = threading.Event ()
+
+  def write (self, chunk):
+    if self.cancelled.is_set ():
+      raise IOError ("the export was cancelled")
+    if chunk:
+      self.queue.put (chunk)
+    return len (chunk)
+
+  def flush (self):
+    pass
+
+  def close (self):
+    self.queue.put (_QueueStream.END)
+
+  def cancel (self):
+    self.cancelled.set ()
+
+  def drain (self):
+    try:
+      while True:
+        self.queue.get_nowait ()
+    except queue.Empty:
+      pass
+
+  def __iter__ (self):
+    while True:
+      chunk = self.queue.get ()
+      if chunk is _QueueStream.END:
+        return
+      yield chunk
@@ -14,22 +14,32 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+import json
 import logging
+import math
 import re
+import sys
+from array import array
 
+from .exportwriter import ExportWriter
 from .gene import Gene
 from .genecomplex import GeneComplex
+from .npzwriter import NpzWriter
 from .reaction import Reaction
+from .segmentwriter import SegmentWriter
 from .species import Species
 from ..utils import Utils
 
-from libsbml import LIBSBML_OPERATION_SUCCESS, SBMLDocument, SBMLWriter
-
 
 class Network:
   """
   a class representing a network
   """
+  # version of the layout produced by iter_serialize_binary
+  BINARY_VERSION = 1
+  # typecode of 32 bit unsigned integer arrays
+  UINT32 = "I" if array ("I").itemsize == 4 else "L"
+  
   def __init__ (self):
     self.__logger = logging.getLogger(__name__)
     self.species = {}
@@ -155,70 +165,330 @@ class Network:
     :rtype: dict
     """
     self.__logger.debug ("serialising the network")
-    json = {
-      "species": [],
-      "reactions": [],
-      "enzs": [],
-      "enzc": [],
+    return {key: list (items) for key, items in self.iter_serialize ().items ()}
+  
+  def iter_serialize (self):
+    """
+    serialize to a dict of generators
+    
+    contains the same information as :func:`serialize`, but the entities are only serialized when the generators are consumed.
+    thus, the serialized network can be streamed (see :func:`modules.gemtractor.utils.Utils.iter_json`) without having all of it in memory.
+    
+    :return: dict with generators for the species, reactions, enzs, and enzc
+    :rtype: dict
+    """
+    species_mapper = {identifier: n for n, identifier in enumerate (self.species)}
+    reaction_mapper = {identifier: n for n, identifier in enumerate (self.reactions)}
+    gene_mapper = {identifier: n for n, identifier in enumerate (self.genes)}
+    gene_complex_mapper = {identifier: n for n, identifier in enumerate (self.gene_complexes)}
+    
+    return {
+      "species": self.__iter_serialize_species (reaction_mapper),
+      "reactions": self.__iter_serialize_reactions (species_mapper, gene_mapper, gene_complex_mapper),
+      "enzs": self.__iter_serialize_genes (reaction_mapper, gene_mapper),
+      "enzc": self.__iter_serialize_gene_complexes (reaction_mapper, gene_mapper),
       }
-      
-    species_mapper = {}
-    reaction_mapper = {}
-    gene_mapper = {}
-    gene_complex_mapper = {}
+  
+  def __iter_serialize_species (self, reaction_mapper):
+    """
+    serialize the species one by one
     
+    :param reaction_mapper: dict that maps a reaction id to its index in the serialized reactions
+    :type reaction_mapper: dict
+    
+    :return: the serialized species
+    :rtype: generator of dict
+    """
     for identifier, species in self.species.items ():
       self.__logger.debug ("serialising species " + identifier)
       s_ser = species.serialize ()
-      species_mapper[identifier] = len (json["species"])
-      json["species"].append (s_ser)
+      # reduce return size: replace reaction ids in species occurrences
+      s_ser["occ"] = [reaction_mapper[occ] for occ in s_ser["occ"]]
+      yield s_ser
+  
+  def __iter_serialize_reactions (self, species_mapper, gene_mapper, gene_complex_mapper):
+    """
+    serialize the reactions one by one
+    
+    :param species_mapper: dict that maps a species id to its index in the serialized species
+    :param gene_mapper: dict that maps a gene id to its index in the serialized genes
+    :param gene_complex_mapper: dict that maps a gene complex id to its index in the serialized gene complexes
+    :type species_mapper: dict
+    :type gene_mapper: dict
+    :type gene_complex_mapper: dict
+    
+    :return: the serialized reactions
+    :rtype: generator of dict
+    """
+    for identifier, reaction in self.reactions.items ():
+      self.__logger.debug ("serialising reaction " + identifier)
+      yield reaction.serialize (species_mapper, gene_mapper, gene_complex_mapper)
+  
+  def __iter_serialize_genes (self, reaction_mapper, gene_mapper):
+    """
+    serialize the genes one by one
+    
+    :param reaction_mapper: dict that maps a reaction id to its index in the serialized reactions
+    :param gene_mapper: dict that maps a gene id to its index in the serialized genes
+    :type reaction_mapper: dict
+    :type gene_mapper: dict
+    
+    :return: the serialized genes
+    :rtype: generator of dict
+    """
+    # add gene-genecomplex information
+    complexes_of_gene = [[] for g in self.genes]
+    for n, gene_complex in enumerate (self.gene_complexes.values ()):
+      for g in gene_complex.genes:
+        complexes_of_gene[gene_mapper[g.identifier]].append (n)
     
-    for identifier, gene in self.genes.items ():
+    for n, (identifier, gene) in enumerate (self.genes.items ()):
       self.__logger.debug ("serialising gene " + identifier)
       g_ser = gene.serialize ()
-      gene_mapper[identifier] = len (json["enzs"])
-      json["enzs"].append (g_ser)
+      # reduce return size: replace reaction ids in gene occurrences
+      g_ser["reactions"] = [reaction_mapper[occ] for occ in g_ser["reactions"]]
+      g_ser["cplx"] = complexes_of_gene[n]
+      yield g_ser
+  
+  def __iter_serialize_gene_complexes (self, reaction_mapper, gene_mapper):
+    """
+    serialize the gene complexes one by one
     
+    :param reaction_mapper: dict that maps a reaction id to its index in the serialized reactions
+    :param gene_mapper: dict that maps a gene id to its index in the serialized genes
+    :type reaction_mapper: dict
+    :type gene_mapper: dict
+    
+    :return: the serialized gene complexes
+    :rtype: generator of dict
+    """
     for identifier, gene_complex in self.gene_complexes.items ():
       self.__logger.debug ("serialising gene complex " + identifier)
       g_ser = gene_complex.serialize (gene_mapper)
-      gene_complex_mapper[identifier] = len (json["enzc"])
-      json["enzc"].append (g_ser)
-      # add gene-genecomplex information
+      # reduce return size: replace reaction ids in gene occurrences
+      g_ser["reactions"] = [reaction_mapper[occ] for occ in g_ser["reactions"]]
+      yield g_ser
+  
+  def serialize_columnar (self):
+    """
+    serialize to a compact, column-oriented JSON-dumpable object
+    
+    contains the same information as :func:`serialize`, but every entity type is encoded as an object of parallel arrays instead of a list of objects.
+    relations are encoded in compressed sparse row format: the links of the i-th entity are stored in idx[off[i]:off[i+1]].
+    the object will contain the following information:
+    
+    - species: id, name, and occ (reactions, in which the species occurs)
+    - reactions: id, name, rev, cons (consumed species), prod (produced species), enzs (enzymes), and enzc (enzyme complexes)
+    - enzs: id, reactions, and cplx (complexes, in which the enzyme participates)
+    - enzc: id, enzs (enzymes that are part of the complex), and reactions
+    
+    all links are integers pointing into the arrays of the corresponding entity type, in the same order as in :func:`serialize`.
+    
+    :return: JSON-dumpable object
+    :rtype: dict
+    """
+    self.__logger.debug ("serialising the network in columnar format")
+    species = self.species.values ()
+    reactions = self.reactions.values ()
+    columns = {
+      "species": {
+        "id": list (self.species),
+        "name": [s.name for s in species],
+        },
+      "reactions": {
+        "id": list (self.reactions),
+        "name": [r.name for r in reactions],
+        "rev": [r.reversible for r in reactions],
+        },
+      "enzs": {
+        "id": list (self.genes),
+        },
+      "enzc": {
+        "id": list (self.gene_complexes),
+        },
+      }
+    for entity, relation, csr in self.__relations ():
+      columns[entity][relation] = csr
+    return columns
+  
+  def iter_serialize_binary (self, fluxes = None, extra = None):
+    """
+    serialize to a compact binary format
+    
+    contains the same information as :func:`serialize_columnar`, but encoded in a binary layout that can be decoded without parsing JSON.
+    all numbers are little-endian, the stream consists of:
+    
+    - magic: the 4 bytes 'GEMN'
+    - header: uint32 format version, number of species, reactions, enzymes, enzyme complexes, strings, and string bytes
+    - string table: uint32 offsets (one more than there are strings) into the following UTF-8 encoded bytes, padded to 4 bytes; the strings are the species ids and names, reaction ids and names, enzyme ids, and enzyme complex ids
+    - reversibility: one uint8 per reaction, padded to 4 bytes
+    - relations: uint32 arrays in compressed sparse row format, in the order species.occ, reactions.cons, reactions.prod, reactions.enzs, reactions.enzc, enzs.reactions, enzs.cplx, enzc.enzs, and enzc.reactions; the offsets (one more than there are entities) are followed by the links
+    - fluxes: padded to 8 bytes, one float64 per reaction, NaN if the flux is not known
+    - extra: uint32 length of the following UTF-8 encoded JSON document
+    
+    :param fluxes: the fluxes of the reactions, either as dict or already aligned to the reactions (see :func:`modules.gemtractor.fluxtable.FluxTable.align`), fluxes that cannot be converted to float are ignored
+    :param extra: some more information to attach as JSON
+    :type fluxes: dict or array of float
+    :type extra: JSON-dumpable object
+    
+    :return: the chunks of the binary encoded network
+    :rtype: generator of bytes-like objects
+    """
+    self.__logger.debug ("serialising the network in binary format")
+    if fluxes is None:
+      fluxes = {}
+    
+    strings = []
+    for s in self.species.values ():
+      strings.append (s.identifier)
+    for s in self.species.values ():
+      strings.append (s.name)
+    for r in self.reactions.values ():
+      strings.append (r.identifier)
+    for r in self.reactions.values ():
+      strings.append (r.name)
+    strings.extend (self.genes)
+    strings.extend (self.gene_complexes)
+    strings = [string.encode ("utf-8") for string in strings]
+    
+    string_offsets = array (Network.UINT32, [0])
+    for string in strings:
+      string_offsets.append (string_offsets[-1] + len (string))
+    
+    header = array (Network.UINT32, [Network.BINARY_VERSION, len (self.species), len (self.reactions), len (self.genes), len (self.gene_complexes), len (strings), string_offsets[-1]])
+    reversible = array ("B", (r.reversible for r in self.reactions.values ()))
+    
+    if isinstance (fluxes, array):
+      flux_values = array ("d", fluxes)
+    else:
+      flux_values = array ("d")
+      for identifier in self.reactions:
+        try:
+          flux_values.append (float (fluxes[identifier]))
+        except (KeyError, TypeError, ValueError):
+          flux_values.append (math.nan)
+    
+    extra = json.dumps (extra).encode ("utf-8")
+    
+    # integers in the list of blocks denote paddings, so the arrays are aligned to the size of their items
+    blocks = [b"GEMN", header, string_offsets, b"".join (strings), 4, reversible, 4]
+    for entity, relation, csr in self.__relations (Network.UINT32):
+      blocks.extend ([csr["off"], csr["idx"]])
+    blocks.extend ([8, flux_values, array (Network.UINT32, [len (extra)]), extra])
+    
+    written = 0
+    for block in blocks:
+      if isinstance (block, int):
+        padding = -written % block
+        if padding > 0:
+          yield bytes (padding)
+          written += padding
+        continue
+      if isinstance (block, array) and sys.byteorder != "little":
+        block.byteswap ()
+      block = memoryview (block).cast ("B")
+      yield block
+      written += len (block)
+  
+  def __relations (self, typecode = None):
+    """
+    encode all relations between the entities in compressed sparse row format
+    
+    :param typecode: the typecode of the arrays to create, see :func:`__csr`
+    :type typecode: str
+    
+    :return: list of tuples of the entity type, the name of the relation, and the relation
+    :rtype: list
+    """
+    species_mapper = {identifier: n for n, identifier in enumerate (self.species)}
+    reaction_mapper = {identifier: n for n, identifier in enumerate (self.reactions)}
+    gene_mapper = {identifier: n for n, identifier in enumerate (self.genes)}
+    gene_complex_mapper = {identifier: n for n, identifier in enumerate (self.gene_complexes)}
+    
+    species = self.species.values ()
+    reactions = self.reactions.values ()
+    genes = self.genes.values ()
+    gene_complexes = self.gene_complexes.values ()
+    
+    # complexes only know their genes, so collect the complexes of every gene
+    complexes_of_gene = [[] for g in genes]
+    for n, gene_complex in enumerate (gene_complexes):
       for g in gene_complex.genes:
-        json["enzs"][gene_mapper[g.identifier]]["cplx"].append (gene_complex_mapper[identifier])
+        complexes_of_gene[gene_mapper[g.identifier]].append (n)
+    
+    return [
+      ("species", "occ", Network.__csr ((s.occurence for s in species), reaction_mapper, typecode)),
+      ("reactions", "cons", Network.__csr ((r.consumed for r in reactions), species_mapper, typecode)),
+      ("reactions", "prod", Network.__csr ((r.produced for r in reactions), species_mapper, typecode)),
+      ("reactions", "enzs", Network.__csr ((r.genes for r in reactions), gene_mapper, typecode)),
+      ("reactions", "enzc", Network.__csr ((r.genec for r in reactions), gene_complex_mapper, typecode)),
+      ("enzs", "reactions", Network.__csr ((g.reactions for g in genes), reaction_mapper, typecode)),
+      ("enzs", "cplx", Network.__csr (complexes_of_gene, None, typecode)),
+      ("enzc", "enzs", Network.__csr (((g.identifier for g in gene_complex.genes) for gene_complex in gene_complexes), gene_mapper, typecode)),
+      ("enzc", "reactions", Network.__csr ((g.reactions for g in gene_complexes), reaction_mapper, typecode)),
+      ]
+  
+  @staticmethod
+  def __csr (rows, mapper = None, typecode = None):
+    """
+    encode a list of relations in compressed sparse row format
     
+    :param rows: the links of every entity
+    :param mapper: dict that maps the linked identifiers to integers, if None the links are expected to be integers already
+    :param typecode: if given, the offsets and links will be stored in arrays of that type instead of lists
+    :type rows: iterable of iterables
+    :type mapper: dict
+    :type typecode: str
     
-    for identifier, reaction in self.reactions.items ():
-      self.__logger.debug ("serialising reaction " + identifier)
-      # json["reactions"][reaction.num] = reaction.serialize ()
-      r_ser = reaction.serialize (species_mapper, gene_mapper, gene_complex_mapper)
-      reaction_mapper[identifier] = len (json["reactions"])
-      json["reactions"].append (r_ser)
-    
-    
-    # further reduce return size: replace reaction ids in species occurrences
-    for s in json["species"]:
-      o = []
-      for occ in s["occ"]:
-        o.append (reaction_mapper[occ])
-      s["occ"] = o
-    
-    # further reduce return size: replace reaction ids in gene occurrences
-    for g in json["enzs"]:
-      o = []
-      for occ in g["reactions"]:
-        o.append (reaction_mapper[occ])
-      g["reactions"] = o
-    for g in json["enzc"]:
-      o = []
-      for occ in g["reactions"]:
-        o.append (reaction_mapper[occ])
-      g["reactions"] = o
-      
-    return json
+    :return: dict with the offsets ('off', one more than there are rows) and the concatenated links ('idx')
+    :rtype: dict
+    """
+    if typecode is None:
+      off = [0]
+      idx = []
+    else:
+      off = array (typecode, [0])
+      idx = array (typecode)
+    for row in rows:
+      if mapper is None:
+        idx.extend (row)
+      else:
+        idx.extend (map (mapper.__getitem__, row))
+      off.append (len (idx))
+    return {"off": off, "idx": idx}
+    
+    
+  def orient_reactions (self, fluxes, epsilon = 0):
+    """
+    orient reversible reactions according to their fluxes
     
+    reversible reactions link all their species in both directions in :func:`calc_reaction_net` and :func:`calc_genenet`.
+    if we know the flux through a reaction, we know the direction, so it is not reversible anymore:
+    reactions with a negative flux have their consumed and produced species swapped.
     
+    reactions with an unknown flux or a flux of (about) zero are not changed.
+    needs to be called before the reaction or enzyme networks are calculated.
+    
+    :param fluxes: the fluxes in the order of the reactions, see :func:`modules.gemtractor.fluxtable.FluxTable.align`
+    :param epsilon: fluxes with an absolute value up to epsilon are considered zero
+    :type fluxes: array of float
+    :type epsilon: float
+    
+    :return: the number of reactions that were oriented
+    :rtype: int
+    """
+    reactions = list (self.reactions.values ())
+    forward = [n for n, flux in enumerate (fluxes) if flux > epsilon and reactions[n].reversible]
+    backward = [n for n, flux in enumerate (fluxes) if flux < -epsilon and reactions[n].reversible]
+    for n in forward:
+      reactions[n].reversible = False
+    for n in backward:
+      reaction = reactions[n]
+      reaction.reversible = False
+      reaction.consumed, reaction.produced = reaction.produced, reaction.consumed
+    self.__logger.info ("oriented " + str (len (forward) + len (backward)) + " reversible reactions")
+    return len (forward) + len (backward)
+  
   def calc_reaction_net (self):
     """
     Calculate the reaction-centric network
@@ -334,179 +604,339 @@ class Network:
           
     self.__logger.info ("got gene net")
     self.have_gene_net = True
+
+  def get_reaction_links (self):
+    """
+    iterate the links of the reaction-centric network
+
+    will calculate the reaction-centric network using :func:`calc_reaction_net`, if not done yet
+
+    :return: generator of (source, target) tuples of reaction identifiers
+    :rtype: generator of tuple of str
+    """
+    if not self.have_reaction_net:
+      self.calc_reaction_net ()
+    for identifier, reaction in self.reactions.items ():
+      for r in reaction.links:
+        yield (identifier, r.identifier)
+
+  def get_gene_links (self):
+    """
+    iterate the links of the enzyme-centric network
+
+    will calculate the enzyme-centric network using :func:`calc_genenet`, if not done yet
+
+    :return: generator of (source, target) tuples of gene and gene complex identifiers
+    :rtype: generator of tuple of str
+    """
+    if not self.have_gene_net:
+      self.calc_genenet ()
+    for gene in self.genes:
+      for associated in self.genes[gene].links["g"]:
+        yield (gene, associated.identifier)
+      for associated in self.genes[gene].links["gc"]:
+        yield (gene, associated.identifier)
+    for gene in self.gene_complexes:
+      for associated in self.gene_complexes[gene].links["g"]:
+        yield (gene, associated.identifier)
+      for associated in self.gene_complexes[gene].links["gc"]:
+        yield (gene, associated.identifier)
+
+  def diff (self, other, projections = True):
+    """
+    compare this network to another network
+
+    entities are matched by their identifiers (gene complexes are identified by their sorted list of genes, see :func:`.genecomplex.GeneComplex.calc_id`), so every lookup is a hash lookup and the whole comparison is linear in the size of both networks.
+    an entity is considered as changed if it exists in both networks, but its name, reversibility, or any of its relations differ.
+
+    the comparison is lazy, it yields the following sections as tuples of (section, changes):
+
+    - species: added, removed, and changed species
+    - reactions: added, removed, and changed reactions
+    - enzs: added, removed, and changed enzymes
+    - enzc: added, removed, and changed enzyme complexes
+    - rn: added and removed links of the reaction-centric network (only if projections is true)
+    - en: added and removed links of the enzyme-centric network (only if projections is true)
+
+    the changes of a section map 'added', 'removed', and 'changed' to generators, which yield the identifiers (or links) while they compare the networks.
+    thus, the differences can be streamed (e.g. using :func:`..utils.Utils.iter_json`) without ever being in memory as a whole.
+    'added' means it only exists in the other network, 'removed' means it only exists in this network.
+
+    .. code-block:: python
+
+      for section, changes in network.diff (other):
+        for identifier in changes["added"]:
+          print (section + " added " + identifier)
+
+    :param other: the network to compare with
+    :param projections: should we also compare the links of the reaction-centric and enzyme-centric networks?
+    :type other: :class:`Network`
+    :type projections: bool
+
+    :return: the sections of the differences
+    :rtype: generator of tuples of str and dict
+    """
+    self.__logger.info ("diffing networks")
+    yield "species", Network.__diff_entities (self.species, other.species,
+      lambda s: (s.name, frozenset (s.occurence)))
+    yield "reactions", Network.__diff_entities (self.reactions, other.reactions,
+      lambda r: (r.name, r.reversible, frozenset (r.consumed), frozenset (r.produced), frozenset (r.genes), frozenset (r.genec)))
+    yield "enzs", Network.__diff_entities (self.genes, other.genes,
+      lambda g: frozenset (g.reactions))
+    yield "enzc", Network.__diff_entities (self.gene_complexes, other.gene_complexes,
+      lambda g: frozenset (g.reactions))
+    if projections:
+      yield "rn", {
+        "added": Network.__diff_links (other.get_reaction_links, self.get_reaction_links),
+        "removed": Network.__diff_links (self.get_reaction_links, other.get_reaction_links),
+        }
+      yield "en", {
+        "added": Network.__diff_links (other.get_gene_links, self.get_gene_links),
+        "removed": Network.__diff_links (self.get_gene_links, other.get_gene_links),
+        }
+
+  @staticmethod
+  def __diff_entities (mine, theirs, signature):
+    """
+    compare two dicts of entities
+
+    :param mine: the entities of this network, indexed by their identifiers
+    :param theirs: the entities of the other network, indexed by their identifiers
+    :param signature: function that returns a hashable summary of an entity, entities with different summaries are considered as changed
+    :type mine: dict
+    :type theirs: dict
+    :type signature: function
+
+    :return: dict with generators of 'added', 'removed', and 'changed' identifiers
+    :rtype: dict
+    """
+    return {
+      "added": (identifier for identifier in theirs if identifier not in mine),
+      "removed": (identifier for identifier in mine if identifier not in theirs),
+      "changed": (identifier for identifier, entity in mine.items () if identifier in theirs and signature (entity) != signature (theirs[identifier])),
+      }
+
+  @staticmethod
+  def __diff_links (links, others):
+    """
+    find the links that are missing in another network
+
+    only the links of the other network are kept in memory, the links of this network are streamed
+
+    :param links: function that generates the links of this network
+    :param others: function that generates the links of the other network
+    :type links: function
+    :type others: function
+
+    :return: the links that only exist in this network
+    :rtype: generator of tuple of str
+    """
+    others = set (others ())
+    for link in links ():
+      if link not in others:
+        yield link
+
+  def __iter_en_adjacency (self, nodemap):
+    """
+    iterate the links of the enzyme-centric network, grouped by their source
+    
+    :param nodemap: dict that maps the identifiers of enzymes and enzyme complexes to node ids
+    :type nodemap: dict
+    
+    :return: generator of the node id of the source and the node ids of its targets
+    :rtype: generator of tuples of str and list of str
+    """
+    for entities in (self.genes, self.gene_complexes):
+      for identifier, gene in entities.items ():
+        targets = [nodemap[associated.identifier] for associated in gene.links["g"]]
+        targets.extend (nodemap[associated.identifier] for associated in gene.links["gc"])
+        yield nodemap[identifier], targets
+  
+  def __iter_rn_adjacency (self, nodemap):
+    """
+    iterate the links of the reaction-centric network, grouped by their source
+    
+    :param nodemap: dict that maps the identifiers of reactions to node ids
+    :type nodemap: dict
+    
+    :return: generator of the node id of the source and the node ids of its targets
+    :rtype: generator of tuples of str and list of str
+    """
+    for identifier, reaction in self.reactions.items ():
+      yield nodemap[identifier], [nodemap[r.identifier] for r in reaction.links]
+  
+  def __write_adjacency (self, file_path, processes, head, template, adjacency, tail, numbered = False):
+    """
+    write an export of a projection: the head, the edges of every source node, and the tail
+    
+    large exports to a path are written in parallel if more than one process is allowed, see :class:`.segmentwriter.SegmentWriter`.
+    
+    :param file_path: where to store the exported format? a path or a writable text stream
+    :param processes: the max number of processes to write the export, or None
+    :param head: the fragments before the edges, e.g. the prefix and the nodes
+    :param template: the edge template, such as :data:`.exportwriter.ExportWriter.CSV_EDGE`
+    :param adjacency: the (escaped) ids of the source nodes and their targets
+    :param tail: the fragment after the edges
+    :param numbered: are the edges numbered? see :func:`.exportwriter.ExportWriter.write_numbered_edges_from`
+    :type file_path: str or file-like object
+    :type processes: int
+    :type head: iterable of str
+    :type template: tuple of str
+    :type adjacency: iterable of tuples of str and list of str
+    :type tail: str
+    :type numbered: bool
+    """
+    if SegmentWriter.is_applicable (file_path, processes):
+      adjacency = list (adjacency)
+      if sum (len (targets) for source, targets in adjacency) >= SegmentWriter.MIN_EDGES:
+        SegmentWriter (file_path, processes).write ("".join (head), template, adjacency, tail, numbered)
+        return
+    with ExportWriter (file_path) as writer:
+      writer.write_all (head)
+      num = 1
+      for source, targets in adjacency:
+        if numbered:
+          num = writer.write_numbered_edges_from (template, num, source, targets)
+        else:
+          writer.write_edges_from (template, source, targets)
+      writer.write (tail)
+  
+  def __en_nodemap (self, gene_prefix, gene_complex_prefix):
+    """
+    number the nodes of the enzyme-centric network
     
+    :param gene_prefix: the prefix for the ids of enzymes
+    :param gene_complex_prefix: the prefix for the ids of enzyme complexes
+    :type gene_prefix: str
+    :type gene_complex_prefix: str
     
+    :return: dict that maps the identifiers of enzymes and enzyme complexes to node ids
+    :rtype: dict
+    """
+    nodemap = {}
+    num = 0
+    for gene in self.genes:
+      num += 1
+      nodemap[gene] = gene_prefix + str (num)
+    for gene in self.gene_complexes:
+      num += 1
+      nodemap[gene] = gene_complex_prefix + str (num)
+    return nodemap
+
   def export_mn_dot (self, file_path):
     """
     export the metabolite-reaction network in DOT format
     
-    :param file_path: where to store the exported format?
-    :type file_path: str
+    :param file_path: where to store the exported format? a path or a writable text stream
+    :type file_path: str or file-like object
     """
-    nodemap = {}
-    with open(file_path, 'w') as f:
-      f.write ("digraph GEMtractor {\n")
+    escape = ExportWriter.escape_dot
+    nodemap = {identifier: 's' + identifier for identifier in self.species}
+    with ExportWriter (file_path) as writer:
+      writer.write (ExportWriter.DOT_PREFIX)
       #TODO comment incl time and version?
-      for identifier, species in self.species.items ():
-          nodemap[identifier] = 's' + identifier
-          f.write ("\t" + nodemap[identifier] + " [label=\""+identifier+"\"];\n")
+      writer.write_all (ExportWriter.DOT_NODE (nodemap[identifier], escape (identifier)) for identifier in self.species)
       for identifier, reaction in self.reactions.items ():
         rid = 'r' + identifier
-        f.write ("\t" + rid + " [label=\""+identifier+"\" shape=box];\n")
-        for s in reaction.consumed:
-          f.write ("\t" + nodemap[s] + " -> " + rid + ";\n")
-        for s in reaction.produced:
-          f.write ("\t" + rid + " -> " + nodemap[s] + ";\n")
-      f.write ("}\n")
+        writer.write (ExportWriter.DOT_BOX_NODE (rid, escape (identifier)))
+        writer.write_edges_to (ExportWriter.DOT_EDGE, [nodemap[s] for s in reaction.consumed], rid)
+        writer.write_edges_from (ExportWriter.DOT_EDGE, rid, [nodemap[s] for s in reaction.produced])
+      writer.write (ExportWriter.DOT_SUFFIX)
       
   
   
-  def export_rn_dot (self, file_path):
+  def export_rn_dot (self, file_path, processes = None):
     """
     export the reaction-centric network in DOT format
     
-    :param file_path: where to store the exported format?
-    :type file_path: str
+    :param file_path: where to store the exported format? a path or a writable text stream
+    :param processes: the max number of processes to write a large export, see :class:`.segmentwriter.SegmentWriter`
+    :type file_path: str or file-like object
+    :type processes: int
     """
     if not self.have_reaction_net:
       self.calc_reaction_net ()
-    with open(file_path, 'w') as f:
-      f.write ("digraph GEMtractor {\n")
-      
-      for identifier, reaction in self.reactions.items ():
-        f.write ("\t" + identifier + " [label=\""+reaction.name+"\"];\n")
-        
-      for identifier, reaction in self.reactions.items ():
-        for r in reaction.links:
-          f.write ("\t" + identifier + " -> " + r.identifier + ";\n")
-      f.write ("}\n")
+    nodemap = {identifier: identifier for identifier in self.reactions}
+    head = [ExportWriter.DOT_PREFIX]
+    head.extend (ExportWriter.DOT_NODE (identifier, ExportWriter.escape_dot (reaction.name)) for identifier, reaction in self.reactions.items ())
+    self.__write_adjacency (file_path, processes, head, ExportWriter.DOT_EDGE, self.__iter_rn_adjacency (nodemap), ExportWriter.DOT_SUFFIX)
       
-  def export_en_dot (self, file_path):
+  def export_en_dot (self, file_path, processes = None):
     """
     export the enzyme-centric network in DOT format
     
-    :param file_path: where to store the exported format?
-    :type file_path: str
+    :param file_path: where to store the exported format? a path or a writable text stream
+    :param processes: the max number of processes to write a large export, see :class:`.segmentwriter.SegmentWriter`
+    :type file_path: str or file-like object
+    :type processes: int
     """
     if not self.have_gene_net:
       self.calc_genenet ()
-    nodemap = {}
-    with open(file_path, 'w') as f:
-      f.write ("digraph GEMtractor {\n")
-      #TODO comment incl time and version?
-      num = 0
-      for gene in self.genes:
-          num = num + 1
-          nodemap[gene] = 'g' + str(num)
-          f.write ("\t" + nodemap[gene] + " [label=\""+gene+"\"];\n")
-      for gene in self.gene_complexes:
-          num = num + 1
-          nodemap[gene] = 'gc' + str(num)
-          f.write ("\t" + nodemap[gene] + " [label=\""+gene+"\"];\n")
-      
-      for gene in self.genes:
-          for associated in self.genes[gene].links["g"]:
-              f.write ("\t" + nodemap[gene] + " -> " + nodemap[associated.identifier] + ";\n")
-          for associated in self.genes[gene].links["gc"]:
-              f.write ("\t" + nodemap[gene] + " -> " + nodemap[associated.identifier] + ";\n")
-      for gene in self.gene_complexes:
-          for associated in self.gene_complexes[gene].links["g"]:
-              f.write ("\t" + nodemap[gene] + " -> " + nodemap[associated.identifier] + ";\n")
-          for associated in self.gene_complexes[gene].links["gc"]:
-              f.write ("\t" + nodemap[gene] + " -> " + nodemap[associated.identifier] + ";\n")
-      f.write ("}\n")
+    nodemap = self.__en_nodemap ('g', 'gc')
+    #TODO comment incl time and version?
+    head = [ExportWriter.DOT_PREFIX]
+    head.extend (ExportWriter.DOT_NODE (nid, ExportWriter.escape_dot (gene)) for gene, nid in nodemap.items ())
+    self.__write_adjacency (file_path, processes, head, ExportWriter.DOT_EDGE, self.__iter_en_adjacency (nodemap), ExportWriter.DOT_SUFFIX)
       
       
   def export_mn_gml (self, file_path):
     """
     export the metabolite-reaction network in GML format
     
-    :param file_path: where to store the exported format?
-    :type file_path: str
+    :param file_path: where to store the exported format? a path or a writable text stream
+    :type file_path: str or file-like object
     """
-    nodemap = {}
-    with open(file_path, 'w') as f:
-      f.write (Network.create_gml_prefix ())
+    escape = ExportWriter.escape_gml
+    nodemap = {identifier: str (num) for num, identifier in enumerate (self.species, 1)}
+    with ExportWriter (file_path) as writer:
+      writer.write (ExportWriter.GML_PREFIX)
       #TODO comment incl time and version?
+      writer.write_all (ExportWriter.GML_NODE (nodemap[identifier], escape (identifier)) for identifier in self.species)
       
-      num = 0
-      for identifier, species in self.species.items ():
-        num += 1
-        nodemap[identifier] = str (num)
-        f.write (Network.create_gml_node (nodemap[identifier], "species", "ellipse", identifier))
-      
+      num = len (nodemap)
       for identifier, reaction in self.reactions.items ():
         num += 1
         rid = str (num)
-        f.write (Network.create_gml_node (rid, "reaction", "rectangle", identifier))
-        for s in reaction.consumed:
-          f.write (Network.create_gml_edge (nodemap[s], rid))
-        for s in reaction.produced:
-          f.write (Network.create_gml_edge (rid, nodemap[s]))
+        writer.write (ExportWriter.GML_NODE (rid, escape (identifier)))
+        writer.write_edges_to (ExportWriter.GML_EDGE, [nodemap[s] for s in reaction.consumed], rid)
+        writer.write_edges_from (ExportWriter.GML_EDGE, rid, [nodemap[s] for s in reaction.produced])
         
-      f.write ("]\n")
+      writer.write (ExportWriter.GML_SUFFIX)
   
   
-  def export_rn_gml (self, file_path):
+  def export_rn_gml (self, file_path, processes = None):
     """
     export the reaction-centric network in GMl format
     
-    :param file_path: where to store the exported format?
-    :type file_path: str
+    :param file_path: where to store the exported format? a path or a writable text stream
+    :param processes: the max number of processes to write a large export, see :class:`.segmentwriter.SegmentWriter`
+    :type file_path: str or file-like object
+    :type processes: int
     """
     if not self.have_reaction_net:
       self.calc_reaction_net ()
-    with open(file_path, 'w') as f:
-      f.write (Network.create_gml_prefix ())
+    nodemap = {identifier: str (num) for num, identifier in enumerate (self.reactions, 1)}
+    head = [Network.create_gml_prefix ()]
+    head.extend (ExportWriter.GML_NODE (nodemap[identifier], ExportWriter.escape_gml (reaction.name)) for identifier, reaction in self.reactions.items ())
+    self.__write_adjacency (file_path, processes, head, ExportWriter.GML_EDGE, self.__iter_rn_adjacency (nodemap), ExportWriter.GML_SUFFIX)
       
-      nodemap = {}
-      num = 0
-      for identifier, reaction in self.reactions.items ():
-        num += 1
-        nodemap[identifier] = str (num)
-        f.write (Network.create_gml_node (nodemap[identifier], "reaction", "ellipse", reaction.name))
-        
-      for identifier, reaction in self.reactions.items ():
-        for r in reaction.links:
-          f.write (Network.create_gml_edge (nodemap[identifier], nodemap[r.identifier]))
-      f.write ("]\n")
       
-      
-  def export_en_gml (self, file_path):
+  def export_en_gml (self, file_path, processes = None):
     """
     export the enzyme-centric network in GML format
     
-    :param file_path: where to store the exported format?
-    :type file_path: str
+    :param file_path: where to store the exported format? a path or a writable text stream
+    :param processes: the max number of processes to write a large export, see :class:`.segmentwriter.SegmentWriter`
+    :type file_path: str or file-like object
+    :type processes: int
     """
     if not self.have_gene_net:
       self.calc_genenet ()
-    nodemap = {}
-    with open(file_path, 'w') as f:
-      f.write (Network.create_gml_prefix ())
-      #TODO comment incl time and version?
-      num = 0
-      for gene in self.genes:
-        num += 1
-        nodemap[gene] = str (num)
-        f.write (Network.create_gml_node (nodemap[gene], "enzyme", "ellipse", gene))
-      for gene in self.gene_complexes:
-        num += 1
-        nodemap[gene] = str (num)
-        f.write (Network.create_gml_node (nodemap[gene], "enzyme_complex", "ellipse", gene))
-        
-        
-      for gene in self.genes:
-          for associated in self.genes[gene].links["g"]:
-              f.write (Network.create_gml_edge (nodemap[gene], nodemap[associated.identifier]))
-          for associated in self.genes[gene].links["gc"]:
-              f.write (Network.create_gml_edge (nodemap[gene], nodemap[associated.identifier]))
-      for gene in self.gene_complexes:
-          for associated in self.gene_complexes[gene].links["g"]:
-              f.write (Network.create_gml_edge (nodemap[gene], nodemap[associated.identifier]))
-          for associated in self.gene_complexes[gene].links["gc"]:
-              f.write (Network.create_gml_edge (nodemap[gene], nodemap[associated.identifier]))
-      f.write ("]\n")
+    nodemap = self.__en_nodemap ('', '')
+    #TODO comment incl time and version?
+    head = [Network.create_gml_prefix ()]
+    head.extend (ExportWriter.GML_NODE (nid, ExportWriter.escape_gml (gene)) for gene, nid in nodemap.items ())
+    self.__write_adjacency (file_path, processes, head, ExportWriter.GML_EDGE, self.__iter_en_adjacency (nodemap), ExportWriter.GML_SUFFIX)
       
   @staticmethod
   def create_gml_prefix ():
@@ -517,11 +947,7 @@ class Network:
     :rtype: str
     
     """
-    n =     "graph [\n"
-    #TODO time and version?
-    n = n + "\tcomment \"generated using the GEMtractor\"\n"
-    n = n + "\tdirected 1\n"
-    return n
+    return ExportWriter.GML_PREFIX
   @staticmethod
   def create_gml_node (nid, ntype, nshape, nlabel):
     """
@@ -540,11 +966,7 @@ class Network:
     :rtype: str
     
     """
-    n =     "\tnode [\n"
-    n = n + "\t\tid " + nid + "\n"
-    n = n + "\t\tlabel \""+nlabel+"\"\n"
-    n = n + "\t]\n"
-    return n
+    return ExportWriter.GML_NODE (nid, ExportWriter.escape_gml (nlabel))
   @staticmethod
   def create_gml_edge (source, target):
     """
@@ -559,104 +981,68 @@ class Network:
     :rtype: str
     
     """
-    n =     "\tedge [\n"
-    n = n + "\t\tsource "+source+"\n"
-    n = n + "\t\ttarget "+target+"\n"
-    n = n + "\t]\n"
-    return n
+    return ExportWriter.GML_EDGE[0] + source + ExportWriter.GML_EDGE[1] + target + ExportWriter.GML_EDGE[2]
       
   def export_mn_graphml (self, file_path):
     """
     export the metabolite-reaction network in GraphML format
     
-    :param file_path: where to store the exported format?
-    :type file_path: str
+    :param file_path: where to store the exported format? a path or a writable text stream
+    :type file_path: str or file-like object
     """
-    nodemap = {}
-    with open(file_path, 'w') as f:
-      f.write (Network.create_graphml_prefix ())
+    escape = ExportWriter.escape_xml
+    nodemap = {identifier: escape ('s' + identifier) for identifier in self.species}
+    with ExportWriter (file_path) as writer:
+      writer.write (ExportWriter.GRAPHML_PREFIX)
       #TODO comment incl time and version?
+      writer.write_all (ExportWriter.GRAPHML_NODE (nodemap[identifier], "species", "ellipse", escape (identifier)) for identifier in self.species)
       
-      for identifier, species in self.species.items ():
-        nodemap[identifier] = 's' + identifier
-        f.write (Network.create_graphml_node (nodemap[identifier], "species", "ellipse", identifier))
-      
-      num = 0
+      num = 1
       for identifier, reaction in self.reactions.items ():
-        rid = 'r' + identifier
-        f.write (Network.create_graphml_node (rid, "reaction", "rectangle", identifier))
-        for s in reaction.consumed:
-          num = num + 1
-          f.write ("\t\t<edge id=\"e" + str(num) + "\" source=\"" + nodemap[s] + "\" target=\"" + rid + "\"/>\n")
-        for s in reaction.produced:
-          num = num + 1
-          f.write ("\t\t<edge id=\"e" + str(num) + "\" source=\"" + rid + "\" target=\"" + nodemap[s] + "\"/>\n")
+        rid = escape ('r' + identifier)
+        writer.write (ExportWriter.GRAPHML_NODE (rid, "reaction", "rectangle", escape (identifier)))
+        num = writer.write_numbered_edges_to (ExportWriter.GRAPHML_EDGE, num, [nodemap[s] for s in reaction.consumed], rid)
+        num = writer.write_numbered_edges_from (ExportWriter.GRAPHML_EDGE, num, rid, [nodemap[s] for s in reaction.produced])
         
-      f.write ("\t</graph>\n</graphml>\n")
+      writer.write (ExportWriter.GRAPHML_SUFFIX)
   
   
-  def export_rn_graphml (self, file_path):
+  def export_rn_graphml (self, file_path, processes = None):
     """
     export the reaction-centric network in GraphML format
     
-    :param file_path: where to store the exported format?
-    :type file_path: str
+    :param file_path: where to store the exported format? a path or a writable text stream
+    :param processes: the max number of processes to write a large export, see :class:`.segmentwriter.SegmentWriter`
+    :type file_path: str or file-like object
+    :type processes: int
     """
     if not self.have_reaction_net:
       self.calc_reaction_net ()
-    with open(file_path, 'w') as f:
-      f.write (Network.create_graphml_prefix ())
-      for identifier, reaction in self.reactions.items ():
-        f.write (Network.create_graphml_node (identifier, "reaction", "ellipse", reaction.name))
-        
-      num = 0
-      for identifier, reaction in self.reactions.items ():
-        for r in reaction.links:
-          num = num + 1
-          f.write ("\t\t<edge id=\"e" + str(num) + "\" source=\"" + identifier + "\" target=\"" + r.identifier + "\"/>\n")
-      
-      f.write ("\t</graph>\n</graphml>\n")
+    escape = ExportWriter.escape_xml
+    nodemap = {identifier: escape (identifier) for identifier in self.reactions}
+    head = [Network.create_graphml_prefix ()]
+    head.extend (ExportWriter.GRAPHML_NODE (nodemap[identifier], "reaction", "ellipse", escape (reaction.name)) for identifier, reaction in self.reactions.items ())
+    self.__write_adjacency (file_path, processes, head, ExportWriter.GRAPHML_EDGE, self.__iter_rn_adjacency (nodemap), ExportWriter.GRAPHML_SUFFIX, numbered = True)
       
       
-  def export_en_graphml (self, file_path):
+  def export_en_graphml (self, file_path, processes = None):
     """
     export the enzyme-centric network in GraphML format
     
-    :param file_path: where to store the exported format?
-    :type file_path: str
+    :param file_path: where to store the exported format? a path or a writable text stream
+    :param processes: the max number of processes to write a large export, see :class:`.segmentwriter.SegmentWriter`
+    :type file_path: str or file-like object
+    :type processes: int
     """
     if not self.have_gene_net:
       self.calc_genenet ()
-    nodemap = {}
-    with open(file_path, 'w') as f:
-      f.write (Network.create_graphml_prefix ())
-      #TODO comment incl time and version?
-      num = 0
-      for gene in self.genes:
-        num += 1
-        nodemap[gene] = 'g' + str (num)
-        f.write (Network.create_graphml_node (nodemap[gene], "enzyme", "ellipse", gene))
-      for gene in self.gene_complexes:
-        num += 1
-        nodemap[gene] = 'gc' + str (num)
-        f.write (Network.create_graphml_node (nodemap[gene], "enzyme_complex", "ellipse", gene))
-      num = 0
-      for gene in self.genes:
-          for associated in self.genes[gene].links["g"]:
-              num += 1
-              f.write ("\t\t<edge id=\"e" + str(num) + "\" source=\"" + nodemap[gene] + "\" target=\"" + nodemap[associated.identifier] + "\"/>\n")
-          for associated in self.genes[gene].links["gc"]:
-              num += 1
-              f.write ("\t\t<edge id=\"e" + str(num) + "\" source=\"" + nodemap[gene] + "\" target=\"" + nodemap[associated.identifier] + "\"/>\n")
-      for gene in self.gene_complexes:
-          for associated in self.gene_complexes[gene].links["g"]:
-              num += 1
-              f.write ("\t\t<edge id=\"e" + str(num) + "\" source=\"" + nodemap[gene] + "\" target=\"" + nodemap[associated.identifier] + "\"/>\n")
-          for associated in self.gene_complexes[gene].links["gc"]:
-              num += 1
-              f.write ("\t\t<edge id=\"e" + str(num) + "\" source=\"" + nodemap[gene] + "\" target=\"" + nodemap[associated.identifier] + "\"/>\n")
-      
-      f.write ("\t</graph>\n</graphml>\n")
+    escape = ExportWriter.escape_xml
+    nodemap = self.__en_nodemap ('g', 'gc')
+    #TODO comment incl time and version?
+    head = [Network.create_graphml_prefix ()]
+    head.extend (ExportWriter.GRAPHML_NODE (nodemap[gene], "enzyme", "ellipse", escape (gene)) for gene in self.genes)
+    head.extend (ExportWriter.GRAPHML_NODE (nodemap[gene], "enzyme_complex", "ellipse", escape (gene)) for gene in self.gene_complexes)
+    self.__write_adjacency (file_path, processes, head, ExportWriter.GRAPHML_EDGE, self.__iter_en_adjacency (nodemap), ExportWriter.GRAPHML_SUFFIX, numbered = True)
   
   @staticmethod
   def create_graphml_prefix ():
@@ -668,14 +1054,7 @@ class Network:
     
     """
     #TODO time and version?
-    n =     "<graphml xmlns=\"http://graphml.graphdrawing.org/xmlns\"\n"
-    n = n + "\txmlns:xsi=\"http://www.w3.org/2001/XMLSchema-instance\"\n"
-    n = n + "\txsi:schemaLocation=\"http://graphml.graphdrawing.org/xmlns/1.0/graphml.xsd\"\n"
-    n = n + "\txmlns:y=\"http://www.yworks.com/xml/graphml\">\n\n"
-    n = n + "\t<key for=\"node\" id=\"layout\" yfiles.type=\"nodegraphics\"/>\n"
-    n = n + "\t<key for=\"node\" id=\"type\" attr.type=\"string\"><default>species</default></key>\n"
-    n = n + "\t<graph id=\"GEMtractor\" edgedefault=\"directed\">\n"
-    return n
+    return ExportWriter.GRAPHML_PREFIX
   @staticmethod
   def create_graphml_node (nid, ntype, nshape, nlabel):
     """
@@ -694,16 +1073,7 @@ class Network:
     :rtype: str
     
     """
-    n =     "\t\t<node id=\"" + nid + "\">\n"
-    n = n + "\t\t\t<data key=\"type\">"+ntype+"</data>\n"
-    n = n + "\t\t\t<data key=\"layout\">\n"
-    n = n + "\t\t\t\t<y:ShapeNode>\n"
-    n = n + "\t\t\t\t\t<y:Shape type=\""+nshape+"\"/>\n"
-    n = n + "\t\t\t\t\t<y:NodeLabel>"+nlabel+"</y:NodeLabel>\n"
-    n = n + "\t\t\t\t</y:ShapeNode>\n"
-    n = n + "\t\t\t</data>\n"
-    n = n + "\t\t</node>\n"
-    return n
+    return ExportWriter.GRAPHML_NODE (ExportWriter.escape_xml (nid), ntype, nshape, ExportWriter.escape_xml (nlabel))
       
   def export_rn_sbml (self, file_path, gemtractor, model_id, model_name = None, filter_species = None, filter_reactions = None, filter_genes = None, filter_gene_complexes = None, remove_reaction_enzymes_removed = True, remove_ghost_species = False, discard_fake_enzymes = False, remove_reaction_missing_species = False, removing_enzyme_removes_complex = True):
     """
@@ -711,9 +1081,10 @@ class Network:
     
     will attach the trimming-settings as SBML note
     
-    writes the document using the `libsbml:SBMLWriter <http://sbml.org/Special/Software/libSBML/docs/python-api/class_s_b_m_l_writer.html>` -- returns the result of `libsbml:SBMLWriter.writeSBML <http://sbml.org/Special/Software/libSBML/docs/python-api/class_s_b_m_l_writer.html#a02d1998aee7656d7b9c3ac69d62bb66f>`_
+    the document is written directly from the edges of the network using an :class:`.exportwriter.ExportWriter`, without creating libsbml objects
     
-    :param file_path: where to store the exported format?
+    :param file_path: where to store the exported format? a path or a writable text stream
+    :param gemtractor: the GEMtractor, to transfer the annotations of the original model
     :param model_id: the model's identifier, will be postfixed with a greeting from us
     :param model_name: the model's name, will be prefixed with a greeting from us
     :param filter_species: species identifiers to get rid of
@@ -726,7 +1097,8 @@ class Network:
     :param remove_reaction_missing_species: remove a reaction if one of the participating genes was removed?
     :param removing_enzyme_removes_complex: if an enzyme is removed, should also all enzyme complexes be removed in which it participates?
     
-    :type file_path: str
+    :type file_path: str or file-like object
+    :type gemtractor: :class:`.gemtractor.GEMtractor`
     :type model_id: str
     :type model_name: str
     :type filter_species: list of str
@@ -739,88 +1111,40 @@ class Network:
     :type remove_reaction_missing_species: bool
     :type removing_enzyme_removes_complex: bool
     
-    :return: true on success, otherwise false
+    :return: true on success
     :rtype: bool
     """
     if not self.have_reaction_net:
       self.calc_reaction_net ()
     
-    
-    sbml = SBMLDocument ()
-    model = sbml.createModel ()
-    #TODO dc modified?
-    if model is None:
-      self.__logger.error ("could not create model...")
-      return False
-    model.setId (model_id + "_GEMtracted_ReactionNetwork")
     if model_name is None:
       model_name = model_id
-    model.setName ("GEMtracted ReactionNetwork of " + model_name)
-    
-    Utils.add_model_note (model, filter_species, filter_reactions, filter_genes, filter_gene_complexes, remove_reaction_enzymes_removed, remove_ghost_species, discard_fake_enzymes, remove_reaction_missing_species, removing_enzyme_removes_complex)
+    note = Utils.create_model_note (filter_species, filter_reactions, filter_genes, filter_gene_complexes, remove_reaction_enzymes_removed, remove_ghost_species, discard_fake_enzymes, remove_reaction_missing_species, removing_enzyme_removes_complex)
     
-    compartment = model.createCompartment()
-    compartment.setId('compartment')
-    compartment.setConstant(True)
-    
-    nodemap = {}
+    nodemap = {identifier: ExportWriter.escape_xml (identifier) for identifier in self.reactions}
+    species = []
     for identifier, reaction in self.reactions.items ():
-      nodemap[identifier] = self.__create_sbml_reaction_species (model, identifier, reaction.name, compartment, gemtractor)
+      annotations = gemtractor.get_reaction_annotations (identifier)
+      species.append ((nodemap[identifier], reaction.name, self.__transfer_annotation (annotations, nodemap[identifier])))
     
-    num = 0
-    for identifier, reaction in self.reactions.items ():
-      for r in reaction.links:
-        num += 1
-        Network.create_sbml_reaction (model, 'r' + str (num), nodemap[identifier], nodemap[r.identifier])
-  
-    return SBMLWriter().writeSBML (sbml, file_path)
-  
-  def __create_sbml_reaction_species (self, model, identifier, name, compartment, gemtractor):
-    """
-    create an SBML reaction species for the Reaction-centric network
-    
-    
-    :param model: the SBML model
-    :param identifier: the identifier of the reaction
-    :param name: the reaction's name
-    :param compartment: the compartment in which the reaction will appear
-    :param gemtractor: the GEMtractor
-    :type model: `libsbml:Model <http://sbml.org/Special/Software/libSBML/docs/python-api/classlibsbml_1_1_model.html>`_
-    :type identifier: str
-    :type name: str
-    :type compartment: `libsbml:Compartment <sbml.org/Software/libSBML/docs/python-api/classlibsbml_1_1_compartment.html>`_
-    :type gemtractor: :class:`.gemtractor.GEMtractor`
+    # the species are named after the reactions of the original model, the reactions of the network must not clash with them
+    prefix = "r"
+    while any (identifier.startswith (prefix) for identifier in nodemap.values ()):
+      prefix = "_" + prefix
     
-    :return: the SBML species representing a reaction
-    :rtype: `libsbml:Species <http://sbml.org/Special/Software/libSBML/docs/python-api/classlibsbml_1_1_species.html>`_
-    """
-    g = model.createSpecies ()
-    g.setId (identifier)
-    g.setMetaId (identifier)
-    g.setName (name)
-    g.setCompartment(compartment.getId())
-    g.setHasOnlySubstanceUnits(False)
-    g.setBoundaryCondition(False)
-    g.setConstant(False)
-    
-    annotations = gemtractor.get_reaction_annotations (identifier)
-    if annotations is not None:
-      annotations = self.__annotation_about_pattern.sub('<rdf:Description rdf:about="#'+identifier+'">', annotations)
-      if g.setAnnotation (annotations) != LIBSBML_OPERATION_SUCCESS:
-        self.__logger.error ("unable to add annotation to reaction " + identifier)
-        self.__logger.debug ("annotation was: " + annotations)
-    
-    return g
-      
+    adjacency = ((nodemap[identifier], [nodemap[r.identifier] for r in reaction.links]) for identifier, reaction in self.reactions.items ())
+    return self.__write_sbml (file_path, model_id + "_GEMtracted_ReactionNetwork", "GEMtracted ReactionNetwork of " + model_name, note, species, adjacency, prefix)
+  
   def export_en_sbml (self, file_path, gemtractor, model_id, model_name = None, filter_species = None, filter_reactions = None, filter_genes = None, filter_gene_complexes = None, remove_reaction_enzymes_removed = True, remove_ghost_species = False, discard_fake_enzymes = False, remove_reaction_missing_species = False, removing_enzyme_removes_complex = True):
     """
     export the enzyme-centric network in SBML format
     
     will attach the trimming-settings as SBML note
     
-    writes the document using the `libsbml:SBMLWriter <http://sbml.org/Special/Software/libSBML/docs/python-api/class_s_b_m_l_writer.html>` -- returns the result of `libsbml:SBMLWriter.writeSBML <http://sbml.org/Special/Software/libSBML/docs/python-api/class_s_b_m_l_writer.html#a02d1998aee7656d7b9c3ac69d62bb66f>`_
+    the document is written directly from the edges of the network using an :class:`.exportwriter.ExportWriter`, without creating libsbml objects
     
-    :param file_path: where to store the exported format?
+    :param file_path: where to store the exported format? a path or a writable text stream
+    :param gemtractor: the GEMtractor, to transfer the annotations of the original model
     :param model_id: the model's identifier, will be postfixed with a greeting from us
     :param model_name: the model's name, will be prefixed with a greeting from us
     :param filter_species: species identifiers to get rid of
@@ -833,7 +1157,8 @@ class Network:
     :param remove_reaction_missing_species: remove a reaction if one of the participating genes was removed?
     :param removing_enzyme_removes_complex: if an enzyme is removed, should also all enzyme complexes be removed in which it participates?
     
-    :type file_path: str
+    :type file_path: str or file-like object
+    :type gemtractor: :class:`.gemtractor.GEMtractor`
     :type model_id: str
     :type model_name: str
     :type filter_species: list of str
@@ -846,181 +1171,125 @@ class Network:
     :type remove_reaction_missing_species: bool
     :type removing_enzyme_removes_complex: bool
     
-    :return: true on success, otherwise false
+    :return: true on success
     :rtype: bool
     """
     if not self.have_gene_net:
       self.calc_genenet ()
     
-    sbml = SBMLDocument ()
-    model = sbml.createModel ()
-    #TODO dc modified?
-    if model is None:
-      self.__logger.error ("could not create model...")
-      return False
-    model.setId (model_id + "_GEMtracted_EnzymeNetwork")
     if model_name is None:
       model_name = model_id
-    model.setName ("GEMtracted EnzymeNetwork of " + model_name)
-    
-    # print ("adding note to en sbml")
-    Utils.add_model_note (model, filter_species, filter_reactions, filter_genes, filter_gene_complexes, remove_reaction_enzymes_removed, remove_ghost_species, discard_fake_enzymes, remove_reaction_missing_species, removing_enzyme_removes_complex)
+    note = Utils.create_model_note (filter_species, filter_reactions, filter_genes, filter_gene_complexes, remove_reaction_enzymes_removed, remove_ghost_species, discard_fake_enzymes, remove_reaction_missing_species, removing_enzyme_removes_complex)
     
     nodemap = {}
-    
-    compartment = model.createCompartment()
-    compartment.setId('compartment')
-    compartment.setConstant(True)
-    
+    species = []
     num = 0
     for gene in self.genes:
       num += 1
-      nodemap[gene] = self.__create_sbml_gene (model, 'g' + str (num), gene, compartment, gemtractor)
+      nodemap[gene] = 'g' + str (num)
+      annotations = gemtractor.get_gene_product_annotations (gene)
+      species.append ((nodemap[gene], gene, self.__transfer_annotation (annotations, nodemap[gene])))
       # TODO: add other information if available
     
     for gene in self.gene_complexes:
       num += 1
-      nodemap[gene] = self.__create_sbml_gene_complex (model, 'gc' + str (num), gene, compartment, gemtractor, self.gene_complexes[gene].genes, nodemap)
+      nodemap[gene] = 'gc' + str (num)
+      species.append ((nodemap[gene], gene, self.__create_gene_complex_annotation (nodemap[gene], [nodemap[g.identifier] for g in self.gene_complexes[gene].genes])))
       # TODO: add other information if available
     
-    num = 0
-    for gene in self.genes:
-      for associated in self.genes[gene].links["g"]:
-        num += 1
-        Network.create_sbml_reaction (model, 'r' + str (num), nodemap[gene], nodemap[associated.identifier])
-      for associated in self.genes[gene].links["gc"]:
-        num += 1
-        Network.create_sbml_reaction (model, 'r' + str (num), nodemap[gene], nodemap[associated.identifier])
-    for gene in self.gene_complexes:
-      for associated in self.gene_complexes[gene].links["g"]:
-        num += 1
-        Network.create_sbml_reaction (model, 'r' + str (num), nodemap[gene], nodemap[associated.identifier])
-      for associated in self.gene_complexes[gene].links["gc"]:
-        num += 1
-        Network.create_sbml_reaction (model, 'r' + str (num), nodemap[gene], nodemap[associated.identifier])
-    
-    return SBMLWriter().writeSBML (sbml, file_path)
-
+    adjacency = ((nodemap[gene], [nodemap[a.identifier] for a in node.links["g"]] + [nodemap[a.identifier] for a in node.links["gc"]])
+      for nodes in (self.genes, self.gene_complexes) for gene, node in nodes.items ())
+    return self.__write_sbml (file_path, model_id + "_GEMtracted_EnzymeNetwork", "GEMtracted EnzymeNetwork of " + model_name, note, species, adjacency, "r")
   
-  def __create_sbml_gene_complex (self, model, identifier, name, compartment, gemtractor, genes, nodemap):
+  def __transfer_annotation (self, annotations, identifier):
     """
-    create an SBML gene-complex species for the Enzyme-centric network
+    transfer the annotation of an entity in the original model to a species of the network
     
-    
-    :param model: the SBML model
-    :param identifier: the identifier of the gene complex
-    :param name: the gene complex' name
-    :param compartment: the compartment in which the gene complex will appear
-    :param gemtractor: the GEMtractor
-    :param genes: the genes, which are part of this complex
-    :param nodemap: mapper to map gene identifiers to corresponding SBML species
-    :type model: `libsbml:Model <http://sbml.org/Special/Software/libSBML/docs/python-api/classlibsbml_1_1_model.html>`_
+    :param annotations: the annotation of the original entity
+    :param identifier: the (escaped) identifier of the species
+    :type annotations: xml str
     :type identifier: str
-    :type name: str
-    :type compartment: `libsbml:Compartment <sbml.org/Software/libSBML/docs/python-api/classlibsbml_1_1_compartment.html>`_
-    :type gemtractor: :class:`.gemtractor.GEMtractor`
-    :type genes: list of :class:`.gene.Gene`
-    :type nodemap: dict
-    
-    :return: the SBML species representing a gene complex
-    :rtype: `libsbml:Species <http://sbml.org/Special/Software/libSBML/docs/python-api/classlibsbml_1_1_species.html>`_
-    """
-    g = model.createSpecies ()
-    g.setId (identifier)
-    g.setMetaId (identifier)
-    g.setName (name)
-    g.setCompartment(compartment.getId())
-    g.setHasOnlySubstanceUnits(False)
-    g.setBoundaryCondition(False)
-    g.setConstant(False)
-    
-    annotations = ""
-    
-    for gene in genes:
-      annotations += '<rdf:li rdf:resource="#' + nodemap[gene.identifier].getMetaId () + '" />'
-    
-    if len (annotations) > 0:
-      annotations = """
-        <annotation>
-         <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns:bqbiol="http://biomodels.net/biology-qualifiers/">
-          <rdf:Description rdf:about="#""" + identifier + """">
-            <bqbiol:hasPart>
-              <rdf:Bag>""" + annotations + """</rdf:Bag>
-            </bqbiol:hasPart>
-          </rdf:Description>
-         </rdf:RDF>
-        </annotation>"""
-      if g.setAnnotation (annotations) != LIBSBML_OPERATION_SUCCESS:
-        self.__logger.error ("unable to add annotation to gene " + identifier)
-        self.__logger.debug ("annotation was: " + annotations)
-    else:
-      self.__logger.warn ("gene complex has no genes: " + identifier)
     
-    return g
+    :return: the annotation, which is now about the species, or None if there is no annotation
+    :rtype: xml str
+    """
+    if not annotations:
+      return None
+    return self.__annotation_about_pattern.sub('<rdf:Description rdf:about="#'+identifier+'">', annotations)
   
-  def __create_sbml_gene (self, model, identifier, name, compartment, gemtractor):
+  def __create_gene_complex_annotation (self, identifier, genes):
     """
-    create an SBML gene species for the Enzyme-centric network
+    create the annotation of a gene-complex species for the Enzyme-centric network
     
+    the annotation links the species of the genes, which are part of the complex
     
-    :param model: the SBML model
-    :param identifier: the identifier of the gene
-    :param name: the gene's name
-    :param compartment: the compartment in which the gene will appear
-    :param gemtractor: the GEMtractor
-    :type model: `libsbml:Model <http://sbml.org/Special/Software/libSBML/docs/python-api/classlibsbml_1_1_model.html>`_
+    :param identifier: the identifier of the gene complex
+    :param genes: the identifiers of the species of the genes
     :type identifier: str
-    :type name: str
-    :type compartment: `libsbml:Compartment <sbml.org/Software/libSBML/docs/python-api/classlibsbml_1_1_compartment.html>`_
-    :type gemtractor: :class:`.gemtractor.GEMtractor`
+    :type genes: list of str
     
-    :return: the SBML species representing a gene
-    :rtype: `libsbml:Species <http://sbml.org/Special/Software/libSBML/docs/python-api/classlibsbml_1_1_species.html>`_
-    """
-    g = model.createSpecies ()
-    g.setId (identifier)
-    g.setMetaId (identifier)
-    g.setName (name)
-    g.setCompartment(compartment.getId())
-    g.setHasOnlySubstanceUnits(False)
-    g.setBoundaryCondition(False)
-    g.setConstant(False)
-    
-    annotations = gemtractor.get_gene_product_annotations (name)
-    if annotations is not None:
-      annotations = self.__annotation_about_pattern.sub('<rdf:Description rdf:about="#'+identifier+'">', annotations)
-      if g.setAnnotation (annotations) != LIBSBML_OPERATION_SUCCESS:
-        self.__logger.error ("unable to add annotation to gene " + identifier)
-        self.__logger.debug ("annotation was: " + annotations)
-    
-    return g
-
-  @staticmethod
-  def create_sbml_reaction (model, identifier, reactant, product):
+    :return: the annotation, or None if the complex has no genes
+    :rtype: xml str
     """
-    create an SBML reaction for the Enzyme-centric or Reaction-centric network
-    
-    the reaction will consume and produce exactly one species
-    
-    :param model: the SBML model
-    :param identifier: the identifier of the reaction
-    :param reactant: the reactant consumed by the reaction
-    :param product: the product produced by the reaction
-    :type model: `libsbml:Model <http://sbml.org/Special/Software/libSBML/docs/python-api/classlibsbml_1_1_model.html>`_
-    :type identifier: str
-    :type reactant: `libsbml:Species <http://sbml.org/Special/Software/libSBML/docs/python-api/classlibsbml_1_1_species.html>`_
-    :type product: `libsbml:Species <http://sbml.org/Special/Software/libSBML/docs/python-api/classlibsbml_1_1_species.html>`_
+    if not genes:
+      self.__logger.warn ("gene complex has no genes: " + identifier)
+      return None
+    return """        <annotation>
+          <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns:bqbiol="http://biomodels.net/biology-qualifiers/">
+            <rdf:Description rdf:about="#""" + identifier + """">
+              <bqbiol:hasPart>
+                <rdf:Bag>""" + "".join ('<rdf:li rdf:resource="#' + gene + '"/>' for gene in genes) + """</rdf:Bag>
+              </bqbiol:hasPart>
+            </rdf:Description>
+          </rdf:RDF>
+        </annotation>"""
+  
+  def __write_sbml (self, file_path, model_id, model_name, note, species, adjacency, reaction_prefix):
+    """
+    write an SBML document of a network
+    
+    the document is streamed through an :class:`.exportwriter.ExportWriter`, every edge becomes a reaction that consumes the source species and produces the target species.
+    lists that would be empty are omitted.
+    
+    :param file_path: where to store the document, a path or a writable text stream
+    :param model_id: the identifier of the model, which is turned into a valid SBML identifier, see :func:`.exportwriter.ExportWriter.to_sid`
+    :param model_name: the name of the model
+    :param note: the XHTML note of the model, see :func:`.utils.Utils.create_model_note`
+    :param species: the (escaped) identifier, the name, and the annotation (or None) of every species
+    :param adjacency: the (escaped) identifier of every species and those of the species it is linked to
+    :param reaction_prefix: the prefix of the reaction ids, which are numbered
+    :type file_path: str or file-like object
+    :type model_id: str
+    :type model_name: str
+    :type note: str
+    :type species: list of tuples
+    :type adjacency: iterable of tuples
+    :type reaction_prefix: str
     
-    :return: the SBML reaction
-    :rtype: `libsbml:Reaction <http://sbml.org/Special/Software/libSBML/docs/python-api/classlibsbml_1_1_reaction.html>`_
+    :return: true on success
+    :rtype: bool
     """
-    r= model.createReaction ()
-    r.setId (identifier)
-    r.setFast(False)
-    r.setReversible(False)
-    r.addReactant (reactant)
-    r.addProduct (product)
-    return r
+    template = (ExportWriter.SBML_REACTION[0] + reaction_prefix,) + ExportWriter.SBML_REACTION[1:]
+    with ExportWriter (file_path) as writer:
+      writer.write (ExportWriter.SBML_PREFIX (ExportWriter.to_sid (model_id), ExportWriter.escape_xml (model_name), note))
+      if species:
+        writer.write (ExportWriter.SBML_SPECIES_PREFIX)
+        for identifier, name, annotation in species:
+          if annotation:
+            writer.write (ExportWriter.SBML_ANNOTATED_SPECIES (identifier, ExportWriter.escape_xml (name or ""), annotation))
+          else:
+            writer.write (ExportWriter.SBML_SPECIES (identifier, ExportWriter.escape_xml (name or "")))
+        writer.write (ExportWriter.SBML_SPECIES_SUFFIX)
+      num = 1
+      for source, targets in adjacency:
+        if targets:
+          if num == 1:
+            writer.write (ExportWriter.SBML_REACTIONS_PREFIX)
+          num = writer.write_numbered_edges_from (template, num, source, targets)
+      if num > 1:
+        writer.write (ExportWriter.SBML_REACTIONS_SUFFIX)
+      writer.write (ExportWriter.SBML_SUFFIX)
+    return True
     
   
   
@@ -1028,54 +1297,155 @@ class Network:
     """
     export the metabolite-reaction network in CSV format
     
-    :param file_path: where to store the exported format?
-    :type file_path: str
+    :param file_path: where to store the exported format? a path or a writable text stream
+    :type file_path: str or file-like object
     """
-    with open(file_path, 'w') as f:
-      f.write ('"source","target"\n')
+    escape = ExportWriter.escape_csv
+    nodemap = {identifier: escape ('s' + identifier) for identifier in self.species}
+    with ExportWriter (file_path) as writer:
+      writer.write (ExportWriter.CSV_PREFIX)
       for identifier, reaction in self.reactions.items ():
-        rid = 'r' + identifier
-        for s in reaction.consumed:
-          f.write ('"s' + s + '","' + rid + '"\n')
-        for s in reaction.produced:
-          f.write ('"' + rid + '","s' + s + '"\n')
+        rid = escape ('r' + identifier)
+        writer.write_edges_to (ExportWriter.CSV_EDGE, [nodemap[s] for s in reaction.consumed], rid)
+        writer.write_edges_from (ExportWriter.CSV_EDGE, rid, [nodemap[s] for s in reaction.produced])
     
   
   
-  def export_rn_csv (self, file_path):
+  def export_rn_csv (self, file_path, processes = None):
     """
     export the reaction-centric network in CSV format
     
-    :param file_path: where to store the exported format?
-    :type file_path: str
+    :param file_path: where to store the exported format? a path or a writable text stream
+    :param processes: the max number of processes to write a large export, see :class:`.segmentwriter.SegmentWriter`
+    :type file_path: str or file-like object
+    :type processes: int
     """
     if not self.have_reaction_net:
       self.calc_reaction_net ()
-    with open(file_path, 'w') as f:
-      f.write ('"source","target"\n')
-      for identifier, reaction in self.reactions.items ():
-        for r in reaction.links:
-          f.write ('"' + identifier + '","' + r.identifier + '"\n')
+    escape = ExportWriter.escape_csv
+    nodemap = {identifier: escape (identifier) for identifier in self.reactions}
+    self.__write_adjacency (file_path, processes, [ExportWriter.CSV_PREFIX], ExportWriter.CSV_EDGE, self.__iter_rn_adjacency (nodemap), "")
       
       
-  def export_en_csv (self, file_path):
+  def export_en_csv (self, file_path, processes = None):
     """
     export the enzyme-centric network in CSV format
     
-    :param file_path: where to store the exported format?
-    :type file_path: str
+    :param file_path: where to store the exported format? a path or a writable text stream
+    :param processes: the max number of processes to write a large export, see :class:`.segmentwriter.SegmentWriter`
+    :type file_path: str or file-like object
+    :type processes: int
     """
     if not self.have_gene_net:
       self.calc_genenet ()
-    with open(file_path, 'w') as f:
-      f.write ('"source","target"\n')
-      for gene in self.genes:
-          for associated in self.genes[gene].links["g"]:
-            f.write ('"' + gene + '","' + associated.identifier + '"\n')
-          for associated in self.genes[gene].links["gc"]:
-            f.write ('"' + gene + '","' + associated.identifier + '"\n')
-      for gene in self.gene_complexes:
-          for associated in self.gene_complexes[gene].links["g"]:
-            f.write ('"' + gene + '","' + associated.identifier + '"\n')
-          for associated in self.gene_complexes[gene].links["gc"]:
-            f.write ('"' + gene + '","' + associated.identifier + '"\n')
+    nodemap = {gene: ExportWriter.escape_csv (gene) for entities in (self.genes, self.gene_complexes) for gene in entities}
+    self.__write_adjacency (file_path, processes, [ExportWriter.CSV_PREFIX], ExportWriter.CSV_EDGE, self.__iter_en_adjacency (nodemap), "")
+  
+  
+  def export_mn_npz (self, file_path):
+    """
+    export the metabolite-reaction network as NumPy arrays
+    
+    the nodes are the species followed by the reactions, species link to the reactions consuming them and reactions link to the species they produce.
+    see :func:`__write_npz` for the contents of the archive.
+    
+    :param file_path: where to store the exported format? a path or a writable binary stream
+    :type file_path: str or file-like object
+    """
+    species_mapper = {identifier: n for n, identifier in enumerate (self.species)}
+    reactions = self.reactions.values ()
+    consumers = [[] for s in self.species]
+    for n, reaction in enumerate (reactions, len (self.species)):
+      for species in reaction.consumed:
+        consumers[species_mapper[species]].append (n)
+    rows = consumers + [sorted (species_mapper[species] for species in reaction.produced) for reaction in reactions]
+    self.__write_npz (file_path,
+      list (self.species) + list (self.reactions),
+      [s.name for s in self.species.values ()] + [r.name for r in reactions],
+      ["species", "reaction"],
+      array ("B", bytes (len (self.species))) + array ("B", [1]) * len (self.reactions),
+      rows)
+  
+  
+  def export_rn_npz (self, file_path):
+    """
+    export the reaction-centric network as NumPy arrays
+    
+    see :func:`__write_npz` for the contents of the archive.
+    
+    :param file_path: where to store the exported format? a path or a writable binary stream
+    :type file_path: str or file-like object
+    """
+    if not self.have_reaction_net:
+      self.calc_reaction_net ()
+    reaction_mapper = {identifier: n for n, identifier in enumerate (self.reactions)}
+    reactions = self.reactions.values ()
+    self.__write_npz (file_path,
+      list (self.reactions),
+      [r.name for r in reactions],
+      ["reaction"],
+      array ("B", bytes (len (self.reactions))),
+      (sorted (reaction_mapper[r.identifier] for r in reaction.links) for reaction in reactions))
+  
+  
+  def export_en_npz (self, file_path):
+    """
+    export the enzyme-centric network as NumPy arrays
+    
+    the nodes are the enzymes followed by the enzyme complexes.
+    see :func:`__write_npz` for the contents of the archive.
+    
+    :param file_path: where to store the exported format? a path or a writable binary stream
+    :type file_path: str or file-like object
+    """
+    if not self.have_gene_net:
+      self.calc_genenet ()
+    ids = list (self.genes) + list (self.gene_complexes)
+    nodemap = {identifier: n for n, identifier in enumerate (ids)}
+    rows = []
+    for entities in (self.genes, self.gene_complexes):
+      for gene in entities.values ():
+        rows.append (sorted ([nodemap[associated.identifier] for associated in gene.links["g"]] + [nodemap[associated.identifier] for associated in gene.links["gc"]]))
+    self.__write_npz (file_path,
+      ids,
+      ids,
+      ["enzyme", "enzyme_complex"],
+      array ("B", bytes (len (self.genes))) + array ("B", [1]) * len (self.gene_complexes),
+      rows)
+  
+  def __write_npz (self, file_path, ids, names, type_names, types, rows):
+    """
+    write a network into a NumPy .npz archive
+    
+    the archive contains the following arrays, see :class:`.npzwriter.NpzWriter`:
+    
+    - ids: the identifiers of the nodes
+    - names: the names of the nodes
+    - types: uint8 type of every node, pointing into type_names
+    - type_names: the names of the node types
+    - indptr and indices: uint32 adjacency in compressed sparse row format, the targets of the i-th node are stored in indices[indptr[i]:indptr[i+1]], sorted ascending
+    
+    load it, for example, as a SciPy matrix using `scipy.sparse.csr_matrix ((numpy.ones (len (indices)), indices, indptr))`.
+    
+    :param file_path: where to store the archive, a path or a writable binary stream
+    :param ids: the identifiers of the nodes
+    :param names: the names of the nodes
+    :param type_names: the names of the node types
+    :param types: the type of every node
+    :param rows: the integer targets of every node
+    :type file_path: str or file-like object
+    :type ids: list of str
+    :type names: list of str
+    :type type_names: list of str
+    :type types: array of int
+    :type rows: iterable of iterables of int
+    """
+    csr = Network.__csr (rows, None, Network.UINT32)
+    with NpzWriter (file_path) as writer:
+      writer.write ("ids", ids)
+      writer.write ("names", names)
+      writer.write ("types", types)
+      writer.write ("type_names", type_names)
+      writer.write ("indptr", csr["off"])
+      writer.write ("indices", csr["idx"])
+    self.__logger.info ("exported " + str (len (ids)) + " nodes and " + str (len (csr["idx"])) + " edges as npz")
@@ -0,0 +1,156 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+#
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import sys
+import zipfile
+from array import array
+
+
+class NpzWriter:
+  """
+  a writer for NumPy's .npz archives
+
+  an .npz archive is a ZIP archive of arrays in NumPy's .npy format, see `the format specification <https://numpy.org/doc/stable/reference/generated/numpy.lib.format.html>`_.
+  the arrays are written from Python's :class:`array.array` without converting every item, thus, the GEMtractor does not depend on NumPy.
+  lists of strings are stored as fixed-width unicode arrays, which can be loaded without pickling.
+  bytes are stored as a zero-dimensional byte string, such as the 'format' of a `scipy.sparse` matrix.
+  load the archive with :func:`numpy.load`.
+
+  use it as a context manager:
+
+  .. code-block:: python
+
+    with NpzWriter (file_path) as writer:
+      writer.write ("ids", ["r1", "r2"])
+      writer.write ("indptr", array ("I", [0, 1, 1]))
+      writer.write ("indices", array ("I", [1]))
+
+  :param file_path: where to write the archive, a path or a writable binary stream
+  :type file_path: str or file-like object
+  """
+
+  MAGIC = b"\x93NUMPY\x01\x00"
+  # the header of an .npy file is padded, so the data is aligned to this number of bytes
+  ALIGNMENT = 64
+  KINDS = {"b": "i", "h": "i", "i": "i", "l": "i", "q": "i", "B": "u", "H": "u", "I": "u", "L": "u", "Q": "u", "f": "f", "d": "f"}
+
+  def __init__ (self, file_path):
+    self.__logger = logging.getLogger(__name__)
+    self.file_path = file_path
+    self.__archive = None
+
+  def __enter__ (self):
+    if isinstance (self.file_path, str):
+      self.__archive = zipfile.ZipFile (self.file_path, "w", zipfile.ZIP_STORED)
+    else:
+      # streams may claim to be seekable (e.g. gzip files) but fail to seek back, so never let the archive seek
+      self.__archive = zipfile.ZipFile (_WriteOnlyStream (self.file_path), "w", zipfile.ZIP_STORED)
+    return self
+
+  def __exit__ (self, exc_type, exc_value, traceback):
+    self.__archive.close ()
+    self.__archive = None
+    return False
+
+  def write (self, name, values):
+    """
+    write an array into the archive
+
+    :param name: the name of the array, the archive entry will be called `name.npy`
+    :param values: the values, either an array of numbers, a list of strings, or a single byte string
+    :type name: str
+    :type values: :class:`array.array` or list of str or bytes
+    """
+    if isinstance (values, array):
+      header, data = NpzWriter.__encode_array (values)
+    elif isinstance (values, bytes):
+      header, data = NpzWriter.create_header ("|S" + str (len (values) or 1), ()), values or b"\0"
+    else:
+      header, data = NpzWriter.__encode_strings (values)
+    with self.__archive.open (name + ".npy", "w", force_zip64 = True) as entry:
+      entry.write (header)
+      entry.write (data)
+    self.__logger.debug ("wrote " + str (len (values)) + " values of " + name)
+
+  @staticmethod
+  def create_header (descr, shape):
+    """
+    create the header of an array in .npy format
+
+    :param descr: the NumPy type descriptor, such as '<u4'
+    :param shape: the dimensions of the array, e.g. (length,) for one-dimensional arrays or () for scalars
+    :type descr: str
+    :type shape: tuple of int
+
+    :return: the magic string, the length of the header, and the padded header
+    :rtype: bytes
+    """
+    header = "{'descr': '" + descr + "', 'fortran_order': False, 'shape': " + repr (tuple (shape)) + ", }"
+    # magic (8 bytes), header length (2 bytes), header, and the final newline
+    header = header + " " * (-(len (NpzWriter.MAGIC) + 2 + len (header) + 1) % NpzWriter.ALIGNMENT) + "\n"
+    return NpzWriter.MAGIC + len (header).to_bytes (2, "little") + header.encode ("latin1")
+
+  @staticmethod
+  def __encode_array (values):
+    """
+    encode an array of numbers
+
+    :param values: the numbers
+    :type values: :class:`array.array`
+
+    :return: the header and the little-endian data
+    :rtype: tuple of bytes and bytes-like object
+    """
+    descr = ("|" if values.itemsize == 1 else "<") + NpzWriter.KINDS[values.typecode] + str (values.itemsize)
+    if sys.byteorder != "little" and values.itemsize > 1:
+      values = array (values.typecode, values)
+      values.byteswap ()
+    return NpzWriter.create_header (descr, (len (values),)), memoryview (values).cast ("B")
+
+  @staticmethod
+  def __encode_strings (values):
+    """
+    encode a list of strings as fixed-width UTF-32 array
+
+    :param values: the strings
+    :type values: list of str
+
+    :return: the header and the data
+    :rtype: tuple of bytes and bytes
+    """
+    width = max ((len (value) for value in values), default = 0) or 1
+    size = 4 * width
+    data = b"".join (value.encode ("utf-32-le").ljust (size, b"\0") for value in values)
+    return NpzWriter.create_header ("<U" + str (width), (len (values),)), data
+
+
+class _WriteOnlyStream:
+  """
+  a stream that passes written data to another stream, but cannot tell or seek, see :func:`NpzWriter.__enter__`
+
+  :param stream: the stream to write to
+  :type stream: file-like object
+  """
+
+  def __init__ (self, stream):
+    self.stream = stream
+
+  def write (self, data):
+    return self.stream.write (data)
+
+  def flush (self):
+    self.stream.flush ()
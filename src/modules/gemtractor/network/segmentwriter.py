@@ -0,0 +1,203 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+#
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from .exportwriter import ExportWriter
+
+# the adjacencies of the running exports, keyed per export, the forked workers inherit them from the parent
+_ADJACENCIES = {}
+
+
+class SegmentWriter:
+  """
+  write the edges of a large export in parallel
+
+  the adjacency of the network is partitioned into segments of about `segment_edges` edges.
+  every segment is formatted by a worker process into a temporary file, using an :class:`.exportwriter.ExportWriter`.
+  the workers are forked, so they inherit the adjacency instead of receiving a copy of it.
+  forking a process while other threads hold locks (e.g. of the logging or of libsbml) may deadlock the forked process, so exports are only written in parallel by the main thread.
+  finally, the head, the segments, and the tail are concatenated into the export with :func:`os.copy_file_range` (or :func:`os.sendfile`), so the data is not copied through Python.
+  the export is byte-identical to an export that is written by a single :class:`.exportwriter.ExportWriter`.
+
+  .. code-block:: python
+
+    SegmentWriter (file_path, 4).write (ExportWriter.CSV_PREFIX, ExportWriter.CSV_EDGE, [("r1", ["r2", "r3"])], "")
+
+  :param file_path: where to write the export
+  :param processes: the max number of worker processes
+  :param segment_edges: the number of edges per segment, defaults to :data:`SEGMENT_EDGES`
+  :type file_path: str
+  :type processes: int
+  :type segment_edges: int
+  """
+
+  SEGMENT_EDGES = 1 << 18
+  # smaller exports are written faster by a single process
+  MIN_EDGES = 1 << 20
+
+  def __init__ (self, file_path, processes, segment_edges = None):
+    self.__logger = logging.getLogger(__name__)
+    self.file_path = file_path
+    self.processes = processes
+    self.segment_edges = segment_edges or SegmentWriter.SEGMENT_EDGES
+
+  @staticmethod
+  def is_applicable (file_path, processes):
+    """
+    can an export be written in parallel?
+
+    that requires a path, more than one process, a platform that can fork processes, and the main thread.
+    exports that are written by other threads, such as the threads of :func:`..exporter.Exporter.bundle` or of the :class:`..jobqueue.JobQueue`, are written by a single process.
+
+    :param file_path: where to write the export, a path or a writable text stream
+    :param processes: the max number of worker processes, or None
+    :type file_path: str or file-like object
+    :type processes: int
+
+    :return: true if a SegmentWriter can write the export
+    :rtype: bool
+    """
+    return isinstance (file_path, str) and processes is not None and processes > 1 and "fork" in multiprocessing.get_all_start_methods () and threading.current_thread () is threading.main_thread ()
+
+  def get_segments (self, adjacency):
+    """
+    partition an adjacency into segments
+
+    :param adjacency: the (escaped) ids of the source nodes and their targets
+    :type adjacency: list of tuples of str and list of str
+
+    :return: the first node, the node after the last one, and the number of the first edge of every segment
+    :rtype: list of tuples of int
+    """
+    segments = []
+    start = 0
+    num = 1
+    edges = 0
+    for node, (source, targets) in enumerate (adjacency):
+      edges += len (targets)
+      if edges >= self.segment_edges:
+        segments.append ((start, node + 1, num))
+        start = node + 1
+        num += edges
+        edges = 0
+    if start < len (adjacency):
+      segments.append ((start, len (adjacency), num))
+    return segments
+
+  def write (self, head, template, adjacency, tail, numbered = False):
+    """
+    write an export
+
+    :param head: everything before the edges, e.g. the prefix and the nodes
+    :param template: the edge template, such as :data:`.exportwriter.ExportWriter.CSV_EDGE`
+    :param adjacency: the (escaped) ids of the source nodes and their targets
+    :param tail: everything after the edges
+    :param numbered: are the edges numbered, e.g. in GraphML? see :func:`.exportwriter.ExportWriter.write_numbered_edges_from`
+    :type head: str
+    :type template: tuple of str
+    :type adjacency: list of tuples of str and list of str
+    :type tail: str
+    :type numbered: bool
+    """
+    segments = self.get_segments (adjacency)
+    # the segments are stored next to the export, so copying them may not even copy the data
+    with tempfile.TemporaryDirectory (dir = os.path.dirname (os.path.abspath (self.file_path))) as directory:
+      paths = [os.path.join (directory, str (n)) for n in range (len (segments) + 2)]
+      # every export has its own entry, which needs to exist before the workers are forked
+      key = uuid.uuid4 ().hex
+      _ADJACENCIES[key] = adjacency
+      try:
+        with ProcessPoolExecutor (max_workers = self.processes, mp_context = multiprocessing.get_context ("fork")) as pool:
+          jobs = [pool.submit (_write_segment, key, start, stop, num, template, numbered, path) for (start, stop, num), path in zip (segments, paths[1:])]
+          with ExportWriter (paths[0]) as writer:
+            writer.write (head)
+          with ExportWriter (paths[-1]) as writer:
+            writer.write (tail)
+          for job in jobs:
+            job.result ()
+      finally:
+        _ADJACENCIES.pop (key, None)
+
+      with open (self.file_path, "wb", buffering = 0) as export:
+        for path in paths:
+          SegmentWriter.append (export, path)
+    self.__logger.debug ("wrote " + str (len (segments)) + " segments to " + self.file_path)
+
+  @staticmethod
+  def append (export, path):
+    """
+    append a file to another one
+
+    the data is copied by the kernel if possible, otherwise through Python.
+
+    :param export: the file to append to, unbuffered
+    :param path: the path to the file to append
+    :type export: binary file-like object
+    :type path: str
+    """
+    with open (path, "rb") as segment:
+      size = os.fstat (segment.fileno ()).st_size
+      copied = 0
+      try:
+        while copied < size:
+          if hasattr (os, "copy_file_range"):
+            n = os.copy_file_range (segment.fileno (), export.fileno (), size - copied)
+          else:
+            n = os.sendfile (export.fileno (), segment.fileno (), None, size - copied)
+          if n == 0:
+            break
+          copied += n
+      except OSError:
+        # e.g. the kernel cannot copy between these file systems
+        segment.seek (copied)
+        shutil.copyfileobj (segment, export)
+
+
+def _write_segment (key, start, stop, num, template, numbered, path):
+  """
+  write a segment of an export, runs in a worker process of :func:`SegmentWriter.write`
+
+  :param key: the key of the adjacency in `_ADJACENCIES`
+  :param start: the first node of the segment
+  :param stop: the node after the last one
+  :param num: the number of the first edge
+  :param template: the edge template
+  :param numbered: are the edges numbered?
+  :param path: where to write the segment
+  :type key: str
+  :type start: int
+  :type stop: int
+  :type num: int
+  :type template: tuple of str
+  :type numbered: bool
+  :type path: str
+  """
+  adjacency = _ADJACENCIES[key]
+  with ExportWriter (path) as writer:
+    for n in range (start, stop):
+      source, targets = adjacency[n]
+      if numbered:
+        num = writer.write_numbered_edges_from (template, num, source, targets)
+      else:
+        writer.write_edges_from (template, source, targets)
@@ -0,0 +1,243 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+#
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+
+class ResultCache:
+  """
+  a content-addressed cache of exported networks
+
+  every result is stored in a file that is named by the key of the job, see :func:`get_key`.
+  the key is a hash of everything that determines the result, such as the hash of the model, the filters, and the requested format.
+  thus, an identical job is served from the cache instead of trimming and exporting the model again.
+
+  the cache is limited to `max_size` bytes.
+  the modification time of a result is updated whenever it is used, and the least recently used results are evicted first.
+  results are written to temporary files first, temporary files of streams that were abandoned are removed by :func:`evict` once they are :data:`STALE` seconds old.
+  the numbers of hits and misses are counted per process.
+
+  :param directory: where to store the results
+  :param max_size: the max number of bytes to store, 0 disables the cache
+  :type directory: str
+  :type max_size: int
+  """
+
+  # increase the version whenever the exports change, so previous results are not served anymore
+  VERSION = 1
+  # temporary files that were not written for this long are left over from abandoned results
+  STALE = 60*60
+
+  def __init__ (self, directory, max_size):
+    self.__logger = logging.getLogger(__name__)
+    self.directory = directory
+    self.max_size = max_size
+    self.hits = 0
+    self.misses = 0
+    self.__lock = threading.Lock ()
+
+  @staticmethod
+  def get_key (job):
+    """
+    get the key of a job
+
+    :param job: everything that determines the result of the job, needs to be JSON-dumpable and normalised (e.g. sets need to be sorted)
+    :type job: dict
+
+    :return: the hex digest of the job's hash
+    :rtype: str
+    """
+    return hashlib.sha256 (json.dumps ([ResultCache.VERSION, job], sort_keys = True, separators = (",", ":")).encode ("utf-8")).hexdigest ()
+
+  def is_enabled (self):
+    """
+    is the cache enabled?
+
+    :return: true if results are cached
+    :rtype: bool
+    """
+    return self.max_size > 0
+
+  def get (self, key):
+    """
+    get a cached result
+
+    the result is opened right away, so it can still be read if it is evicted concurrently
+
+    :param key: the key of the job, see :func:`get_key`
+    :type key: str
+
+    :return: the result opened for reading, or None if it is not cached
+    :rtype: binary file-like object
+    """
+    if not self.is_enabled ():
+      return None
+    path = os.path.join (self.directory, key)
+    try:
+      result = open (path, "rb")
+    except OSError:
+      with self.__lock:
+        self.misses += 1
+      return None
+    try:
+      # mark the result as recently used
+      os.utime (path)
+    except OSError:
+      # it was just evicted, but it is open already
+      pass
+    with self.__lock:
+      self.hits += 1
+    return result
+
+  def put (self, key, file_path):
+    """
+    store a copy of a result in the cache
+
+    :param key: the key of the job, see :func:`get_key`
+    :param file_path: the path to the result
+    :type key: str
+    :type file_path: str
+
+    :return: the path to the cached result, or None if the cache is disabled
+    :rtype: str
+    """
+    if not self.is_enabled ():
+      return None
+    os.makedirs (self.directory, exist_ok = True)
+    fd, tmp = tempfile.mkstemp (dir = self.directory, prefix = ".")
+    os.close (fd)
+    try:
+      shutil.copyfile (file_path, tmp)
+      return self.__commit (key, tmp)
+    finally:
+      if os.path.exists (tmp):
+        os.remove (tmp)
+
+  def tee (self, key, chunks):
+    """
+    store the chunks of a result in the cache, while they are passed on
+
+    the result is only stored if all chunks were consumed, e.g. it is not stored if the client disconnected while the result was streamed.
+
+    :param key: the key of the job, see :func:`get_key`
+    :param chunks: the chunks of the result
+    :type key: str
+    :type chunks: iterable of str or bytes-like objects
+
+    :return: the chunks
+    :rtype: generator of str or bytes-like objects
+    """
+    if not self.is_enabled ():
+      yield from chunks
+      return
+    os.makedirs (self.directory, exist_ok = True)
+    fd, tmp = tempfile.mkstemp (dir = self.directory, prefix = ".")
+    try:
+      with os.fdopen (fd, "wb") as f:
+        for chunk in chunks:
+          f.write (chunk.encode ("utf-8") if isinstance (chunk, str) else chunk)
+          yield chunk
+      self.__commit (key, tmp)
+    finally:
+      if os.path.exists (tmp):
+        os.remove (tmp)
+
+  def __commit (self, key, tmp):
+    """
+    move a complete result into the cache and evict old results
+
+    :param key: the key of the job
+    :param tmp: the path to the temporary result in the cache's directory
+    :type key: str
+    :type tmp: str
+
+    :return: the path to the cached result
+    :rtype: str
+    """
+    path = os.path.join (self.directory, key)
+    os.replace (tmp, path)
+    self.__logger.debug ("cached result " + key)
+    self.evict ()
+    return path
+
+  def evict (self):
+    """
+    remove stale temporary files, and the least recently used results until the cache fits into its max size
+
+    the results of a disabled cache are kept, so the cache can be enabled again
+    """
+    if os.path.isdir (self.directory):
+      now = time.time ()
+      for entry in os.scandir (self.directory):
+        try:
+          if entry.name.startswith (".") and now - entry.stat ().st_mtime > ResultCache.STALE:
+            os.remove (entry.path)
+            self.__logger.info ("removed stale temporary result " + entry.path)
+        except OSError:
+          pass
+    if not self.is_enabled ():
+      return
+    results = self.__list ()
+    size = sum (stat.st_size for path, stat in results)
+    for path, stat in sorted (results, key = lambda result: result[1].st_mtime):
+      if size <= self.max_size:
+        break
+      try:
+        os.remove (path)
+        size -= stat.st_size
+        self.__logger.info ("evicted cached result " + path)
+      except OSError:
+        pass
+
+  def __list (self):
+    """
+    list the cached results
+
+    :return: the paths to the results and their stats
+    :rtype: list of tuples of str and os.stat_result
+    """
+    results = []
+    if os.path.isdir (self.directory):
+      for entry in os.scandir (self.directory):
+        if entry.is_file () and not entry.name.startswith ("."):
+          try:
+            results.append ((entry.path, entry.stat ()))
+          except OSError:
+            pass
+    return results
+
+  def get_stats (self):
+    """
+    get some statistics about the cache
+
+    :return: the number of hits and misses of this process, and the number and size of the results in the cache
+    :rtype: dict
+    """
+    results = self.__list ()
+    return {
+      "hits": self.hits,
+      "misses": self.misses,
+      "nfiles": len (results),
+      "size": sum (stat.st_size for path, stat in results),
+      "max_size": self.max_size,
+      }
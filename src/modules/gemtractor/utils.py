@@ -16,19 +16,36 @@
 
 import errno
 import hashlib
+import inspect
+import itertools
 import json
 import logging
+import math
 import os
 import re
+import tempfile
 import time
+import urllib.parse
 import urllib.request
+import zipfile
+import zlib
 from shutil import copyfile
 
 from django.conf import settings
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 
 from .constants import Constants
-from .exceptions import UnableToRetrieveBiomodel, InvalidBiomodelsId, InvalidBiggId
+from .exceptions import UnableToRetrieveBiomodel, InvalidBiomodelsId, InvalidBiggId, TooBigForServer, UnsupportedCompression
+from .exporter import Exporter
+from .jobqueue import JobQueue
+from .resultcache import ResultCache
+from .network.exportwriter import ExportWriter
+
+try:
+  # zstd compressed models are only supported if zstandard is installed
+  import zstandard
+except ImportError:
+  zstandard = None
 
 
 class Utils:
@@ -38,6 +55,13 @@ class Utils:
   """
   
   __logger = logging.getLogger(__name__)
+  # unreferenced uploads younger than this (in seconds) are kept, as their session may not yet reference them
+  UPLOAD_GRACE = 60
+  # cached models in use are marked as recently used at most once in this interval (in seconds), as that invalidates their fingerprints, see get_file_hash
+  MODEL_TOUCH_INTERVAL = 60*60
+  # the first bytes of compressed streams, see decompress_stream
+  GZIP_MAGIC = b"\x1f\x8b"
+  ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
   
   
   @staticmethod
@@ -64,6 +88,43 @@ class Utils:
     
   
   
+  @staticmethod
+  def __cleanup_uploads (root_dir, max_age):
+    """
+    get rid of old uploads
+    
+    uploaded models are stored by their content (see :func:`store_upload`) and referenced by the sessions that use them.
+    references that were not used for `max_age` seconds are removed, and models are removed once they are not referenced anymore.
+    other files, such as flux balance results, are removed if they were not used for `max_age` seconds.
+    
+    :param root_dir: the directory of the uploads
+    :param max_age: the max age of references and other files that will survive
+    
+    :type root_dir: str
+    :type max_age: int
+    """
+    Utils.__cleanup (os.path.join (root_dir, Constants.STORAGE_UPLOAD_SESSIONS_DIR), max_age)
+    references = Utils.__count_upload_references (root_dir)
+    
+    if not os.path.isdir (root_dir):
+      return
+    for entry in os.scandir (root_dir):
+      if not entry.is_file ():
+        continue
+      try:
+        age = time.time () - entry.stat ().st_mtime
+        if Utils.is_upload_hash (entry.name):
+          if references.get (entry.name, 0) > 0 or age <= Utils.UPLOAD_GRACE:
+            continue
+          Utils.__logger.info('deleting unreferenced upload: ' + entry.path)
+        elif age > max_age:
+          Utils.__logger.info('deleting old file: ' + entry.path)
+        else:
+          continue
+        os.remove (entry.path)
+      except Exception as e:
+        Utils.__logger.critical('error deleting old file: ' + entry.path + " -- error: " + getattr(e, 'message', repr(e)))
+  
   @staticmethod
   def cleanup ():
     """
@@ -74,7 +135,9 @@ class Utils:
     Utils.__cleanup (os.path.join (settings.STORAGE, "cache", "biomodels"), settings.CACHE_BIOMODELS_MODEL)
     Utils.__cleanup (os.path.join (settings.STORAGE, "cache", "bigg"), settings.CACHE_BIGG_MODEL)
     Utils.__cleanup (os.path.join (settings.STORAGE, Constants.STORAGE_GENERATED_DIR), settings.KEEP_GENERATED)
-    Utils.__cleanup (os.path.join (settings.STORAGE, Constants.STORAGE_UPLOAD_DIR), settings.KEEP_UPLOADED)
+    Utils.__cleanup_uploads (os.path.join (settings.STORAGE, Constants.STORAGE_UPLOAD_DIR), settings.KEEP_UPLOADED)
+    JobQueue.cleanup (os.path.join (settings.STORAGE, Constants.STORAGE_JOBS_DIR), settings.KEEP_JOBS)
+    ResultCache (os.path.join (settings.STORAGE, "cache", "results"), settings.RESULT_CACHE_SIZE).evict ()
             
   
   
@@ -129,13 +192,55 @@ class Utils:
     nfiles, size = Utils.__collect_stats (os.path.join (settings.STORAGE,  Constants.STORAGE_GENERATED_DIR))
     response_obj['user']['generated'] = {"nfiles" : nfiles, "size": size}
     
+    nfiles, size = Utils.__collect_stats (os.path.join (settings.STORAGE,  Constants.STORAGE_JOBS_DIR))
+    response_obj['user']['jobs'] = {"nfiles" : nfiles, "size": size}
+    
+  
+  @staticmethod
+  def create_model_note (filter_species, filter_reactions, filter_enzymes, filter_enzyme_complexes, remove_reaction_enzymes_removed, remove_ghost_species, discard_fake_enzymes, remove_reaction_missing_species, removing_enzyme_removes_complex):
+    """
+    create the XHTML note that indicates that a model has been generated using the GEMtractor
+    
+    :param filter_species: species identifiers to get rid of
+    :param filter_reactions: reaction identifiers to get rid of
+    :param filter_enzymes: enzyme identifiers to get rid of
+    :param filter_enzyme_complexes: enzyme-complex identifiers to get rid of, every list-item should be of format: 'A + B + gene42'
+    :param remove_reaction_enzymes_removed: should we remove a reaction if all it's genes were removed?
+    :param remove_ghost_species: should species be removed, that do not participate in any reaction anymore - even though they might be required in other entities?
+    :param discard_fake_enzymes: should fake enzymes (implicitly assumes enzymes, if no enzymes are annotated to a reaction) be removed?
+    :param remove_reaction_missing_species: remove a reaction if one of the participating genes was removed?
+    :param removing_enzyme_removes_complex: if an enzyme is removed, should also all enzyme complexes be removed in which it participates?
+    
+    :type filter_species: list of str
+    :type filter_reactions: list of str
+    :type filter_enzymes: list of str
+    :type filter_enzyme_complexes: list of str
+    :type remove_reaction_enzymes_removed: bool
+    :type remove_ghost_species: bool
+    :type discard_fake_enzymes: bool
+    :type remove_reaction_missing_species: bool
+    :type removing_enzyme_removes_complex: bool
+    
+    :return: the XHTML paragraphs of the note
+    :rtype: str
+    """
+    note = "<p>This file was generated at the GEMtractor (https://gemtractor.bio.informatik.uni-rostock.de/) using the following settings:</p>"
+    for title, entities in [("Filter Species", filter_species), ("Filter Reactions", filter_reactions), ("Filter Enzymes", filter_enzymes), ("Filter Enzyme Complexes", filter_enzyme_complexes)]:
+      if entities is not None and len (entities) > 0:
+        note = note + "<p>" + title + ":</p><ul>" + "".join ("<li>" + ExportWriter.escape_xml (s) + "</li>" for s in entities) + "</ul>"
+    note = note + "<p>Remove reactions whose enzymes are removed: " +str(remove_reaction_enzymes_removed)+ "</p>"
+    note = note + "<p>Remove ghost species: " +str(remove_ghost_species)+ "</p>"
+    note = note + "<p>Discard fake enzymes: " +str(discard_fake_enzymes)+ "</p>"
+    note = note + "<p>Remove reactions that are missing a species: " +str(remove_reaction_missing_species)+ "</p>"
+    note = note + "<p>Remove enzyme complexes which are missing an enzyme: " +str(removing_enzyme_removes_complex)+ "</p>"
+    return note
   
   @staticmethod
   def add_model_note (model, filter_species, filter_reactions, filter_enzymes, filter_enzyme_complexes, remove_reaction_enzymes_removed, remove_ghost_species, discard_fake_enzymes, remove_reaction_missing_species, removing_enzyme_removes_complex):
     """'
     annotate the model to indicate that is has been generated using the GEMtractor
     
-    adds a note to the model note..
+    adds a note to the model note, see :func:`create_model_note`
     
     :param model: the SBML model
     :param filter_species: species identifiers to get rid of
@@ -167,32 +272,7 @@ class Utils:
     if note is None or len (note) < 1 or "</body>" not in note:
         note = '<notes><body xmlns="http://www.w3.org/1999/xhtml"></body></notes>'
     
-    additional_note = "<p>This file was generated at the GEMtractor (https://gemtractor.bio.informatik.uni-rostock.de/) using the following settings:</p>"
-    if filter_species is not None and len (filter_species) > 0:
-      additional_note = additional_note + "<p>Filter Species:</p><ul>"
-      for s in filter_species:
-        additional_note = additional_note + "<li>"+s+"</li>"
-      additional_note = additional_note + "</ul>"
-    if filter_reactions is not None and len (filter_reactions) > 0:
-      additional_note = additional_note + "<p>Filter Reactions:</p><ul>"
-      for s in filter_reactions:
-        additional_note = additional_note + "<li>"+s+"</li>"
-      additional_note = additional_note + "</ul>"
-    if filter_enzymes is not None and len (filter_enzymes) > 0:
-      additional_note = additional_note + "<p>Filter Enzymes:</p><ul>"
-      for s in filter_enzymes:
-        additional_note = additional_note + "<li>"+s+"</li>"
-      additional_note = additional_note + "</ul>"
-    if filter_enzyme_complexes is not None and len (filter_enzyme_complexes) > 0:
-      additional_note = additional_note + "<p>Filter Enzyme Complexes:</p><ul>"
-      for s in filter_enzyme_complexes:
-        additional_note = additional_note + "<li>"+s+"</li>"
-      additional_note = additional_note + "</ul>"
-    additional_note = additional_note + "<p>Remove reactions whose enzymes are removed: " +str(remove_reaction_enzymes_removed)+ "</p>"
-    additional_note = additional_note + "<p>Remove ghost species: " +str(remove_ghost_species)+ "</p>"
-    additional_note = additional_note + "<p>Discard fake enzymes: " +str(discard_fake_enzymes)+ "</p>"
-    additional_note = additional_note + "<p>Remove reactions that are missing a species: " +str(remove_reaction_missing_species)+ "</p>"
-    additional_note = additional_note + "<p>Remove enzyme complexes which are missing an enzyme: " +str(removing_enzyme_removes_complex)+ "</p>"
+    additional_note = Utils.create_model_note (filter_species, filter_reactions, filter_enzymes, filter_enzyme_complexes, remove_reaction_enzymes_removed, remove_ghost_species, discard_fake_enzymes, remove_reaction_missing_species, removing_enzyme_removes_complex)
     
     model.setNotes (note.replace ("</body>", additional_note + "</body>"))
   
@@ -245,6 +325,142 @@ class Utils:
     return os.path.join (d, sessionid)
     
   
+  @staticmethod
+  def is_upload_hash (name):
+    """
+    is this the name of an uploaded model, see :func:`store_upload`?
+    
+    :param name: the name of the file
+    :type name: str
+    
+    :return: true if the name is a SHA-256 hex digest
+    :rtype: bool
+    """
+    return re.fullmatch ("[0-9a-f]{64}", name) is not None
+  
+  @staticmethod
+  def get_upload_reference_path (sessionid):
+    """
+    get the file that references the model uploaded by a user
+    
+    :param sessionid: the users' session id
+    :type sessionid: str
+    
+    :return: path to the reference
+    :rtype: str
+    """
+    d = os.path.join (settings.STORAGE, Constants.STORAGE_UPLOAD_DIR, Constants.STORAGE_UPLOAD_SESSIONS_DIR)
+    Utils._create_dir(d)
+    return os.path.join (d, sessionid)
+  
+  @staticmethod
+  def __read_reference (reference_path):
+    """
+    read the hash of the model that is referenced by a session
+    
+    :param reference_path: the path to the reference, see :func:`get_upload_reference_path`
+    :type reference_path: str
+    
+    :return: the hash of the model, or None if there is no proper reference
+    :rtype: str
+    """
+    try:
+      with open (reference_path) as f:
+        model_hash = f.read ().strip ()
+    except (OSError, UnicodeDecodeError):
+      return None
+    return model_hash if Utils.is_upload_hash (model_hash) else None
+  
+  @staticmethod
+  def __count_upload_references (root_dir):
+    """
+    count how many sessions reference the uploaded models
+    
+    :param root_dir: the directory of the uploads
+    :type root_dir: str
+    
+    :return: the number of references per hash of a model
+    :rtype: dict of str to int
+    """
+    references = {}
+    sessions_dir = os.path.join (root_dir, Constants.STORAGE_UPLOAD_SESSIONS_DIR)
+    if os.path.isdir (sessions_dir):
+      for entry in os.scandir (sessions_dir):
+        model_hash = Utils.__read_reference (entry.path)
+        if model_hash is not None:
+          references[model_hash] = references.get (model_hash, 0) + 1
+    return references
+  
+  @staticmethod
+  def store_upload (sessionid, chunks):
+    """
+    store a model uploaded by a user
+    
+    the model is hashed while it is written and stored by its SHA-256 hash, see :func:`get_upload_path`.
+    thus, a model that is uploaded by several users is stored only once and all caches that depend on the model's path or hash are shared among these users.
+    the user's session references the model (see :func:`get_upload_reference_path`), unreferenced models are removed by :func:`cleanup`.
+    
+    :param sessionid: the users' session id
+    :param chunks: the chunks of the uploaded file
+    :type sessionid: str
+    :type chunks: iterable of bytes
+    
+    :return: the hash of the model, which is the model's id
+    :rtype: str
+    """
+    d = os.path.join (settings.STORAGE, Constants.STORAGE_UPLOAD_DIR)
+    Utils._create_dir(d)
+    fd, tmp = tempfile.mkstemp (dir = d, prefix = ".upload-")
+    os.close (fd)
+    try:
+      model_hash = Utils.store_stream (chunks, tmp)
+      
+      # reference the model first, so the cleanup won't remove it
+      reference = Utils.get_upload_reference_path (sessionid)
+      with open (reference + ".tmp", "w") as f:
+        f.write (model_hash)
+      os.replace (reference + ".tmp", reference)
+      
+      model_path = Utils.get_upload_path (model_hash)
+      if os.path.isfile (model_path):
+        os.utime (model_path)
+        Utils.__logger.info('model was already uploaded: ' + model_hash)
+      else:
+        os.replace (tmp, model_path)
+    finally:
+      if os.path.exists (tmp):
+        os.remove (tmp)
+    return model_hash
+  
+  @staticmethod
+  def touch_upload (sessionid):
+    """
+    mark the reference to the model uploaded by a user as recently used, so it survives the :func:`cleanup`
+    
+    :param sessionid: the users' session id
+    :type sessionid: str
+    """
+    try:
+      os.utime (Utils.get_upload_reference_path (sessionid))
+    except OSError:
+      pass
+  
+  @staticmethod
+  def release_upload (sessionid):
+    """
+    remove the reference to the model uploaded by a user
+    
+    the model itself is not removed here, as another session may just be uploading the same model.
+    once no session references it anymore, the model is removed by :func:`cleanup` after :data:`UPLOAD_GRACE` seconds.
+    
+    :param sessionid: the users' session id
+    :type sessionid: str
+    """
+    try:
+      os.remove (Utils.get_upload_reference_path (sessionid))
+    except OSError:
+      pass
+  
   @staticmethod
   def get_bigg_models (force = False):
     """ Retrieve the list of models from BiGG
@@ -461,8 +677,8 @@ class Utils:
     depending on how the model was obtained (downloaded from BiGG/biomodels or uploaded) the path may differ
     
     :param model_type: the obtain type (see :class:`.constants.Constants`)
-    :param model_id: the model's id
-    :param sessionid: the user's session id - only relevant if the model was uploaded
+    :param model_id: the model's id, which is the hash of the model if it was uploaded (see :func:`store_upload`)
+    :param sessionid: the user's session id - not needed anymore, as uploaded models are shared among sessions
     
     :type model_type: str
     :type model_id: str
@@ -473,7 +689,7 @@ class Utils:
     
     """
     if model_type == Constants.SESSION_MODEL_TYPE_UPLOAD:
-      return Utils.get_upload_path (sessionid)
+      return Utils.get_upload_path (model_id)
     if model_type == Constants.SESSION_MODEL_TYPE_BIGG:
       return Utils.get_bigg_model (model_id)
     if model_type == Constants.SESSION_MODEL_TYPE_BIOMODELS:
@@ -484,18 +700,344 @@ class Utils:
     """
     deliver a file to the user
     
-    :param file_path: the path to the file to deliver
+    if :data:`settings.ACCEL_REDIRECT` is set and the file is in the :data:`settings.STORAGE`, the delivery is offloaded to nginx using an X-Accel-Redirect, see :func:`get_accel_redirect`.
+    otherwise, the file is streamed in blocks instead of being read into memory.
+    
+    :param file_path: the path to the file to deliver, or a file that is already opened for reading (which is always streamed)
     :param file_name: the name to suggest to the client (browser)
     :param file_type: the mime type to suggest to the client (browser)
+    :type file_path: str or binary file-like object
+    :type file_name: str
+    :type file_type: str
+    
+    :return: the (streaming) response
+    :rtype: `django:FileResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#fileresponse-objects>`_ or `django:HttpResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#httpresponse-objects>`_
+    """
+    redirect = Utils.get_accel_redirect (file_path) if isinstance (file_path, str) else None
+    if redirect is not None:
+      response = HttpResponse (content_type=file_type)
+      response['X-Accel-Redirect'] = redirect
+    elif isinstance (file_path, str):
+      response = FileResponse (open (file_path, 'rb'), content_type=file_type)
+    else:
+      response = FileResponse (file_path, content_type=file_type)
+    response['Content-Disposition'] = 'attachment; filename=' + file_name
+    return response
+  
+  @staticmethod
+  def get_accel_redirect (file_path):
+    """
+    get the internal nginx location of a file
+    
+    the location is the file's path relative to the :data:`settings.STORAGE`, below :data:`settings.ACCEL_REDIRECT`.
+    
+    :param file_path: the path to the file
     :type file_path: str
+    
+    :return: the location, or None if :data:`settings.ACCEL_REDIRECT` is not set or if the file is not in the :data:`settings.STORAGE`
+    :rtype: str
+    """
+    if not settings.ACCEL_REDIRECT:
+      return None
+    storage = os.path.realpath (settings.STORAGE)
+    file_path = os.path.realpath (file_path)
+    if os.path.commonpath ([storage, file_path]) != storage:
+      return None
+    return settings.ACCEL_REDIRECT.rstrip ("/") + "/" + urllib.parse.quote (os.path.relpath (file_path, storage))
+  
+  @staticmethod
+  def stream_export (export, file_name, file_type, compression = None, tee = None):
+    """
+    deliver an export to the user, while it is generated
+    
+    the export writes to a stream instead of a file, see :func:`.network.exportwriter.ExportWriter.iterate`
+    
+    :param export: the export, called with a writable stream, e.g. :func:`.network.network.Network.export_en_dot`
+    :param file_name: the name to suggest to the client (browser)
+    :param file_type: the mime type to suggest to the client (browser)
+    :param compression: compress the export on the fly, see :data:`.exporter.Exporter.COMPRESSIONS`, the file name and type will be adjusted
+    :param tee: called with the (compressed) chunks of the response and returns the chunks to send, e.g. to cache the export, see :func:`.resultcache.ResultCache.tee`
+    :type export: function
     :type file_name: str
     :type file_type: str
+    :type compression: str
+    :type tee: function
+    
+    :return: the streaming response
+    :rtype: `django:StreamingHttpResponse <https://docs.djangoproject.com/en/2.2/ref/request-response/#streaminghttpresponse-objects>`_
+    """
+    chunks = ExportWriter.iterate (export)
+    if compression == "gzip":
+      chunks = Utils.gzip_stream (chunks)
+    elif compression == "zip":
+      chunks = Utils.zip_stream (chunks, file_name)
+    if compression is not None:
+      file_name = file_name + "." + Exporter.COMPRESSIONS[compression][0]
+      file_type = Exporter.COMPRESSIONS[compression][1]
+    if tee is not None:
+      chunks = tee (chunks)
+    response = StreamingHttpResponse (chunks, content_type=file_type)
+    response['Content-Disposition'] = 'attachment; filename=' + file_name
+    return response
+  
+  @staticmethod
+  def get_file_hash (session, file_path):
+    """
+    get the SHA-256 hash of a file's content
+    
+    the hashes are remembered in the session together with the files' modification times and sizes,
+    so a file is only hashed again if it changed.
+    uploaded models are stored by their hash (see :func:`store_upload`), so they are not hashed at all.
+    
+    :param session: the user's session
+    :param file_path: the path to the file
+    :type session: `django:SessionBase <https://docs.djangoproject.com/en/2.2/topics/http/sessions/#django.contrib.sessions.backends.base.SessionBase>`_
+    :type file_path: str
+    
+    :return: the hex digest of the file's hash, or an empty string if there is no such file
+    :rtype: str
+    """
+    name = os.path.basename (file_path)
+    if Utils.is_upload_hash (name) and os.path.dirname (file_path) == os.path.join (settings.STORAGE, Constants.STORAGE_UPLOAD_DIR):
+      return name if os.path.isfile (file_path) else ""
+    
+    fingerprints = session.get (Constants.SESSION_FINGERPRINTS, {})
+    try:
+      stat = os.stat (file_path)
+    except OSError:
+      if file_path in fingerprints:
+        del fingerprints[file_path]
+        session[Constants.SESSION_FINGERPRINTS] = fingerprints
+      return ""
+    
+    fingerprint = fingerprints.get (file_path)
+    if fingerprint is not None and fingerprint[0] == stat.st_mtime_ns and fingerprint[1] == stat.st_size:
+      return fingerprint[2]
+    
+    h = hashlib.sha256 ()
+    with open (file_path, "rb") as f:
+      for chunk in iter (lambda: f.read (1024 * 1024), b""):
+        h.update (chunk)
+    fingerprints[file_path] = [stat.st_mtime_ns, stat.st_size, h.hexdigest ()]
+    session[Constants.SESSION_FINGERPRINTS] = fingerprints
+    return fingerprints[file_path][2]
+  
+  @staticmethod
+  def iter_json (obj, batch_size = 1000):
+    """
+    encode an object as JSON piece by piece
+
+    dicts are encoded key by key, and lists, sets, tuples, and generators are encoded in batches of batch_size items.
+    thus, generators are consumed lazily and the encoded document never needs to be in memory as a whole.
+    items of lists are encoded using `json.dumps`, unless they are generators themselves.
+
+    :param obj: the object to encode
+    :param batch_size: how many list items to encode in one chunk
+    :type obj: JSON-dumpable object, which may contain generators
+    :type batch_size: int
+
+    :return: the chunks of the JSON document
+    :rtype: generator of str
+    """
+    if isinstance (obj, dict):
+      yield "{"
+      first = True
+      for key, value in obj.items ():
+        yield ("" if first else ",") + json.dumps (str (key)) + ":"
+        first = False
+        yield from Utils.iter_json (value, batch_size)
+      yield "}"
+    elif isinstance (obj, (list, set, tuple)) or inspect.isgenerator (obj):
+      yield "["
+      chunk = []
+      first = True
+      for item in obj:
+        if inspect.isgenerator (item):
+          # nested generators are encoded recursively
+          if chunk:
+            yield ("" if first else ",") + ",".join (chunk)
+            first = False
+            chunk = []
+          yield "" if first else ","
+          first = False
+          yield from Utils.iter_json (item, batch_size)
+          continue
+        chunk.append (json.dumps (item))
+        if len (chunk) >= batch_size:
+          yield ("" if first else ",") + ",".join (chunk)
+          first = False
+          chunk = []
+      if chunk:
+        yield ("" if first else ",") + ",".join (chunk)
+      yield "]"
+    else:
+      yield json.dumps (obj)
+
+  @staticmethod
+  def gzip_stream (chunks, level = 6):
+    """
+    compress a stream of chunks using gzip on the fly
+    
+    :param chunks: the chunks to compress, str will be encoded as UTF-8
+    :param level: the compression level (1-9)
+    :type chunks: iterable of str or bytes
+    :type level: int
+    
+    :return: the gzip compressed stream
+    :rtype: generator of bytes
+    """
+    compressor = zlib.compressobj (level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+      if isinstance (chunk, str):
+        chunk = chunk.encode ("utf-8")
+      compressed = compressor.compress (chunk)
+      if compressed:
+        yield compressed
+    yield compressor.flush ()
+  
+  @staticmethod
+  def zip_stream (chunks, name):
+    """
+    create a ZIP archive of a single file on the fly
+    
+    :param chunks: the chunks of the file, str will be encoded as UTF-8
+    :param name: the name of the file in the archive
+    :type chunks: iterable of str or bytes
+    :type name: str
+    
+    :return: the ZIP archive
+    :rtype: generator of bytes
+    """
+    pipe = _ZipPipe ()
+    with zipfile.ZipFile (pipe, "w", zipfile.ZIP_DEFLATED) as archive:
+      with archive.open (name, "w", force_zip64 = True) as entry:
+        for chunk in chunks:
+          if isinstance (chunk, str):
+            chunk = chunk.encode ("utf-8")
+          entry.write (chunk)
+          if pipe.written:
+            yield b"".join (pipe.written)
+            pipe.written.clear ()
+    yield b"".join (pipe.written)
+  
+  @staticmethod
+  def zip_files_stream (files, block_size = 1 << 20):
+    """
+    create a ZIP archive of several files on the fly
+    
+    the files may be generated while the archive is streamed, every file is added as soon as the iteration reaches it
+    
+    :param files: the names of the files in the archive and the paths to the files
+    :param block_size: the number of bytes to read at once
+    :type files: iterable of tuples of str
+    :type block_size: int
+    
+    :return: the ZIP archive
+    :rtype: generator of bytes
+    """
+    pipe = _ZipPipe ()
+    with zipfile.ZipFile (pipe, "w", zipfile.ZIP_DEFLATED) as archive:
+      for name, path in files:
+        with open (path, "rb") as f, archive.open (name, "w", force_zip64 = True) as entry:
+          for block in iter (lambda: f.read (block_size), b""):
+            entry.write (block)
+            if pipe.written:
+              yield b"".join (pipe.written)
+              pipe.written.clear ()
+        if pipe.written:
+          yield b"".join (pipe.written)
+          pipe.written.clear ()
+    yield b"".join (pipe.written)
+  
+  @staticmethod
+  def store_stream (chunks, file_path, max_size = math.inf):
     """
-    with open(file_path, 'rb') as fh:
-      response = HttpResponse(fh.read(), content_type=file_type)
-      response['Content-Disposition'] = 'attachment; filename=' + file_name
-      return response
+    write a stream of chunks to a file and hash it on the fly
     
+    :param chunks: the chunks to write, str will be encoded as UTF-8
+    :param file_path: where to write the chunks
+    :param max_size: the max number of bytes to write
+    :type chunks: iterable of str or bytes
+    :type file_path: str
+    :type max_size: int
+    
+    :return: the hex digest of the SHA-256 hash of the written bytes
+    :rtype: str
+    
+    :raises TooBigForServer: if the stream has more than `max_size` bytes, the file is incomplete in that case
+    """
+    h = hashlib.sha256 ()
+    size = 0
+    with open (file_path, "wb") as f:
+      for chunk in chunks:
+        if isinstance (chunk, str):
+          chunk = chunk.encode ("utf-8")
+        size += len (chunk)
+        if size > max_size:
+          raise TooBigForServer ("the model has more than " + Utils.human_readable_bytes (max_size))
+        h.update (chunk)
+        f.write (chunk)
+    return h.hexdigest ()
+  
+  @staticmethod
+  def decompress_stream (chunks, block_size = 1 << 20):
+    """
+    decompress a stream of chunks on the fly
+    
+    the compression is detected by the first bytes of the stream, gzip and zstd (if zstandard is installed) are supported.
+    streams that are not compressed are passed through.
+    the decompressed stream is generated in blocks of at most `block_size` bytes, so a small but highly compressed stream does not blow up the memory.
+    
+    :param chunks: the chunks of the possibly compressed stream
+    :param block_size: the max number of bytes to decompress at once
+    :type chunks: iterable of bytes
+    :type block_size: int
+    
+    :return: the decompressed stream
+    :rtype: generator of bytes
+    
+    :raises UnsupportedCompression: if the stream is zstd compressed, but zstandard is not installed
+    """
+    chunks = iter (chunks)
+    head = b""
+    for chunk in chunks:
+      head += chunk
+      if len (head) >= len (Utils.ZSTD_MAGIC):
+        break
+    chunks = itertools.chain ([head], chunks)
+    
+    if head.startswith (Utils.GZIP_MAGIC):
+      decompressor = zlib.decompressobj (16 + zlib.MAX_WBITS)
+      pending = False
+      for data in chunks:
+        while data:
+          pending = True
+          block = decompressor.decompress (data, block_size)
+          if block:
+            yield block
+          if decompressor.eof:
+            # the next member of a multi-member gzip file
+            data = decompressor.unused_data
+            decompressor = zlib.decompressobj (16 + zlib.MAX_WBITS)
+            pending = False
+          else:
+            data = decompressor.unconsumed_tail
+      block = decompressor.flush ()
+      if block:
+        yield block
+      if pending and not decompressor.eof:
+        raise zlib.error ("the gzip stream is incomplete")
+    elif head.startswith (Utils.ZSTD_MAGIC):
+      if zstandard is None:
+        raise UnsupportedCompression ("zstd compressed models are not supported by this server, please use gzip")
+      with zstandard.ZstdDecompressor ().stream_reader (_ChunkReader (chunks), read_across_frames = True, closefd = False) as reader:
+        for block in iter (lambda: reader.read (block_size), b""):
+          yield block
+    else:
+      for data in chunks:
+        if data:
+          yield data
+  
   @staticmethod
   def del_session_key (request, context, key):
     """
@@ -547,3 +1089,37 @@ class Utils:
         return True
     except ValueError:
         return False
+
+
+class _ZipPipe:
+  """
+  collects what a ZIP archive writes, so it can be streamed
+
+  the archive cannot seek, so the sizes are written after every file
+  """
+  def __init__ (self):
+    self.written = []
+  def write (self, data):
+    self.written.append (bytes (data))
+    return len (data)
+  def flush (self):
+    pass
+
+
+class _ChunkReader:
+  """
+  reads a stream of chunks like a file, see :func:`Utils.decompress_stream`
+  """
+  def __init__ (self, chunks):
+    self.chunks = chunks
+    self.pending = b""
+  def read (self, size = -1):
+    while size < 0 or len (self.pending) < size:
+      chunk = next (self.chunks, None)
+      if chunk is None:
+        break
+      self.pending += chunk
+    if size < 0:
+      size = len (self.pending)
+    data, self.pending = self.pending[:size], self.pending[size:]
+    return data
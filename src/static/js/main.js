@@ -126,195 +126,34 @@ function storeFilters (s, r, g, gc, successFn = undefined) {
 
 /*
  * 
- * updateNetwork -- evaluate the filtered species, find inconsistencies, recompute network tables, and store the filters
+ * updateNetwork -- evaluate the filtered entities, store the filters, and check their consistency
  * 
  */
 
 function updateNetwork () {
 	// reset filer-classes
-	$("#species-table tr").removeClass ("filter-inconsistent").removeClass ("filter-excluded");
-	$("#reaction-table tr").removeClass ("filter-inconsistent").removeClass ("filter-excluded");
-	$("#gene-table tr").removeClass ("filter-inconsistent").removeClass ("filter-excluded");
-	$("#gene-complex-table tr").removeClass ("filter-inconsistent").removeClass ("filter-excluded").removeClass ("filter-supercomplex");
-	$("#gene-complex-table tr td:nth-child(2)").attr("title", "");
-	$(".w3-content .fa-info-circle").hide().attr("title", "");
-
-	// prepare inconsistency sets
-	var inconsistent = [new Set(),new Set(),new Set(),new Set()];
+	$("#species-table tr").removeClass ("filter-excluded");
+	$("#reaction-table tr").removeClass ("filter-excluded");
+	$("#gene-table tr").removeClass ("filter-excluded");
+	$("#gene-complex-table tr").removeClass ("filter-excluded");
+
 	filter_species = new Set();
 	filter_reaction = new Set();
 	filter_genes = new Set();
 	filter_genec = new Set();
 
-	// check species for deselection
-	$("#species-table input[type=checkbox]:not(:checked)").each (function (item){
-			const domId=$(this).parent ().parent ().attr ("id");
-			const entId = idReMap[domId];
-			// if unchecked, fade it out
-			$("#" + domId).addClass ("filter-excluded");
-			filter_species.add (entId);
-	});
-
-	// check reactions for deselection
-	$("#reaction-table input[type=checkbox]:not(:checked)").each (function (item){
+	// collect the deselected entities and fade them out
+	const collect = function (table, filter) {
+		$(table + " input[type=checkbox]:not(:checked)").each (function (item){
 			const domId=$(this).parent ().parent ().attr ("id");
-			const entId = idReMap[domId];
-			// if unchecked, fade it out
 			$("#" + domId).addClass ("filter-excluded");
-			filter_reaction.add (entId);
-	});
-
-	// check genes for deselection
-	$("#gene-table input[type=checkbox]:not(:checked)").each (function (item){
-			const domId=$(this).parent ().parent ().attr ("id");
-			const entId = idReMap[domId];
-			// if unchecked, fade it out
-			$("#" + domId).addClass ("filter-excluded");
-			filter_genes.add (entId);
-	});
-
-	// check genes for deselection
-	$("#gene-complex-table input[type=checkbox]:not(:checked)").each (function (item){
-			const domId=$(this).parent ().parent ().attr ("id");
-			const entId = idReMap[domId];
-			// if unchecked, fade it out
-			$("#" + domId).addClass ("filter-excluded");
-			filter_genec.add (entId);
-			
-			// find super-complexes
-			const this_key = complexIdNumMap[entId];
-			const this_complex = networks.original.enzc[this_key].enzs;
-			for (var key = 0; key < networks.original.enzc.length; key++) {
-				if (key == this_key)
-					continue;
-				const other = networks.original.enzc[key].enzs;
-				if (this_complex.every (r => other.includes (r))) {
-					const domid = "#" + idMap[networks.original.enzc[key].id]
-					$(domid).addClass ("filter-inconsistent").addClass ("filter-supercomplex");
-          var info = $(domid + " .fa-info-circle").attr ('title');
-					if (info.length < 1)
-						info = "Subcomplexes removed: ";
-					info += "["+entId+"] ";
-          $(domid + " .fa-info-circle").show ().attr ('title', info.trim ());
-				}
-			}
-	});
-
-	// check reactions for missing genes
-	for (var key = 0; key < networks.original.reactions.length; key++) {
-	//~ for (var key in networks.original.reactions) {
-		//~ if (networks.original.reactions.hasOwnProperty(key)) {
-			const item = networks.original.reactions[key];
-			// is there some gene left in this reaction?
-			var occ = item.enzs.some (function (g) {
-					return !filter_genes.has (networks.original.enzs[g].id);
-			});
-			var occ2 = item.enzc.some (function (g) {
-					return !filter_genec.has (networks.original.enzc[g].id);
-			});
-			// was there a species removed?
-			var occ3 = item.cons.some (function (s) {
-					return filter_species.has (networks.original.species[s].id);
-			});
-			var occ4 = item.prod.some (function (s) {
-					return filter_species.has (networks.original.species[s].id);
-			});
-			if ((!occ && !occ2) || occ3 || occ4) {
-				// otherwise highlight it as inconsistent
-				$("#" + item.DOM).addClass ("filter-inconsistent");
-        var info = "";
-        if (!occ && !occ2)
-          info += " this reaction is not catalyzed anymore... "
-        if (occ3)
-          info += " some species consumed by this reaction were removed... "
-        if (occ3)
-          info += " some species produced by this reaction were removed... "
-				$("#" + item.DOM + " .fa-info-circle").show ().attr ('title', info.trim ());
-				inconsistent[1].add (item.id);
-			}
-		//~ }
-	};
-
-	// check for ghost species - species that do not appear in any reaction
-	for (var key = 0; key < networks.original.species.length; key++) {
-	//~ for (var key in networks.original.species) {
-		//~ if (networks.original.species.hasOwnProperty(key)) {
-			const item = networks.original.species[key];
-			// does the species appear somewhere?
-			var occ = item.occ.some (function (r) {
-				return !filter_reaction.has (networks.original.reactions[r].id);
-			});
-			if (!occ) {
-				// otherwise highlight it as inconsistent
-				$("#" + item.DOM).addClass ("filter-inconsistent");
-				$("#" + item.DOM + " .fa-info-circle").show ().attr ('title', "ghost species -> doesn't appear in any reaction anymore");
-				inconsistent[0].add (item.id);
-			}
-		//~ }
+			filter.add (idReMap[domId]);
+		});
 	};
-
-	// check for ghost genes - genes that do not appear in any reaction
-	for (var key = 0; key < networks.original.enzs.length; key++) {
-	//~ for (var key in networks.original.genenet) {
-		//~ if (networks.original.genenet.hasOwnProperty(key)) {
-			const item = networks.original.enzs[key];
-			var occ = item.reactions.some (function (r) {
-				// does the species appear somewhere?
-				return !filter_reaction.has (networks.original.reactions[r].id);
-			});
-			var occ2 = item.cplx.some (function (c) {
-				// does the species appear somewhere?
-				return !filter_genec.has (networks.original.enzc[c].id);
-			});
-			if (!occ && !occ2) {
-				// otherwise highlight it as inconsistent
-				$("#" + item.DOM).addClass ("filter-inconsistent");
-				$("#" + item.DOM + " .fa-info-circle").show ().attr ('title', "enzyme is not used in any reaction or enzyme complex anymore");
-				inconsistent[2].add (item.id);
-			}
-		//~ }
-	}
-
-	// check for ghost genes complexes - genes that do not appear in any reaction
-	for (var key = 0; key < networks.original.enzc.length; key++) {
-	//~ for (var key in networks.original.genenet) {
-		//~ if (networks.original.genenet.hasOwnProperty(key)) {
-			const item = networks.original.enzc[key];
-			var occ = item.reactions.some (function (r) {
-				// does the species appear somewhere?
-				return !filter_reaction.has (networks.original.reactions[r].id);
-			});
-			var occ2 = item.enzs.some (function (g) {
-				// does the species appear somewhere?
-					return filter_genes.has (networks.original.enzs[g].id);
-			});
-			if (!occ || occ2) {
-				// otherwise highlight it as inconsistent
-				$("#" + item.DOM).addClass ("filter-inconsistent");
-        var info = $("#" + item.DOM + " .fa-info-circle").attr ('title');
-        if (info.length > 0)
-          info += "; ";
-        if (!occ)
-          info += " enzyme complex is not used in any reaction anymore... "
-        if (occ2)
-          info += " some enzymes required by this complex are not available anymore..."
-				$("#" + item.DOM + " .fa-info-circle").show ().attr ('title', info.trim ());
-				inconsistent[3].add (item.id);
-			}
-		//~ }
-	}
-
-	// post-process inconsistencies
-	filter_reaction.forEach (function (item) {inconsistent[1].delete (item)});
-	filter_species.forEach (function (item) {inconsistent[0].delete (item)});
-	filter_genes.forEach (function (item) {inconsistent[2].delete (item)});
-	filter_genec.forEach (function (item) {inconsistent[3].delete (item)});
-
-	// display inconsistencies in the top table
-	$("#s_inconsistent").text (inconsistent[0].size);
-	$("#r_inconsistent").text (inconsistent[1].size);
-	$("#g_inconsistent").text (inconsistent[2].size);
-	$("#gc_inconsistent").text (inconsistent[3].size);
+	collect ("#species-table", filter_species);
+	collect ("#reaction-table", filter_reaction);
+	collect ("#gene-table", filter_genes);
+	collect ("#gene-complex-table", filter_genec);
 
 	// display current model size in top table
 	$("#s_cur").text (Object.keys(networks.original.species).length - filter_species.size);
@@ -332,8 +171,143 @@ function updateNetwork () {
 	//~ $("#batch-filter").val ("species: " + s.join (", ") + "\nreactions: " + r.join (", ") + "\ngenes: " + g.join (", "));
 	$("#batch-filter").val ("species: " + s.join (", ") + "\nreactions: " + r.join (", ") + "\nenzymes: " + g.join (", ") + "\nenzyme_complexes: " + gc.join (", "));
 
-	// and store the filter at the backend session
-	storeFilters (s, r, g, gc);
+	// and store the filter at the backend session, which will tell us about inconsistencies
+	checkConsistency (s, r, g, gc, markInconsistencies);
+}
+
+/**
+ * 
+ * consistency -- the consistency state of the filters as reported by the server
+ * 
+ * the server only sends the entities whose consistency changed since the given revision
+ * 
+ */
+const consistency = {
+	revision: undefined,
+	inconsistent: {species: {}, reactions: {}, enzs: {}, enzc: {}},
+	messages: {
+		species: {ghost: "ghost species -> doesn't appear in any reaction anymore"},
+		reactions: {
+			uncatalyzed: "this reaction is not catalyzed anymore...",
+			consumed_removed: "some species consumed by this reaction were removed...",
+			produced_removed: "some species produced by this reaction were removed..."
+		},
+		enzs: {unused: "enzyme is not used in any reaction or enzyme complex anymore"},
+		enzc: {
+			unused: "enzyme complex is not used in any reaction anymore...",
+			enzymes_removed: "some enzymes required by this complex are not available anymore...",
+			subcomplexes_removed: "Subcomplexes removed:"
+		}
+	}
+};
+
+/**
+ * 
+ * checkConsistency -- store the currently applied filters and check their consistency at /api/consistency
+ * 
+ * @param s list of species' ids to discard
+ * @param r list of reactions' ids to discard
+ * @param g list of genes' ids to discard
+ * @param gc list of gene complexes' ids to discard
+ * @param successFn function called with the entities whose consistency changed and whether that is the complete list of inconsistencies
+ * 
+ */
+function checkConsistency (s, r, g, gc, successFn) {
+	$.ajax({
+		method: "POST",
+		headers: {"X-CSRFToken": token},
+		url: '/api/consistency',
+		dataType: 'json',
+		data: JSON.stringify({
+			species: s,
+			reaction: r,
+			enzymes: g,
+			enzyme_complexes: gc,
+			revision: consistency.revision
+		}),
+		success: function (data) {
+			if (data.status != 'success') {
+				$("#filtercontainer").hide ();
+				$("#loading").hide ();
+				$("#error").show ().text ("Failed to update the filters: " + data.error);
+				return;
+			}
+			
+			consistency.revision = data.revision;
+			for (var entity in data.inconsistent) {
+				if (data.complete)
+					consistency.inconsistent[entity] = {};
+				for (var id in data.inconsistent[entity]) {
+					if (Object.keys (data.inconsistent[entity][id]).length > 0)
+						consistency.inconsistent[entity][id] = data.inconsistent[entity][id];
+					else
+						delete consistency.inconsistent[entity][id];
+				}
+			}
+			
+			// display inconsistencies in the top table
+			$("#s_inconsistent").text (data.counts.species);
+			$("#r_inconsistent").text (data.counts.reactions);
+			$("#g_inconsistent").text (data.counts.enzs);
+			$("#gc_inconsistent").text (data.counts.enzc);
+			
+			successFn (data.inconsistent, data.complete);
+		},
+		error: function (jqXHR, textStatus, errorThrown) {
+			$("#filtercontainer").hide ();
+			$("#loading").hide ();
+			$("#error").show ().text ("Failed to update the filters: " + errorThrown);
+		}
+	});
+}
+
+/**
+ * 
+ * inconsistencyInfo -- explain why an entity is inconsistent
+ * 
+ * @param entity the type of the entity, one of species, reactions, enzs, enzc
+ * @param reasons the reasons as reported by the server
+ * @return the explanation
+ * 
+ */
+function inconsistencyInfo (entity, reasons) {
+	var info = [];
+	for (var reason in reasons) {
+		var message = consistency.messages[entity][reason];
+		if (Array.isArray (reasons[reason]))
+			message += " [" + reasons[reason].join ("] [") + "]";
+		info.push (message);
+	}
+	return info.join ("; ");
+}
+
+/**
+ * 
+ * markInconsistencies -- highlight entities in the filter tables, whose consistency changed
+ * 
+ * @param changed the entities whose consistency changed, mapped to the reasons of their inconsistency
+ * @param complete is that the complete list of inconsistencies?
+ * 
+ */
+function markInconsistencies (changed, complete) {
+	if (complete) {
+		$("#filter-tables tr").removeClass ("filter-inconsistent").removeClass ("filter-supercomplex");
+		$(".w3-content .fa-info-circle").hide().attr("title", "");
+	}
+	for (var entity in changed) {
+		for (var id in changed[entity]) {
+			const domid = "#" + idMap[id];
+			const reasons = changed[entity][id];
+			$(domid).removeClass ("filter-inconsistent").removeClass ("filter-supercomplex");
+			$(domid + " .fa-info-circle").hide ().attr ('title', "");
+			if (Object.keys (reasons).length < 1)
+				continue;
+			$(domid).addClass ("filter-inconsistent");
+			if (reasons.subcomplexes_removed)
+				$(domid).addClass ("filter-supercomplex");
+			$(domid + " .fa-info-circle").show ().attr ('title', inconsistencyInfo (entity, reasons));
+		}
+	}
 }
 
 /*
@@ -411,7 +385,7 @@ function fill_network_table (filter, fluxes, use_fluxes) {
 			var checked = filter["filter_reactions"].includes(item.id) ? "" : " checked";
 			var flx = "";
 			if (use_fluxes) {
-				if (fluxes[item.id]) {
+				if (fluxes[item.id] !== undefined) {
 					found_fluxes += 1;
 					flx = "<td>"+fluxes[item.id]+"</td>";
 				} else {
@@ -544,20 +518,437 @@ function prepareTableSorting () {
  * and build the tables
  * 
  */
+/**
+ * 
+ * expandColumnarNetwork -- expand a network in columnar format into lists of species, reactions, enzs, and enzc objects
+ * @param columns the network as returned by /api/get_network?format=columnar or decodeBinaryNetwork
+ * @return the network as returned by /api/get_network
+ * 
+ */
+function expandColumnarNetwork (columns) {
+	const links = function (csr, i) {
+		// typed arrays can be shared instead of copied
+		if (csr.idx.subarray)
+			return csr.idx.subarray (csr.off[i], csr.off[i + 1]);
+		return csr.idx.slice (csr.off[i], csr.off[i + 1]);
+	};
+	const net = {species: [], reactions: [], enzs: [], enzc: []};
+	
+	const species = columns.species;
+	for (var i = 0; i < species.id.length; i++)
+		net.species.push ({id: species.id[i], name: species.name[i], occ: links (species.occ, i)});
+	
+	const reactions = columns.reactions;
+	for (var i = 0; i < reactions.id.length; i++)
+		net.reactions.push ({
+			id: reactions.id[i],
+			name: reactions.name[i],
+			rev: reactions.rev[i],
+			cons: links (reactions.cons, i),
+			prod: links (reactions.prod, i),
+			enzs: links (reactions.enzs, i),
+			enzc: links (reactions.enzc, i)
+		});
+	
+	const enzs = columns.enzs;
+	for (var i = 0; i < enzs.id.length; i++)
+		net.enzs.push ({id: enzs.id[i], reactions: links (enzs.reactions, i), cplx: links (enzs.cplx, i)});
+	
+	const enzc = columns.enzc;
+	for (var i = 0; i < enzc.id.length; i++)
+		net.enzc.push ({id: enzc.id[i], enzs: links (enzc.enzs, i), reactions: links (enzc.reactions, i)});
+	
+	return net;
+}
+
+/**
+ * 
+ * decodeBinaryNetwork -- decode a network as returned by /api/get_network?format=bin
+ * 
+ * see Network.iter_serialize_binary for the layout
+ * 
+ * @param buffer the ArrayBuffer with the binary network
+ * @return an object with the network in columnar format (relations as Uint32Arrays), the fluxes, and the filter
+ * 
+ */
+function decodeBinaryNetwork (buffer) {
+	const view = new DataView (buffer);
+	var pos = 0;
+	const uint32 = function () {
+		const value = view.getUint32 (pos, true);
+		pos += 4;
+		return value;
+	};
+	const uint32Array = function (n) {
+		const values = new Uint32Array (n);
+		for (var i = 0; i < n; i++)
+			values[i] = view.getUint32 (pos + 4 * i, true);
+		pos += 4 * n;
+		return values;
+	};
+	const align = function (n) {
+		pos = Math.ceil (pos / n) * n;
+	};
+	
+	if (String.fromCharCode (view.getUint8 (0), view.getUint8 (1), view.getUint8 (2), view.getUint8 (3)) != "GEMN")
+		throw "unexpected binary format";
+	pos = 4;
+	const version = uint32 ();
+	if (version != 1)
+		throw "unsupported binary format version " + version;
+	const nspecies = uint32 ();
+	const nreactions = uint32 ();
+	const nenzs = uint32 ();
+	const nenzc = uint32 ();
+	const nstrings = uint32 ();
+	const nbytes = uint32 ();
+	
+	// string table
+	const decoder = new TextDecoder ("utf-8");
+	const stringOffsets = uint32Array (nstrings + 1);
+	const stringBytes = new Uint8Array (buffer, pos, nbytes);
+	pos += nbytes;
+	align (4);
+	var nextString = 0;
+	const strings = function (n) {
+		const values = new Array (n);
+		for (var i = 0; i < n; i++, nextString++)
+			values[i] = decoder.decode (stringBytes.subarray (stringOffsets[nextString], stringOffsets[nextString + 1]));
+		return values;
+	};
+	const net = {
+		species: {id: strings (nspecies), name: strings (nspecies)},
+		reactions: {id: strings (nreactions), name: strings (nreactions), rev: []},
+		enzs: {id: strings (nenzs)},
+		enzc: {id: strings (nenzc)}
+	};
+	
+	for (var i = 0; i < nreactions; i++)
+		net.reactions.rev.push (view.getUint8 (pos + i) != 0);
+	pos += nreactions;
+	align (4);
+	
+	// relations
+	const csr = function (n) {
+		const off = uint32Array (n + 1);
+		return {off: off, idx: uint32Array (off[n])};
+	};
+	net.species.occ = csr (nspecies);
+	net.reactions.cons = csr (nreactions);
+	net.reactions.prod = csr (nreactions);
+	net.reactions.enzs = csr (nreactions);
+	net.reactions.enzc = csr (nreactions);
+	net.enzs.reactions = csr (nenzs);
+	net.enzs.cplx = csr (nenzs);
+	net.enzc.enzs = csr (nenzc);
+	net.enzc.reactions = csr (nenzc);
+	
+	// fluxes
+	align (8);
+	const fluxes = {};
+	for (var i = 0; i < nreactions; i++) {
+		const flux = view.getFloat64 (pos + 8 * i, true);
+		if (!isNaN (flux))
+			fluxes[net.reactions.id[i]] = String (flux);
+	}
+	pos += 8 * nreactions;
+	
+	const extraLength = uint32 ();
+	const extra = JSON.parse (decoder.decode (new Uint8Array (buffer, pos, extraLength)));
+	Object.assign (fluxes, extra.fluxes);
+	
+	return {status: "success", network: net, fluxes: fluxes, flux_columns: extra.flux_columns, filter: extra.filter};
+}
+
+/**
+ * 
+ * pagedTables -- state of the filter tables of networks that are too big for the browser
+ * 
+ * for every table (species, reactions, enzs, enzc) we remember the DOM body, the server-side sort columns per header cell,
+ * the key of the filter, and the currently displayed window
+ * 
+ */
+const pagedTables = {
+	limit: 100,
+	filter: {},
+	tables: {
+		species: {body: "#species-table", filter: "filter_species", count: "s", columns: ["include", "id", "name", "occ"]},
+		reactions: {body: "#reaction-table", filter: "filter_reactions", count: "r", columns: ["include", "id", "name", "reaction", "enzymes", "flux"]},
+		enzs: {body: "#gene-table", filter: "filter_enzymes", count: "g", columns: ["include", "id", "reactions", "cplx"]},
+		enzc: {body: "#gene-complex-table", filter: "filter_enzyme_complexes", count: "gc", columns: ["include", "id", "reactions"]}
+	}
+};
+
+/**
+ * 
+ * renderTableRow -- create the DOM row of an entity in a paged table
+ * 
+ * @param entity the table, one of species, reactions, enzs, enzc
+ * @param item the row as returned by /api/get_table
+ * @return the jquery row
+ * 
+ */
+function renderTableRow (entity, item) {
+	var checked = item.excluded ? "" : " checked";
+	var cells = "<td class='check'><input type='checkbox'"+checked+"></td>";
+	if (entity == "species") {
+		cells += "<td><abbr title='"+item.id+"'>"+truncate (item.id, 20)+"</abbr></td><td><abbr title='"+item.name+"'>"+truncate (item.name)+"</abbr></td><td title='occurs in "+item.occ.join (", ")+"'>"+item.occ.length+"</td>";
+	} else if (entity == "reactions") {
+		cells += "<td><abbr title='"+item.id+"'>"+truncate (item.id, 20)+"</abbr></td><td><abbr title='"+item.name+"'>"+truncate (item.name)+"</abbr></td><td><small>"+item.cons.join (" + ") + "</small> <i class='fas fa-arrow-right'></i> <small>" + item.prod.join (" + ") +"</small></td><td><small>"+item.enzs.concat (item.enzc).join ("</small> [OR] <small>") +"</small></td>";
+		if (pagedTables.use_fluxes)
+			cells += item.flux === null ? "<td class='w3-red'>unknown</td>" : "<td>"+item.flux+"</td>";
+	} else if (entity == "enzs") {
+		cells += "<td>"+item.id+"</td><td title='occurs in "+item.reactions.join (", ")+"'>"+item.reactions.length+"</td><td title='occurs in "+item.cplx.join (", ")+"'>"+item.cplx.length+"</td>";
+	} else {
+		cells += "<td>"+item.id+"</td><td title='occurs in "+item.reactions.join (", ")+"'>"+item.reactions.length+"</td>";
+	}
+	const row = $("<tr>"+cells+"</tr>").data ("id", item.id);
+	row.find ("input[type=checkbox]").change (function () {
+		const excluded = pagedTables.filter[pagedTables.tables[entity].filter];
+		const n = excluded.indexOf (item.id);
+		if (this.checked && n >= 0)
+			excluded.splice (n, 1);
+		if (!this.checked && n < 0)
+			excluded.push (item.id);
+		row.toggleClass ("filter-excluded", !this.checked);
+		updatePagedCounts ();
+		checkConsistency (pagedTables.filter.filter_species, pagedTables.filter.filter_reactions, pagedTables.filter.filter_enzymes, pagedTables.filter.filter_enzyme_complexes, markPagedInconsistencies);
+	});
+	const reasons = consistency.inconsistent[entity][item.id];
+	if (reasons)
+		row.addClass ("filter-inconsistent").attr ("title", inconsistencyInfo (entity, reasons));
+	if (item.excluded)
+		row.addClass ("filter-excluded");
+	return row;
+}
+
+/**
+ * 
+ * markPagedInconsistencies -- highlight inconsistent entities in the currently visible windows of the paged tables
+ * 
+ */
+function markPagedInconsistencies () {
+	for (var entity in pagedTables.tables) {
+		const e = entity;
+		$(pagedTables.tables[e].body + " tr").each (function () {
+			const reasons = consistency.inconsistent[e][$(this).data ("id")];
+			$(this).toggleClass ("filter-inconsistent", reasons !== undefined).attr ("title", reasons ? inconsistencyInfo (e, reasons) : "");
+		});
+	}
+}
+
+/**
+ * 
+ * updatePagedCounts -- update the overview of entities for the paged tables
+ * 
+ */
+function updatePagedCounts () {
+	for (var entity in pagedTables.tables) {
+		const table = pagedTables.tables[entity];
+		if (table.total === undefined)
+			continue;
+		$("#" + table.count + "_org").text (table.total);
+		$("#" + table.count + "_cur").text (table.total - pagedTables.filter[table.filter].length);
+	}
+	const f = pagedTables.filter;
+	$("#batch-filter").val ("species: " + f.filter_species.join (", ") + "\nreactions: " + f.filter_reactions.join (", ") + "\nenzymes: " + f.filter_enzymes.join (", ") + "\nenzyme_complexes: " + f.filter_enzyme_complexes.join (", "));
+}
+
+/**
+ * 
+ * loadTableWindow -- load the current window of a paged table from the server
+ * 
+ * @param entity the table, one of species, reactions, enzs, enzc
+ * 
+ */
+function loadTableWindow (entity) {
+	const table = pagedTables.tables[entity];
+	const params = $.param ({
+		entity: entity,
+		offset: table.offset,
+		limit: pagedTables.limit,
+		sort: table.sort,
+		order: table.descending ? "desc" : "asc",
+		search: table.controls.find (".table-search").val (),
+		match: table.controls.find (".table-match").val (),
+		state: table.controls.find (".table-state").val ()
+	});
+	$.getJSON ('/api/get_table?' + params, function (data) {
+		if (data.status != 'success') {
+			$("#error").show ().text ("Failed to retrieve the table: " + data.error);
+			return;
+		}
+		table.total = data.total;
+		if (data.fluxes) {
+			pagedTables.use_fluxes = true;
+			$("#flux_column").show ();
+		}
+		const body = $(table.body).empty ();
+		for (var i = 0; i < data.rows.length; i++)
+			body.append (renderTableRow (entity, data.rows[i]));
+		const last = Math.min (data.offset + data.rows.length, data.matches);
+		table.controls.find (".table-window").text ((data.matches > 0 ? data.offset + 1 : 0) + " - " + last + " of " + data.matches);
+		table.controls.find (".table-prev").prop ("disabled", data.offset == 0);
+		table.controls.find (".table-next").prop ("disabled", last >= data.matches);
+		updatePagedCounts ();
+	}).fail (function (jqXHR, textStatus, errorThrown) {
+		$("#error").show ().text ("Failed to retrieve the table: " + errorThrown);
+	});
+}
+
+/**
+ * 
+ * loadPagedTables -- set up the filter tables for networks that are too big for the browser
+ * 
+ * instead of sending the whole network, the server sorts and searches the tables
+ * and only the currently visible window of rows is loaded
+ * 
+ * @param filter the current filter
+ * @param message the reason why the network was not sent
+ * 
+ */
+function loadPagedTables (filter, message) {
+	pagedTables.filter = filter;
+	$("#loading").hide ();
+	$("#filtercontainer").show ();
+	$("#error").show ().text (message + " You can still browse and filter the network page by page.");
+	$("#toggle-species, #toggle-reactions, #toggle-gene, #toggle-gene-complex").hide ();
+	
+	for (var entity in pagedTables.tables) {
+		const e = entity;
+		const table = pagedTables.tables[e];
+		table.offset = 0;
+		table.sort = "id";
+		table.descending = false;
+		table.controls = $("<p class='paged-table'><input class='table-search w3-input w3-border' type='search' placeholder='search for id or name'> <select class='table-match'><option value='substring'>contains</option><option value='prefix'>starts with</option></select> <select class='table-state'><option value='all'>all</option><option value='included'>included</option><option value='excluded'>excluded</option></select> <button class='table-prev w3-button'><i class='fas fa-chevron-left'></i></button> <span class='table-window'></span> <button class='table-next w3-button'><i class='fas fa-chevron-right'></i></button></p>");
+		$(table.body).parents ("table").eq (0).before (table.controls);
+		
+		var searchTimeout;
+		table.controls.find (".table-search").on ("input", function () {
+			clearTimeout (searchTimeout);
+			searchTimeout = setTimeout (function () {
+				table.offset = 0;
+				loadTableWindow (e);
+			}, 300);
+		});
+		table.controls.find ("select").change (function () {
+			table.offset = 0;
+			loadTableWindow (e);
+		});
+		table.controls.find (".table-prev").click (function () {
+			table.offset = Math.max (0, table.offset - pagedTables.limit);
+			loadTableWindow (e);
+		});
+		table.controls.find (".table-next").click (function () {
+			table.offset += pagedTables.limit;
+			loadTableWindow (e);
+		});
+		// sorting is done by the server
+		$(table.body).parents ("table").eq (0).find ("th").click (function () {
+			const column = table.columns[$(this).index ()];
+			table.descending = table.sort == column && !table.descending;
+			table.sort = column;
+			table.offset = 0;
+			$(this).parent ().find ('.sortsymbol').remove ();
+			$(this).append (table.descending ? " <i class='fas fa-sort-down sortsymbol'></i>" : " <i class='fas fa-sort-up sortsymbol'></i>");
+			loadTableWindow (e);
+		});
+		loadTableWindow (e);
+	}
+	checkConsistency (filter.filter_species, filter.filter_reactions, filter.filter_enzymes, filter.filter_enzyme_complexes, markPagedInconsistencies);
+}
+
+/**
+ * 
+ * networkCache -- run a request on the IndexedDB store that caches networks
+ * 
+ * the cache is optional, so every failure (e.g. no IndexedDB in private browsing) resolves to undefined
+ * 
+ * @param mode the transaction mode, "readonly" or "readwrite"
+ * @param request function that gets the object store and returns an IDBRequest
+ * @return a Promise of the request's result
+ * 
+ */
+function networkCache (mode, request) {
+	return new Promise (function (resolve) {
+		try {
+			const open = indexedDB.open ("gemtractor", 1);
+			open.onupgradeneeded = function () {
+				open.result.createObjectStore ("networks");
+			};
+			open.onerror = function () {
+				resolve (undefined);
+			};
+			open.onsuccess = function () {
+				const db = open.result;
+				try {
+					const req = request (db.transaction ("networks", mode).objectStore ("networks"));
+					req.onsuccess = function () {
+						db.close ();
+						resolve (req.result);
+					};
+					req.onerror = function () {
+						db.close ();
+						resolve (undefined);
+					};
+				} catch (e) {
+					db.close ();
+					resolve (undefined);
+				}
+			};
+		} catch (e) {
+			resolve (undefined);
+		}
+	});
+}
+
 function loadNetwork () {
 	$("#error").hide ();
-	$.ajax({
-		url: '/api/get_network',
-		dataType: 'json',
-		success: function (data) {
+	const failed = function (error) {
+		$("#filtercontainer").hide ();
+		$("#loading").hide ();
+		$("#error").show ().text ("Failed to retrieve the network: " + error);
+	};
+	const url = '/api/get_network?format=bin';
+	// revalidate the locally cached network, the server will respond with 304 if it did not change
+	networkCache ("readonly", function (store) {
+			return store.get (url);
+		})
+		.then (function (cached) {
+			const headers = {};
+			if (cached)
+				headers["If-None-Match"] = cached.etag;
+			return fetch (url, {credentials: 'same-origin', headers: headers})
+				.then (function (response) {
+					if (response.status == 304 && cached)
+						return decodeBinaryNetwork (cached.buffer);
+					if (!response.ok)
+						throw response.statusText + " (" + response.status + ")";
+					// failures are reported as json
+					if (response.headers.get ("Content-Type").startsWith ("application/json"))
+						return response.json ();
+					return response.arrayBuffer ().then (function (buffer) {
+						const etag = response.headers.get ("ETag");
+						if (etag)
+							networkCache ("readwrite", function (store) {
+								return store.put ({etag: etag, buffer: buffer}, url);
+							});
+						return decodeBinaryNetwork (buffer);
+					});
+				});
+		})
+		.then (function (data) {
 			// got something, but was it successfull?
 			if (data.status != 'success') {
-				$("#filtercontainer").hide ();
-				$("#loading").hide ();
-				$("#error").show ().text ("Failed to retrieve the network: " + data.error);
+				if (data.too_big)
+					loadPagedTables (data.filter, data.error);
+				else
+					failed (data.error);
 				return;
 			}
 			
+			data.network = expandColumnarNetwork (data.network);
+			
 			// fill the table with original values
 			$("#s_org").text (Object.keys(data.network.species).length);
 			$("#r_org").text (Object.keys(data.network.reactions).length);
@@ -578,13 +969,8 @@ function loadNetwork () {
 			// fill the filter tables
 			fill_network_table (data.filter, data.fluxes, Object.keys(data.fluxes).length > 0);
 			updateNetwork ();
-		},
-		error: function (jqXHR, textStatus, errorThrown) {
-			$("#filtercontainer").hide ();
-			$("#loading").hide ();
-			$("#error").show ().text ("Failed to retrieve the network: " + errorThrown + " (" + textStatus + ")");
-		}
-	});
+		})
+		.catch (failed);
 	
 	$("#batch-button").click (function (){
 		filters = $("#batch-filter").val().split("\n");
@@ -691,6 +1077,11 @@ function prepareExport () {
 		} else {
 			$("#" + remove_reaction_enzymes_removed_id).prop ("disabled", false);
 		}
+		// the stoichiometric matrix is only available for the metabolite-reaction network
+		var mn = $("#" + network_type_id).val () == "mn";
+		$("#" + network_format_id + " option[value='smatrix']").prop ("disabled", !mn);
+		if (!mn && $("#" + network_format_id).val () == "smatrix")
+			$("#" + network_format_id).val ("sbml");
 	});
 	
 	// trigger the logic
@@ -0,0 +1,94 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+#
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import time
+
+from django.test import TestCase
+
+from modules.gemtractor.batch import Batch
+from modules.gemtractor.gemtractor import GEMtractor
+
+
+def count_reactions (gemtractor, job, file_path):
+  """
+  trim a model and write the number of remaining reactions
+  """
+  if job is None:
+    raise ValueError ("no job")
+  model = gemtractor.get_sbml (filter_reactions = job).getModel ()
+  with open (file_path, "w") as f:
+    f.write (str (model.getNumReactions ()))
+  return {"pid": os.getpid ()}
+
+
+def wait (gemtractor, job, file_path):
+  """
+  wait for some seconds
+  """
+  time.sleep (job)
+  return {"pid": os.getpid ()}
+
+
+class BatchTests (TestCase):
+  def test_clone (self):
+    gemtractor = GEMtractor ("test/gene-filter-example.xml")
+    reactions = gemtractor.sbml.getModel ().getNumReactions ()
+    clone = gemtractor.clone ()
+    self.assertEqual (clone.get_sbml (filter_reactions = ["r1"]).getModel ().getNumReactions (), reactions - 1)
+    self.assertEqual (gemtractor.sbml.getModel ().getNumReactions (), reactions)
+    self.assertEqual (len (gemtractor.clone ().extract_network_from_sbml ().reactions), reactions)
+    self.assertEqual (clone.get_sbml_file (), "test/gene-filter-example.xml")
+
+  def test_batch (self):
+    gemtractor = GEMtractor ("test/gene-filter-example.xml")
+    reactions = gemtractor.sbml.getModel ().getNumReactions ()
+    jobs = [["r1"], None, [], ["r1", "r2"]]
+    for processes in [1, 2]:
+      d = tempfile.TemporaryDirectory()
+      results = list (Batch (gemtractor, count_reactions, processes).run (jobs, d.name))
+      self.assertEqual ([result["status"] for result in results], [Batch.SUCCESS, Batch.FAILED, Batch.SUCCESS, Batch.SUCCESS])
+      self.assertIn ("no job", results[1]["error"])
+      self.assertFalse (os.path.exists (results[1]["path"]))
+      for result, removed in zip ([results[0], results[2], results[3]], [1, 0, 2]):
+        with open (result["path"]) as f:
+          self.assertEqual (int (f.read ()), reactions - removed)
+      if Batch.is_parallel (processes):
+        self.assertNotEqual (results[0]["pid"], os.getpid ())
+      else:
+        self.assertEqual (results[0]["pid"], os.getpid ())
+    # the model itself was not trimmed
+    self.assertEqual (gemtractor.sbml.getModel ().getNumReactions (), reactions)
+    self.assertFalse (Batch.is_parallel (None))
+    self.assertFalse (Batch.is_parallel (1))
+
+  def test_stop (self):
+    if not Batch.is_parallel (2):
+      return
+    gemtractor = GEMtractor ("test/gene-filter-example.xml")
+    d = tempfile.TemporaryDirectory()
+    results = Batch (gemtractor, wait, 2).run ([0, 60, 60, 60], d.name)
+    result = next (results)
+    self.assertEqual (result["status"], Batch.SUCCESS)
+    # stopping early does not wait for the running jobs
+    start = time.time ()
+    results.close ()
+    self.assertLess (time.time () - start, 30)
+    # and the workers are gone
+    time.sleep (1)
+    with self.assertRaises (ProcessLookupError):
+      os.kill (result["pid"], 0)
@@ -0,0 +1,62 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+#
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+
+from django.test import TestCase
+
+from modules.gemtractor.gemtractor import GEMtractor
+from modules.gemtractor.network.estimator import Estimator
+
+
+class EstimatorTests (TestCase):
+  def test_estimate (self):
+    gemtractor = GEMtractor ("test/gene-filter-example.xml")
+    gemtractor.get_sbml ()
+    network = gemtractor.extract_network_from_sbml ()
+
+    estimates = Estimator (network).estimate ()
+    self.assertEqual (sorted (estimates), ["en", "mn", "rn"])
+    self.assertTrue (estimates["mn"]["exact"])
+    self.assertFalse (estimates["rn"]["exact"])
+    self.assertFalse (estimates["en"]["exact"])
+    self.assertEqual (estimates["mn"]["nodes"], len (network.species) + len (network.reactions))
+    self.assertEqual (estimates["rn"]["nodes"], len (network.reactions))
+    self.assertIn ("smatrix", estimates["mn"]["bytes"])
+    self.assertNotIn ("smatrix", estimates["rn"]["bytes"])
+    # the mn sbml is as large as the trimmed model, which is unknown here
+    self.assertIsNone (estimates["mn"]["bytes"]["sbml"])
+    self.assertGreater (estimates["rn"]["bytes"]["csv"], 0)
+
+    # the estimates are upper bounds of the actual projections
+    network.calc_reaction_net ()
+    network.calc_genenet ()
+    exact = Estimator (network).estimate (["en", "rn"], ["csv"])
+    self.assertEqual (sorted (exact), ["en", "rn"])
+    self.assertEqual (list (exact["rn"]["bytes"]), ["csv"])
+    for network_type in ["en", "rn"]:
+      self.assertTrue (exact[network_type]["exact"])
+      self.assertGreater (exact[network_type]["edges"], 0)
+      self.assertGreaterEqual (estimates[network_type]["edges"], exact[network_type]["edges"])
+
+    # and the size of the csv export is about right
+    d = tempfile.TemporaryDirectory()
+    f = os.path.join (d.name, "export")
+    network.export_rn_csv (f)
+    size = os.path.getsize (f)
+    self.assertGreater (exact["rn"]["bytes"]["csv"], size / 2)
+    self.assertLess (exact["rn"]["bytes"]["csv"], size * 2)
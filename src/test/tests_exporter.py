@@ -0,0 +1,146 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+# 
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+
+import gzip
+import io
+import os
+import tempfile
+import zipfile
+
+from django.test import TestCase
+
+from modules.gemtractor.exporter import Exporter
+from modules.gemtractor.gemtractor import GEMtractor
+
+
+class ExporterTests (TestCase):
+  def test_export (self):
+    gemtractor = GEMtractor ("test/gene-filter-example.xml")
+    sbml = gemtractor.get_sbml ()
+    exporter = Exporter (gemtractor, sbml, gemtractor.extract_network_from_sbml (), "modelid", "modelname")
+    self.assertTrue (Exporter.is_valid_target ("en", "sbml"))
+    self.assertFalse (Exporter.is_valid_target ("en", "pdf"))
+    self.assertFalse (Exporter.is_valid_target ("xn", "sbml"))
+    self.assertTrue (Exporter.is_valid_target ("mn", "smatrix"))
+    self.assertFalse (Exporter.is_valid_target ("rn", "smatrix"))
+    self.assertEqual (Exporter.get_file_name ("model", "mn", "smatrix"), "model-MetabolicNetwork.smatrix.npz")
+    self.assertEqual (Exporter.get_file_name ("model", "rn", "graphml"), "model-ReactionNetwork.graphml")
+    
+    d = tempfile.TemporaryDirectory()
+    f = os.path.join (d.name, "export")
+    exporter.export ("rn", "csv", f)
+    with open (f) as export:
+      self.assertEqual (export.readline (), '"source","target"\n')
+    with self.assertRaises (ValueError):
+      exporter.export ("rn", "pdf", f)
+    with open (f, "rb") as export:
+      plain = export.read ()
+    
+    self.assertEqual (Exporter.get_file_name ("model", "rn", "csv", "gzip"), "model-ReactionNetwork.csv.gz")
+    exporter.export ("rn", "csv", f, "gzip")
+    with gzip.open (f) as export:
+      self.assertEqual (export.read (), plain)
+    exporter.export ("rn", "csv", f, "zip", "model.csv")
+    with zipfile.ZipFile (f) as archive:
+      self.assertEqual (archive.namelist (), ["model.csv"])
+      self.assertEqual (archive.read ("model.csv"), plain)
+    exporter.export ("mn", "sbml", f, "gzip")
+    with gzip.open (f) as export:
+      self.assertIn (b"<sbml", export.read ())
+    with self.assertRaises (ValueError):
+      exporter.export ("rn", "csv", f, "rar")
+    
+    exporter.export ("en", "npz", f)
+    with zipfile.ZipFile (f) as archive:
+      plain = {name: archive.read (name) for name in archive.namelist ()}
+    self.assertIn ("indptr.npy", plain)
+    exporter.export ("en", "npz", f, "gzip")
+    with gzip.open (f) as export:
+      with zipfile.ZipFile (io.BytesIO (export.read ())) as archive:
+        self.assertEqual ({name: archive.read (name) for name in archive.namelist ()}, plain)
+    exporter.export ("en", "npz", f, "zip", "model.npz")
+    with zipfile.ZipFile (f) as archive:
+      with zipfile.ZipFile (io.BytesIO (archive.read ("model.npz"))) as npz:
+        self.assertEqual ({name: npz.read (name) for name in npz.namelist ()}, plain)
+  
+  def test_checkpoint (self):
+    gemtractor = GEMtractor ("test/gene-filter-example.xml")
+    sbml = gemtractor.get_sbml ()
+    network = gemtractor.extract_network_from_sbml ()
+    exporter = Exporter (gemtractor, sbml, network, "modelid", "modelname")
+    calls = []
+    watched = Exporter (gemtractor, sbml, network, "modelid", "modelname", checkpoint = lambda: calls.append (1))
+    
+    d = tempfile.TemporaryDirectory()
+    plain = os.path.join (d.name, "plain")
+    f = os.path.join (d.name, "export")
+    interval = Exporter.CHECKPOINT_INTERVAL
+    try:
+      Exporter.CHECKPOINT_INTERVAL = 0
+      for network_type, network_format in [("en", "sbml"), ("rn", "csv"), ("en", "graphml"), ("mn", "sbml"), ("en", "npz"), ("mn", "smatrix")]:
+        for compression in [None, "gzip"]:
+          del calls[:]
+          exporter.export (network_type, network_format, plain, compression)
+          watched.export (network_type, network_format, f, compression)
+          with open (plain, "rb") as a, open (f, "rb") as b:
+            a = gzip.decompress (a.read ()) if compression else a.read ()
+            b = gzip.decompress (b.read ()) if compression else b.read ()
+          if network_format in Exporter.BINARY_FORMATS:
+            # archives written to streams have a different layout, but the same content
+            a = {name: zipfile.ZipFile (io.BytesIO (a)).read (name) for name in zipfile.ZipFile (io.BytesIO (a)).namelist ()}
+            b = {name: zipfile.ZipFile (io.BytesIO (b)).read (name) for name in zipfile.ZipFile (io.BytesIO (b)).namelist ()}
+          self.assertEqual (a, b, msg="different " + network_type + " " + network_format)
+          self.assertGreater (len (calls), 0, msg="no checkpoint " + network_type + " " + network_format)
+      
+      # the checkpoint may abort an export
+      def abort ():
+        raise ValueError ("aborted")
+      with self.assertRaises (ValueError):
+        Exporter (gemtractor, sbml, network, "modelid", checkpoint = abort).bundle ([("en", "csv"), ("rn", "dot")], f)
+    finally:
+      Exporter.CHECKPOINT_INTERVAL = interval
+  
+  def test_bundle (self):
+    gemtractor = GEMtractor ("test/gene-filter-example.xml")
+    sbml = gemtractor.get_sbml (filter_reactions = ["r3"])
+    network = gemtractor.extract_network_from_sbml ()
+    exporter = Exporter (gemtractor, sbml, network, "modelid", "modelname", {"filter_reactions": ["r3"]})
+    
+    d = tempfile.TemporaryDirectory()
+    f = os.path.join (d.name, "bundle.zip")
+    targets = [(t, f) for t in ["en", "rn", "mn"] for f in ["sbml", "graphml", "csv"]]
+    names = exporter.bundle (targets + [("en", "sbml")], f, prefix = "model", threads = 3)
+    self.assertEqual (len (names), 9)
+    self.assertTrue (network.have_reaction_net)
+    self.assertTrue (network.have_gene_net)
+    
+    with zipfile.ZipFile (f) as archive:
+      self.assertEqual (sorted (archive.namelist ()), sorted (names))
+      self.assertIn ("model-EnzymeNetwork.sbml", names)
+      self.assertIn ("model-MetabolicNetwork.csv", names)
+      # the projections are the same as in single exports
+      single = os.path.join (d.name, "single")
+      for network_type, network_format in targets:
+        if network_format == "sbml":
+          continue
+        exporter.export (network_type, network_format, single)
+        with open (single, "rb") as export:
+          self.assertEqual (archive.read (Exporter.get_file_name ("model", network_type, network_format)), export.read ())
+      self.assertIn (b"<sbml", archive.read ("model-ReactionNetwork.sbml"))
+    
+    with self.assertRaises (ValueError):
+      exporter.bundle ([("en", "sbml"), ("en", "pdf")], f)
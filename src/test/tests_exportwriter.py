@@ -0,0 +1,200 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+# 
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+
+import csv
+import io
+import os
+import tempfile
+from xml.dom import minidom
+
+from django.test import TestCase
+from libsbml import LIBSBML_CAT_UNITS_CONSISTENCY, LIBSBML_SEV_ERROR, SBMLReader
+
+from modules.gemtractor.gemtractor import GEMtractor
+from modules.gemtractor.network.exportwriter import ExportWriter
+from modules.gemtractor.network.gene import Gene
+from modules.gemtractor.network.network import Network
+
+
+class ExportWriterTests (TestCase):
+  def test_writer (self):
+    d = tempfile.TemporaryDirectory()
+    f = os.path.join (d.name, "export")
+    with ExportWriter (f, chunk_size = 10) as writer:
+      writer.write (ExportWriter.DOT_PREFIX)
+      writer.write_edges_from (ExportWriter.DOT_EDGE, "a", ["b", "c"])
+      writer.write_edges_to (ExportWriter.DOT_EDGE, ["b", "c"], "a")
+      writer.write_edges_from (ExportWriter.DOT_EDGE, "a", [])
+      writer.write (ExportWriter.DOT_SUFFIX)
+    with open (f) as export:
+      self.assertEqual (export.read (), "digraph GEMtractor {\n\ta -> b;\n\ta -> c;\n\tb -> a;\n\tc -> a;\n}\n")
+    
+    with ExportWriter (f) as writer:
+      num = writer.write_numbered_edges_from (ExportWriter.GRAPHML_EDGE, 1, "a", ["b", "c"])
+      self.assertEqual (num, 3)
+      num = writer.write_numbered_edges_to (ExportWriter.GRAPHML_EDGE, num, ["b"], "a")
+      self.assertEqual (num, 4)
+      num = writer.write_numbered_edges_to (ExportWriter.GRAPHML_EDGE, num, [], "a")
+      self.assertEqual (num, 4)
+    with open (f) as export:
+      self.assertEqual (export.read (), '\t\t<edge id="e1" source="a" target="b"/>\n\t\t<edge id="e2" source="a" target="c"/>\n\t\t<edge id="e3" source="b" target="a"/>\n')
+    
+    # nothing is written if the export fails
+    with self.assertRaises (KeyError):
+      with ExportWriter (f) as writer:
+        writer.write ("something")
+        raise KeyError ("broken")
+    with open (f) as export:
+      self.assertEqual (export.read (), "")
+  
+  def test_iterate (self):
+    net = Network ()
+    net.add_species ("s1", "species 1")
+    net.add_species ("s2", "species 2")
+    for n in range (100):
+      r = net.add_reaction ("r" + str (n), "reaction " + str (n))
+      r.add_input (net.species["s1"])
+      r.add_output (net.species["s2"])
+    
+    # writing to a stream
+    stream = io.StringIO ()
+    net.export_mn_dot (stream)
+    self.assertFalse (stream.closed)
+    self.assertTrue (stream.getvalue ().startswith (ExportWriter.DOT_PREFIX))
+    
+    # iterating gives the same export
+    self.assertEqual ("".join (ExportWriter.iterate (net.export_mn_dot)), stream.getvalue ())
+    
+    # small chunks, but at most one in the queue
+    def export (s):
+      with ExportWriter (s, chunk_size = 1) as writer:
+        for n in range (100):
+          writer.write ("line " + str (n) + "\n")
+    chunks = list (ExportWriter.iterate (export, queue_size = 1))
+    self.assertEqual (len (chunks), 100)
+    
+    # stopping early cancels the export
+    chunks = ExportWriter.iterate (export, queue_size = 1)
+    self.assertEqual (next (chunks), "line 0\n")
+    chunks.close ()
+    
+    # errors are passed on
+    def broken (s):
+      s.write ("something")
+      raise KeyError ("broken")
+    with self.assertRaises (KeyError):
+      list (ExportWriter.iterate (broken))
+  
+  def __read_valid_sbml (self, xml):
+    sbml = SBMLReader ().readSBMLFromString (xml)
+    sbml.setConsistencyChecks (LIBSBML_CAT_UNITS_CONSISTENCY, False)
+    sbml.checkConsistency ()
+    errors = [sbml.getError (n).getMessage () for n in range (sbml.getNumErrors ()) if sbml.getError (n).getSeverity () >= LIBSBML_SEV_ERROR]
+    self.assertEqual (errors, [])
+    return sbml.getModel ()
+  
+  def test_sbml (self):
+    gemtractor = GEMtractor ("test/gene-filter-example.xml")
+    gemtractor.get_sbml (filter_reactions = ["r3"])
+    net = gemtractor.extract_network_from_sbml ()
+    net.calc_genenet ()
+    
+    stream = io.StringIO ()
+    self.assertTrue (net.export_en_sbml (stream, gemtractor, "modelid", "some <model>", filter_reactions = ["r3"], filter_gene_complexes = ["a + b"]))
+    model = self.__read_valid_sbml (stream.getvalue ())
+    self.assertEqual (model.getId (), "modelid_GEMtracted_EnzymeNetwork")
+    self.assertEqual (model.getName (), "GEMtracted EnzymeNetwork of some <model>")
+    self.assertIn ("<li>r3</li>", model.getNotesString ())
+    self.assertIn ("<li>a + b</li>", model.getNotesString ())
+    self.assertEqual (model.getNumSpecies (), len (net.genes) + len (net.gene_complexes))
+    self.assertEqual (model.getNumReactions (), sum (len (g.links["g"]) + len (g.links["gc"]) for nodes in (net.genes, net.gene_complexes) for g in nodes.values ()))
+    species = {model.getSpecies (n).getName (): model.getSpecies (n) for n in range (model.getNumSpecies ())}
+    # the annotations of the gene products are transferred
+    self.assertIn ("http://identifiers.org/uniprot/P0A9Q7", species["x"].getAnnotationString ())
+    self.assertIn ('rdf:about="#' + species["x"].getMetaId () + '"', species["x"].getAnnotationString ())
+    for name, s in species.items ():
+      if " + " in name:
+        self.assertEqual (len (net.gene_complexes[name].genes), s.getAnnotationString ().count ("<rdf:li rdf:resource="))
+    for n in range (model.getNumReactions ()):
+      r = model.getReaction (n)
+      self.assertEqual ((r.getNumReactants (), r.getNumProducts ()), (1, 1))
+    
+    # the species of a reaction network are named after the reactions, the reactions must not clash with them
+    d = tempfile.TemporaryDirectory()
+    f = os.path.join (d.name, "export.sbml")
+    self.assertTrue (net.export_rn_sbml (f, gemtractor, "modelid"))
+    with open (f) as export:
+      model = self.__read_valid_sbml (export.read ())
+    self.assertEqual (model.getNumSpecies (), len (net.reactions))
+    self.assertEqual (model.getNumReactions (), sum (len (r.links) for r in net.reactions.values ()))
+    self.assertIsNotNone (model.getSpecies ("r1"))
+    self.assertTrue (model.getReaction (0).getId ().startswith ("_r"))
+    
+    # empty networks are valid as well
+    stream = io.StringIO ()
+    Network ().export_rn_sbml (stream, gemtractor, "modelid")
+    model = self.__read_valid_sbml (stream.getvalue ())
+    self.assertEqual ((model.getNumSpecies (), model.getNumReactions ()), (0, 0))
+    
+    # model ids are turned into valid identifiers
+    for export in [net.export_en_sbml, net.export_rn_sbml]:
+      stream = io.StringIO ()
+      export (stream, gemtractor, "3f2a-9c")
+      model = self.__read_valid_sbml (stream.getvalue ())
+      self.assertTrue (model.getId ().startswith ("_3f2a_9c_GEMtracted_"))
+      self.assertEqual (model.getName ().split (" of ")[1], "3f2a-9c")
+  
+  def test_escape (self):
+    self.assertEqual (ExportWriter.escape_dot ('a "b" \\c'), 'a \\"b\\" \\\\c')
+    self.assertEqual (ExportWriter.escape_gml ('a & "b"'), 'a &amp; &quot;b&quot;')
+    self.assertEqual (ExportWriter.escape_xml ('<a> & "b"'), '&lt;a&gt; &amp; &quot;b&quot;')
+    self.assertEqual (ExportWriter.escape_csv ('a "b"'), 'a ""b""')
+    self.assertEqual (ExportWriter.escape_xml ("plain"), "plain")
+    self.assertEqual (ExportWriter.to_sid ("model_1"), "model_1")
+    self.assertEqual (ExportWriter.to_sid ("1 model-ä"), "_1_model__")
+    self.assertEqual (ExportWriter.to_sid (""), "")
+  
+  def test_export_special_characters (self):
+    net = Network ()
+    net.add_species ("s1", "species 1")
+    net.add_species ("s2", "species 2")
+    r = net.add_reaction ("r1", "<reaction> & \"friends\"")
+    r.add_input (net.species["s1"])
+    r.add_output (net.species["s2"])
+    net.add_genes (r, [Gene ("a \"b\"")])
+    r = net.add_reaction ("r2", "reaction 2")
+    r.add_input (net.species["s2"])
+    r.add_output (net.species["s1"])
+    net.add_genes (r, [Gene ("c")])
+    
+    d = tempfile.TemporaryDirectory()
+    f = os.path.join (d.name, "export")
+    
+    net.export_rn_graphml (f)
+    labels = [l.firstChild.nodeValue for l in minidom.parse (f).getElementsByTagName ("y:NodeLabel")]
+    self.assertIn ("<reaction> & \"friends\"", labels)
+    
+    net.export_en_csv (f)
+    with open (f) as export:
+      rows = list (csv.reader (export))
+    self.assertEqual (rows[0], ["source", "target"])
+    self.assertIn (["a \"b\"", "c"], rows)
+    self.assertIn (["c", "a \"b\""], rows)
+    
+    net.export_rn_dot (f)
+    with open (f) as export:
+      self.assertIn ('[label="<reaction> & \\"friends\\""]', export.read ())
@@ -0,0 +1,104 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+# 
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+
+import math
+import os
+import tempfile
+
+from django.test import TestCase
+
+from modules.gemtractor.exceptions import InvalidFluxTable
+from modules.gemtractor.fluxtable import FluxTable
+
+
+class FluxTableTests (TestCase):
+  def test_parse_csv (self):
+    # both orders of id and flux are supported
+    t = FluxTable.parse_csv (["r1,1.5", "-2,r2", "", "r3,nope"])
+    self.assertEqual (t.reactions, ["r1", "r2", "r3"])
+    self.assertEqual (t.columns, ["flux"])
+    self.assertEqual (t.as_dict (), {"r1": 1.5, "r2": -2})
+    
+    # fva results with a header
+    t = FluxTable.parse_csv (["reaction,min,max", "r1,-1,1", "r2,0"])
+    self.assertEqual (t.columns, ["min", "max"])
+    self.assertEqual (t.get_column (), 0)
+    self.assertEqual (t.as_dict ("max"), {"r1": 1})
+    self.assertEqual (t.as_dict ("min"), {"r1": -1, "r2": 0})
+    with self.assertRaises (KeyError):
+      t.as_dict ("flux")
+    
+    # the header cell above the ids is skipped, and the flux column is the default
+    t = FluxTable.parse_csv (["wildtype,flux,id", "1,2,r1"])
+    self.assertEqual (t.columns, ["wildtype", "flux"])
+    self.assertEqual (t.as_dict (), {"r1": 2})
+    
+    # unnamed scenarios
+    t = FluxTable.parse_csv (["r1,1,2,3"])
+    self.assertEqual (t.columns, ["flux_1", "flux_2", "flux_3"])
+    
+    with self.assertRaises (InvalidFluxTable):
+      FluxTable.parse_csv (["reaction,flux", "1,2"])
+    with self.assertRaises (InvalidFluxTable):
+      FluxTable.parse_csv ([])
+  
+  def test_save_load (self):
+    d = tempfile.TemporaryDirectory()
+    f = os.path.join (d.name, "fluxes")
+    self.assertIsNone (FluxTable.load (f))
+    
+    # legacy csv files
+    with open (f, "w") as csv:
+      csv.write ("r1,1.5\n2,r2\n")
+    t = FluxTable.load (f)
+    self.assertEqual (t.as_dict (), {"r1": 1.5, "r2": 2})
+    
+    t = FluxTable.parse_csv (["reaction,min,max", "r1,-1,1", "r2,0", "r3,3,4"])
+    t.save (f)
+    with open (f, "rb") as binary:
+      self.assertTrue (binary.read ().startswith (FluxTable.MAGIC))
+    loaded = FluxTable.load (f)
+    self.assertEqual (loaded.reactions, t.reactions)
+    self.assertEqual (loaded.columns, t.columns)
+    self.assertEqual (loaded.as_dict ("min"), t.as_dict ("min"))
+    self.assertEqual (loaded.as_dict ("max"), t.as_dict ("max"))
+    
+    with open (f, "wb") as broken:
+      broken.write (FluxTable.MAGIC + b"{}\n")
+    self.assertIsNone (FluxTable.load (f))
+  
+  def test_align (self):
+    t = FluxTable.parse_csv (["reaction,min,max", "r1,-1,1", "r2,0", "unknown,3,4"])
+    aligned, unmatched = t.align (["r2", "r1", "r3"], "max")
+    self.assertTrue (math.isnan (aligned[0]))
+    self.assertEqual (aligned[1], 1)
+    self.assertTrue (math.isnan (aligned[2]))
+    self.assertEqual (unmatched, ["unknown"])
+    aligned, unmatched = t.align (["r2", "r1", "r3"])
+    self.assertEqual (list (aligned[:2]), [0, -1])
+  
+  def test_inactive (self):
+    t = FluxTable.parse_csv (["reaction,min,max", "r1,-1,1e-12", "r2,0", "r3,1e-10,-0.5", "r4"])
+    self.assertEqual (t.inactive (), ["r2", "r3"])
+    self.assertEqual (t.inactive (column = "max"), ["r1"])
+    self.assertEqual (t.inactive (epsilon = 0), ["r2"])
+    self.assertEqual (t.inactive (epsilon = 1), ["r1", "r2", "r3"])
+    
+    t = FluxTable.from_dict ({"r1": 0, "r2": "-2", "r3": "unknown", "r4": None})
+    self.assertEqual (t.columns, ["flux"])
+    self.assertEqual (t.as_dict (), {"r1": 0, "r2": -2})
+    self.assertEqual (t.inactive (), ["r1"])
@@ -452,3 +452,36 @@ class GEMtractorTests (TestCase):
       f = "test/gene-filter-example-3.xml"
       gemtractor = GEMtractor (f)
       self.assertEqual ("((a) or (x) or (b and c) or (sdkflj alskd2345 34lk5 w34knflk324))", gemtractor._implode_genes (genes))
+      
+      
+  def test_reversibility_from_bounds (self):
+      f = "test/fbc-bounds-example.xml"
+      self.assertTrue (os.path.isfile(f), msg="cannot find test file")
+      
+      gemtractor = GEMtractor (f)
+      net = gemtractor.extract_network_from_sbml ()
+      self.assertTrue (net.reactions["r1"].reversible)
+      self.assertTrue (net.reactions["r2"].reversible)
+      self.assertTrue (net.reactions["r3"].reversible)
+      self.assertFalse (net.reactions["r4"].reversible)
+      net.calc_reaction_net ()
+      links = sum (len (r.links) for r in net.reactions.values ())
+      
+      net = gemtractor.extract_network_from_sbml (reversibility_from_bounds = True)
+      # r1 cannot run backwards
+      self.assertFalse (net.reactions["r1"].reversible)
+      self.assertEqual (net.reactions["r1"].consumed, ["a"])
+      self.assertEqual (net.reactions["r1"].produced, ["b"])
+      # r2 cannot run forwards
+      self.assertFalse (net.reactions["r2"].reversible)
+      self.assertEqual (net.reactions["r2"].consumed, ["b"])
+      self.assertEqual (net.reactions["r2"].produced, ["c"])
+      # r3 can run in both directions
+      self.assertTrue (net.reactions["r3"].reversible)
+      self.assertEqual (net.reactions["r3"].consumed, ["c"])
+      # r4 is irreversible anyway
+      self.assertFalse (net.reactions["r4"].reversible)
+      self.assertEqual (net.reactions["r4"].consumed, ["d"])
+      
+      net.calc_reaction_net ()
+      self.assertLess (sum (len (r.links) for r in net.reactions.values ()), links)
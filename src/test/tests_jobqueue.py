@@ -0,0 +1,157 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+#
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.test import TestCase
+
+from modules.gemtractor.exceptions import JobQueueFull
+from modules.gemtractor.exporter import Exporter
+from modules.gemtractor.gemtractor import GEMtractor
+from modules.gemtractor.jobqueue import JobQueue
+
+
+def wait (queue, job_id, timeout = 10):
+  """
+  wait for a job to finish
+  """
+  start = time.time ()
+  while time.time () - start < timeout:
+    state = queue.get_state (job_id)
+    if state["status"] in JobQueue.FINAL_STATES:
+      return state
+    time.sleep (0.01)
+  raise AssertionError ("job " + job_id + " did not finish")
+
+
+class JobQueueTests (TestCase):
+  def test_jobs (self):
+    d = tempfile.TemporaryDirectory()
+    queue = JobQueue (os.path.join (d.name, "jobs"), 1, 1)
+
+    def job (job_dir, progress):
+      progress ("copying", 0.5)
+      with open (os.path.join (job_dir, "input")) as f, open (os.path.join (job_dir, JobQueue.RESULT_FILE), "w") as r:
+        r.write (f.read ().upper ())
+      return {"file_name": "result.txt"}
+
+    state = queue.submit (job, {"input": "some input"})
+    self.assertTrue (JobQueue.is_valid_id (state["id"]))
+    self.assertEqual (state["status"], JobQueue.QUEUED)
+    state = wait (queue, state["id"])
+    self.assertEqual (state["status"], JobQueue.DONE)
+    self.assertEqual (state["progress"], 1)
+    self.assertEqual (state["file_name"], "result.txt")
+    with open (queue.get_result_path (state["id"])) as f:
+      self.assertEqual (f.read (), "SOME INPUT")
+
+    # failing jobs
+    def fail (job_dir, progress):
+      with open (os.path.join (job_dir, JobQueue.RESULT_FILE), "w") as r:
+        r.write ("partial")
+      raise ValueError ("broken model")
+    failed = wait (queue, queue.submit (fail)["id"])
+    self.assertEqual (failed["status"], JobQueue.FAILED)
+    self.assertIn ("broken model", failed["error"])
+    self.assertFalse (os.path.exists (queue.get_result_path (failed["id"])))
+
+    # inputs that cannot be stored do not leave a job behind
+    jobs = os.listdir (queue.directory)
+    with self.assertRaises (TypeError):
+      queue.submit (job, {"input": 1})
+    self.assertEqual (os.listdir (queue.directory), jobs)
+
+    # unknown jobs
+    self.assertIsNone (queue.get_state ("0" * 32))
+    self.assertIsNone (queue.get_state ("../../etc"))
+    self.assertIsNone (queue.cancel ("0" * 32))
+
+    # cancel a running and a queued job, while the queue is full
+    started = threading.Event ()
+    proceed = threading.Event ()
+    def block (job_dir, progress):
+      started.set ()
+      proceed.wait (10)
+      progress ("writing", 0.5)
+    running = queue.submit (block)
+    self.assertTrue (started.wait (10))
+    queued = queue.submit (job, {"input": "x"})
+    with self.assertRaises (JobQueueFull):
+      queue.submit (job, {"input": "x"})
+    self.assertEqual (queue.cancel (queued["id"])["status"], JobQueue.CANCELLED)
+    self.assertEqual (queue.cancel (running["id"])["status"], JobQueue.CANCELLED)
+    proceed.set ()
+    self.assertEqual (wait (queue, running["id"])["status"], JobQueue.CANCELLED)
+    self.assertEqual (wait (queue, queued["id"])["status"], JobQueue.CANCELLED)
+    # the worker notices the cancellation when it reports its progress
+    start = time.time ()
+    while queue.get_pending () > 0 and time.time () - start < 10:
+      time.sleep (0.01)
+    self.assertEqual (queue.get_pending (), 0)
+
+    # finished jobs are deleted
+    self.assertIsNone (queue.cancel (state["id"]))
+    self.assertIsNone (queue.get_state (state["id"]))
+
+    # old jobs are removed
+    JobQueue.cleanup (queue.directory, 60)
+    self.assertEqual (len (os.listdir (queue.directory)), 3)
+    state_file = os.path.join (queue.get_job_dir (failed["id"]), JobQueue.STATE_FILE)
+    with open (state_file) as f:
+      old = json.load (f)
+    old["updated"] -= 120
+    with open (state_file, "w") as f:
+      json.dump (old, f)
+    JobQueue.cleanup (queue.directory, 60)
+    self.assertEqual (sorted (os.listdir (queue.directory)), sorted ([running["id"], queued["id"]]))
+    JobQueue.cleanup (os.path.join (d.name, "does-not-exist"), 60)
+
+  def test_cancel_export (self):
+    d = tempfile.TemporaryDirectory()
+    queue = JobQueue (os.path.join (d.name, "jobs"), 1, 1)
+    # another process of the instance, which shares the job table
+    other = JobQueue (queue.directory, 1, 1)
+    gemtractor = GEMtractor ("test/gene-filter-example.xml")
+    sbml = gemtractor.get_sbml ()
+    network = gemtractor.extract_network_from_sbml ()
+    exported = []
+
+    def job (job_dir, progress):
+      progress ("exporting", 0.5)
+      def checkpoint ():
+        if not exported:
+          # the job is cancelled by the other process while it is exporting
+          exported.append (other.cancel (os.path.basename (job_dir)))
+        progress ("exporting", 0.5)
+      Exporter (gemtractor, sbml, network, "modelid", checkpoint = checkpoint).export ("rn", "csv", os.path.join (job_dir, JobQueue.RESULT_FILE))
+      exported.append ("finished")
+
+    interval = Exporter.CHECKPOINT_INTERVAL
+    try:
+      Exporter.CHECKPOINT_INTERVAL = 0
+      state = wait (queue, queue.submit (job)["id"])
+    finally:
+      Exporter.CHECKPOINT_INTERVAL = interval
+    self.assertEqual (state["status"], JobQueue.CANCELLED)
+    self.assertEqual (exported[0]["status"], JobQueue.CANCELLED)
+    self.assertEqual (len (exported), 1)
+    self.assertFalse (os.path.exists (queue.get_result_path (state["id"])))
+    # the cancellation is final, even if the job reports its progress afterwards
+    self.assertEqual (other.get_state (state["id"])["status"], JobQueue.CANCELLED)
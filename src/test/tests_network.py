@@ -15,8 +15,15 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 
+import json
+import math
+import struct
+from array import array
+
 from django.test import TestCase
 
+from modules.gemtractor.network.consistency import Consistency
+from modules.gemtractor.network.entitytable import EntityTable
 from modules.gemtractor.network.gene import Gene
 from modules.gemtractor.network.genecomplex import GeneComplex
 from modules.gemtractor.network.network import Network
@@ -208,3 +215,270 @@ class NetworkTests (TestCase):
     
     self.assertEqual (len (s1.occurence), 2)
     self.assertEqual (len (s2.occurence), 1)
+    
+  def test_diff (self):
+    net = Network ()
+    net.add_species ("s1", "species 1")
+    net.add_species ("s2", "species 2")
+    r = net.add_reaction ("r1", "reaction 1")
+    r.add_input (net.species["s1"])
+    r.add_output (net.species["s2"])
+    r = net.add_reaction ("r2", "reaction 2")
+    r.add_input (net.species["s2"])
+    r.add_output (net.species["s1"])
+    
+    d = self._diff (net, net)
+    for entity in ["species", "reactions", "enzs", "enzc"]:
+      for change in ["added", "removed", "changed"]:
+        self.assertEqual (len (d[entity][change]), 0, msg="network differs from itself: " + entity + " " + change)
+    for projection in ["rn", "en"]:
+      for change in ["added", "removed"]:
+        self.assertEqual (len (d[projection][change]), 0, msg="network differs from itself: " + projection + " " + change)
+    
+    other = Network ()
+    other.add_species ("s1", "species 1")
+    other.add_species ("s3", "species 3")
+    r = other.add_reaction ("r1", "reaction 1")
+    r.add_input (other.species["s1"])
+    r.add_output (other.species["s3"])
+    
+    d = self._diff (net, other)
+    self.assertEqual (d["species"]["added"], ["s3"])
+    self.assertEqual (d["species"]["removed"], ["s2"])
+    self.assertEqual (d["species"]["changed"], ["s1"])
+    self.assertEqual (d["reactions"]["added"], [])
+    self.assertEqual (d["reactions"]["removed"], ["r2"])
+    self.assertEqual (d["reactions"]["changed"], ["r1"])
+    self.assertEqual (d["rn"]["added"], [])
+    self.assertTrue (("r1", "r2") in d["rn"]["removed"])
+    self.assertTrue (("r2", "r1") in d["rn"]["removed"])
+    
+    d = self._diff (net, other, projections = False)
+    self.assertFalse ("rn" in d)
+    self.assertFalse ("en" in d)
+    
+  def _diff (self, net, other, projections = True):
+    """
+    collect the lazy differences of two networks
+    """
+    return {section: {change: list (items) for change, items in changes.items ()} for section, changes in net.diff (other, projections = projections)}
+  
+  def test_columnar_serialisation (self):
+    net = Network ()
+    net.add_species ("s1", "species 1")
+    net.add_species ("s2", "species 2")
+    r = net.add_reaction ("r1", "reaction 1")
+    r.add_input (net.species["s1"])
+    r.add_output (net.species["s2"])
+    r = net.add_reaction ("r2", "reaction 2")
+    r.reversible = False
+    r.add_input (net.species["s2"])
+    r.add_output (net.species["s1"])
+    r.add_output (net.species["s2"])
+    
+    ns = net.serialize ()
+    nc = net.serialize_columnar ()
+    self.assertEqual (len (nc), 4, msg="expected 4 items in columnar network")
+    self.assertEqual (nc["species"]["id"], ["s1", "s2"])
+    self.assertEqual (nc["species"]["name"], ["species 1", "species 2"])
+    self.assertEqual (nc["reactions"]["rev"], [True, False])
+    self.assertEqual (nc["reactions"]["prod"]["off"], [0, 1, 3])
+    
+    for entity, columns in [("species", ["occ"]), ("reactions", ["cons", "prod", "enzs", "enzc"]), ("enzs", ["reactions", "cplx"]), ("enzc", ["enzs", "reactions"])]:
+      self.assertEqual (len (nc[entity]["id"]), len (ns[entity]))
+      for n, item in enumerate (ns[entity]):
+        self.assertEqual (nc[entity]["id"][n], item["id"])
+        for column in columns:
+          csr = nc[entity][column]
+          self.assertEqual (len (csr["off"]), len (ns[entity]) + 1)
+          self.assertEqual (csr["idx"][csr["off"][n]:csr["off"][n + 1]], item[column], msg="unexpected " + column + " of " + entity + " " + item["id"])
+    
+  def test_binary_serialisation (self):
+    net = Network ()
+    net.add_species ("s1", "species 1")
+    net.add_species ("s2", "späcies 2")
+    r = net.add_reaction ("r1", "reaction 1")
+    r.add_input (net.species["s1"])
+    r.add_output (net.species["s2"])
+    r = net.add_reaction ("r2", "reaction 2")
+    r.reversible = False
+    r.add_input (net.species["s2"])
+    r.add_output (net.species["s1"])
+    r.add_output (net.species["s2"])
+    
+    b = b"".join (net.iter_serialize_binary ({"r2": "-1.5", "r3": "2"}, {"some": "thing"}))
+    self.assertEqual (b[:4], b"GEMN")
+    version, ns, nr, ng, nc, nstrings, nbytes = struct.unpack_from ("<7I", b, 4)
+    self.assertEqual (version, Network.BINARY_VERSION)
+    self.assertEqual ((ns, nr, ng, nc, nstrings), (2, 2, 0, 0, 8))
+    
+    pos = 32
+    offsets = struct.unpack_from ("<" + str (nstrings + 1) + "I", b, pos)
+    pos += 4 * (nstrings + 1)
+    strings = [b[pos + offsets[i]:pos + offsets[i + 1]].decode ("utf-8") for i in range (nstrings)]
+    self.assertEqual (strings, ["s1", "s2", "species 1", "späcies 2", "r1", "r2", "reaction 1", "reaction 2"])
+    pos += nbytes
+    pos += -pos % 4
+    self.assertEqual (list (b[pos:pos + nr]), [1, 0])
+    pos += nr
+    pos += -pos % 4
+    
+    columns = net.serialize_columnar ()
+    for entity, relation, n in [("species", "occ", ns), ("reactions", "cons", nr), ("reactions", "prod", nr), ("reactions", "enzs", nr), ("reactions", "enzc", nr), ("enzs", "reactions", ng), ("enzs", "cplx", ng), ("enzc", "enzs", 0), ("enzc", "reactions", 0)]:
+      off = list (struct.unpack_from ("<" + str (n + 1) + "I", b, pos))
+      pos += 4 * (n + 1)
+      idx = list (struct.unpack_from ("<" + str (off[-1]) + "I", b, pos))
+      pos += 4 * off[-1]
+      self.assertEqual (off, columns[entity][relation]["off"], msg="unexpected offsets of " + entity + " " + relation)
+      self.assertEqual (idx, columns[entity][relation]["idx"], msg="unexpected links of " + entity + " " + relation)
+    
+    pos += -pos % 8
+    fluxes = struct.unpack_from ("<2d", b, pos)
+    self.assertTrue (math.isnan (fluxes[0]))
+    self.assertEqual (fluxes[1], -1.5)
+    pos += 16
+    length, = struct.unpack_from ("<I", b, pos)
+    self.assertEqual (json.loads (b[pos + 4:pos + 4 + length].decode ("utf-8")), {"some": "thing"})
+    self.assertEqual (len (b), pos + 4 + length)
+    
+  def test_entity_table (self):
+    net = Network ()
+    for n in range (30):
+      net.add_species ("s" + str (n), "species " + str (30 - n))
+    for n in range (29):
+      r = net.add_reaction ("r" + str (n), "Reaction " + str (n))
+      r.add_input (net.species["s" + str (n)])
+      r.add_output (net.species["s" + str (n + 1)])
+      if n % 2 == 0:
+        r.add_input (net.species["s0"])
+    
+    table = EntityTable (net)
+    total, matches, rows = table.window ("species", 0, 5)
+    self.assertEqual (total, 30)
+    self.assertEqual (matches, 30)
+    self.assertEqual ([row["id"] for row in rows], ["s0", "s1", "s10", "s11", "s12"])
+    
+    total, matches, rows = table.window ("species", 0, 2, sort = "occ", descending = True)
+    self.assertEqual (rows[0]["id"], "s0")
+    self.assertEqual (len (rows[0]["occ"]), 16)
+    
+    # substring searches use the trigrams, short queries are scanned
+    self.assertEqual (table.search ("species", "ies 2"), set (range (1, 11)) | {28})
+    self.assertEqual (table.search ("species", "S2"), {2, 20, 21, 22, 23, 24, 25, 26, 27, 28, 29})
+    self.assertEqual (table.search ("species", "nothing"), set ())
+    self.assertEqual (table.search ("reactions", "reaction 2", True), {2, 20, 21, 22, 23, 24, 25, 26, 27, 28})
+    self.assertEqual (table.search ("reactions", "r2", True), {2, 20, 21, 22, 23, 24, 25, 26, 27, 28})
+    self.assertEqual (table.search ("reactions", "2", True), set ())
+    
+    total, matches, rows = table.window ("reactions", 2, 3, query = "reaction 1", excluded = {"r12", "r13"}, fluxes = {"r12": "1.5"})
+    self.assertEqual (matches, 11)
+    self.assertEqual ([row["id"] for row in rows], ["r11", "r12", "r13"])
+    self.assertEqual ([row["excluded"] for row in rows], [False, True, True])
+    self.assertEqual ([row["flux"] for row in rows], [None, "1.5", None])
+    self.assertEqual (rows[1]["cons"], ["s12", "s0"])
+    
+    total, matches, rows = table.window ("reactions", 0, 5, sort = "include", state = "excluded", excluded = {"r12", "r13", "unknown"})
+    self.assertEqual ([row["id"] for row in rows], ["r12", "r13"])
+    total, matches, rows = table.window ("reactions", 0, 2, sort = "flux", fluxes = {"r5": "-1", "r7": "2", "r8": "NaN"})
+    self.assertEqual ([row["id"] for row in rows], ["r5", "r7"])
+    
+    with self.assertRaises (ValueError):
+      table.window ("species", sort = "flux")
+    with self.assertRaises (ValueError):
+      table.window ("nothing")
+    
+  def test_orient_reactions (self):
+    net = Network ()
+    for s in ["s1", "s2", "s3"]:
+      net.add_species (s, "species " + s)
+    r = net.add_reaction ("r1", "reaction 1")
+    r.add_input (net.species["s1"])
+    r.add_output (net.species["s2"])
+    r = net.add_reaction ("r2", "reaction 2")
+    r.add_input (net.species["s2"])
+    r.add_output (net.species["s3"])
+    r = net.add_reaction ("r3", "reaction 3")
+    r.reversible = False
+    r.add_input (net.species["s3"])
+    r.add_output (net.species["s1"])
+    
+    # r1 runs backwards, r2 does not carry any flux, r3 is irreversible anyway
+    self.assertEqual (net.orient_reactions (array ("d", [-2, 1e-12, -1]), 1e-9), 1)
+    self.assertFalse (net.reactions["r1"].reversible)
+    self.assertEqual (net.reactions["r1"].consumed, ["s2"])
+    self.assertEqual (net.reactions["r1"].produced, ["s1"])
+    self.assertTrue (net.reactions["r2"].reversible)
+    self.assertEqual (net.reactions["r2"].consumed, ["s2"])
+    self.assertFalse (net.reactions["r3"].reversible)
+    self.assertEqual (net.reactions["r3"].consumed, ["s3"])
+    
+    net.calc_reaction_net ()
+    # r1 only consumes s2 now, which is only produced by r2
+    self.assertEqual (sorted (l.identifier for l in net.reactions["r1"].links), ["r2"])
+    self.assertEqual (sorted (l.identifier for l in net.reactions["r2"].links), ["r2"])
+    self.assertEqual (sorted (l.identifier for l in net.reactions["r3"].links), ["r2"])
+    
+    # unknown fluxes do not change anything
+    self.assertEqual (net.orient_reactions (array ("d", [math.nan, math.nan, math.nan])), 0)
+    self.assertTrue (net.reactions["r2"].reversible)
+  
+  def test_consistency (self):
+    net = Network ()
+    for s in ["s1", "s2", "s3"]:
+      net.add_species (s, "species " + s)
+    r = net.add_reaction ("r1", "reaction 1")
+    r.add_input (net.species["s1"])
+    r.add_output (net.species["s2"])
+    ab = GeneComplex (Gene ("a"))
+    ab.add_gene (Gene ("b"))
+    net.add_genes (r, [Gene ("a"), ab])
+    r = net.add_reaction ("r2", "reaction 2")
+    r.add_input (net.species["s2"])
+    r.add_output (net.species["s3"])
+    abc = GeneComplex (Gene ("a"))
+    abc.add_gene (Gene ("b"))
+    abc.add_gene (Gene ("c"))
+    net.add_genes (r, [abc])
+    r = net.add_reaction ("r3", "reaction 3")
+    r.add_input (net.species["s3"])
+    
+    c = Consistency (net)
+    # reactions without enzymes are never catalyzed
+    self.assertEqual (c.get_inconsistent ()["reactions"], {"r3": {"uncatalyzed": True}})
+    self.assertEqual (c.get_counts (), {"species": 0, "reactions": 1, "enzs": 0, "enzc": 0})
+    self.assertEqual (c.supercomplexes, [[1], []])
+    
+    revision = c.revision
+    delta = c.update (species = ["s1", "unknown"])
+    self.assertNotEqual (c.revision, revision)
+    self.assertEqual (delta["reactions"], {"r1": {"consumed_removed": True}})
+    self.assertEqual (delta["species"], {})
+    
+    delta = c.update (reactions = ["r1"])
+    # r1 is removed, so it is consistent again, but s1 is removed as well
+    self.assertEqual (delta["reactions"], {"r1": {}})
+    self.assertEqual (delta["species"], {})
+    self.assertEqual (delta["enzc"], {"a + b": {"unused": True}})
+    
+    # the reaction is still catalyzed by the complex, which however became inconsistent
+    delta = c.update (enzymes = ["c"])
+    self.assertEqual (delta["reactions"], {})
+    self.assertEqual (delta["enzc"], {"a + b + c": {"enzymes_removed": True}})
+    
+    delta = c.update (enzymes = [], enzyme_complexes = ["a + b"])
+    self.assertEqual (delta["enzc"], {"a + b": {}, "a + b + c": {"subcomplexes_removed": ["a + b"]}})
+    
+    delta = c.update (species = [], reactions = ["r1", "r2", "r3"])
+    self.assertEqual (delta["species"], {"s1": {"ghost": True}, "s2": {"ghost": True}, "s3": {"ghost": True}})
+    self.assertEqual (delta["enzc"], {"a + b + c": {"unused": True, "subcomplexes_removed": ["a + b"]}})
+    # the enzymes are still part of a complex
+    self.assertEqual (delta["enzs"], {})
+    
+    # the incremental updates end up in the same state as a fresh check
+    fresh = Consistency (net)
+    fresh.update (species = [], reactions = ["r1", "r2", "r3"], enzymes = [], enzyme_complexes = ["a + b"])
+    self.assertEqual (c.get_inconsistent (), fresh.get_inconsistent ())
+    self.assertEqual (c.get_counts (), fresh.get_counts ())
+    
+    c.update ([], [], [], [])
+    self.assertEqual (c.get_inconsistent (), Consistency (net).get_inconsistent ())
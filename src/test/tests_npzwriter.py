@@ -0,0 +1,157 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+#
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import ast
+import csv
+import io
+import math
+import os
+import sys
+import tempfile
+import zipfile
+from array import array
+
+from django.test import TestCase
+
+from modules.gemtractor.gemtractor import GEMtractor
+from modules.gemtractor.network.network import Network
+from modules.gemtractor.network.npzwriter import NpzWriter
+
+
+def read_npz (file_path):
+  """
+  read an .npz archive without NumPy, supports the types written by the NpzWriter
+  """
+  typecodes = {"|u1": "B", "<u4": Network.UINT32, "<i4": "i", "<i8": "q", "<f8": "d"}
+  arrays = {}
+  with zipfile.ZipFile (file_path) as archive:
+    for name in archive.namelist ():
+      data = archive.read (name)
+      assert data[:8] == NpzWriter.MAGIC
+      length = int.from_bytes (data[8:10], "little")
+      assert (10 + length) % NpzWriter.ALIGNMENT == 0
+      header = ast.literal_eval (data[10:10 + length].decode ("latin1"))
+      assert not header["fortran_order"]
+      data = data[10 + length:]
+      if header["descr"].startswith ("|S"):
+        assert header["shape"] == ()
+        arrays[name[:-4]] = data.rstrip (b"\0")
+        continue
+      if header["descr"].startswith ("<U"):
+        size = 4 * int (header["descr"][2:])
+        values = [data[n:n + size].decode ("utf-32-le").rstrip ("\0") for n in range (0, len (data), size)]
+      else:
+        values = array (typecodes[header["descr"]])
+        values.frombytes (data)
+        if sys.byteorder != "little":
+          values.byteswap ()
+      assert header["shape"] == (len (values),)
+      arrays[name[:-4]] = values
+  return arrays
+
+
+class NpzWriterTests (TestCase):
+  def test_writer (self):
+    d = tempfile.TemporaryDirectory()
+    f = os.path.join (d.name, "export.npz")
+    with NpzWriter (f) as writer:
+      writer.write ("ids", ["a", "bÄÖ", ""])
+      writer.write ("empty", [])
+      writer.write ("uint", array (Network.UINT32, [0, 1, 2 ** 32 - 1]))
+      writer.write ("bytes", array ("B", [0, 255]))
+      writer.write ("double", array ("d", [0.5, -1e300]))
+      writer.write ("long", array ("q", [-1]))
+      writer.write ("format", b"coo")
+    arrays = read_npz (f)
+    self.assertEqual (arrays["ids"], ["a", "bÄÖ", ""])
+    self.assertEqual (arrays["empty"], [])
+    self.assertEqual (list (arrays["uint"]), [0, 1, 2 ** 32 - 1])
+    self.assertEqual (list (arrays["bytes"]), [0, 255])
+    self.assertEqual (list (arrays["double"]), [0.5, -1e300])
+    self.assertEqual (list (arrays["long"]), [-1])
+    self.assertEqual (arrays["format"], b"coo")
+
+    # streams are fine as well
+    stream = io.BytesIO ()
+    with NpzWriter (stream) as writer:
+      writer.write ("ids", ["a"])
+    self.assertFalse (stream.closed)
+    self.assertEqual (read_npz (stream)["ids"], ["a"])
+
+  def test_network_export (self):
+    d = tempfile.TemporaryDirectory()
+    f = os.path.join (d.name, "export")
+
+    gemtractor = GEMtractor ("test/gene-filter-example.xml")
+    gemtractor.get_sbml ()
+    network = gemtractor.extract_network_from_sbml ()
+
+    for network_type, prefixes in [("mn", ["s", "r"]), ("rn", [""]), ("en", ["", ""])]:
+      getattr (network, "export_" + network_type + "_npz") (f)
+      arrays = read_npz (f)
+      self.assertEqual (sorted (arrays), ["ids", "indices", "indptr", "names", "type_names", "types"])
+      self.assertEqual (len (arrays["ids"]), len (arrays["names"]))
+      self.assertEqual (len (arrays["ids"]), len (arrays["types"]))
+      self.assertEqual (len (arrays["ids"]) + 1, len (arrays["indptr"]))
+      self.assertEqual (arrays["indptr"][-1], len (arrays["indices"]))
+      self.assertEqual (len (arrays["type_names"]), len (prefixes))
+
+      # the same edges as in the CSV export
+      ids = [prefixes[t] + i for i, t in zip (arrays["ids"], arrays["types"])]
+      edges = []
+      for n in range (len (ids)):
+        targets = list (arrays["indices"][arrays["indptr"][n]:arrays["indptr"][n + 1]])
+        self.assertEqual (targets, sorted (targets))
+        edges.extend ((ids[n], ids[t]) for t in targets)
+      getattr (network, "export_" + network_type + "_csv") (f)
+      with open (f) as export:
+        rows = list (csv.reader (export))
+      self.assertGreater (len (edges), 1, msg="empty " + network_type)
+      self.assertEqual (sorted (edges), sorted (tuple (row) for row in rows[1:]))
+
+    network.export_mn_npz (f)
+    arrays = read_npz (f)
+    self.assertEqual (arrays["type_names"], ["species", "reaction"])
+    self.assertEqual (arrays["ids"][:len (network.species)], list (network.species))
+    self.assertEqual (arrays["names"][len (network.species)], network.reactions[arrays["ids"][len (network.species)]].name)
+
+  def test_stoichiometric_matrix (self):
+    d = tempfile.TemporaryDirectory()
+    f = os.path.join (d.name, "export")
+
+    gemtractor = GEMtractor ("test/fbc-bounds-example.xml")
+    gemtractor.get_sbml (filter_reactions = ["r3"])
+    gemtractor.export_stoichiometric_matrix (f)
+    arrays = read_npz (f)
+    self.assertEqual (arrays["format"], b"coo")
+    self.assertEqual (list (arrays["shape"]), [4, 3])
+    self.assertEqual (arrays["species"], ["a", "b", "c", "d"])
+    self.assertEqual (arrays["reactions"], ["r1", "r2", "r4"])
+    matrix = {(arrays["species"][r], arrays["reactions"][c]): v for r, c, v in zip (arrays["row"], arrays["col"], arrays["data"])}
+    self.assertEqual (matrix, {("a", "r1"): -1, ("b", "r1"): 1, ("c", "r2"): -1, ("b", "r2"): 1, ("d", "r4"): -1, ("a", "r4"): 1})
+    self.assertEqual (list (arrays["lower_bound"]), [0, -1000, -1000])
+    self.assertEqual (list (arrays["upper_bound"]), [1000, 0, 1000])
+
+    # no bounds: reversible reactions are unbounded, irreversible ones are bounded by zero
+    gemtractor = GEMtractor ("test/gene-filter-example.xml")
+    gemtractor.get_sbml ()
+    gemtractor.export_stoichiometric_matrix (f)
+    arrays = read_npz (f)
+    self.assertEqual (len (arrays["row"]), len (arrays["data"]))
+    self.assertEqual (len (arrays["col"]), len (arrays["data"]))
+    self.assertGreater (len (arrays["data"]), 1)
+    self.assertTrue (all (u == math.inf for u in arrays["upper_bound"]))
+    self.assertTrue (all (l in [0, -math.inf] for l in arrays["lower_bound"]))
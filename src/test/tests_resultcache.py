@@ -0,0 +1,93 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+#
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import time
+
+from django.test import TestCase
+
+from modules.gemtractor.resultcache import ResultCache
+
+
+class ResultCacheTests (TestCase):
+  def test_keys (self):
+    self.assertEqual (ResultCache.get_key ({"a": 1, "b": [1, 2]}), ResultCache.get_key ({"b": [1, 2], "a": 1}))
+    self.assertNotEqual (ResultCache.get_key ({"a": 1, "b": [1, 2]}), ResultCache.get_key ({"a": 1, "b": [2, 1]}))
+    self.assertNotEqual (ResultCache.get_key ({"a": 1}), ResultCache.get_key ({"a": "1"}))
+    self.assertEqual (len (ResultCache.get_key (None)), 64)
+
+  def test_cache (self):
+    d = tempfile.TemporaryDirectory()
+    cache = ResultCache (os.path.join (d.name, "results"), 10)
+    self.assertIsNone (cache.get ("a"))
+    self.assertEqual (cache.get_stats (), {"hits": 0, "misses": 1, "nfiles": 0, "size": 0, "max_size": 10})
+
+    result = os.path.join (d.name, "result")
+    with open (result, "w") as f:
+      f.write ("1234")
+    cache.put ("a", result)
+    with cache.get ("a") as f:
+      self.assertEqual (f.read (), b"1234")
+
+    # results are only stored if the stream is complete
+    chunks = cache.tee ("b", ["56", b"78"])
+    self.assertEqual (next (chunks), "56")
+    chunks.close ()
+    self.assertIsNone (cache.get ("b"))
+    self.assertEqual (list (cache.tee ("b", ["56", b"78"])), ["56", b"78"])
+    with cache.get ("b") as f:
+      self.assertEqual (f.read (), b"5678")
+    self.assertEqual (cache.get_stats (), {"hits": 2, "misses": 2, "nfiles": 2, "size": 8, "max_size": 10})
+
+    # the least recently used result is evicted, but it can still be read if it was opened before
+    opened = cache.get ("a")
+    os.utime (os.path.join (cache.directory, "a"), (0, 0))
+    cache.put ("c", result)
+    self.assertIsNone (cache.get ("a"))
+    with opened:
+      self.assertEqual (opened.read (), b"1234")
+    for key in ["b", "c"]:
+      with cache.get (key) as f:
+        self.assertEqual (len (f.read ()), 4)
+    self.assertEqual (cache.get_stats ()["size"], 8)
+    self.assertEqual (sorted (os.listdir (cache.directory)), ["b", "c"])
+
+    # temporary files of abandoned results are removed once they are stale
+    chunks = cache.tee ("e", ["1"])
+    next (chunks)
+    temporary = [name for name in os.listdir (cache.directory) if name.startswith (".")]
+    self.assertEqual (len (temporary), 1)
+    cache.evict ()
+    self.assertTrue (os.path.exists (os.path.join (cache.directory, temporary[0])))
+    stale = time.time () - ResultCache.STALE - 1
+    os.utime (os.path.join (cache.directory, temporary[0]), (stale, stale))
+    cache.evict ()
+    self.assertFalse (os.path.exists (os.path.join (cache.directory, temporary[0])))
+    chunks.close ()
+    
+    # results that are larger than the cache are not kept
+    with open (result, "w") as f:
+      f.write ("x" * 11)
+    cache.put ("d", result)
+    self.assertEqual (cache.get_stats ()["nfiles"], 0)
+
+    disabled = ResultCache (os.path.join (d.name, "disabled"), 0)
+    self.assertFalse (disabled.is_enabled ())
+    self.assertIsNone (disabled.put ("a", result))
+    self.assertEqual (list (disabled.tee ("a", ["1"])), ["1"])
+    self.assertIsNone (disabled.get ("a"))
+    self.assertFalse (os.path.exists (disabled.directory))
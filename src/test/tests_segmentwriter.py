@@ -0,0 +1,103 @@
+# This file is part of the GEMtractor
+# Copyright (C) 2019 Martin Scharm <https://binfalse.de>
+#
+# The GEMtractor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# The GEMtractor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import TestCase
+
+from modules.gemtractor.gemtractor import GEMtractor
+from modules.gemtractor.network.exportwriter import ExportWriter
+from modules.gemtractor.network import segmentwriter
+from modules.gemtractor.network.segmentwriter import SegmentWriter
+
+
+def read (file_path):
+  with open (file_path, "rb") as f:
+    return f.read ()
+
+
+class SegmentWriterTests (TestCase):
+  def test_writer (self):
+    d = tempfile.TemporaryDirectory()
+    serial = os.path.join (d.name, "serial")
+    parallel = os.path.join (d.name, "parallel")
+    adjacency = [("n" + str (n), ["n" + str (t) for t in range (n % 7)]) for n in range (100)]
+
+    writer = SegmentWriter (parallel, 3, segment_edges = 10)
+    segments = writer.get_segments (adjacency)
+    self.assertEqual (segments[0][0], 0)
+    self.assertEqual (segments[-1][1], len (adjacency))
+    for previous, segment in zip (segments, segments[1:]):
+      self.assertEqual (previous[1], segment[0])
+      self.assertEqual (segment[2] - previous[2], sum (len (targets) for source, targets in adjacency[previous[0]:previous[1]]))
+    self.assertEqual (writer.get_segments ([]), [])
+
+    for template, numbered in [(ExportWriter.CSV_EDGE, False), (ExportWriter.GRAPHML_EDGE, True)]:
+      with ExportWriter (serial) as w:
+        w.write ("head ä\n")
+        num = 1
+        for source, targets in adjacency:
+          if numbered:
+            num = w.write_numbered_edges_from (template, num, source, targets)
+          else:
+            w.write_edges_from (template, source, targets)
+        w.write ("tail\n")
+      writer.write ("head ä\n", template, adjacency, "tail\n", numbered)
+      self.assertEqual (read (serial), read (parallel))
+    self.assertEqual (sorted (os.listdir (d.name)), ["parallel", "serial"])
+
+    self.assertTrue (SegmentWriter.is_applicable (parallel, 2))
+    self.assertFalse (SegmentWriter.is_applicable (parallel, 1))
+    self.assertFalse (SegmentWriter.is_applicable (parallel, None))
+    self.assertFalse (SegmentWriter.is_applicable (io.StringIO (), 2))
+    # other threads must not fork
+    with ThreadPoolExecutor (1) as pool:
+      self.assertFalse (pool.submit (SegmentWriter.is_applicable, parallel, 2).result ())
+    self.assertEqual (segmentwriter._ADJACENCIES, {})
+
+  def test_network_export (self):
+    d = tempfile.TemporaryDirectory()
+    serial = os.path.join (d.name, "serial")
+    parallel = os.path.join (d.name, "parallel")
+
+    gemtractor = GEMtractor ("test/gene-filter-example.xml")
+    gemtractor.get_sbml ()
+    network = gemtractor.extract_network_from_sbml ()
+
+    min_edges = SegmentWriter.MIN_EDGES
+    segment_edges = SegmentWriter.SEGMENT_EDGES
+    try:
+      SegmentWriter.MIN_EDGES = 0
+      SegmentWriter.SEGMENT_EDGES = 2
+      for network_type in ["en", "rn"]:
+        for network_format in ["dot", "gml", "graphml", "csv"]:
+          export = getattr (network, "export_" + network_type + "_" + network_format)
+          export (serial)
+          export (parallel, 2)
+          self.assertGreater (os.path.getsize (serial), len (ExportWriter.CSV_PREFIX), msg="empty " + network_type + " " + network_format)
+          self.assertEqual (read (serial), read (parallel), msg="different " + network_type + " " + network_format)
+          # exports of other threads are written serially
+          with ThreadPoolExecutor (2) as pool:
+            for job in [pool.submit (export, parallel + str (n), 2) for n in range (2)]:
+              job.result ()
+          for n in range (2):
+            self.assertEqual (read (serial), read (parallel + str (n)), msg="different " + network_type + " " + network_format)
+    finally:
+      SegmentWriter.MIN_EDGES = min_edges
+      SegmentWriter.SEGMENT_EDGES = segment_edges
@@ -15,13 +15,22 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 
+import gzip
+import hashlib
+import json
 import os
 import re
 import tempfile
+import unittest
+import zipfile
+import zlib
 
 from django.test import TestCase
 from libsbml import SBMLReader
 
+from modules.gemtractor.constants import Constants
+from modules.gemtractor.exceptions import TooBigForServer, UnsupportedCompression
+from modules.gemtractor import utils
 from modules.gemtractor.utils import Utils
 
 
@@ -137,3 +146,183 @@ class UtilsTests (TestCase):
     self.__test_model_notes (self.__get_sbml_model (), ["S1", "S2"], None, None, None, True, False, False, True, True)
     self.__test_model_notes (self.__get_sbml_model (), None, None, ["S1", "S2"], None, True, True, False, True, True)
     self.__test_model_notes (self.__get_sbml_model (), None, None, None, ["S1", "S2"], False, False, True, True, True)
+  
+  def test_iter_json (self):
+    obj = {"a": [1, 2, {"b": None}], "c": "d", "e": {"f": (x for x in range (5))}, "g": []}
+    expected = {"a": [1, 2, {"b": None}], "c": "d", "e": {"f": [0, 1, 2, 3, 4]}, "g": []}
+    self.assertEqual (json.loads ("".join (Utils.iter_json (obj, batch_size = 2))), expected)
+    
+    obj = ((n, str (n)) for n in range (10))
+    self.assertEqual (json.loads ("".join (Utils.iter_json (obj, batch_size = 3))), [[n, str (n)] for n in range (10)])
+    
+    obj = [(x for x in range (3)), 1, (x for x in [])]
+    self.assertEqual (json.loads ("".join (Utils.iter_json (obj))), [[0, 1, 2], 1, []])
+  
+  def test_gzip_stream (self):
+    chunks = ["some", b" text ", "ÄÖÜ"] * 100
+    self.assertEqual (gzip.decompress (b"".join (Utils.gzip_stream (chunks))).decode ("utf-8"), "some text ÄÖÜ" * 100)
+    self.assertEqual (gzip.decompress (b"".join (Utils.gzip_stream ([]))), b"")
+  
+  def test_zip_stream (self):
+    chunks = ["some", b" text ", "ÄÖÜ"] * 100
+    f = tempfile.NamedTemporaryFile (suffix = ".zip")
+    f.write (b"".join (Utils.zip_stream (chunks, "file.txt")))
+    f.flush ()
+    with zipfile.ZipFile (f.name) as archive:
+      self.assertEqual (archive.namelist (), ["file.txt"])
+      self.assertEqual (archive.read ("file.txt").decode ("utf-8"), "some text ÄÖÜ" * 100)
+  
+  def test_serve_file (self):
+    with tempfile.TemporaryDirectory() as d:
+      f = os.path.join (d, "GENERATED", "some file")
+      Utils._create_dir (os.path.dirname (f))
+      with open (f, "w") as fp:
+        fp.write ("some content")
+      
+      with self.settings (STORAGE = d, ACCEL_REDIRECT = ""):
+        self.assertIsNone (Utils.get_accel_redirect (f))
+        response = Utils.serve_file (f, "name.txt", "text/plain")
+        self.assertEqual (b"".join (response.streaming_content), b"some content")
+        self.assertEqual (response["Content-Disposition"], "attachment; filename=name.txt")
+        self.assertFalse (response.has_header ("X-Accel-Redirect"))
+      
+      with self.settings (STORAGE = d, ACCEL_REDIRECT = "/protected-storage/"):
+        self.assertEqual (Utils.get_accel_redirect (f), "/protected-storage/GENERATED/some%20file")
+        response = Utils.serve_file (f, "name.txt", "text/plain")
+        self.assertEqual (response.content, b"")
+        self.assertEqual (response["X-Accel-Redirect"], "/protected-storage/GENERATED/some%20file")
+        self.assertEqual (response["Content-Type"], "text/plain")
+        self.assertEqual (response["Content-Disposition"], "attachment; filename=name.txt")
+        
+        # files outside the storage cannot be redirected
+        with tempfile.NamedTemporaryFile () as other:
+          self.assertIsNone (Utils.get_accel_redirect (other.name))
+          response = Utils.serve_file (other.name, "name.txt", "text/plain")
+          self.assertFalse (response.has_header ("X-Accel-Redirect"))
+        self.assertIsNone (Utils.get_accel_redirect (os.path.join (d, "..", "etc", "passwd")))
+  
+  def test_get_file_hash (self):
+    session = {}
+    with tempfile.TemporaryDirectory() as d:
+      f = os.path.join (d, "file")
+      self.assertEqual (Utils.get_file_hash (session, f), "")
+      with open (f, "w") as fp:
+        fp.write ("some content")
+      h = Utils.get_file_hash (session, f)
+      self.assertEqual (h, "290f493c44f5d63d06b374d0a5abd292fae38b92cab2fae5efefe1b0e9347f56")
+      self.assertEqual (session[Constants.SESSION_FINGERPRINTS][f][2], h)
+      
+      # the remembered hash is used as long as the file does not change
+      session[Constants.SESSION_FINGERPRINTS][f][2] = "remembered"
+      self.assertEqual (Utils.get_file_hash (session, f), "remembered")
+      
+      with open (f, "w") as fp:
+        fp.write ("some other content")
+      self.assertNotEqual (Utils.get_file_hash (session, f), "remembered")
+      
+      os.remove (f)
+      self.assertEqual (Utils.get_file_hash (session, f), "")
+      self.assertFalse (f in session[Constants.SESSION_FINGERPRINTS])
+      
+      # uploads are named after their hash
+      with self.settings(STORAGE=d):
+        model_hash = Utils.store_upload ("session", [b"some content"])
+        self.assertEqual (Utils.get_file_hash (session, Utils.get_upload_path (model_hash)), h)
+        self.assertFalse (Utils.get_upload_path (model_hash) in session[Constants.SESSION_FINGERPRINTS])
+        os.remove (Utils.get_upload_path (model_hash))
+        self.assertEqual (Utils.get_file_hash (session, Utils.get_upload_path (model_hash)), "")
+  
+  def test_store_upload (self):
+    d = tempfile.TemporaryDirectory()
+    with self.settings(STORAGE=d.name, KEEP_UPLOADED=60*60):
+      model_hash = Utils.store_upload ("session1", [b"some ", b"model"])
+      self.assertEqual (model_hash, hashlib.sha256 (b"some model").hexdigest ())
+      self.assertTrue (Utils.is_upload_hash (model_hash))
+      path = Utils.get_model_path (Constants.SESSION_MODEL_TYPE_UPLOAD, model_hash, "session1")
+      with open (path) as f:
+        self.assertEqual (f.read (), "some model")
+      
+      # the same model is stored only once
+      self.assertEqual (Utils.store_upload ("session2", [b"some model"]), model_hash)
+      other_hash = Utils.store_upload ("session3", [b"other model"])
+      self.assertNotEqual (other_hash, model_hash)
+      upload_dir = os.path.join (d.name, Constants.STORAGE_UPLOAD_DIR)
+      self.assertEqual (sorted (os.listdir (upload_dir)), sorted ([model_hash, other_hash, Constants.STORAGE_UPLOAD_SESSIONS_DIR]))
+      
+      # models are kept as long as a session references them
+      os.utime (path, (0, 0))
+      Utils.release_upload ("session1")
+      Utils.release_upload ("session3")
+      self.assertFalse (os.path.isfile (Utils.get_upload_reference_path ("session3")))
+      # released models are only removed by the cleanup, after the grace period
+      self.assertTrue (os.path.isfile (Utils.get_upload_path (other_hash)))
+      Utils.cleanup ()
+      self.assertTrue (os.path.isfile (path))
+      self.assertTrue (os.path.isfile (Utils.get_upload_path (other_hash)))
+      os.utime (Utils.get_upload_path (other_hash), (0, 0))
+      Utils.cleanup ()
+      self.assertTrue (os.path.isfile (path))
+      self.assertFalse (os.path.isfile (Utils.get_upload_path (other_hash)))
+      
+      # references that were not used expire
+      Utils.store_upload ("session3", [b"other model"])
+      os.utime (Utils.get_upload_reference_path ("session2"), (0, 0))
+      Utils.touch_upload ("session3")
+      Utils.cleanup ()
+      self.assertFalse (os.path.isfile (Utils.get_upload_reference_path ("session2")))
+      self.assertFalse (os.path.isfile (path))
+      self.assertTrue (os.path.isfile (Utils.get_upload_path (other_hash)))
+      
+      # recent uploads are kept, even if they are not referenced yet
+      os.remove (Utils.get_upload_reference_path ("session3"))
+      Utils.cleanup ()
+      self.assertTrue (os.path.isfile (Utils.get_upload_path (other_hash)))
+      
+      # other files expire as before
+      with open (Utils.get_upload_path ("session3") + "-fb-results", "w") as f:
+        f.write ("fluxes")
+      Utils.cleanup ()
+      self.assertTrue (os.path.isfile (Utils.get_upload_path ("session3") + "-fb-results"))
+      os.utime (Utils.get_upload_path ("session3") + "-fb-results", (0, 0))
+      Utils.cleanup ()
+      self.assertFalse (os.path.isfile (Utils.get_upload_path ("session3") + "-fb-results"))
+  
+  def test_stream (self):
+    d = tempfile.TemporaryDirectory()
+    f = os.path.join (d.name, "stream")
+    content = b"<sbml>" + b"x" * 100000 + b"</sbml>"
+    
+    self.assertEqual (Utils.store_stream ([content[:10], content[10:].decode ("utf-8")], f), hashlib.sha256 (content).hexdigest ())
+    with open (f, "rb") as stream:
+      self.assertEqual (stream.read (), content)
+    with self.assertRaises (TooBigForServer):
+      Utils.store_stream ([content], f, 1000)
+    
+    # uncompressed streams are passed through, compressed streams are detected by their first bytes
+    self.assertEqual (b"".join (Utils.decompress_stream ([b"<s", b"bml>", b"", b"</sbml>"])), b"<sbml></sbml>")
+    self.assertEqual (list (Utils.decompress_stream ([])), [])
+    compressed = gzip.compress (content)
+    chunks = [compressed[i:i + 7] for i in range (0, len (compressed), 7)]
+    self.assertEqual (b"".join (Utils.decompress_stream (chunks)), content)
+    # blocks are limited in size and multi-member gzip files are supported
+    blocks = list (Utils.decompress_stream ([compressed + gzip.compress (b"more")], 1000))
+    self.assertEqual (b"".join (blocks), content + b"more")
+    self.assertTrue (all (len (block) <= 1000 for block in blocks))
+    with self.assertRaises (zlib.error):
+      list (Utils.decompress_stream ([compressed[:len (compressed) // 2]]))
+  
+  @unittest.skipIf (utils.zstandard is None, "zstandard is not installed")
+  def test_stream_zstd (self):
+    content = b"<sbml>" + b"x" * 100000 + b"</sbml>"
+    compressed = utils.zstandard.ZstdCompressor ().compress (content)
+    chunks = [compressed[i:i + 7] for i in range (0, len (compressed), 7)]
+    self.assertEqual (b"".join (Utils.decompress_stream (chunks)), content)
+    # blocks are limited in size and streams of several frames are supported
+    blocks = list (Utils.decompress_stream ([compressed + utils.zstandard.ZstdCompressor ().compress (b"more")], 1000))
+    self.assertEqual (b"".join (blocks), content + b"more")
+    self.assertTrue (all (len (block) <= 1000 for block in blocks))
+  
+  @unittest.skipUnless (utils.zstandard is None, "zstandard is installed")
+  def test_stream_zstd_unsupported (self):
+    with self.assertRaises (UnsupportedCompression):
+      list (Utils.decompress_stream ([Utils.ZSTD_MAGIC + b"\x00\x00"]))